@@ -2,36 +2,10 @@
 Cost calculation utilities for Databricks cloud calculator
 """
 
-# Cost constants (AWS only)
-COSTS = {
-    "S3": {
-        "Standard": 0.023,
-        "Intelligent-Tiering": 0.022,
-        "Standard-IA": 0.0125,
-        "OneZone-IA": 0.01,
-        "Glacier": 0.004,
-        "GlacierDeep": 0.00099
-    },
-    "EC2": {
-        "i3.xlarge": 0.312,
-        "i3.2xlarge": 0.624,
-        "i3.4xlarge": 1.248,
-        "i3.8xlarge": 2.496,
-        "i3.16xlarge": 4.992,
-        "r5.xlarge": 0.252,
-        "r5.2xlarge": 0.504,
-        "r5.4xlarge": 1.008,
-        "r5.8xlarge": 2.016,
-        "r5.12xlarge": 3.024
-    },
-    "DBU": {
-        "Enterprise": 0.75,
-        "DLT_Advanced": 0.36,
-        "DLT_Core": 0.20,
-        "DLT_Pro": 0.25,
-        "Jobs": 0.15
-    }
-}
+from utils.rate_catalog import get_rate_catalog
+
+# Read-only {service: {sku: rate}} view of the shared rate catalog
+COSTS = get_rate_catalog().costs
 
 # Default compute configuration
 DEFAULT_COMPUTE = {
@@ -1,5 +1,10 @@
-import streamlit as st
 import os
+import sys
 
-# Redirect to home.py
-os.system("streamlit run home.py --server.port 5000")
\ No newline at end of file
+# Run from anywhere: utils/ lives next to this folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.launcher import main  # noqa: E402
+
+# Pre-warm and serve home.py (see utils/launcher.py for the options)
+sys.exit(main(["--port", "5000", *sys.argv[1:]]))
@@ -0,0 +1 @@
+# Benchmarks for the Databricks Cloud Cost Calculator
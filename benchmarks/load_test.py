@@ -0,0 +1,299 @@
+"""
+Load test for the Streamlit pages
+
+Drives scripted calculator sessions headlessly with
+streamlit.testing.v1.AppTest, several at a time in one process the way the
+server runs them, and reports:
+
+    latency      p50/p90/p99 seconds per rerun, per step and overall
+    throughput   reruns per second across all concurrent sessions
+    memory       bytes one session allocates (peak) and keeps alive
+                 (retained), measured with tracemalloc in a separate
+                 single-session pass so tracing does not skew latency
+
+A session opens the home page and the calculator, switches through the
+layers, adds RAW jobs through the Advanced mode form, loads the rest of a
+large job list (as opening a saved estimate does), reruns with the full
+list on screen and generates the Excel report.
+
+AppTest installs a process-wide runtime for every rerun, so sessions in
+one process cannot overlap; N concurrent sessions run in N worker
+processes, as behind a multi-worker deployment. Throughput is measured
+from the sessions' own start and end, so worker start-up is not counted.
+
+    python -m benchmarks.load_test --sessions 1 4 16 --jobs 1000
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOME_PAGE = os.path.join(ROOT_DIR, "home.py")
+CALCULATOR_PAGE = os.path.join(ROOT_DIR, "pages", "calculator.py")
+
+PERCENTILES = (50, 90, 99)
+DEFAULT_SESSIONS = (1, 4)
+DEFAULT_JOBS = 1000
+DEFAULT_FORM_JOBS = 10
+SCRIPT_TIMEOUT = 300
+
+
+def _widget(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"No widget labelled '{label}'")
+
+
+def _check(app):
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+
+
+def job_frame(count, seed=0):
+    """Return count random RAW jobs as a DataFrame"""
+    from utils.rate_catalog import get_rate_catalog
+
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "name": [f"load_job_{i}" for i in range(count)],
+        "instance_type": rng.choice(get_rate_catalog().options("EC2"), count),
+        "avg_duration": rng.integers(5, 120, count).astype(float),
+        "runs_per_month": rng.integers(1, 60, count),
+        "photon_enabled": rng.random(count) < 0.5
+    })
+
+
+def run_session(jobs=DEFAULT_JOBS, form_jobs=DEFAULT_FORM_JOBS, seed=0):
+    """
+    Run one scripted session
+
+    Returns:
+        tuple: (step, seconds) per rerun, and the calculator AppTest, which
+            holds the session's state
+    """
+    from streamlit.testing.v1 import AppTest
+
+    from utils.workload_registry import WorkloadRegistry
+
+    timings = []
+
+    def timed(step, action):
+        start = time.perf_counter()
+        action()
+        timings.append((step, time.perf_counter() - start))
+
+    home = AppTest.from_file(HOME_PAGE, default_timeout=SCRIPT_TIMEOUT)
+    timed("open_home", home.run)
+    _check(home)
+
+    app = AppTest.from_file(CALCULATOR_PAGE, default_timeout=SCRIPT_TIMEOUT)
+    timed("open_calculator", app.run)
+    _check(app)
+    for layer in ("RAW", "CONF", "PB", "Landing", "RAW"):
+        timed("switch_layer",
+              _widget(app.selectbox, "Select Layer to Configure").select(
+                  layer).run)
+        _check(app)
+
+    timed("advanced_mode", app.radio(key="raw_mode").set_value("Advanced").run)
+    _check(app)
+    frame = job_frame(jobs, seed)
+    form_jobs = min(form_jobs, jobs)
+    for job in frame.iloc[:form_jobs].itertuples(index=False):
+        _widget(app.text_input, "Job Name").input(job.name)
+        _widget(app.selectbox, "Instance Type").select(job.instance_type)
+        _widget(app.number_input,
+                "Average Duration (min)").set_value(int(job.avg_duration))
+        _widget(app.number_input,
+                "Runs per Physical Month").set_value(int(job.runs_per_month))
+        _widget(app.checkbox,
+                "Enable Photon Acceleration").set_value(bool(job.photon_enabled))
+        timed("add_job_form", _widget(app.button, "Add Job").click().run)
+        _check(app)
+
+    # The rest arrive in bulk, as when a saved estimate is opened
+    registry = app.session_state["raw_jobs"]
+    start = time.perf_counter()
+    registry.extend(frame.iloc[form_jobs:])
+    app.session_state["raw_jobs"] = registry
+    app.run()
+    timings.append(("load_jobs", time.perf_counter() - start))
+    _check(app)
+    assert isinstance(registry, WorkloadRegistry) and len(registry) == jobs
+
+    for _ in range(3):
+        timed("rerun_with_jobs", app.run)
+        _check(app)
+    _widget(app.radio, "Report Format").set_value("Excel")
+    timed("excel_report",
+          _widget(app.button, "Generate Excel Report").click().run)
+    _check(app)
+    if not app.get("download_button"):
+        raise RuntimeError("The Excel report was not generated")
+    return timings, app
+
+
+def summarize(timings, wall_seconds):
+    """
+    Latency percentiles per step and overall, plus throughput
+
+    Args:
+        timings (list): (step, seconds) of every rerun of every session
+        wall_seconds (float): Wall-clock time of the whole run
+
+    Returns:
+        dict: steps (step -> count and p<n> seconds), overall, reruns and
+            reruns_per_second
+    """
+    frame = pd.DataFrame(timings, columns=["step", "seconds"])
+
+    def bands(seconds):
+        return {
+            "count": int(len(seconds)),
+            **{
+                f"p{percentile}": float(value)
+                for percentile, value in zip(
+                    PERCENTILES, np.percentile(seconds, PERCENTILES))
+            }
+        }
+
+    return {
+        "steps": {
+            step: bands(group.to_numpy())
+            for step, group in frame.groupby("step", sort=False)["seconds"]
+        },
+        "overall": bands(frame["seconds"].to_numpy()),
+        "reruns": int(len(frame)),
+        "reruns_per_second": len(frame) / wall_seconds
+    }
+
+
+def _quiet_streamlit():
+    """Silence the warnings AppTest sessions log outside a server"""
+    from streamlit import config
+    from streamlit.logger import set_log_level
+
+    config.set_option("logger.level", "error")
+    set_log_level("error")
+
+
+def _timed_session(args):
+    """Worker process entry point: one session with its start and end"""
+    _quiet_streamlit()
+    start = time.time()
+    timings, _ = run_session(*args)
+    return start, time.time(), timings
+
+
+def run_level(sessions, jobs=DEFAULT_JOBS, form_jobs=DEFAULT_FORM_JOBS):
+    """Run `sessions` sessions concurrently and summarize them"""
+    with ProcessPoolExecutor(
+            max_workers=sessions,
+            mp_context=multiprocessing.get_context("spawn")) as pool:
+        results = list(
+            pool.map(_timed_session,
+                     [(jobs, form_jobs, seed) for seed in range(sessions)]))
+    wall_seconds = (max(end for _, end, _ in results) -
+                    min(start for start, _, _ in results))
+    summary = summarize(
+        [timing for _, _, timings in results for timing in timings],
+        wall_seconds)
+    return {"sessions": sessions, "wall_seconds": wall_seconds, **summary}
+
+
+def measure_session_memory(jobs=DEFAULT_JOBS, form_jobs=DEFAULT_FORM_JOBS):
+    """
+    Trace the memory of one session
+
+    Returns:
+        dict: peak_bytes allocated during the session and retained_bytes
+            still held once it finished (its session state and widgets)
+    """
+    # Warm up first, so imports and process-wide caches are not counted
+    run_session(jobs, form_jobs)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        _, app = run_session(jobs, form_jobs)
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        del app
+    finally:
+        tracemalloc.stop()
+    return {"peak_bytes": peak - baseline, "retained_bytes": retained - baseline}
+
+
+def _print_report(report):
+    for level in report["levels"]:
+        print(f"\n{level['sessions']} concurrent session(s): "
+              f"{level['reruns']} reruns in {level['wall_seconds']:.1f} s, "
+              f"{level['reruns_per_second']:.1f} reruns/s")
+        print(f"  {'step':<18}{'count':>7}" +
+              "".join(f"{f'p{p} (s)':>10}" for p in PERCENTILES))
+        for step, bands in [*level["steps"].items(),
+                            ("overall", level["overall"])]:
+            print(f"  {step:<18}{bands['count']:>7}" +
+                  "".join(f"{bands[f'p{p}']:>10.3f}" for p in PERCENTILES))
+    memory = report.get("memory")
+    if memory:
+        print(f"\nMemory per session: peak {memory['peak_bytes'] / 2**20:.1f} "
+              f"MiB, retained {memory['retained_bytes'] / 2**20:.1f} MiB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Load test the calculator with concurrent headless "
+        "sessions")
+    parser.add_argument("--sessions", type=int, nargs="+",
+                        default=list(DEFAULT_SESSIONS),
+                        help="Concurrency levels to run")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS,
+                        help="RAW jobs per session")
+    parser.add_argument("--form-jobs", type=int, default=DEFAULT_FORM_JOBS,
+                        help="Jobs added one at a time through the form")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip the traced single-session memory pass")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args(argv)
+
+    _quiet_streamlit()
+    # Keep the sessions' saved estimates out of the real store
+    os.environ.setdefault(
+        "COST_CALCULATOR_ESTIMATES",
+        os.path.join(tempfile.mkdtemp(prefix="load_test_"), "estimates.db"))
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
+    os.chdir(ROOT_DIR)
+
+    report = {
+        "cpus": os.cpu_count(),
+        "jobs": args.jobs,
+        "form_jobs": args.form_jobs,
+        "levels": [
+            run_level(sessions, args.jobs, args.form_jobs)
+            for sessions in args.sessions
+        ]
+    }
+    if not args.no_memory:
+        report["memory"] = measure_session_memory(args.jobs, args.form_jobs)
+    _print_report(report)
+    if args.json:
+        with open(args.json, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
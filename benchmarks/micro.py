@@ -0,0 +1,445 @@
+"""
+Micro-benchmarks for the calculator's pricing and aggregation stages
+
+Each stage is timed on its own across workload counts, pytest-benchmark
+style: a benchmark function builds its inputs, then hands the code under
+test to a `benchmark` timer that calibrates how many rounds to run and
+keeps the min/median/mean of them. The stages are
+
+    cost_formulas      utils.cost_formulas over one array per input
+    price_workloads    price_workloads_frame for every workload kind
+    layer_costs        the calculator's per-layer step: load the
+                       registries, total them and price all four layers
+    registry_add       adding workloads one at a time, as the forms do
+    process_cost_data  the chart frames built from all_costs
+    excel_export       report_sheets and the Excel report
+
+A size of N workloads is split evenly across the five workload kinds
+(tables, jobs, transforms, dashboards and reports). Stages that are slow
+per row stop at a smaller size unless --large is given.
+
+Every run is appended to a JSON history with the commit it ran on. Each
+result is compared with the same stage and size in the previous run, and
+medians slower by more than --threshold are flagged as regressions.
+
+    python -m benchmarks.micro --sizes 10 1000 100000 1000000
+    python -m benchmarks.micro --only layer_costs --fail-on-regression
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_HISTORY = os.path.join(ROOT_DIR, "benchmarks", "history.json")
+DEFAULT_SIZES = (10, 1_000, 100_000, 1_000_000)
+DEFAULT_THRESHOLD = 0.10
+MIN_TIME = 0.5
+MAX_ROUNDS = 1000
+
+KINDS = ("table", "job", "transform", "dashboard", "report")
+
+# Benchmark name -> (function, largest size run without --large)
+BENCHMARKS = {}
+
+
+def register(max_size=None):
+    """Register a benchmark function(benchmark, size) under its name"""
+
+    def decorator(function):
+        BENCHMARKS[function.__name__.replace("bench_", "", 1)] = (function,
+                                                                 max_size)
+        return function
+
+    return decorator
+
+
+class Benchmark:
+    """
+    Times a callable over calibrated rounds
+
+    Called as benchmark(function, *args): the first call is timed on its
+    own, then the call is repeated until min_time has passed or
+    max_rounds are done. Returns the function's last result.
+    """
+
+    def __init__(self, min_time=MIN_TIME, max_rounds=MAX_ROUNDS):
+        self.min_time = min_time
+        self.max_rounds = max_rounds
+        self.times = []
+
+    def __call__(self, function, *args, **kwargs):
+        started = time.perf_counter()
+        result = function(*args, **kwargs)
+        self.times = [time.perf_counter() - started]
+        rounds = min(self.max_rounds,
+                     math.ceil(self.min_time / max(self.times[0], 1e-9)))
+        for _ in range(rounds - 1):
+            started = time.perf_counter()
+            result = function(*args, **kwargs)
+            self.times.append(time.perf_counter() - started)
+        return result
+
+    def stats(self):
+        """Return min, median, mean and stddev seconds and the rounds run"""
+        return {
+            "min": min(self.times),
+            "median": statistics.median(self.times),
+            "mean": statistics.fmean(self.times),
+            "stddev": statistics.pstdev(self.times),
+            "rounds": len(self.times)
+        }
+
+
+def workload_frames(size, seed=0):
+    """
+    Return random workloads of every kind, size of them in all
+
+    Returns:
+        dict: Workload kind -> DataFrame of registry fields
+    """
+    from utils.pricing_engine import (ENGINE_TYPES, PB_COMPUTE_SIZES,
+                                      RETENTION_OPTIONS, SERVICE_TIERS)
+    from utils.rate_catalog import get_rate_catalog
+
+    rng = np.random.default_rng(seed)
+    frames = {}
+    for position, kind in enumerate(KINDS):
+        count = size // len(KINDS) + (position < size % len(KINDS))
+        columns = {"name": [f"bench_{kind}_{i}" for i in range(count)]}
+        if kind == "table":
+            columns.update(
+                avg_file_size=rng.uniform(0.1, 5.0, count),
+                files_per_day=rng.integers(1, 100, count),
+                retention=rng.choice(RETENTION_OPTIONS, count))
+        elif kind == "job":
+            columns.update(
+                instance_type=rng.choice(get_rate_catalog().options("EC2"),
+                                         count),
+                avg_duration=rng.uniform(5, 120, count),
+                runs_per_month=rng.integers(1, 60, count),
+                photon_enabled=rng.random(count) < 0.5)
+        elif kind == "transform":
+            columns.update(
+                service_tier=rng.choice(list(SERVICE_TIERS), count),
+                avg_duration=rng.uniform(5, 120, count),
+                runs_per_month=rng.integers(1, 60, count),
+                dbu_per_hour=rng.uniform(1, 8, count),
+                storage_gb=rng.uniform(1, 100, count),
+                photon_enabled=rng.random(count) < 0.5)
+        elif kind == "dashboard":
+            columns.update(
+                compute_size=rng.choice(list(PB_COMPUTE_SIZES), count),
+                active_users=rng.integers(1, 50, count),
+                queries_per_day=rng.integers(1, 50, count),
+                avg_query_duration=rng.uniform(0.5, 10, count),
+                photon_enabled=rng.random(count) < 0.5,
+                engine_type=rng.choice(ENGINE_TYPES, count))
+        else:
+            columns.update(
+                runs_per_month=rng.integers(1, 60, count),
+                gen_duration=rng.uniform(1, 30, count),
+                dbu_per_hour=rng.uniform(1, 8, count),
+                photon_enabled=rng.random(count) < 0.5,
+                engine_type=rng.choice(ENGINE_TYPES, count))
+        frames[kind] = pd.DataFrame(columns)
+    return frames
+
+
+def load_registries(frames):
+    """Return a WorkloadRegistry per kind, loaded from workload_frames()"""
+    from utils.workload_registry import WorkloadRegistry
+
+    registries = {}
+    for kind, frame in frames.items():
+        registries[kind] = WorkloadRegistry(kind)
+        registries[kind].extend(frame)
+    return registries
+
+
+def layer_costs(registries, engine_type=None):
+    """
+    Price every layer from its registries, as the calculator's Advanced
+    mode does
+
+    Returns:
+        dict: Layer -> costs, shaped like st.session_state.all_costs
+    """
+    from utils.pricing_engine import (ENGINE_TYPES, calculate_conf_cost,
+                                      calculate_landing_cost,
+                                      calculate_pb_cost, calculate_raw_cost)
+
+    engine_type = engine_type or ENGINE_TYPES[0]
+    return {
+        "Landing": calculate_landing_cost(
+            {
+                "mode": "Advanced",
+                "totals": registries["table"].totals()
+            }, "Standard"),
+        "RAW": calculate_raw_cost(
+            {
+                "mode": "Advanced",
+                "totals": registries["job"].totals(),
+                "estimated_tables": 10,
+                "avg_table_size": 50.0
+            }, "Standard"),
+        "CONF": calculate_conf_cost(
+            {
+                "mode": "Advanced",
+                "totals": registries["transform"].totals()
+            }, "Standard"),
+        "PB": calculate_pb_cost(
+            {
+                "mode": "Advanced",
+                "engine_type": engine_type,
+                "dashboard_totals": registries["dashboard"].totals(engine_type),
+                "report_totals": registries["report"].totals(engine_type),
+                "dashboard_storage_gb": 10.0,
+                "report_storage_gb": 50.0
+            }, "Standard")
+    }
+
+
+@register()
+def bench_cost_formulas(benchmark, size):
+    from utils.cost_formulas import (calculate_compute_cost,
+                                     calculate_dbu_cost,
+                                     calculate_photon_cost,
+                                     calculate_storage_cost)
+
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0.1, 10.0, (6, size))
+    enabled = rng.random(size) < 0.5
+
+    def formulas():
+        compute = calculate_compute_cost(values[0], values[1], values[2], 30)
+        dbu = calculate_dbu_cost(values[3], values[1], values[2], 30,
+                                 values[4])
+        return (calculate_storage_cost(values[5], 0.023),
+                calculate_photon_cost(compute + dbu, 0.2, enabled))
+
+    benchmark(formulas)
+
+
+@register()
+def bench_price_workloads(benchmark, size):
+    from utils.pricing_engine import price_workloads_frame
+
+    frames = workload_frames(size)
+    benchmark(lambda: [
+        price_workloads_frame(kind, frame) for kind, frame in frames.items()
+    ])
+
+
+@register()
+def bench_layer_costs(benchmark, size):
+    frames = workload_frames(size)
+    benchmark(lambda: layer_costs(load_registries(frames)))
+
+
+@register(max_size=1_000)
+def bench_registry_add(benchmark, size):
+    from utils.workload_registry import WorkloadRegistry
+
+    rows = {
+        kind: frame.to_dict("records")
+        for kind, frame in workload_frames(size).items()
+    }
+
+    def add_all():
+        for kind, items in rows.items():
+            registry = WorkloadRegistry(kind)
+            for item in items:
+                registry.add(item)
+
+    benchmark(add_all)
+
+
+@register()
+def bench_process_cost_data(benchmark, size):
+    from utils.cost_charts import process_cost_data
+
+    all_costs = layer_costs(load_registries(workload_frames(size)))
+    benchmark(process_cost_data, all_costs)
+
+
+@register(max_size=100_000)
+def bench_excel_export(benchmark, size):
+    from utils.estimate_store import SESSION_REGISTRIES
+    from utils.report_export import export_report, layer_total, report_sheets
+
+    registries = load_registries(workload_frames(size))
+    all_costs = layer_costs(registries)
+    session = {
+        key: registries[kind]
+        for key, kind in SESSION_REGISTRIES.items()
+    }
+    layers = list(all_costs)
+    total = sum(layer_total(costs) for costs in all_costs.values())
+
+    def export():
+        path, _, _ = export_report(
+            report_sheets(all_costs, layers, total, session), "Excel")
+        os.remove(path)
+
+    benchmark(export)
+
+
+def run_benchmarks(names, sizes, large=False, min_time=MIN_TIME):
+    """
+    Run benchmarks at every size they allow
+
+    Args:
+        names (list): Benchmark names (see BENCHMARKS)
+        sizes (list): Workload counts
+        large (bool): Also run sizes above a benchmark's max_size
+        min_time (float): Seconds to keep repeating each benchmark
+
+    Returns:
+        list: One dict per run with name, size and the Benchmark.stats()
+    """
+    results = []
+    for name in names:
+        function, max_size = BENCHMARKS[name]
+        for size in sizes:
+            if max_size is not None and size > max_size and not large:
+                continue
+            benchmark = Benchmark(min_time)
+            function(benchmark, size)
+            results.append({"name": name, "size": size, **benchmark.stats()})
+    return results
+
+
+def read_history(path):
+    try:
+        with open(path) as history_file:
+            return json.load(history_file)
+    except (OSError, ValueError):
+        return []
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              cwd=ROOT_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, history, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare results with the latest earlier run of each stage and size
+
+    Adds "baseline" (that run's median, or None), "change" (relative
+    change of the median) and "regression" to every result.
+
+    Returns:
+        list: The results that regressed by more than threshold
+    """
+    regressions = []
+    for result in results:
+        baseline = None
+        for run in reversed(history):
+            baseline = next((previous["median"] for previous in run["results"]
+                             if previous["name"] == result["name"] and
+                             previous["size"] == result["size"]), None)
+            if baseline is not None:
+                break
+        result["baseline"] = baseline
+        result["change"] = (result["median"] / baseline -
+                            1 if baseline else None)
+        result["regression"] = (result["change"] is not None and
+                                result["change"] > threshold)
+        if result["regression"]:
+            regressions.append(result)
+    return regressions
+
+
+def _seconds(value):
+    if value >= 1:
+        return f"{value:.2f} s"
+    if value >= 1e-3:
+        return f"{value * 1e3:.2f} ms"
+    return f"{value * 1e6:.1f} us"
+
+
+def _print_results(results, threshold):
+    print(f"{'benchmark':<20}{'size':>10}{'min':>12}{'median':>12}"
+          f"{'rounds':>8}{'change':>10}")
+    for result in results:
+        change = ("" if result["change"] is None else
+                  f"{result['change']:+.1%}")
+        flag = "  REGRESSION" if result["regression"] else ""
+        print(f"{result['name']:<20}{result['size']:>10,}"
+              f"{_seconds(result['min']):>12}"
+              f"{_seconds(result['median']):>12}{result['rounds']:>8}"
+              f"{change:>10}{flag}")
+    regressions = sum(result["regression"] for result in results)
+    if regressions:
+        print(f"\n{regressions} regression(s) above {threshold:.0%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time the calculator's pricing and aggregation stages "
+        "and track them in a JSON history")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=list(DEFAULT_SIZES),
+                        help="Workload counts to run each stage at")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS),
+                        help="Stages to run, default all")
+    parser.add_argument("--large", action="store_true",
+                        help="Also run per-row stages at their large sizes")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME,
+                        help="Seconds to keep repeating each benchmark")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative median slowdown flagged as a "
+                        "regression")
+    parser.add_argument("--history", default=DEFAULT_HISTORY,
+                        help="JSON history file to compare with and append "
+                        "to")
+    parser.add_argument("--no-save", action="store_true",
+                        help="Compare with the history without recording "
+                        "this run")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 if anything regressed")
+    args = parser.parse_args(argv)
+
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
+    results = run_benchmarks(args.only or list(BENCHMARKS), args.sizes,
+                             args.large, args.min_time)
+    history = read_history(args.history)
+    regressions = compare(results, history, args.threshold)
+    _print_results(results, args.threshold)
+
+    if not args.no_save:
+        history.append({
+            "timestamp": datetime.now(timezone.utc).isoformat(
+                timespec="seconds"),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": [{
+                key: result[key]
+                for key in ("name", "size", "min", "median", "mean",
+                            "stddev", "rounds")
+            } for result in results]
+        })
+        with open(args.history, "w") as history_file:
+            json.dump(history, history_file, indent=2)
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
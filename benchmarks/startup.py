@@ -0,0 +1,136 @@
+"""
+Startup benchmark for the Streamlit pages
+
+Measures time to first render of home.py and the calculator page the way
+a freshly started container sees it: every sample is a new Python process
+that imports Streamlit, then renders the page once headlessly with
+streamlit.testing.v1.AppTest (cold: every import the page needs happens
+here) and once more (warm: what a rerun costs). It also lists which heavy
+libraries the first render loaded, so an import that stops being lazy
+shows up even when the timing noise hides it. AppTest adds a fixed cost to
+the first render (component discovery, polling for the script to end), so
+compare pages and commits rather than reading the numbers as browser
+paint times.
+
+    python -m benchmarks.startup --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = {
+    "home": os.path.join(ROOT_DIR, "home.py"),
+    "calculator": os.path.join(ROOT_DIR, "pages", "calculator.py")
+}
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "plotly.express", "altair",
+                 "PIL.Image", "xlsxwriter")
+DEFAULT_REPEAT = 3
+SCRIPT_TIMEOUT = 300
+
+
+def _render(page):
+    """Child process: render a page twice and report the timings"""
+    started = time.perf_counter()
+    from streamlit import config
+    from streamlit.logger import set_log_level
+    from streamlit.testing.v1 import AppTest
+
+    # As load_test._quiet_streamlit, without importing its numpy and pandas
+    config.set_option("logger.level", "error")
+    set_log_level("error")
+    imported = time.perf_counter()
+    loaded_before = set(sys.modules)
+
+    app = AppTest.from_file(PAGES[page], default_timeout=SCRIPT_TIMEOUT)
+    app.run()
+    first = time.perf_counter()
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    loaded = [
+        module for module in HEAVY_MODULES
+        if module in sys.modules and module not in loaded_before
+    ]
+    app.run()
+    second = time.perf_counter()
+    return {
+        "import_seconds": imported - started,
+        "first_render_seconds": first - imported,
+        "time_to_first_render": first - started,
+        "rerun_seconds": second - first,
+        "loaded_modules": loaded
+    }
+
+
+def measure_page(page, repeat=DEFAULT_REPEAT):
+    """
+    Render a page in `repeat` fresh processes
+
+    Returns:
+        dict: Median of each timing, plus the heavy modules the first
+            render loaded
+    """
+    env = dict(os.environ)
+    # Keep the benchmark off the real estimate store and metrics port
+    env.setdefault("COST_CALCULATOR_ESTIMATES",
+                   os.path.join(tempfile.mkdtemp(prefix="startup_"),
+                                "estimates.db"))
+    env["COST_CALCULATOR_METRICS_PORT"] = "0"
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--child", page],
+            cwd=ROOT_DIR, env=env, capture_output=True, text=True,
+            check=True).stdout
+        samples.append(json.loads(output.splitlines()[-1]))
+    return {
+        "page": page,
+        "samples": repeat,
+        **{
+            key: statistics.median(sample[key] for sample in samples)
+            for key in ("import_seconds", "first_render_seconds",
+                        "time_to_first_render", "rerun_seconds")
+        },
+        "loaded_modules": samples[-1]["loaded_modules"]
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure time to first render of the app's pages in "
+        "fresh processes")
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES),
+                        default=list(PAGES))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="Fresh processes per page; medians are shown")
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--child", choices=list(PAGES),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(_render(args.child)))
+        return 0
+
+    report = [measure_page(page, args.repeat) for page in args.pages]
+    print(f"{'page':<12}{'import (s)':>12}{'first (s)':>12}"
+          f"{'to render (s)':>15}{'rerun (s)':>12}  loaded by first render")
+    for result in report:
+        print(f"{result['page']:<12}{result['import_seconds']:>12.3f}"
+              f"{result['first_render_seconds']:>12.3f}"
+              f"{result['time_to_first_render']:>15.3f}"
+              f"{result['rerun_seconds']:>12.3f}  "
+              f"{', '.join(result['loaded_modules']) or '-'}")
+    if args.json:
+        with open(args.json, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,6 @@
 import streamlit as st
-import os
-from PIL import Image
-import base64
+from utils.assets import asset_url
+from utils.metrics import start_metrics_server, track_rerun
 
 # Set page config
 st.set_page_config(page_title="TE Connectivity Data Platform",
@@ -9,6 +8,10 @@ st.set_page_config(page_title="TE Connectivity Data Platform",
                    layout="wide",
                    initial_sidebar_state="collapsed")
 
+# Process-wide metrics, served on a side port (see utils.metrics)
+start_metrics_server()
+finish_rerun = track_rerun("home")
+
 # Custom CSS for landing page
 st.markdown("""
 <style>
@@ -191,15 +194,12 @@ st.markdown("""
 """,
             unsafe_allow_html=True)
 
-# Header with TE Connectivity logo
-logo_path = "logo.png"
-if os.path.exists(logo_path):
-    with open(logo_path, "rb") as image_file:
-        encoded_logo = base64.b64encode(image_file.read()).decode()
-
+# Header with TE Connectivity logo, served as a content-hashed static file
+logo_url = asset_url("logo", st.get_option("server.enableStaticServing"))
+if logo_url:
     st.markdown(f'''
     <div class="header-container">
-        <img src="data:image/png;base64,{encoded_logo}" class="logo-img" />
+        <img src="{logo_url}" class="logo-img" />
         <div class="title-section">
             <h1 class="main-title">Cost Spark</h1>
         </div>
@@ -289,3 +289,5 @@ st.markdown('''
 </div>
 ''',
             unsafe_allow_html=True)
+
+finish_rerun()
@@ -1,13 +1,34 @@
 import streamlit as st
 import pandas as pd
-from io import BytesIO
-from PIL import Image
 import os
-import plotly.express as px
-import plotly.graph_objects as go
-from utils.cost_formulas import (calculate_storage_cost,
-                                 calculate_compute_cost, calculate_dbu_cost,
-                                 calculate_photon_cost)
+import json
+from utils.assets import asset_url
+from utils.cost_charts import (costs_fingerprint, cost_figure_json,
+                               process_cost_data)
+from utils.pricing_engine import (
+    ENGINE_COST_FACTORS, ENGINE_TYPES, LAYER_CALCULATORS, PB_COMPUTE_SIZES,
+    PB_DASHBOARD_SIZES, RETENTION_OPTIONS, SERVICE_TIERS,
+    calculate_landing_cost, calculate_raw_cost, calculate_conf_cost,
+    calculate_pb_cost)
+from utils.estimate_store import SESSION_REGISTRIES, get_estimate_store
+from utils.lifecycle import (DEFAULT_DAYS, MAX_DAYS, layer_ingest,
+                             monthly_lifecycle, simulate_lifecycle,
+                             transition_tiers)
+from utils.metrics import (record_session_workloads, start_metrics_server,
+                           track_rerun)
+from utils.optimizer import optimize_workloads
+from utils.profiling import STAGE_COLUMNS, stage_rows, start_profiling
+from utils.projection import MAX_MONTHS, project_costs
+from utils.rate_catalog import get_rate_catalog, refresh_rate_catalog
+from utils.report_export import (DETAIL_SHEETS, EXPORT_FORMATS, export_report,
+                                 report_sheets)
+from utils.scenarios import compare_scenarios, price_grid, snapshot
+from utils.simulation import (DEFAULT_DRAWS, DISTRIBUTIONS, PERCENTILES,
+                              SIMULATED_INPUTS, percentile_bands,
+                              simulate_costs)
+from utils.workload_import import (FIELD_RANGES, UPLOAD_FORMATS,
+                                   import_workloads)
+from utils.workload_registry import WorkloadRegistry
 
 # Set page config with professional color scheme
 st.set_page_config(page_title="Databricks Cloud Cost Calculator",
@@ -15,6 +36,16 @@ st.set_page_config(page_title="Databricks Cloud Cost Calculator",
                    layout="wide",
                    initial_sidebar_state="expanded")
 
+# Process-wide metrics, served on a side port (see utils.metrics)
+start_metrics_server()
+finish_rerun = track_rerun("calculator")
+
+# Opt-in per-stage timing of this rerun (?profile=1 or
+# COST_CALCULATOR_PROFILE=1); a no-op when off
+profiler = start_profiling("calculator",
+                           st.query_params.get("profile") == "1")
+profiler.stage("css")
+
 # Custom CSS for better visibility
 st.markdown("""
     <style>
@@ -149,6 +180,7 @@ st.markdown("""
 """,
             unsafe_allow_html=True)
 
+profiler.stage("header")
 # Add back button to home
 st.markdown("""
 <a href="/" class="back-button">
@@ -160,59 +192,86 @@ st.markdown("""
 """,
             unsafe_allow_html=True)
 
-# Logo placement at the top
-logo_path = "logo.png"
-if os.path.exists(logo_path):
-    logo = Image.open(logo_path)
+# Logo placement at the top, served as a content-hashed static file
+logo_url = asset_url("logo", st.get_option("server.enableStaticServing"))
+if logo_url:
     st.markdown('<div class="logo-container">', unsafe_allow_html=True)
-    st.image(logo, width=200)
+    st.image(logo_url, width=200)
     st.markdown('</div>', unsafe_allow_html=True)
 else:
     st.warning(
         "Logo image not found. Please ensure 'logo.png' is in the same directory."
     )
 
-# Cost constants (AWS only)
-COSTS = {
-    "S3": {
-        "Standard": 0.023,
-        "Intelligent-Tiering": 0.022,
-        "Standard-IA": 0.0125,
-        "OneZone-IA": 0.01,
-        "Glacier": 0.004,
-        "GlacierDeep": 0.00099
-    },
-    "EC2": {
-        "i3.xlarge": 0.312,
-        "i3.2xlarge": 0.624,
-        "i3.4xlarge": 1.248,
-        "i3.8xlarge": 2.496,
-        "i3.16xlarge": 4.992,
-        "r5.xlarge": 0.252,
-        "r5.2xlarge": 0.504,
-        "r5.4xlarge": 1.008,
-        "r5.8xlarge": 2.016,
-        "r5.12xlarge": 3.024
-    },
-    "DBU": {
-        "Enterprise": 0.75,
-        "DLT_Advanced": 0.36,
-        "DLT_Core": 0.20,
-        "DLT_Pro": 0.25,
-        "Jobs": 0.15
-    },
-    "Photon": {
-        "acceleration_factor": 0.2  # 20% of base compute cost
-    }
-}
+profiler.stage("rate_catalog")
+# Shared, read-only rate catalog (built once per process), reloaded in
+# place when its price index is rebuilt
+rates_version = refresh_rate_catalog()
+rate_catalog = get_rate_catalog()
+if st.session_state.get('rates_version', rates_version) != rates_version:
+    # Workloads keep the costs they were priced at when added, so price
+    # this session's workloads and Simple mode layers again at the new rates
+    for key in SESSION_REGISTRIES:
+        if st.session_state.get(key) is not None:
+            st.session_state[key].reprice()
+    for layer_name, inputs in st.session_state.get('layer_inputs',
+                                                   {}).items():
+        st.session_state.all_costs[layer_name] = LAYER_CALCULATORS[
+            layer_name](inputs["params"], inputs["storage_type"])
+st.session_state.rates_version = rates_version
+
+PHOTON_LABELS = {True: 'Enabled', False: 'Disabled'}
+
+
+def workload_upload(registry, label, key, engine_type=None):
+    """Bulk-add a layer's workloads from an uploaded CSV, XLSX or Parquet"""
+    columns = ", ".join(["name", *registry.fields])
+    with st.expander(f"Import {label} from a file"):
+        with st.form(f"import_{key}_form", clear_on_submit=True):
+            upload = st.file_uploader(
+                f"{label} file",
+                type=[extension[1:] for extension in UPLOAD_FORMATS],
+                help=f"One row per workload with columns {columns}. Empty "
+                "cells take the form's defaults.")
+            submitted = st.form_submit_button(f"Import {label}")
+        if not submitted:
+            return
+        if upload is None:
+            st.error("Please choose a file to import")
+            return
+        try:
+            added, errors = import_workloads(registry, upload, upload.name,
+                                             engine_type)
+        except (ImportError, ValueError) as error:
+            st.error(f"Could not import {upload.name}: {error}")
+            return
+        if added:
+            st.success(f"Imported {added:,} {label.lower()}")
+        if not errors.empty:
+            st.warning(f"{len(errors):,} rows were not imported")
+            st.dataframe(errors, hide_index=True)
+            st.download_button("Download Import Errors (CSV)",
+                               errors.to_csv(index=False),
+                               file_name=f"{key}_import_errors.csv",
+                               mime="text/csv",
+                               key=f"import_{key}_errors")
+
+
+def layer_widget(key):
+    """
+    Session key of one of the shown layer's input widgets
+
+    Streamlit drops the value of a widget that is not drawn, so a value kept
+    in layer_widgets (from the last time the layer was shown, or from a
+    loaded estimate) is restored before the widget is created. The key is
+    noted so the layer's values can be kept again after this run.
+    """
+    saved = st.session_state.layer_widgets.get(layer, {})
+    if key not in st.session_state and key in saved:
+        st.session_state[key] = saved[key]
+    shown_widgets.append(key)
+    return key
 
-# Default compute configuration (hidden from user)
-DEFAULT_COMPUTE = {
-    "instance_type": "r5.xlarge",
-    "num_instances": 2,
-    "hours_per_day": 8,
-    "days_per_month": 22
-}
 
 # Main app
 st.markdown('<h1 class="header">Databricks Cloud Cost Calculator</h1>',
@@ -230,16 +289,80 @@ if 'all_costs' not in st.session_state:
         "PB": {}
     }
 
+# Simple mode inputs per layer, for the uncertainty simulation
+if 'layer_inputs' not in st.session_state:
+    st.session_state.layer_inputs = {}
+
+# Input widget values per layer, including its mode, so estimates reopen
+# with the inputs they were saved with (see layer_widget)
+if 'layer_widgets' not in st.session_state:
+    st.session_state.layer_widgets = {}
+
+profiler.stage("saved_estimates")
+# Saved estimates: the costs, Simple mode inputs and Advanced mode workloads
+# of this session, persisted across browser refreshes and server restarts
+estimate_store = get_estimate_store()
+st.sidebar.header("Saved Estimates")
+with st.sidebar.form("save_estimate_form", clear_on_submit=True):
+    estimate_name = st.text_input("Estimate Name")
+    if st.form_submit_button("Save Estimate"):
+        try:
+            saved_version = estimate_store.save(
+                estimate_name, st.session_state.all_costs,
+                st.session_state.layer_inputs, {
+                    key: st.session_state.get(key)
+                    for key in SESSION_REGISTRIES
+                }, st.session_state.layer_widgets)
+        except ValueError as e:
+            st.error(f"Cannot save the estimate: {e}")
+        else:
+            st.success(f"Saved '{estimate_name.strip()}' "
+                       f"version {saved_version}")
+
+saved_estimates = estimate_store.list_estimates()
+if saved_estimates.empty:
+    st.sidebar.caption("No saved estimates yet.")
+else:
+    load_name = st.sidebar.selectbox("Saved Estimate",
+                                     saved_estimates["name"],
+                                     key="load_estimate_name")
+    load_version = st.sidebar.selectbox(
+        "Version",
+        estimate_store.versions(load_name)["version"],
+        key="load_estimate_version")
+    if st.sidebar.button("Load Estimate"):
+        estimate = estimate_store.load(load_name, int(load_version))
+        st.session_state.all_costs = estimate["all_costs"]
+        st.session_state.layer_inputs = estimate["layer_inputs"]
+        for key, registry in estimate["registries"].items():
+            st.session_state[key] = registry
+        # Replace the input widgets' values before any of them is created,
+        # or the shown layer would recompute its costs from the old inputs
+        for widgets in st.session_state.layer_widgets.values():
+            for key in widgets:
+                st.session_state.pop(key, None)
+        for widgets in estimate["widgets"].values():
+            st.session_state.update(widgets)
+        st.session_state.layer_widgets = estimate["widgets"]
+        st.session_state.loaded_estimate = (load_name, estimate["version"])
+        st.rerun()
+    if 'loaded_estimate' in st.session_state:
+        loaded_name, loaded_version = st.session_state.pop('loaded_estimate')
+        st.sidebar.success(f"Loaded '{loaded_name}' version {loaded_version}")
+
+profiler.stage("layer_pricing")
 # Layer tabs
 layer = st.selectbox("Select Layer to Configure",
                      ["Landing", "RAW", "CONF", "PB"])
+# Keys of the shown layer's input widgets, noted by layer_widget
+shown_widgets = []
 
 # LANDING LAYER CONFIGURATION
 if layer == "Landing":
     st.subheader("Landing Layer Configuration")
     mode = st.radio("Estimation Mode", ["Simple", "Advanced"],
                     horizontal=True,
-                    key="landing_mode")
+                    key=layer_widget("landing_mode"))
 
     if mode == "Simple":
         st.markdown('<div class="tab-content">', unsafe_allow_html=True)
@@ -250,12 +373,14 @@ if layer == "Landing":
                 "Number of Tables",
                 min_value=1,
                 value=5,
-                help="Total number of tables in your landing zone")
+                help="Total number of tables in your landing zone",
+                key=layer_widget("landing_num_tables"))
             avg_file_size = st.number_input(
                 "Average File Size (GB)",
                 min_value=0.1,
                 value=2.0,
-                help="Average size of each file in GB")
+                help="Average size of each file in GB",
+                key=layer_widget("landing_avg_file_size"))
 
         with col2:
             file_growth = st.number_input(
@@ -263,69 +388,54 @@ if layer == "Landing":
                 min_value=0,
                 max_value=100,
                 value=5,
-                help="Expected monthly growth of your data")
+                help="Expected monthly growth of your data",
+                key=layer_widget("landing_file_growth"))
             files_per_day = st.number_input(
                 "Files Received Per Day",
                 min_value=1,
                 value=10,
-                help="Average number of files received daily")
+                help="Average number of files received daily",
+                key=layer_widget("landing_files_per_day"))
 
-        retention = st.selectbox("Retention Policy", [
-            "30 days", "60 days", "90 days", "180 days", "1 physical month",
-            "2 physical months", "Indefinite"
-        ],
-                                 help="How long should the data be retained?")
+        retention = st.selectbox("Retention Policy",
+                                 RETENTION_OPTIONS,
+                                 help="How long should the data be retained?",
+                                 key=layer_widget("landing_retention"))
 
         storage_type = st.selectbox(
             "Storage Tier",
-            list(COSTS["S3"].keys()),
-            help="Select the appropriate S3 storage tier")
+            rate_catalog.options("S3"),
+            help="Select the appropriate S3 storage tier",
+            key=layer_widget("landing_storage_type"))
 
         st.markdown('</div>', unsafe_allow_html=True)
 
         # Calculate storage for Landing layer (Simple mode)
-        total_files = files_per_day * 30  # Assuming 30 days in a physical month
-        total_storage_gb = total_files * avg_file_size
-        growth_factor = 1 + (file_growth / 100)
-
-        # Get months from retention policy
-        if "physical month" in retention:
-            if retention == "1 physical month":
-                retention_months = 1
-            elif retention == "2 physical months":
-                retention_months = 2
-            else:
-                retention_months = 1  # Default
-        elif "days" in retention:
-            days = int(retention.split()[0])
-            retention_months = days / 30  # Convert days to months
-        else:  # Indefinite
-            retention_months = 12  # Assume 1 year for calculation
-
-        # Calculate cost with retention
-        projected_storage = total_storage_gb * (growth_factor**
-                                                retention_months)
-        storage_cost = calculate_storage_cost(
-            projected_storage,
-            COSTS["S3"][storage_type],
-            months=1  # For a single physical month
-        )
-
-        # Store in session state
-        st.session_state.all_costs["Landing"] = {
-            "storage_gb": projected_storage,
-            "storage_cost_per_month": storage_cost,
-            "storage_tier": storage_type,
-            "retention_policy": retention
+        landing_params = {
+            "num_tables": num_tables,
+            "avg_file_size": avg_file_size,
+            "file_growth": file_growth,
+            "files_per_day": files_per_day,
+            "retention": retention
         }
+        # Keep the inputs for the uncertainty simulation
+        st.session_state.layer_inputs["Landing"] = {
+            "params": landing_params,
+            "storage_type": storage_type
+        }
+        st.session_state.all_costs["Landing"] = calculate_landing_cost(
+            landing_params, storage_type)
 
     else:  # Advanced mode
+        # Advanced workloads are not simulated
+        st.session_state.layer_inputs.pop("Landing", None)
         st.markdown('<div class="tab-content">', unsafe_allow_html=True)
         st.info("Add each landing table individually for precise estimation")
 
-        # Initialize session state for tables if not exists
+        # Initialize the tables registry if not exists
         if 'landing_tables' not in st.session_state:
-            st.session_state.landing_tables = []
+            st.session_state.landing_tables = WorkloadRegistry("table")
+        landing_tables = st.session_state.landing_tables
 
         # Form to add new tables
         with st.form("add_table_form"):
@@ -338,97 +448,64 @@ if layer == "Landing":
                                                 value=2.0)
 
             with col2:
-                files_per_day = st.number_input("Files Per Day",
-                                                min_value=1,
-                                                value=5)
-                retention = st.selectbox("Retention Policy", [
-                    "30 days", "60 days", "90 days", "180 days",
-                    "1 physical month", "2 physical months", "Indefinite"
-                ])
+                files_per_day = st.number_input(
+                    "Files Per Day",
+                    min_value=1,
+                    max_value=FIELD_RANGES["files_per_day"][1],
+                    value=5)
+                retention = st.selectbox("Retention Policy",
+                                         RETENTION_OPTIONS)
 
             if st.form_submit_button("Add Table"):
                 if table_name:
-                    if table_name in [
-                            t['name'] for t in st.session_state.landing_tables
-                    ]:
+                    if table_name in landing_tables:
                         st.error("Table with this name already exists!")
                     else:
-                        st.session_state.landing_tables.append({
-                            'name':
-                            table_name,
-                            'avg_file_size':
-                            avg_file_size,
-                            'files_per_day':
-                            files_per_day,
-                            'retention':
-                            retention
-                        })
+                        table = {
+                            'name': table_name,
+                            'avg_file_size': avg_file_size,
+                            'files_per_day': files_per_day,
+                            'retention': retention
+                        }
+                        landing_tables.add(table)
                         st.success(f"Table '{table_name}' added!")
                 else:
                     st.error("Please enter a table name")
 
+        workload_upload(landing_tables, "Tables", "tables")
+
         # Display added tables
-        if st.session_state.landing_tables:
+        if landing_tables:
             st.subheader("Your Landing Tables")
-            df_tables = pd.DataFrame(st.session_state.landing_tables)
+            df_tables = landing_tables.frame(priced=False)
             st.dataframe(df_tables)
 
             if st.button("Clear All Tables"):
-                st.session_state.landing_tables = []
+                landing_tables.clear()
                 st.rerun()
 
         storage_type = st.selectbox(
             "Storage Tier",
-            list(COSTS["S3"].keys()),
-            help="Select the appropriate S3 storage tier")
+            rate_catalog.options("S3"),
+            help="Select the appropriate S3 storage tier",
+            key=layer_widget("landing_storage_type"))
 
         st.markdown('</div>', unsafe_allow_html=True)
 
         # Calculate storage for Landing layer (Advanced mode)
-        if st.session_state.landing_tables:
-            total_storage_gb = 0
-            for table in st.session_state.landing_tables:
-                files_per_month = table[
-                    'files_per_day'] * 30  # Assuming 30 days in a physical month
-                table_storage = files_per_month * table['avg_file_size']
-
-                # Get months from retention policy
-                if "physical month" in table['retention']:
-                    if table['retention'] == "1 physical month":
-                        retention_months = 1
-                    elif table['retention'] == "2 physical months":
-                        retention_months = 2
-                    else:
-                        retention_months = 1  # Default
-                elif "days" in table['retention']:
-                    days = int(table['retention'].split()[0])
-                    retention_months = days / 30  # Convert days to months
-                else:  # Indefinite
-                    retention_months = 12  # Assume 1 year for calculation
-
-                # Accumulate storage with retention
-                total_storage_gb += table_storage * retention_months
-
-            storage_cost = calculate_storage_cost(
-                total_storage_gb,
-                COSTS["S3"][storage_type],
-                months=1  # For a single physical month
-            )
-
-            # Store in session state
-            st.session_state.all_costs["Landing"] = {
-                "storage_gb": total_storage_gb,
-                "storage_cost_per_month": storage_cost,
-                "storage_tier": storage_type,
-                "tables_count": len(st.session_state.landing_tables)
-            }
+        if landing_tables:
+            st.session_state.all_costs["Landing"] = calculate_landing_cost(
+                {
+                    "mode": "Advanced",
+                    "totals": landing_tables.totals()
+                }, storage_type)
 
 # RAW LAYER CONFIGURATION
 elif layer == "RAW":
     st.subheader("RAW Layer Configuration")
     mode = st.radio("Estimation Mode", ["Simple", "Advanced"],
                     horizontal=True,
-                    key="raw_mode")
+                    key=layer_widget("raw_mode"))
 
     if mode == "Simple":
         st.markdown('<div class="tab-content">', unsafe_allow_html=True)
@@ -438,94 +515,79 @@ elif layer == "RAW":
             num_jobs = st.number_input("Number of Jobs",
                                        min_value=1,
                                        value=3,
-                                       help="Total number of processing jobs")
+                                       help="Total number of processing jobs",
+                                       key=layer_widget("raw_num_jobs"))
             num_tables = st.number_input(
                 "Number of Tables",
                 min_value=1,
                 value=10,
-                help="Number of tables being processed")
+                help="Number of tables being processed",
+                key=layer_widget("raw_num_tables"))
 
         with col2:
             instance_type = st.selectbox(
                 "Instance Type",
-                list(COSTS["EC2"].keys()),
-                index=list(COSTS["EC2"].keys()).index("r5.xlarge")
-                if "r5.xlarge" in COSTS["EC2"] else 0,
-                help="Select the instance type for your jobs")
+                rate_catalog.options("EC2"),
+                index=rate_catalog.index("EC2", "r5.xlarge"),
+                help="Select the instance type for your jobs",
+                key=layer_widget("raw_instance_type"))
             avg_runs_per_month = st.number_input(
                 "Average Runs per Physical Month",
                 min_value=1,
                 value=30,
-                help="How many times each job runs per physical month")
+                help="How many times each job runs per physical month",
+                key=layer_widget("raw_avg_runs_per_month"))
 
         avg_job_duration = st.number_input(
             "Average Job Duration (minutes)",
             min_value=1,
             value=45,
-            help="Average runtime duration for each job")
+            help="Average runtime duration for each job",
+            key=layer_widget("raw_avg_job_duration"))
 
         enable_photon = st.checkbox(
             "Enable Photon Acceleration",
             value=True,
             help=
-            "Photon is Databricks' next-generation query engine that accelerates queries"
+            "Photon is Databricks' next-generation query engine that accelerates queries",
+            key=layer_widget("raw_enable_photon")
         )
 
         storage_type = st.selectbox(
             "Storage Tier",
-            list(COSTS["S3"].keys()),
-            help="Select the appropriate S3 storage tier")
+            rate_catalog.options("S3"),
+            help="Select the appropriate S3 storage tier",
+            key=layer_widget("raw_storage_type"))
 
         st.markdown('</div>', unsafe_allow_html=True)
 
         # Calculate costs for RAW layer (Simple mode)
-        # Convert job duration to hours
-        job_hours = (avg_job_duration / 60) * num_jobs * avg_runs_per_month
-
-        # Compute cost
-        compute_cost = calculate_compute_cost(
-            COSTS["EC2"][instance_type],
-            1,  # Number of instances per job
-            job_hours / 30,  # Hours per day
-            30  # Days per physical month
-        )
-
-        # Photon acceleration cost if enabled
-        photon_cost = 0
-        if enable_photon:
-            photon_cost = calculate_photon_cost(
-                compute_cost, COSTS["Photon"]["acceleration_factor"])
-
-        # Storage estimate for processed tables in RAW
-        raw_storage_gb = num_tables * 50  # Assume 50GB per table in RAW
-        storage_cost = calculate_storage_cost(
-            raw_storage_gb,
-            COSTS["S3"][storage_type],
-            months=1  # For a single physical month
-        )
-
-        # Total cost
-        total_cost = compute_cost + storage_cost + photon_cost
-
-        # Store in session state
-        st.session_state.all_costs["RAW"] = {
-            "compute_cost": compute_cost,
-            "storage_cost": storage_cost,
-            "photon_cost": photon_cost,
-            "total_cost": total_cost,
-            "jobs_count": num_jobs,
-            "storage_gb": raw_storage_gb,
+        raw_params = {
+            "num_jobs": num_jobs,
+            "num_tables": num_tables,
             "instance_type": instance_type,
-            "photon_enabled": enable_photon
+            "avg_runs_per_month": avg_runs_per_month,
+            "avg_job_duration": avg_job_duration,
+            "enable_photon": enable_photon
         }
+        # Keep the inputs for the uncertainty simulation
+        st.session_state.layer_inputs["RAW"] = {
+            "params": raw_params,
+            "storage_type": storage_type
+        }
+        st.session_state.all_costs["RAW"] = calculate_raw_cost(
+            raw_params, storage_type)
 
     else:  # Advanced mode
+        # Advanced workloads are not simulated
+        st.session_state.layer_inputs.pop("RAW", None)
         st.markdown('<div class="tab-content">', unsafe_allow_html=True)
         st.info("Add each job individually with specific configurations")
 
-        # Initialize session state for jobs if not exists
+        # Initialize the jobs registry if not exists
         if 'raw_jobs' not in st.session_state:
-            st.session_state.raw_jobs = []
+            st.session_state.raw_jobs = WorkloadRegistry("job")
+        raw_jobs = st.session_state.raw_jobs
 
         # Form to add new jobs
         with st.form("add_job_form"):
@@ -535,7 +597,7 @@ elif layer == "RAW":
                                          help="Unique name for this job")
                 instance_type = st.selectbox(
                     "Instance Type",
-                    list(COSTS["EC2"].keys()),
+                    rate_catalog.options("EC2"),
                     help="Select specific instance type")
 
             with col2:
@@ -547,6 +609,7 @@ elif layer == "RAW":
                 runs_per_month = st.number_input(
                     "Runs per Physical Month",
                     min_value=1,
+                    max_value=FIELD_RANGES["runs_per_month"][1],
                     value=30,
                     help="How many times this job runs monthly")
 
@@ -559,75 +622,44 @@ elif layer == "RAW":
 
             if st.form_submit_button("Add Job"):
                 if job_name:
-                    if job_name in [
-                            j['name'] for j in st.session_state.raw_jobs
-                    ]:
+                    if job_name in raw_jobs:
                         st.error("Job with this name already exists!")
                     else:
-                        st.session_state.raw_jobs.append({
-                            'name':
-                            job_name,
-                            'instance_type':
-                            instance_type,
-                            'avg_duration':
-                            avg_duration,
-                            'runs_per_month':
-                            runs_per_month,
-                            'photon_enabled':
-                            enable_photon_job
-                        })
+                        job = {
+                            'name': job_name,
+                            'instance_type': instance_type,
+                            'avg_duration': avg_duration,
+                            'runs_per_month': runs_per_month,
+                            'photon_enabled': enable_photon_job
+                        }
+                        raw_jobs.add(job)
                         st.success(f"Job '{job_name}' added!")
                 else:
                     st.error("Please enter a job name")
 
+        workload_upload(raw_jobs, "Jobs", "jobs")
+
         # Display added jobs
-        if st.session_state.raw_jobs:
+        if raw_jobs:
             st.subheader("Your RAW Layer Jobs")
 
-            # Create DataFrame with costs calculation
-            job_data = []
-            for job in st.session_state.raw_jobs:
-                job_hours = (job['avg_duration'] / 60) * job['runs_per_month']
-                instance_cost = COSTS["EC2"][job['instance_type']]
-
-                # Compute cost for this job
-                compute_cost = calculate_compute_cost(
-                    instance_cost,
-                    1,  # Number of instances per job
-                    job_hours / 30,  # Hours per day
-                    30  # Days per physical month
-                )
-
-                # Photon acceleration cost if enabled
-                photon_cost = 0
-                if job['photon_enabled']:
-                    photon_cost = calculate_photon_cost(
-                        compute_cost, COSTS["Photon"]["acceleration_factor"])
-
-                job_data.append({
-                    'Name':
-                    job['name'],
-                    'Instance':
-                    job['instance_type'],
-                    'Duration (min)':
-                    job['avg_duration'],
-                    'Runs/Physical Month':
-                    job['runs_per_month'],
-                    'Photon':
-                    'Enabled' if job['photon_enabled'] else 'Disabled',
-                    'Compute Cost ($)':
-                    round(compute_cost, 2),
-                    'Photon Cost ($)':
-                    round(photon_cost, 2),
-                    'Total Cost ($)':
-                    round(compute_cost + photon_cost, 2)
-                })
-
-            df_jobs = pd.DataFrame(job_data)
+            # Display table from the already-priced job columns
+            jobs = raw_jobs.frame()
+            df_jobs = pd.DataFrame({
+                'Name': jobs['name'],
+                'Instance': jobs['instance_type'],
+                'Duration (min)': jobs['avg_duration'],
+                'Runs/Physical Month': jobs['runs_per_month'],
+                'Photon': jobs['photon_enabled'].map(PHOTON_LABELS),
+                'Compute Cost ($)': jobs['compute_cost'].round(2),
+                'Photon Cost ($)': jobs['photon_cost'].round(2),
+                'Total Cost ($)':
+                (jobs['compute_cost'] + jobs['photon_cost']).round(2)
+            })
             st.dataframe(df_jobs)
 
             if st.button("Clear All Jobs"):
-                st.session_state.raw_jobs = []
+                raw_jobs.clear()
                 st.rerun()
 
         # Storage configuration
@@ -636,81 +668,38 @@ elif layer == "RAW":
             "Estimated Number of Tables",
             min_value=1,
             value=10,
-            help="Approximate number of tables in RAW layer")
+            help="Approximate number of tables in RAW layer",
+            key=layer_widget("raw_estimated_tables"))
         avg_table_size = st.number_input(
             "Average Table Size (GB)",
             min_value=1.0,
             value=50.0,
-            help="Average size per table in RAW layer")
+            help="Average size per table in RAW layer",
+            key=layer_widget("raw_avg_table_size"))
         storage_type = st.selectbox(
             "Storage Tier",
-            list(COSTS["S3"].keys()),
-            help="Select the appropriate S3 storage tier")
+            rate_catalog.options("S3"),
+            help="Select the appropriate S3 storage tier",
+            key=layer_widget("raw_storage_type"))
 
         st.markdown('</div>', unsafe_allow_html=True)
 
         # Calculate costs for RAW layer (Advanced mode)
-        if st.session_state.raw_jobs:
-            # Compute and photon costs
-            total_compute_cost = 0
-            total_photon_cost = 0
-
-            for job in st.session_state.raw_jobs:
-                job_hours = (job['avg_duration'] / 60) * job['runs_per_month']
-                instance_cost = COSTS["EC2"][job['instance_type']]
-
-                # Compute cost for this job
-                compute_cost = calculate_compute_cost(
-                    instance_cost,
-                    1,  # Number of instances per job
-                    job_hours / 30,  # Hours per day
-                    30  # Days per physical month
-                )
-
-                # Add to total compute cost
-                total_compute_cost += compute_cost
-
-                # Photon acceleration cost if enabled
-                if job['photon_enabled']:
-                    photon_cost = calculate_photon_cost(
-                        compute_cost, COSTS["Photon"]["acceleration_factor"])
-                    total_photon_cost += photon_cost
-
-            # Storage cost
-            raw_storage_gb = estimated_tables * avg_table_size
-            storage_cost = calculate_storage_cost(
-                raw_storage_gb,
-                COSTS["S3"][storage_type],
-                months=1  # For a single physical month
-            )
-
-            # Total cost
-            total_cost = total_compute_cost + storage_cost + total_photon_cost
-
-            # Store in session state
-            st.session_state.all_costs["RAW"] = {
-                "compute_cost":
-                total_compute_cost,
-                "storage_cost":
-                storage_cost,
-                "photon_cost":
-                total_photon_cost,
-                "total_cost":
-                total_cost,
-                "jobs_count":
-                len(st.session_state.raw_jobs),
-                "storage_gb":
-                raw_storage_gb,
-                "photon_enabled":
-                any(job['photon_enabled'] for job in st.session_state.raw_jobs)
-            }
+        if raw_jobs:
+            st.session_state.all_costs["RAW"] = calculate_raw_cost(
+                {
+                    "mode": "Advanced",
+                    "totals": raw_jobs.totals(),
+                    "estimated_tables": estimated_tables,
+                    "avg_table_size": avg_table_size
+                }, storage_type)
 
 # CONF LAYER CONFIGURATION
 elif layer == "CONF":
     st.subheader("CONF Layer Configuration")
     mode = st.radio("Estimation Mode", ["Simple", "Advanced"],
                     horizontal=True,
-                    key="conf_mode")
+                    key=layer_widget("conf_mode"))
 
     if mode == "Simple":
         st.markdown('<div class="tab-content">', unsafe_allow_html=True)
@@ -721,116 +710,85 @@ elif layer == "CONF":
                 "Number of Transformations",
                 min_value=1,
                 value=4,
-                help="Total number of data transformation jobs")
+                help="Total number of data transformation jobs",
+                key=layer_widget("conf_num_transforms"))
             dbu_per_hour = st.number_input(
                 "DBUs per Hour",
                 min_value=1,
                 value=4,
-                help="Databricks Units consumed per hour")
+                help="Databricks Units consumed per hour",
+                key=layer_widget("conf_dbu_per_hour"))
 
         with col2:
             service_tier = st.selectbox(
-                "Service Tier", [
-                    "Databricks Jobs", "Delta Live Tables (Core)",
-                    "Delta Live Tables (Pro)", "Delta Live Tables (Advanced)"
-                ],
-                help="Select the appropriate Databricks service tier")
+                "Service Tier",
+                list(SERVICE_TIERS.keys()),
+                help="Select the appropriate Databricks service tier",
+                key=layer_widget("conf_service_tier"))
             transform_complexity = st.selectbox(
                 "Transformation Complexity",
                 ["Low", "Medium", "High"],
                 index=1,  # Default to Medium
-                help="Complexity affects storage and computing requirements")
+                help="Complexity affects storage and computing requirements",
+                key=layer_widget("conf_transform_complexity"))
 
         avg_transform_duration = st.number_input(
             "Average Transformation Duration (minutes)",
             min_value=1,
             value=60,
-            help="Average runtime for transformations")
+            help="Average runtime for transformations",
+            key=layer_widget("conf_avg_transform_duration"))
         avg_runs_per_month = st.number_input(
             "Average Runs per Physical Month",
             min_value=1,
             value=30,
-            help="How many times each transformation runs monthly")
+            help="How many times each transformation runs monthly",
+            key=layer_widget("conf_avg_runs_per_month"))
         enable_photon = st.checkbox(
             "Enable Photon Acceleration",
             value=True,
             help=
-            "Photon is Databricks' next-generation query engine that accelerates queries"
+            "Photon is Databricks' next-generation query engine that accelerates queries",
+            key=layer_widget("conf_enable_photon")
         )
         storage_type = st.selectbox(
             "Storage Tier",
-            list(COSTS["S3"].keys()),
-            help="Select the appropriate S3 storage tier")
+            rate_catalog.options("S3"),
+            help="Select the appropriate S3 storage tier",
+            key=layer_widget("conf_storage_type"))
 
         st.markdown('</div>', unsafe_allow_html=True)
 
         # Calculate costs for CONF layer (Simple mode)
-        # Map service tier to DBU type and cost
-        dbu_type_map = {
-            "Databricks Jobs": "Jobs",
-            "Delta Live Tables (Core)": "DLT_Core",
-            "Delta Live Tables (Pro)": "DLT_Pro",
-            "Delta Live Tables (Advanced)": "DLT_Advanced"
-        }
-        dbu_type = dbu_type_map.get(service_tier, "Jobs")
-        dbu_cost = COSTS["DBU"].get(dbu_type, COSTS["DBU"]["Jobs"])
-
-        # Calculate hours for all transformations in a physical month
-        monthly_hours = (avg_transform_duration /
-                         60) * num_transforms * avg_runs_per_month
-
-        # Calculate compute cost
-        compute_cost = calculate_dbu_cost(
-            dbu_cost,
-            1,  # Cluster size (already factored into dbu_per_hour)
-            monthly_hours / 30,  # Hours per day
-            30,  # Days per physical month
-            dbu_per_hour)
-
-        # Photon acceleration cost if enabled
-        photon_cost = 0
-        if enable_photon:
-            photon_cost = calculate_photon_cost(
-                compute_cost, COSTS["Photon"]["acceleration_factor"])
-
-        # Storage calculation based on complexity
-        complexity_factor = {
-            "Low": 0.7,
-            "Medium": 1.0,
-            "High": 1.5
-        }.get(transform_complexity, 1.0)
-
-        conf_storage_gb = num_transforms * 50 * complexity_factor
-        storage_cost = calculate_storage_cost(
-            conf_storage_gb,
-            COSTS["S3"][storage_type],
-            months=1  # For a single physical month
-        )
-
-        # Total cost
-        total_cost = compute_cost + storage_cost + photon_cost
-
-        # Store in session state
-        st.session_state.all_costs["CONF"] = {
-            "compute_cost": compute_cost,
-            "storage_cost": storage_cost,
-            "photon_cost": photon_cost,
-            "total_cost": total_cost,
-            "transforms_count": num_transforms,
-            "storage_gb": conf_storage_gb,
+        conf_params = {
+            "num_transforms": num_transforms,
+            "dbu_per_hour": dbu_per_hour,
             "service_tier": service_tier,
-            "photon_enabled": enable_photon
+            "transform_complexity": transform_complexity,
+            "avg_transform_duration": avg_transform_duration,
+            "avg_runs_per_month": avg_runs_per_month,
+            "enable_photon": enable_photon
         }
+        # Keep the inputs for the uncertainty simulation
+        st.session_state.layer_inputs["CONF"] = {
+            "params": conf_params,
+            "storage_type": storage_type
+        }
+        st.session_state.all_costs["CONF"] = calculate_conf_cost(
+            conf_params, storage_type)
 
     else:  # Advanced mode
+        # Advanced workloads are not simulated
+        st.session_state.layer_inputs.pop("CONF", None)
         st.markdown('<div class="tab-content">', unsafe_allow_html=True)
         st.info(
             "Add each transformation individually with specific configurations"
         )
 
-        # Initialize session state for transformations if not exists
+        # Initialize the transformations registry if not exists
         if 'conf_transforms' not in st.session_state:
-            st.session_state.conf_transforms = []
+            st.session_state.conf_transforms = WorkloadRegistry("transform")
+        conf_transforms = st.session_state.conf_transforms
 
         # Form to add new transformations
         with st.form("add_transform_form"):
@@ -840,11 +798,8 @@ elif layer == "CONF":
                     "Transformation Name",
                     help="Unique name for this transformation")
                 service_tier = st.selectbox(
-                    "Service Tier", [
-                        "Databricks Jobs", "Delta Live Tables (Core)",
-                        "Delta Live Tables (Pro)",
-                        "Delta Live Tables (Advanced)"
-                    ],
+                    "Service Tier",
+                    list(SERVICE_TIERS.keys()),
                     help="Select the appropriate Databricks service tier")
 
             with col2:
@@ -856,6 +811,7 @@ elif layer == "CONF":
                 runs_per_month = st.number_input(
                     "Runs per Physical Month",
                     min_value=1,
+                    max_value=FIELD_RANGES["runs_per_month"][1],
                     value=30,
                     help="How many times this transformation runs monthly")
 
@@ -878,173 +834,65 @@ elif layer == "CONF":
 
             if st.form_submit_button("Add Transformation"):
                 if transform_name:
-                    if transform_name in [
-                            t['name'] for t in st.session_state.conf_transforms
-                    ]:
+                    if transform_name in conf_transforms:
                         st.error(
                             "Transformation with this name already exists!")
                     else:
-                        st.session_state.conf_transforms.append({
-                            'name':
-                            transform_name,
-                            'service_tier':
-                            service_tier,
-                            'avg_duration':
-                            avg_duration,
-                            'runs_per_month':
-                            runs_per_month,
-                            'dbu_per_hour':
-                            dbu_per_hour,
-                            'storage_gb':
-                            estimated_storage,
-                            'photon_enabled':
-                            enable_photon_transform
-                        })
+                        transform = {
+                            'name': transform_name,
+                            'service_tier': service_tier,
+                            'avg_duration': avg_duration,
+                            'runs_per_month': runs_per_month,
+                            'dbu_per_hour': dbu_per_hour,
+                            'storage_gb': estimated_storage,
+                            'photon_enabled': enable_photon_transform
+                        }
+                        conf_transforms.add(transform)
                         st.success(f"Transformation '{transform_name}' added!")
                 else:
                     st.error("Please enter a transformation name")
 
+        workload_upload(conf_transforms, "Transformations", "transforms")
+
         # Display added transformations
-        if st.session_state.conf_transforms:
+        if conf_transforms:
             st.subheader("Your CONF Layer Transformations")
 
-            # Create DataFrame with costs calculation
-            transform_data = []
-            for transform in st.session_state.conf_transforms:
-                # Map service tier to DBU type and cost
-                dbu_type_map = {
-                    "Databricks Jobs": "Jobs",
-                    "Delta Live Tables (Core)": "DLT_Core",
-                    "Delta Live Tables (Pro)": "DLT_Pro",
-                    "Delta Live Tables (Advanced)": "DLT_Advanced"
-                }
-                dbu_type = dbu_type_map.get(transform['service_tier'], "Jobs")
-                dbu_cost = COSTS["DBU"].get(dbu_type, COSTS["DBU"]["Jobs"])
-
-                # Calculate hours for this transformation in a physical month
-                monthly_hours = (transform['avg_duration'] /
-                                 60) * transform['runs_per_month']
-
-                # Calculate compute cost
-                compute_cost = calculate_dbu_cost(
-                    dbu_cost,
-                    1,  # Cluster size (already factored into dbu_per_hour)
-                    monthly_hours / 30,  # Hours per day
-                    30,  # Days per physical month
-                    transform['dbu_per_hour'])
-
-                # Photon acceleration cost if enabled
-                photon_cost = 0
-                if transform['photon_enabled']:
-                    photon_cost = calculate_photon_cost(
-                        compute_cost, COSTS["Photon"]["acceleration_factor"])
-
-                transform_data.append({
-                    'Name':
-                    transform['name'],
-                    'Service Tier':
-                    transform['service_tier'],
-                    'Duration (min)':
-                    transform['avg_duration'],
-                    'Runs/Physical Month':
-                    transform['runs_per_month'],
-                    'DBUs/Hour':
-                    transform['dbu_per_hour'],
-                    'Storage (GB)':
-                    transform['storage_gb'],
-                    'Photon':
-                    'Enabled' if transform['photon_enabled'] else 'Disabled',
-                    'Compute Cost ($)':
-                    round(compute_cost, 2),
-                    'Photon Cost ($)':
-                    round(photon_cost, 2)
-                })
-
-            df_transforms = pd.DataFrame(transform_data)
+            # Display table from the already-priced transformation columns
+            transforms = conf_transforms.frame()
+            df_transforms = pd.DataFrame({
+                'Name': transforms['name'],
+                'Service Tier': transforms['service_tier'],
+                'Duration (min)': transforms['avg_duration'],
+                'Runs/Physical Month': transforms['runs_per_month'],
+                'DBUs/Hour': transforms['dbu_per_hour'],
+                'Storage (GB)': transforms['storage_gb'],
+                'Photon': transforms['photon_enabled'].map(PHOTON_LABELS),
+                'Compute Cost ($)': transforms['compute_cost'].round(2),
+                'Photon Cost ($)': transforms['photon_cost'].round(2)
+            })
             st.dataframe(df_transforms)
 
             if st.button("Clear All Transformations"):
-                st.session_state.conf_transforms = []
+                conf_transforms.clear()
                 st.rerun()
 
         # Storage tier selection
         storage_type = st.selectbox(
             "Storage Tier",
-            list(COSTS["S3"].keys()),
-            help="Select the appropriate S3 storage tier")
+            rate_catalog.options("S3"),
+            help="Select the appropriate S3 storage tier",
+            key=layer_widget("conf_storage_type"))
 
         st.markdown('</div>', unsafe_allow_html=True)
 
         # Calculate costs for CONF layer (Advanced mode)
-        if st.session_state.conf_transforms:
-            # Compute, photon and storage costs
-            total_compute_cost = 0
-            total_photon_cost = 0
-            total_storage_gb = 0
-
-            for transform in st.session_state.conf_transforms:
-                # Map service tier to DBU type and cost
-                dbu_type_map = {
-                    "Databricks Jobs": "Jobs",
-                    "Delta Live Tables (Core)": "DLT_Core",
-                    "Delta Live Tables (Pro)": "DLT_Pro",
-                    "Delta Live Tables (Advanced)": "DLT_Advanced"
-                }
-                dbu_type = dbu_type_map.get(transform['service_tier'], "Jobs")
-                dbu_cost = COSTS["DBU"].get(dbu_type, COSTS["DBU"]["Jobs"])
-
-                # Calculate hours for this transformation in a physical month
-                monthly_hours = (transform['avg_duration'] /
-                                 60) * transform['runs_per_month']
-
-                # Calculate compute cost
-                compute_cost = calculate_dbu_cost(
-                    dbu_cost,
-                    1,  # Cluster size (already factored into dbu_per_hour)
-                    monthly_hours / 30,  # Hours per day
-                    30,  # Days per physical month
-                    transform['dbu_per_hour'])
-
-                # Add to total compute cost
-                total_compute_cost += compute_cost
-
-                # Photon acceleration cost if enabled
-                if transform['photon_enabled']:
-                    photon_cost = calculate_photon_cost(
-                        compute_cost, COSTS["Photon"]["acceleration_factor"])
-                    total_photon_cost += photon_cost
-
-                # Accumulate storage
-                total_storage_gb += transform['storage_gb']
-
-            # Storage cost
-            storage_cost = calculate_storage_cost(
-                total_storage_gb,
-                COSTS["S3"][storage_type],
-                months=1  # For a single physical month
-            )
-
-            # Total cost
-            total_cost = total_compute_cost + storage_cost + total_photon_cost
-
-            # Store in session state
-            st.session_state.all_costs["CONF"] = {
-                "compute_cost":
-                total_compute_cost,
-                "storage_cost":
-                storage_cost,
-                "photon_cost":
-                total_photon_cost,
-                "total_cost":
-                total_cost,
-                "transforms_count":
-                len(st.session_state.conf_transforms),
-                "storage_gb":
-                total_storage_gb,
-                "photon_enabled":
-                any(transform['photon_enabled']
-                    for transform in st.session_state.conf_transforms)
-            }
+        if conf_transforms:
+            st.session_state.all_costs["CONF"] = calculate_conf_cost(
+                {
+                    "mode": "Advanced",
+                    "totals": conf_transforms.totals()
+                }, storage_type)
 
 # PB LAYER CONFIGURATION
 elif layer == "PB":
@@ -1052,39 +900,16 @@ elif layer == "PB":
 
     # Add engine type selection
     engine_type = st.selectbox(
-        "Engine Type", ["SQL", "PySpark", "Materialized View (MV)"],
-        help="Select the type of engine for your data processing")
+        "Engine Type", ENGINE_TYPES,
+        help="Select the type of engine for your data processing",
+        key=layer_widget("pb_engine_type"))
 
     mode = st.radio("Estimation Mode", ["Simple", "Advanced"],
                     horizontal=True,
-                    key="pb_mode")
-
-    # Different cost factors based on engine type
-    engine_cost_factors = {
-        "SQL": {
-            "dbu_rate": COSTS["DBU"]["Enterprise"],
-            "storage_multiplier": 1.0,
-            "performance_factor": 1.0
-        },
-        "PySpark": {
-            "dbu_rate": COSTS["DBU"]["Jobs"],
-            "storage_multiplier":
-            1.2,  # PySpark typically uses more storage due to intermediate results
-            "performance_factor":
-            1.5  # PySpark can be more powerful but uses more resources
-        },
-        "Materialized View (MV)": {
-            "dbu_rate": COSTS["DBU"]["Enterprise"] *
-            0.8,  # Materialized views are precomputed so query time is less
-            "storage_multiplier":
-            2.0,  # MV requires additional storage for the materialized data
-            "performance_factor":
-            0.5  # MV has lower compute needs for querying, but higher for refreshes
-        }
-    }
+                    key=layer_widget("pb_mode"))
 
     # Get engine-specific cost factors
-    engine_factors = engine_cost_factors[engine_type]
+    engine_factors = ENGINE_COST_FACTORS[engine_type]
 
     if mode == "Simple":
         st.markdown('<div class="tab-content">', unsafe_allow_html=True)
@@ -1095,44 +920,36 @@ elif layer == "PB":
                 "Number of Dashboards",
                 min_value=0,
                 value=5,
-                help="Total number of interactive dashboards")
+                help="Total number of interactive dashboards",
+                key=layer_widget("pb_num_dashboards"))
             num_reports = st.number_input("Number of Reports",
                                           min_value=0,
                                           value=10,
-                                          help="Total number of batch reports")
+                                          help="Total number of batch reports",
+                                          key=layer_widget("pb_num_reports"))
 
         with col2:
             active_users = st.number_input(
                 "Number of Active Users",
                 min_value=1,
                 value=20,
-                help="Users actively accessing dashboards")
+                help="Users actively accessing dashboards",
+                key=layer_widget("pb_active_users"))
 
             # Different size naming based on engine type
             if engine_type == "SQL":
-                size_options = [
-                    "Extra Small (1 DBU)", "Small (2 DBUs)", "Medium (4 DBUs)",
-                    "Large (8 DBUs)"
-                ]
                 size_label = "SQL Warehouse Size"
             elif engine_type == "PySpark":
-                size_options = [
-                    "Small Cluster (2 DBUs)", "Medium Cluster (4 DBUs)",
-                    "Large Cluster (8 DBUs)", "X-Large Cluster (16 DBUs)"
-                ]
                 size_label = "Cluster Size"
             else:  # Materialized View
-                size_options = [
-                    "Low Refresh (1 DBU)", "Medium Refresh (2 DBUs)",
-                    "High Refresh (4 DBUs)", "Very High Refresh (8 DBUs)"
-                ]
                 size_label = "MV Refresh Size"
 
             compute_size = st.selectbox(
                 size_label,
-                size_options,
+                list(PB_COMPUTE_SIZES[engine_type].keys()),
                 index=1,  # Default to Small/Medium
-                help=f"Size of compute resources for {engine_type}")
+                help=f"Size of compute resources for {engine_type}",
+                key=layer_widget(f"pb_compute_size_{engine_type}"))
 
         col3, col4 = st.columns(2)
         with col3:
@@ -1140,7 +957,8 @@ elif layer == "PB":
                 "Average Queries per User per Day",
                 min_value=1,
                 value=15,
-                help="How many queries each user runs daily")
+                help="How many queries each user runs daily",
+                key=layer_widget("pb_avg_queries_per_day"))
 
             # Different duration label based on engine type
             if engine_type == "Materialized View (MV)":
@@ -1152,7 +970,8 @@ elif layer == "PB":
                 duration_label,
                 min_value=1,
                 value=8,
-                help="Typical duration of queries or view access")
+                help="Typical duration of queries or view access",
+                key=layer_widget(f"pb_avg_query_duration_{engine_type}"))
 
         with col4:
             if engine_type == "Materialized View (MV)":
@@ -1167,14 +986,16 @@ elif layer == "PB":
                 min_value=1,
                 value=8,
                 help=
-                "How many times reports are run or views are refreshed monthly"
+                "How many times reports are run or views are refreshed monthly",
+                key=layer_widget(f"pb_report_runs_per_month_{engine_type}")
             )
             avg_report_duration = st.number_input(
                 duration_label,
                 min_value=1,
                 value=45,
                 help=
-                "Typical duration for generating reports or refreshing views")
+                "Typical duration for generating reports or refreshing views",
+                key=layer_widget(f"pb_avg_report_duration_{engine_type}"))
 
         # Photon is only available for SQL and partially for PySpark
         if engine_type != "Materialized View (MV)":
@@ -1182,7 +1003,8 @@ elif layer == "PB":
                 "Enable Photon Acceleration",
                 value=True,
                 help=
-                "Photon is Databricks' next-generation query engine that accelerates queries"
+                "Photon is Databricks' next-generation query engine that accelerates queries",
+                key=layer_widget("pb_enable_photon")
             )
         else:
             enable_photon = False
@@ -1191,105 +1013,36 @@ elif layer == "PB":
 
         storage_type = st.selectbox(
             "Storage Tier",
-            list(COSTS["S3"].keys()),
-            help="Select the appropriate S3 storage tier")
+            rate_catalog.options("S3"),
+            help="Select the appropriate S3 storage tier",
+            key=layer_widget("pb_storage_type"))
 
         st.markdown('</div>', unsafe_allow_html=True)
 
         # Calculate costs for PB layer (Simple mode)
-        # Map compute size to DBU based on engine type
-        if engine_type == "SQL":
-            size_map = {
-                "Extra Small (1 DBU)": 1,
-                "Small (2 DBUs)": 2,
-                "Medium (4 DBUs)": 4,
-                "Large (8 DBUs)": 8
-            }
-        elif engine_type == "PySpark":
-            size_map = {
-                "Small Cluster (2 DBUs)": 2,
-                "Medium Cluster (4 DBUs)": 4,
-                "Large Cluster (8 DBUs)": 8,
-                "X-Large Cluster (16 DBUs)": 16
-            }
-        else:  # Materialized View
-            size_map = {
-                "Low Refresh (1 DBU)": 1,
-                "Medium Refresh (2 DBUs)": 2,
-                "High Refresh (4 DBUs)": 4,
-                "Very High Refresh (8 DBUs)": 8
-            }
-
-        compute_dbu = size_map.get(compute_size, 2)
-
-        # Dashboard/Interactive compute cost
-        # Convert query duration from seconds to hours
-        query_hours = (
-            avg_query_duration /
-            3600) * avg_queries_per_day * active_users * 22  # 22 working days
-
-        # Apply engine-specific performance factor
-        query_hours *= engine_factors["performance_factor"]
-
-        dashboard_compute = calculate_dbu_cost(
-            engine_factors["dbu_rate"],
-            1,  # Cluster size (already factored into compute_dbu)
-            query_hours / 22,  # Hours per day
-            22,  # Working days per physical month
-            compute_dbu)
-
-        # Report/Batch compute cost
-        report_hours = (avg_report_duration /
-                        60) * report_runs_per_month * num_reports
-
-        # For Materialized Views, use the same DBU rate but adjust hours based on refresh frequency
-        report_compute = calculate_dbu_cost(
-            engine_factors["dbu_rate"],
-            1,  # Cluster size
-            report_hours / 30,  # Hours per day
-            30,  # Days per physical month
-            compute_dbu  # Use the selected compute size
-        )
-
-        # Total compute cost
-        compute_cost = dashboard_compute + report_compute
-
-        # Photon acceleration cost if enabled (only for SQL and PySpark)
-        photon_cost = 0
-        if enable_photon:
-            photon_cost = calculate_photon_cost(
-                compute_cost, COSTS["Photon"]["acceleration_factor"])
-
-        # Storage calculation with engine-specific multiplier
-        dashboard_storage = num_dashboards * 20 * engine_factors[
-            "storage_multiplier"]  # Approx 20GB per dashboard
-        report_storage = num_reports * 50 * engine_factors[
-            "storage_multiplier"]  # Approx 50GB per report
-        total_storage_gb = dashboard_storage + report_storage
-
-        storage_cost = calculate_storage_cost(
-            total_storage_gb,
-            COSTS["S3"][storage_type],
-            months=1  # For a single physical month
-        )
-
-        # Total cost
-        total_cost = compute_cost + storage_cost + photon_cost
-
-        # Store in session state
-        st.session_state.all_costs["PB"] = {
-            "compute_cost": compute_cost,
-            "storage_cost": storage_cost,
-            "photon_cost": photon_cost,
-            "total_cost": total_cost,
-            "dashboards_count": num_dashboards,
-            "reports_count": num_reports,
-            "storage_gb": total_storage_gb,
-            "photon_enabled": enable_photon,
-            "engine_type": engine_type
+        pb_params = {
+            "engine_type": engine_type,
+            "num_dashboards": num_dashboards,
+            "num_reports": num_reports,
+            "active_users": active_users,
+            "compute_size": compute_size,
+            "avg_queries_per_day": avg_queries_per_day,
+            "avg_query_duration": avg_query_duration,
+            "report_runs_per_month": report_runs_per_month,
+            "avg_report_duration": avg_report_duration,
+            "enable_photon": enable_photon
         }
+        # Keep the inputs for the uncertainty simulation
+        st.session_state.layer_inputs["PB"] = {
+            "params": pb_params,
+            "storage_type": storage_type
+        }
+        st.session_state.all_costs["PB"] = calculate_pb_cost(
+            pb_params, storage_type)
 
     else:  # Advanced mode
+        # Advanced workloads are not simulated
+        st.session_state.layer_inputs.pop("PB", None)
         st.markdown('<div class="tab-content">', unsafe_allow_html=True)
 
         # Dashboard/Interactive Query configuration
@@ -1298,9 +1051,10 @@ elif layer == "PB":
         else:
             st.subheader("Interactive Dashboards")
 
-        # Initialize session state for dashboards if not exists
+        # Initialize the dashboards registry if not exists
         if 'pb_dashboards' not in st.session_state:
-            st.session_state.pb_dashboards = []
+            st.session_state.pb_dashboards = WorkloadRegistry("dashboard")
+        pb_dashboards = st.session_state.pb_dashboards
 
         # Form to add new dashboards
         with st.form("add_dashboard_form"):
@@ -1311,32 +1065,20 @@ elif layer == "PB":
                         "View Name",
                         help="Unique name for this materialized view")
                     size_label = "MV Access Tier"
-                    size_options = [
-                        "Low Usage (1 DBU)", "Medium Usage (2 DBUs)",
-                        "High Usage (4 DBUs)", "Very High Usage (8 DBUs)"
-                    ]
                 elif engine_type == "PySpark":
                     dash_name = st.text_input(
                         "Dashboard Name",
                         help="Unique name for this dashboard")
                     size_label = "Cluster Size"
-                    size_options = [
-                        "Small Cluster (2 DBUs)", "Medium Cluster (4 DBUs)",
-                        "Large Cluster (8 DBUs)", "X-Large Cluster (16 DBUs)"
-                    ]
                 else:  # SQL
                     dash_name = st.text_input(
                         "Dashboard Name",
                         help="Unique name for this dashboard")
                     size_label = "SQL Warehouse Size"
-                    size_options = [
-                        "Extra Small (1 DBU)", "Small (2 DBUs)",
-                        "Medium (4 DBUs)", "Large (8 DBUs)"
-                    ]
 
                 compute_size = st.selectbox(
                     size_label,
-                    size_options,
+                    list(PB_DASHBOARD_SIZES[engine_type].keys()),
                     index=1,  # Default to Small/Medium
                     help=f"Compute resources for this {engine_type} dashboard")
 
@@ -1344,11 +1086,13 @@ elif layer == "PB":
                 active_users = st.number_input(
                     "Active Users",
                     min_value=1,
+                    max_value=FIELD_RANGES["active_users"][1],
                     value=10,
                     help="Users actively accessing this dashboard/view")
                 queries_per_day = st.number_input(
                     "Queries per User per Day",
                     min_value=1,
+                    max_value=FIELD_RANGES["queries_per_day"][1],
                     value=10,
                     help="How many queries each user runs daily")
 
@@ -1378,29 +1122,21 @@ elif layer == "PB":
                     f"Add {'View' if engine_type == 'Materialized View (MV)' else 'Dashboard'}"
             ):
                 if dash_name:
-                    if dash_name in [
-                            d['name'] for d in st.session_state.pb_dashboards
-                    ]:
+                    if dash_name in pb_dashboards:
                         st.error(
                             f"{'View' if engine_type == 'Materialized View (MV)' else 'Dashboard'} with this name already exists!"
                         )
                     else:
-                        st.session_state.pb_dashboards.append({
-                            'name':
-                            dash_name,
-                            'compute_size':
-                            compute_size,
-                            'active_users':
-                            active_users,
-                            'queries_per_day':
-                            queries_per_day,
-                            'avg_query_duration':
-                            avg_query_duration,
-                            'photon_enabled':
-                            enable_photon_dash,
-                            'engine_type':
-                            engine_type
-                        })
+                        dashboard = {
+                            'name': dash_name,
+                            'compute_size': compute_size,
+                            'active_users': active_users,
+                            'queries_per_day': queries_per_day,
+                            'avg_query_duration': avg_query_duration,
+                            'photon_enabled': enable_photon_dash,
+                            'engine_type': engine_type
+                        }
+                        pb_dashboards.add(dashboard)
                         st.success(
                             f"{'View' if engine_type == 'Materialized View (MV)' else 'Dashboard'} '{dash_name}' added!"
                         )
@@ -1409,107 +1145,39 @@ elif layer == "PB":
                         f"Please enter a {'view' if engine_type == 'Materialized View (MV)' else 'dashboard'} name"
                     )
 
+        workload_upload(
+            pb_dashboards,
+            "Views" if engine_type == "Materialized View (MV)" else "Dashboards",
+            "dashboards", engine_type)
+
         # Display added dashboards
-        if st.session_state.pb_dashboards:
+        if pb_dashboards:
             st.caption(
                 f"Your {'Views' if engine_type == 'Materialized View (MV)' else 'Dashboards'}"
             )
 
             # Filter dashboards by current engine type
-            current_engine_dashboards = [
-                d for d in st.session_state.pb_dashboards
-                if d.get('engine_type') == engine_type
-            ]
-
-            if current_engine_dashboards:
-                # Create DataFrame with costs calculation
-                dashboard_data = []
-                for dash in current_engine_dashboards:
-                    # Map compute size to DBU based on engine type
-                    if dash['engine_type'] == "SQL":
-                        size_map = {
-                            "Extra Small (1 DBU)": 1,
-                            "Small (2 DBUs)": 2,
-                            "Medium (4 DBUs)": 4,
-                            "Large (8 DBUs)": 8
-                        }
-                    elif dash['engine_type'] == "PySpark":
-                        size_map = {
-                            "Small Cluster (2 DBUs)": 2,
-                            "Medium Cluster (4 DBUs)": 4,
-                            "Large Cluster (8 DBUs)": 8,
-                            "X-Large Cluster (16 DBUs)": 16
-                        }
-                    else:  # Materialized View
-                        size_map = {
-                            "Low Usage (1 DBU)": 1,
-                            "Medium Usage (2 DBUs)": 2,
-                            "High Usage (4 DBUs)": 4,
-                            "Very High Usage (8 DBUs)": 8
-                        }
-
-                    compute_dbu = size_map.get(dash['compute_size'], 2)
-
-                    # Apply engine-specific performance factor
-                    engine_perf_factor = engine_cost_factors[
-                        dash['engine_type']]["performance_factor"]
-
-                    # Convert query duration from seconds to hours and apply performance factor
-                    query_hours = (
-                        dash['avg_query_duration'] /
-                        3600) * dash['queries_per_day'] * dash[
-                            'active_users'] * 22 * engine_perf_factor
-
-                    # Use engine-specific DBU rate
-                    engine_dbu_rate = engine_cost_factors[
-                        dash['engine_type']]["dbu_rate"]
-
-                    # Dashboard compute cost
-                    compute_cost = calculate_dbu_cost(
-                        engine_dbu_rate,
-                        1,  # Cluster size (already factored into compute_dbu)
-                        query_hours / 22,  # Hours per day
-                        22,  # Working days per physical month
-                        compute_dbu)
-
-                    # Photon acceleration cost if enabled and applicable
-                    photon_cost = 0
-                    if dash['photon_enabled'] and dash[
-                            'engine_type'] != "Materialized View (MV)":
-                        photon_cost = calculate_photon_cost(
-                            compute_cost,
-                            COSTS["Photon"]["acceleration_factor"])
-
-                    dashboard_data.append({
-                        'Name':
-                        dash['name'],
-                        'Compute':
-                        dash['compute_size'],
-                        'Users':
-                        dash['active_users'],
-                        'Queries/Day':
-                        dash['queries_per_day'],
-                        'Duration (s)':
-                        dash['avg_query_duration'],
-                        'Photon':
-                        'Enabled' if dash.get('photon_enabled', False)
-                        and dash['engine_type'] != "Materialized View (MV)"
-                        else 'Disabled',
-                        'Monthly Cost ($)':
-                        round(compute_cost + photon_cost, 2)
-                    })
-
-                df_dashboards = pd.DataFrame(dashboard_data)
+            dashboards = pb_dashboards.frame('engine_type', engine_type)
+
+            if not dashboards.empty:
+                df_dashboards = pd.DataFrame({
+                    'Name': dashboards['name'],
+                    'Compute': dashboards['compute_size'],
+                    'Users': dashboards['active_users'],
+                    'Queries/Day': dashboards['queries_per_day'],
+                    'Duration (s)': dashboards['avg_query_duration'],
+                    'Photon': dashboards['photon'].map(PHOTON_LABELS),
+                    'Monthly Cost ($)':
+                    (dashboards['compute_cost'] +
+                     dashboards['photon_cost']).round(2)
+                })
                 st.dataframe(df_dashboards)
 
                 if st.button(
                         f"Clear All {engine_type} {'Views' if engine_type == 'Materialized View (MV)' else 'Dashboards'}",
                         key="clear_dashboards"):
                     # Only clear dashboards of the current engine type
-                    st.session_state.pb_dashboards = [
-                        d for d in st.session_state.pb_dashboards
-                        if d.get('engine_type') != engine_type
-                    ]
+                    pb_dashboards.clear('engine_type', engine_type)
                     st.rerun()
             else:
                 st.info(
@@ -1522,9 +1190,10 @@ elif layer == "PB":
         else:
             st.subheader("Batch Reports")
 
-        # Initialize session state for reports if not exists
+        # Initialize the reports registry if not exists
         if 'pb_reports' not in st.session_state:
-            st.session_state.pb_reports = []
+            st.session_state.pb_reports = WorkloadRegistry("report")
+        pb_reports = st.session_state.pb_reports
 
         # Form to add new reports
         with st.form("add_report_form"):
@@ -1543,6 +1212,7 @@ elif layer == "PB":
                 runs_per_month = st.number_input(
                     runs_label,
                     min_value=1,
+                    max_value=FIELD_RANGES["runs_per_month"][1],
                     value=4,
                     help=
                     f"How many times this {'view is refreshed' if engine_type == 'Materialized View (MV)' else 'report runs'} monthly"
@@ -1591,27 +1261,20 @@ elif layer == "PB":
                     f"Add {'Refresh Job' if engine_type == 'Materialized View (MV)' else 'Report'}"
             ):
                 if report_name:
-                    if report_name in [
-                            r['name'] for r in st.session_state.pb_reports
-                    ]:
+                    if report_name in pb_reports:
                         st.error(
                             f"{'Refresh job' if engine_type == 'Materialized View (MV)' else 'Report'} with this name already exists!"
                         )
                     else:
-                        st.session_state.pb_reports.append({
-                            'name':
-                            report_name,
-                            'runs_per_month':
-                            runs_per_month,
-                            'gen_duration':
-                            gen_duration,
-                            'dbu_per_hour':
-                            dbu_per_hour,
-                            'photon_enabled':
-                            enable_photon_report,
-                            'engine_type':
-                            engine_type
-                        })
+                        report = {
+                            'name': report_name,
+                            'runs_per_month': runs_per_month,
+                            'gen_duration': gen_duration,
+                            'dbu_per_hour': dbu_per_hour,
+                            'photon_enabled': enable_photon_report,
+                            'engine_type': engine_type
+                        }
+                        pb_reports.add(report)
                         st.success(
                             f"{'Refresh job' if engine_type == 'Materialized View (MV)' else 'Report'} '{report_name}' added!"
                         )
@@ -1620,74 +1283,37 @@ elif layer == "PB":
                         f"Please enter a {'refresh job' if engine_type == 'Materialized View (MV)' else 'report'} name"
                     )
 
+        workload_upload(
+            pb_reports, "Refresh Jobs"
+            if engine_type == "Materialized View (MV)" else "Reports",
+            "reports", engine_type)
+
         # Display added reports
-        if st.session_state.pb_reports:
+        if pb_reports:
             st.caption(
                 f"Your {'Refresh Jobs' if engine_type == 'Materialized View (MV)' else 'Reports'}"
             )
 
             # Filter reports by current engine type
-            current_engine_reports = [
-                r for r in st.session_state.pb_reports
-                if r.get('engine_type') == engine_type
-            ]
-
-            if current_engine_reports:
-                # Create DataFrame with costs calculation
-                report_data = []
-                for report in current_engine_reports:
-                    # Convert duration to hours
-                    report_hours = (report['gen_duration'] /
-                                    60) * report['runs_per_month']
-
-                    # Use engine-specific DBU rate
-                    engine_dbu_rate = engine_cost_factors[
-                        report['engine_type']]["dbu_rate"]
-
-                    # Report compute cost
-                    compute_cost = calculate_dbu_cost(
-                        engine_dbu_rate,
-                        1,  # Cluster size
-                        report_hours / 30,  # Hours per day
-                        30,  # Days per physical month
-                        report['dbu_per_hour'])
-
-                    # Photon acceleration cost if enabled and applicable
-                    photon_cost = 0
-                    if report['photon_enabled'] and report[
-                            'engine_type'] != "Materialized View (MV)":
-                        photon_cost = calculate_photon_cost(
-                            compute_cost,
-                            COSTS["Photon"]["acceleration_factor"])
-
-                    report_data.append({
-                        'Name':
-                        report['name'],
-                        'Runs/Physical Month':
-                        report['runs_per_month'],
-                        'Duration (min)':
-                        report['gen_duration'],
-                        'DBUs/Hour':
-                        report['dbu_per_hour'],
-                        'Photon':
-                        'Enabled' if report.get('photon_enabled', False)
-                        and report['engine_type'] != "Materialized View (MV)"
-                        else 'Disabled',
-                        'Monthly Cost ($)':
-                        round(compute_cost + photon_cost, 2)
-                    })
-
-                df_reports = pd.DataFrame(report_data)
+            reports = pb_reports.frame('engine_type', engine_type)
+
+            if not reports.empty:
+                df_reports = pd.DataFrame({
+                    'Name': reports['name'],
+                    'Runs/Physical Month': reports['runs_per_month'],
+                    'Duration (min)': reports['gen_duration'],
+                    'DBUs/Hour': reports['dbu_per_hour'],
+                    'Photon': reports['photon'].map(PHOTON_LABELS),
+                    'Monthly Cost ($)':
+                    (reports['compute_cost'] + reports['photon_cost']).round(2)
+                })
                 st.dataframe(df_reports)
 
                 if st.button(
                         f"Clear All {engine_type} {'Refresh Jobs' if engine_type == 'Materialized View (MV)' else 'Reports'}",
                         key="clear_reports"):
                     # Only clear reports of the current engine type
-                    st.session_state.pb_reports = [
-                        r for r in st.session_state.pb_reports
-                        if r.get('engine_type') != engine_type
-                    ]
+                    pb_reports.clear('engine_type', engine_type)
                     st.rerun()
             else:
                 st.info(
@@ -1709,7 +1335,8 @@ elif layer == "PB":
                 min_value=1.0,
                 value=20.0 * engine_factors["storage_multiplier"],
                 help=
-                f"Average storage space per {'view' if engine_type == 'Materialized View (MV)' else 'dashboard'}"
+                f"Average storage space per {'view' if engine_type == 'Materialized View (MV)' else 'dashboard'}",
+                key=layer_widget(f"pb_dashboard_storage_per_dash_{engine_type}")
             )
 
         with col2:
@@ -1723,165 +1350,39 @@ elif layer == "PB":
                 min_value=1.0,
                 value=50.0 * engine_factors["storage_multiplier"],
                 help=
-                f"Average storage space per {'refresh job' if engine_type == 'Materialized View (MV)' else 'report'}"
+                f"Average storage space per {'refresh job' if engine_type == 'Materialized View (MV)' else 'report'}",
+                key=layer_widget(f"pb_report_storage_per_report_{engine_type}")
             )
 
         storage_type = st.selectbox(
             "Storage Tier",
-            list(COSTS["S3"].keys()),
-            help="Select the appropriate S3 storage tier")
+            rate_catalog.options("S3"),
+            help="Select the appropriate S3 storage tier",
+            key=layer_widget("pb_storage_type"))
 
         st.markdown('</div>', unsafe_allow_html=True)
 
         # Calculate costs for PB layer (Advanced mode)
-        # Filter dashboards and reports by current engine type
-        current_engine_dashboards = [
-            d for d in st.session_state.pb_dashboards
-            if d.get('engine_type') == engine_type
-        ]
-        current_engine_reports = [
-            r for r in st.session_state.pb_reports
-            if r.get('engine_type') == engine_type
-        ]
-
-        dashboard_count = len(current_engine_dashboards)
-        report_count = len(current_engine_reports)
-
-        if dashboard_count > 0 or report_count > 0:
-            # Dashboard compute and photon costs
-            total_dashboard_compute = 0
-            total_dashboard_photon = 0
-
-            for dash in current_engine_dashboards:
-                # Map compute size to DBU based on engine type
-                if dash['engine_type'] == "SQL":
-                    size_map = {
-                        "Extra Small (1 DBU)": 1,
-                        "Small (2 DBUs)": 2,
-                        "Medium (4 DBUs)": 4,
-                        "Large (8 DBUs)": 8
-                    }
-                elif dash['engine_type'] == "PySpark":
-                    size_map = {
-                        "Small Cluster (2 DBUs)": 2,
-                        "Medium Cluster (4 DBUs)": 4,
-                        "Large Cluster (8 DBUs)": 8,
-                        "X-Large Cluster (16 DBUs)": 16
-                    }
-                else:  # Materialized View
-                    size_map = {
-                        "Low Usage (1 DBU)": 1,
-                        "Medium Usage (2 DBUs)": 2,
-                        "High Usage (4 DBUs)": 4,
-                        "Very High Usage (8 DBUs)": 8
-                    }
-
-                compute_dbu = size_map.get(dash['compute_size'], 2)
-
-                # Apply engine-specific performance factor
-                engine_perf_factor = engine_cost_factors[
-                    dash['engine_type']]["performance_factor"]
-
-                # Convert query duration from seconds to hours and apply performance factor
-                query_hours = (dash['avg_query_duration'] /
-                               3600) * dash['queries_per_day'] * dash[
-                                   'active_users'] * 22 * engine_perf_factor
-
-                # Use engine-specific DBU rate
-                engine_dbu_rate = engine_cost_factors[
-                    dash['engine_type']]["dbu_rate"]
-
-                # Dashboard compute cost
-                compute_cost = calculate_dbu_cost(
-                    engine_dbu_rate,
-                    1,  # Cluster size (already factored into compute_dbu)
-                    query_hours / 22,  # Hours per day
-                    22,  # Working days per physical month
-                    compute_dbu)
-
-                total_dashboard_compute += compute_cost
-
-                # Photon acceleration cost if enabled and applicable
-                if dash.get(
-                        'photon_enabled', False
-                ) and dash['engine_type'] != "Materialized View (MV)":
-                    photon_cost = calculate_photon_cost(
-                        compute_cost, COSTS["Photon"]["acceleration_factor"])
-                    total_dashboard_photon += photon_cost
-
-            # Report compute and photon costs
-            total_report_compute = 0
-            total_report_photon = 0
-
-            for report in current_engine_reports:
-                # Convert duration to hours
-                report_hours = (report['gen_duration'] /
-                                60) * report['runs_per_month']
-
-                # Use engine-specific DBU rate
-                engine_dbu_rate = engine_cost_factors[
-                    report['engine_type']]["dbu_rate"]
-
-                # Report compute cost
-                compute_cost = calculate_dbu_cost(
-                    engine_dbu_rate,
-                    1,  # Cluster size
-                    report_hours / 30,  # Hours per day
-                    30,  # Days per physical month
-                    report['dbu_per_hour'])
-
-                total_report_compute += compute_cost
-
-                # Photon acceleration cost if enabled and applicable
-                if report.get(
-                        'photon_enabled', False
-                ) and report['engine_type'] != "Materialized View (MV)":
-                    photon_cost = calculate_photon_cost(
-                        compute_cost, COSTS["Photon"]["acceleration_factor"])
-                    total_report_photon += photon_cost
-
-            # Storage calculation
-            dashboard_storage = dashboard_count * dashboard_storage_per_dash
-            report_storage = report_count * report_storage_per_report
-            total_storage_gb = dashboard_storage + report_storage
-
-            storage_cost = calculate_storage_cost(
-                total_storage_gb,
-                COSTS["S3"][storage_type],
-                months=1  # For a single physical month
-            )
-
-            # Total costs
-            total_compute = total_dashboard_compute + total_report_compute
-            total_photon = total_dashboard_photon + total_report_photon
-            total_cost = total_compute + storage_cost + total_photon
-
-            # Store in session state
-            st.session_state.all_costs["PB"] = {
-                "compute_cost":
-                total_compute,
-                "storage_cost":
-                storage_cost,
-                "photon_cost":
-                total_photon,
-                "total_cost":
-                total_cost,
-                "dashboards_count":
-                dashboard_count,
-                "reports_count":
-                report_count,
-                "storage_gb":
-                total_storage_gb,
-                "photon_enabled": (dashboard_count > 0 and any(
-                    dash.get('photon_enabled', False)
-                    for dash in current_engine_dashboards))
-                or (report_count > 0 and any(
-                    report.get('photon_enabled', False)
-                    for report in current_engine_reports)),
-                "engine_type":
-                engine_type
-            }
+        engine_dashboards = pb_dashboards.totals(engine_type)
+        engine_reports = pb_reports.totals(engine_type)
+        if engine_dashboards["count"] or engine_reports["count"]:
+            st.session_state.all_costs["PB"] = calculate_pb_cost(
+                {
+                    "mode": "Advanced",
+                    "engine_type": engine_type,
+                    "dashboard_totals": engine_dashboards,
+                    "report_totals": engine_reports,
+                    "dashboard_storage_gb": dashboard_storage_per_dash,
+                    "report_storage_gb": report_storage_per_report
+                }, storage_type)
+
+# Keep the shown layer's inputs for when it is shown again and for saving
+st.session_state.layer_widgets[layer] = {
+    key: st.session_state[key]
+    for key in shown_widgets
+}
 
+profiler.stage("summary")
 # COST SUMMARY
 st.markdown("---")
 st.header("Cost Summary")
@@ -2048,135 +1549,503 @@ if layers_with_costs:
         """,
                     unsafe_allow_html=True)
 
+    profiler.stage("simulation")
+    # Monte Carlo uncertainty bands for layers priced in Simple mode
+    st.subheader("Cost Uncertainty")
+    simulated_layers = [
+        layer_name for layer_name in layers_with_costs
+        if layer_name in st.session_state.layer_inputs
+    ]
+    if not simulated_layers:
+        st.info("Configure a layer in Simple mode to simulate its cost range.")
+    elif st.toggle("Simulate cost ranges (Monte Carlo)",
+                   key="run_simulation",
+                   help="Give uncertain inputs a distribution instead of a "
+                   "single estimate and see P50/P90/P99 monthly cost"):
+        input_options = {
+            f"{layer_name}: {label}": (layer_name, param)
+            for layer_name in simulated_layers
+            for param, label in SIMULATED_INPUTS[layer_name].items()
+        }
+        uncertain_inputs = st.multiselect(
+            "Uncertain Inputs",
+            list(input_options),
+            key="uncertain_inputs",
+            help="Inputs not selected keep their single estimate")
+
+        distributions = {}
+        try:
+            for option in uncertain_inputs:
+                layer_name, param = input_options[option]
+                estimate = float(
+                    st.session_state.layer_inputs[layer_name]["params"][param])
+                key = f"sim_{layer_name}_{param}"
+                dist_col, param_col1, param_col2 = st.columns(3)
+                with dist_col:
+                    dist = st.selectbox(option,
+                                        list(DISTRIBUTIONS),
+                                        format_func=DISTRIBUTIONS.get,
+                                        key=f"{key}_dist")
+                if dist == "triangular":
+                    with param_col1:
+                        low = st.number_input("Low",
+                                              min_value=0.0,
+                                              value=estimate * 0.8,
+                                              key=f"{key}_low")
+                    with param_col2:
+                        high = st.number_input("High",
+                                               min_value=0.0,
+                                               value=estimate * 1.5,
+                                               key=f"{key}_high")
+                    spec = {
+                        "dist": dist,
+                        "low": low,
+                        "mode": estimate,
+                        "high": high
+                    }
+                elif dist == "lognormal":
+                    param_col1.caption(f"Median: {estimate:g} (current estimate)")
+                    with param_col2:
+                        p90 = st.number_input("P90",
+                                              min_value=0.0,
+                                              value=estimate * 1.5,
+                                              key=f"{key}_p90")
+                    spec = {"dist": dist, "median": estimate, "p90": p90}
+                else:
+                    with param_col1:
+                        history = st.text_input(
+                            "Observed Values",
+                            value=f"{estimate:g}",
+                            help="Comma-separated history, e.g. past months",
+                            key=f"{key}_history")
+                    spec = {
+                        "dist": dist,
+                        "values": [
+                            float(value) for value in history.split(",")
+                            if value.strip()
+                        ]
+                    }
+                distributions.setdefault(layer_name, {})[param] = spec
+
+            draws = st.number_input("Trials",
+                                    min_value=1_000,
+                                    max_value=1_000_000,
+                                    value=DEFAULT_DRAWS,
+                                    step=10_000)
+            # Fixed seed so reruns show the same bands for the same inputs
+            bands = percentile_bands(
+                simulate_costs(st.session_state.all_costs,
+                               st.session_state.layer_inputs,
+                               distributions,
+                               draws=int(draws),
+                               seed=0))
+        except ValueError as e:
+            st.error(f"Cannot run the simulation: {e}")
+        else:
+            total_band = bands.set_index("Layer").loc["TOTAL"]
+            band_cols = st.columns(len(PERCENTILES))
+            for band_col, percentile in zip(band_cols, PERCENTILES):
+                band_col.metric(f"P{percentile} Monthly Cost",
+                                f"${total_band[f'P{percentile}']:,.2f}")
+            st.dataframe(bands,
+                         use_container_width=True,
+                         hide_index=True,
+                         column_config={
+                             column: st.column_config.NumberColumn(
+                                 f"{column} ($/physical mo)", format="$%.2f")
+                             for column in bands.columns if column != "Layer"
+                         })
+            st.caption("Layers in Advanced mode keep their current total in "
+                       "every trial.")
+
+    profiler.stage("export")
     # Export options
     st.subheader("Export Options")
 
-    if st.button("Generate Excel Report"):
-        # Create a Pandas Excel writer with XlsxWriter
-        output = BytesIO()
-        writer = pd.ExcelWriter(output, engine='xlsxwriter')
-
-        # Write each layer's data to a different worksheet
-        for layer_name in layers_with_costs:
-            costs = st.session_state.all_costs[layer_name]
-
-            # Create a DataFrame for this layer
-            if layer_name == "Landing":
-                df = pd.DataFrame({
-                    'Metric': [
-                        'Storage Cost', 'Storage Size', 'Storage Tier',
-                        'Retention Policy'
-                    ],
-                    'Value': [
-                        f"${costs.get('storage_cost_per_month', 0):.2f}/physical month",
-                        f"{costs.get('storage_gb', 0):.1f} GB",
-                        costs.get('storage_tier', 'Standard'),
-                        costs.get('retention_policy', '30 days')
-                    ]
-                })
-            else:
-                metrics = ['Total Cost', 'Compute Cost', 'Storage Cost']
-                values = [
-                    f"${costs.get('total_cost', 0):.2f}/physical month",
-                    f"${costs.get('compute_cost', 0):.2f}/physical month",
-                    f"${costs.get('storage_cost', 0):.2f}/physical month"
-                ]
-
-                if "photon_cost" in costs and costs["photon_cost"] > 0:
-                    metrics.append('Photon Acceleration')
-                    values.append(
-                        f"${costs['photon_cost']:.2f}/physical month")
-
-                metrics.append('Storage Size')
-                values.append(f"{costs.get('storage_gb', 0):.1f} GB")
-
-                # Add specific metrics based on layer
-                if layer_name == "RAW" and "jobs_count" in costs:
-                    metrics.append('Jobs Count')
-                    values.append(str(costs['jobs_count']))
-                elif layer_name == "CONF" and "transforms_count" in costs:
-                    metrics.append('Transformations Count')
-                    values.append(str(costs['transforms_count']))
-                elif layer_name == "PB":
-                    if "dashboards_count" in costs:
-                        metrics.append('Dashboards Count')
-                        values.append(str(costs['dashboards_count']))
-                    if "reports_count" in costs:
-                        metrics.append('Reports Count')
-                        values.append(str(costs['reports_count']))
-
-                df = pd.DataFrame({'Metric': metrics, 'Value': values})
-
-            # Write the dataframe to an Excel sheet
-            df.to_excel(writer, sheet_name=layer_name, index=False)
-
-        # Add a summary sheet
-        summary_data = {
-            'Layer':
-            layers_with_costs + ['TOTAL'],
-            'Monthly Cost': [
-                st.session_state.all_costs[layer].get(
-                    'total_cost', st.session_state.all_costs[layer].get(
-                        'storage_cost_per_month', 0))
-                for layer in layers_with_costs
-            ] + [total_monthly_cost]
-        }
-        summary_df = pd.DataFrame(summary_data)
-        summary_df.to_excel(writer, sheet_name='Summary', index=False)
-
-        # Close the Pandas Excel writer and output the Excel file
-        writer.close()
-        excel_data = output.getvalue()
-
-        # Create a download button
-        st.download_button(
-            label="Download Excel Report",
-            data=excel_data,
-            file_name="databricks_cost_estimate.xlsx",
-            mime=
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+    export_format = st.radio("Report Format",
+                             list(EXPORT_FORMATS),
+                             horizontal=True,
+                             help="Excel workbook, or a zip of CSV/Parquet "
+                             "files with one file per sheet")
+
+    if st.button(f"Generate {export_format} Report"):
+        # Layer, summary and per-workload detail sheets, written straight
+        # to a temporary file
+        sheets = report_sheets(st.session_state.all_costs, layers_with_costs,
+                               total_monthly_cost, st.session_state)
+        report_path, extension, mime = export_report(sheets, export_format)
+        try:
+            with open(report_path, "rb") as report_file:
+                # Create a download button
+                st.download_button(
+                    label=f"Download {export_format} Report",
+                    data=report_file,
+                    file_name=f"databricks_cost_estimate{extension}",
+                    mime=mime)
+        finally:
+            os.remove(report_path)
 else:
     st.info("Configure at least one layer to see the cost summary.")
 
+profiler.stage("scenarios")
+# Scenario comparison
+st.markdown("---")
+st.markdown('<h2 class="header">Scenario Comparison</h2>',
+            unsafe_allow_html=True)
+
+if 'scenarios' not in st.session_state:
+    st.session_state.scenarios = {}
+
+with st.form("save_scenario_form"):
+    scenario_name = st.text_input(
+        "Scenario Name",
+        placeholder="e.g. r5 with Photon",
+        help="Save the current configuration of every layer under this name")
+    save_scenario = st.form_submit_button("Save Current Configuration")
+
+if save_scenario:
+    if not scenario_name:
+        st.error("Scenario name is required")
+    elif not layers_with_costs:
+        st.error("Configure at least one layer before saving a scenario")
+    else:
+        st.session_state.scenarios[scenario_name] = snapshot(
+            st.session_state.all_costs, st.session_state.layer_inputs)
+        st.success(f"Saved scenario '{scenario_name}'")
+
+money_columns = {
+    column: st.column_config.NumberColumn(f"{column} ($/physical mo)",
+                                          format="$%.2f")
+    for column in ["Landing", "RAW", "CONF", "PB", "Total"]
+}
+
+if st.session_state.scenarios:
+    # Click a column header to sort
+    st.dataframe(compare_scenarios(st.session_state.scenarios),
+                 use_container_width=True,
+                 hide_index=True,
+                 column_config=money_columns)
+    if st.button("Clear Scenarios"):
+        st.session_state.scenarios = {}
+        st.rerun()
+
+with st.expander("Scenario Grid"):
+    if not st.session_state.layer_inputs:
+        st.info("Configure a layer in Simple mode to price a scenario grid.")
+    else:
+        st.caption("Every combination of the chosen options is priced from "
+                   "the current Simple mode inputs. Options left empty keep "
+                   "their current value; Advanced mode layers are fixed.")
+        grid_col1, grid_col2 = st.columns(2)
+        with grid_col1:
+            grid_instances = st.multiselect("Instance Types",
+                                            rate_catalog.options("EC2"))
+            grid_tiers = st.multiselect("Storage Tiers",
+                                        rate_catalog.options("S3"))
+        with grid_col2:
+            grid_services = st.multiselect("Service Tiers",
+                                           list(SERVICE_TIERS))
+            grid_photon = st.multiselect("Photon", [True, False],
+                                         format_func=PHOTON_LABELS.get)
+
+        grid_options = {
+            "instance_type": grid_instances,
+            "storage_type": grid_tiers,
+            "service_tier": grid_services,
+            "enable_photon": grid_photon
+        }
+        if any(grid_options.values()):
+            try:
+                grid = price_grid(st.session_state.all_costs,
+                                  st.session_state.layer_inputs, grid_options)
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                if "Photon" in grid:
+                    grid["Photon"] = grid["Photon"].map(PHOTON_LABELS)
+                st.write(f"{len(grid):,} scenarios, cheapest first")
+                st.dataframe(grid,
+                             use_container_width=True,
+                             hide_index=True,
+                             column_config=money_columns)
+
+profiler.stage("optimizer")
+# Cheapest configuration per Advanced mode workload
+registries = {
+    sheet_name: st.session_state[key]
+    for sheet_name, key in DETAIL_SHEETS.items()
+    if st.session_state.get(key)
+}
+with st.expander("Cost Optimizer"):
+    if not registries:
+        st.info("Add workloads in Advanced mode to optimize them.")
+    else:
+        st.caption("Searches every instance type, service tier, engine, "
+                   "compute size, retention and Photon setting for the "
+                   "cheapest configuration of each workload, the fastest "
+                   "of equally cheap ones. Runtimes scale with instance "
+                   "size, compute size and engine performance; Photon is "
+                   "assumed to run {:g}x as fast.".format(
+                       get_rate_catalog().rate("Photon", "runtime_speedup")))
+        opt_col1, opt_col2 = st.columns(2)
+        with opt_col1:
+            max_runtime = st.number_input(
+                "Max Runtime (minutes, 0 = no limit)",
+                min_value=0.0,
+                value=0.0,
+                help="Jobs, transformations and reports")
+            max_query = st.number_input("Max Query Duration (seconds, 0 = no limit)",
+                                        min_value=0.0,
+                                        value=0.0,
+                                        help="PB dashboards and views")
+            min_retention = st.number_input(
+                "Min Retention (months, 0 = keep each table's)",
+                min_value=0.0,
+                value=0.0,
+                help="Landing tables")
+        with opt_col2:
+            opt_instances = st.multiselect(
+                "Instance Types to Consider",
+                rate_catalog.options("EC2"),
+                help="Leave empty to consider every instance type")
+            opt_tiers = st.multiselect(
+                "Landing Storage Tiers to Consider",
+                rate_catalog.options("S3"),
+                help="Leave empty to keep the current tier")
+            require_photon = st.checkbox("Require Photon")
+            allow_engine_change = st.checkbox(
+                "Allow SQL / PySpark Engine Changes")
+
+        if st.button("Optimize Workloads"):
+            constraints = {
+                "max_runtime_minutes": max_runtime or None,
+                "max_query_seconds": max_query or None,
+                "require_photon": require_photon,
+                "allow_engine_change": allow_engine_change,
+                "min_retention_months": min_retention or None,
+                "storage_tiers": opt_tiers or None,
+                "instance_types": opt_instances or None
+            }
+            landing_tier = st.session_state.all_costs["Landing"].get(
+                "storage_tier", "Standard")
+            results = {
+                sheet_name: optimize_workloads(registry.kind,
+                                               registry.frame(), constraints,
+                                               landing_tier)
+                for sheet_name, registry in registries.items()
+            }
+            current_total = sum(result["current_cost"].sum()
+                                for result in results.values())
+            optimized_total = sum(result["optimized_cost"].sum()
+                                  for result in results.values())
+            sum_col1, sum_col2, sum_col3 = st.columns(3)
+            sum_col1.metric("Current Workload Cost", f"${current_total:,.2f}")
+            sum_col2.metric("Optimized Workload Cost",
+                            f"${optimized_total:,.2f}")
+            sum_col3.metric("Monthly Savings",
+                            f"${current_total - optimized_total:,.2f}")
+            for sheet_name, result in results.items():
+                st.markdown(f"**{sheet_name}**")
+                if not result["feasible"].all():
+                    st.warning(
+                        f"{(~result['feasible']).sum()} workload(s) cannot "
+                        "meet the constraints and keep their configuration")
+                st.dataframe(result.sort_values("savings", ascending=False),
+                             use_container_width=True,
+                             hide_index=True,
+                             column_config={
+                                 column: st.column_config.NumberColumn(
+                                     format="$%.2f")
+                                 for column in ("current_cost",
+                                                "optimized_cost", "savings")
+                             })
+
+profiler.stage("projection")
+# Month-by-month projection with growth, retention and lifecycle tiers
+with st.expander("Cost Projection"):
+    projected_layers = [
+        layer_name for layer_name, costs in st.session_state.all_costs.items()
+        if costs
+    ]
+    if not projected_layers:
+        st.info("Configure at least one layer to project its cost.")
+    else:
+        projection_months = st.slider("Months to Project", 1, MAX_MONTHS, 12)
+        landing_inputs = st.session_state.layer_inputs.get("Landing")
+        growth_cols = st.columns(len(projected_layers))
+        growth_rates = {}
+        for growth_col, layer_name in zip(growth_cols, projected_layers):
+            default_growth = (float(landing_inputs["params"]["file_growth"])
+                              if layer_name == "Landing" and landing_inputs
+                              else 0.0)
+            growth_rates[layer_name] = growth_col.number_input(
+                f"{layer_name} Growth (%/month)",
+                min_value=-100.0,
+                max_value=100.0,
+                value=default_growth,
+                key=f"projection_growth_{layer_name}")
+
+        transitions = []
+        if "Landing" in projected_layers and st.checkbox(
+                "Apply S3 lifecycle transitions to Landing data"):
+            for step in (1, 2):
+                tier_col, age_col = st.columns(2)
+                with tier_col:
+                    transition_tier = st.selectbox(
+                        f"Transition {step} Tier",
+                        rate_catalog.options("S3"),
+                        index=rate_catalog.index(
+                            "S3", "Standard-IA" if step == 1 else "Glacier"),
+                        key=f"transition_tier_{step}")
+                with age_col:
+                    transition_age = st.number_input(
+                        f"Transition {step} After (months, 0 = none)",
+                        min_value=0,
+                        max_value=MAX_MONTHS,
+                        value=1 if step == 1 else 0,
+                        key=f"transition_age_{step}")
+                if transition_age:
+                    transitions.append((transition_age, transition_tier))
+
+        try:
+            projection = project_costs(
+                st.session_state.all_costs, st.session_state.layer_inputs,
+                projection_months, growth_rates, transitions,
+                st.session_state.get("landing_tables"))
+        except ValueError as e:
+            st.error(f"Cannot project costs: {e}")
+        else:
+            final_month = projection[projection["Month"] == projection_months]
+            proj_col1, proj_col2 = st.columns(2)
+            proj_col1.metric(f"Month {projection_months} Cost",
+                             f"${final_month['Total Cost'].sum():,.2f}")
+            proj_col2.metric(f"Total over {projection_months} Months",
+                             f"${final_month['Cumulative Cost'].sum():,.2f}")
+            st.area_chart(projection.pivot(index="Month",
+                                           columns="Layer",
+                                           values="Total Cost"))
+            st.download_button("Download Projection (CSV)",
+                               projection.to_csv(index=False),
+                               file_name="databricks_cost_projection.csv",
+                               mime="text/csv")
+
+profiler.stage("lifecycle")
+with st.expander("S3 Lifecycle Simulator"):
+    st.caption("Ages each day's files through S3 tiers, including transition "
+               "request charges and minimum storage duration charges for "
+               "data that leaves a tier early.")
+    if not (st.session_state.all_costs.get("Landing") or
+            st.session_state.all_costs.get("RAW")):
+        st.info("Configure the Landing or RAW layer to simulate its storage "
+                "lifecycle.")
+    else:
+        lifecycle_col1, lifecycle_col2 = st.columns(2)
+        with lifecycle_col1:
+            lifecycle_days = st.number_input("Days to Simulate",
+                                             min_value=30,
+                                             max_value=MAX_DAYS,
+                                             value=DEFAULT_DAYS,
+                                             step=30)
+        with lifecycle_col2:
+            lifecycle_tier = st.selectbox(
+                "Initial Tier",
+                rate_catalog.options("S3"),
+                index=rate_catalog.index(
+                    "S3",
+                    st.session_state.all_costs.get("Landing", {}).get(
+                        "storage_tier", "Standard")),
+                key="lifecycle_tier")
+        include_raw = st.checkbox("Include RAW layer storage",
+                                  value=False,
+                                  disabled=not st.session_state.all_costs.get(
+                                      "RAW"))
+
+        lifecycle_transitions = []
+        # Only tiers with a transition request rate can be moved into
+        step_tiers = transition_tiers()
+        for step, (default_tier, default_age) in enumerate(
+            (("Standard-IA", 30), ("Glacier", 90), ("GlacierDeep", 180)),
+                start=1):
+            tier_col, age_col = st.columns(2)
+            with tier_col:
+                step_tier = st.selectbox(
+                    f"Step {step} Tier",
+                    step_tiers,
+                    index=step_tiers.index(default_tier)
+                    if default_tier in step_tiers else 0,
+                    key=f"lifecycle_step_tier_{step}")
+            with age_col:
+                step_age = st.number_input(
+                    f"Step {step} After (days, 0 = none)",
+                    min_value=0,
+                    max_value=MAX_DAYS,
+                    value=default_age,
+                    key=f"lifecycle_step_age_{step}")
+            if step_age:
+                lifecycle_transitions.append((step_age, step_tier))
+
+        try:
+            ingest_gb, ingest_objects, ingest_retention = layer_ingest(
+                st.session_state.all_costs, st.session_state.layer_inputs,
+                int(lifecycle_days), st.session_state.get("landing_tables"),
+                include_raw)
+            lifecycle = monthly_lifecycle(
+                simulate_lifecycle(ingest_gb, ingest_objects,
+                                   ingest_retention, lifecycle_tier,
+                                   lifecycle_transitions))
+        except ValueError as e:
+            st.error(f"Cannot simulate the lifecycle: {e}")
+        else:
+            life_col1, life_col2, life_col3 = st.columns(3)
+            life_col1.metric("Average Monthly Cost",
+                             f"${lifecycle['Total Cost'].mean():,.2f}")
+            life_col2.metric("Transition Charges",
+                             f"${lifecycle['Transition Cost'].sum():,.2f}")
+            life_col3.metric(
+                "Minimum Duration Charges",
+                f"${lifecycle['Minimum Duration Cost'].sum():,.2f}")
+            tier_columns = [
+                column for column in lifecycle.columns
+                if column.endswith(" (GB)") and column != "Stored (GB)"
+            ]
+            st.area_chart(lifecycle.set_index("Month")[tier_columns])
+            st.dataframe(lifecycle)
+            st.download_button("Download Lifecycle (CSV)",
+                               lifecycle.to_csv(index=False),
+                               file_name="databricks_s3_lifecycle.csv",
+                               mime="text/csv")
+
+profiler.stage("charts")
 # Add visualizations section after all layer configurations
 st.markdown("---")
 st.markdown('<h2 class="header">Cost Visualizations</h2>', unsafe_allow_html=True)
 
-# Process the cost data for visualizations
-def process_cost_data():
-    # Layer-wise cost breakdown
-    layers = list(st.session_state.all_costs.keys())
-    layer_costs = []
-    for layer in layers:
-        if st.session_state.all_costs[layer]:
-            # Only sum numeric values
-            total_cost = sum(
-                float(value) if isinstance(value, (int, float)) else 0
-                for value in st.session_state.all_costs[layer].values()
-            )
-            layer_costs.append({
-                'Layer': layer,
-                'Total Cost': total_cost
-            })
-    
-    # Component-wise cost breakdown
-    components = []
-    for layer in layers:
-        if st.session_state.all_costs[layer]:
-            for component, cost in st.session_state.all_costs[layer].items():
-                # Only include numeric costs
-                if isinstance(cost, (int, float)):
-                    components.append({
-                        'Layer': layer,
-                        'Component': component,
-                        'Cost': float(cost)
-                    })
-    
-    return pd.DataFrame(layer_costs), pd.DataFrame(components)
-
-# Process the data
-layer_df, component_df = process_cost_data()
+# The charts only depend on all_costs, so the frames and figure JSON are
+# cached on its content hash and reused until a layer's costs change
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_cost_frames(costs_key, _all_costs):
+    return process_cost_data(_all_costs)
+
+
+@st.cache_data(max_entries=96, show_spinner=False)
+def cached_cost_figure(costs_key, chart, _all_costs):
+    layer_df, component_df = cached_cost_frames(costs_key, _all_costs)
+    return cost_figure_json(chart, layer_df, component_df)
+
+
+def show_cost_chart(chart, toggle_key, empty_message):
+    """Draw a cached chart, building it only while its section is shown"""
+    if not st.toggle("Show chart", value=True, key=toggle_key):
+        return
+    figure_json = cached_cost_figure(costs_key, chart, st.session_state.all_costs)
+    if figure_json is None:
+        st.info(empty_message)
+    else:
+        st.plotly_chart(json.loads(figure_json), use_container_width=True)
+
+
+costs_key = costs_fingerprint(st.session_state.all_costs)
+layer_df, component_df = cached_cost_frames(costs_key, st.session_state.all_costs)
 
 # Create visualization columns
 viz_col1, viz_col2 = st.columns(2)
@@ -2185,62 +2054,26 @@ viz_col1, viz_col2 = st.columns(2)
 with viz_col1:
     st.markdown('<div class="plot-container">', unsafe_allow_html=True)
     st.subheader("Cost Distribution by Layer")
-    if not layer_df.empty:
-        fig_pie = px.pie(
-            layer_df,
-            values='Total Cost',
-            names='Layer',
-            color_discrete_sequence=px.colors.qualitative.Set3,
-            hole=0.4
-        )
-        fig_pie.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig_pie, use_container_width=True)
-    else:
-        st.info("Configure costs to see the distribution.")
+    show_cost_chart("layer_pie", "show_layer_pie",
+                    "Configure costs to see the distribution.")
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Component-wise Cost Breakdown
 with viz_col2:
     st.markdown('<div class="plot-container">', unsafe_allow_html=True)
     st.subheader("Cost Breakdown by Component")
-    if not component_df.empty:
-        fig_bar = px.bar(
-            component_df,
-            x='Component',
-            y='Cost',
-            color='Layer',
-            color_discrete_sequence=['#FF8200', '#00A6A6', '#FF4B4B', '#FFD700']
-        )
-        fig_bar.update_layout(
-            xaxis_title="Cost Component",
-            yaxis_title="Cost ($)",
-            barmode='group'
-        )
-        st.plotly_chart(fig_bar, use_container_width=True)
-    else:
-        st.info("Configure costs to see the breakdown.")
+    show_cost_chart("component_bar", "show_component_bar",
+                    "Configure costs to see the breakdown.")
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Cost Comparison Across Layers
 st.markdown('<div class="plot-container">', unsafe_allow_html=True)
 st.subheader("Cost Comparison Across Layers")
-if not component_df.empty:
-    # Create pivot table with numeric values only
-    pivot_df = component_df.pivot(index='Layer', columns='Component', values='Cost')
-    fig_heatmap = px.imshow(
-        pivot_df,
-        color_continuous_scale='YlOrRd',
-        aspect='auto'
-    )
-    fig_heatmap.update_layout(
-        xaxis_title="Cost Component",
-        yaxis_title="Layer"
-    )
-    st.plotly_chart(fig_heatmap, use_container_width=True)
-else:
-    st.info("Configure costs to see the comparison.")
+show_cost_chart("layer_heatmap", "show_layer_heatmap",
+                "Configure costs to see the comparison.")
 st.markdown('</div>', unsafe_allow_html=True)
 
+profiler.stage("visualization_controls")
 # Add visualization controls
 st.sidebar.markdown("---")
 st.sidebar.header("Visualization Controls")
@@ -2260,3 +2093,27 @@ if not component_df.empty:
         options=available_components,
         default=available_components
     )
+
+record_session_workloads({
+    kind: st.session_state.get(key)
+    for key, kind in SESSION_REGISTRIES.items()
+})
+finish_rerun()
+
+if profiler:
+    with st.expander("Rerun Timing"):
+        st.dataframe(pd.DataFrame(stage_rows(profiler.finish()),
+                                  columns=STAGE_COLUMNS),
+                     use_container_width=True,
+                     hide_index=True,
+                     column_config={
+                         "Time (ms)": st.column_config.NumberColumn(
+                             format="%.2f"),
+                         "Allocated (KiB)": st.column_config.NumberColumn(
+                             format="%.1f"),
+                         "Peak (KiB)": st.column_config.NumberColumn(
+                             format="%.1f")
+                     })
+        st.caption("Each stage runs until the next one begins. Allocations "
+                   "are process-wide, so they include other sessions "
+                   "rerunning at the same time.")
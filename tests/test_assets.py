@@ -0,0 +1,20 @@
+"""Asset files are replaced whole, even by concurrent writers"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.assets import _write_atomic
+
+
+def test_concurrent_writes_leave_one_whole_file(tmp_path):
+    path = str(tmp_path / "logo.png")
+    payloads = [bytes([number]) * 200_000 for number in range(8)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda data: _write_atomic(path, data),
+                      payloads * 4))
+
+    with open(path, "rb") as written:
+        assert written.read() in payloads
+    # No temporary files are left behind
+    assert os.listdir(tmp_path) == ["logo.png"]
+    assert os.stat(path).st_mode & 0o777 == 0o644
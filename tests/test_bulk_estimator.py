@@ -0,0 +1,36 @@
+"""Inventory rows that break the upload rules are reported, not priced"""
+from utils.bulk_estimator import estimate_inventory, main
+
+INVENTORY = """kind,name,instance_type,avg_duration,runs_per_month,photon_enabled
+job,a,i3.xlarge,abc,30,yes
+job,b,i3.xlarge,30,30,maybe
+job,c,i3.xlarge,-5,30,no
+job,d,i3.xlarge,30,30,no
+table,e,,,,
+"""
+
+
+def test_invalid_rows_are_rejected(tmp_path):
+    path = tmp_path / "inventory.csv"
+    path.write_text(INVENTORY)
+    errors = []
+    totals = estimate_inventory(str(path), chunksize=2, errors=errors)
+
+    assert totals.loc["RAW", "workloads"] == 1
+    assert totals.loc["Landing", "workloads"] == 1
+    rejected = [row for part in errors for row in part.itertuples()]
+    assert [(row.Row, row.Name, row.Errors) for row in rejected] == [
+        (1, "a", "avg_duration is not a number: 'abc'"),
+        (2, "b", "photon_enabled is not true or false: 'maybe'"),
+        (3, "c", "avg_duration out of range (1-1440): -5"),
+    ]
+
+
+def test_cli_writes_rejected_rows(tmp_path, capsys):
+    path = tmp_path / "inventory.csv"
+    path.write_text(INVENTORY)
+    report = tmp_path / "rejected.csv"
+    assert main([str(path), "--errors", str(report)]) == 0
+    assert report.read_text().splitlines()[0] == "Row,Name,Errors"
+    assert len(report.read_text().splitlines()) == 4
+    assert "Rejected 3 rows" in capsys.readouterr().err
@@ -0,0 +1,81 @@
+"""Saved estimates reopen with the inputs they were saved with"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from utils.estimate_store import (ESTIMATE_STORE_ENV, EstimateStore,
+                                  get_estimate_store)
+from utils.metrics import METRICS_PORT_ENV
+
+CALCULATOR = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                          "pages", "calculator.py")
+
+
+def test_widgets_round_trip(tmp_path):
+    store = EstimateStore(str(tmp_path / "estimates.db"))
+    widgets = {
+        "Landing": {
+            "landing_mode": "Simple",
+            "landing_avg_file_size": 10.5,
+            "landing_files_per_day": 100
+        },
+        "RAW": {
+            "raw_mode": "Advanced",
+            "raw_storage_type": "Standard-IA"
+        }
+    }
+    store.save("plan", {"Landing": {"storage_gb": 1.0}}, widgets=widgets)
+    assert store.load("plan")["widgets"] == widgets
+
+
+def test_concurrent_saves_get_distinct_versions(tmp_path):
+    path = str(tmp_path / "estimates.db")
+    EstimateStore(path)
+
+    def save(_):
+        return EstimateStore(path).save("plan", {"Landing": {}})
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        versions = sorted(pool.map(save, range(12)))
+    assert versions == list(range(1, 13))
+
+
+@pytest.fixture
+def calculator(tmp_path, monkeypatch):
+    monkeypatch.setenv(ESTIMATE_STORE_ENV, str(tmp_path / "estimates.db"))
+    monkeypatch.setenv(METRICS_PORT_ENV, "0")
+    get_estimate_store.cache_clear()
+    yield AppTest.from_file(CALCULATOR, default_timeout=60).run()
+    get_estimate_store.cache_clear()
+
+
+def button(at, label):
+    return [widget for widget in at.sidebar.button
+            if widget.label == label][0]
+
+
+def test_loaded_estimate_keeps_its_costs_and_modes(calculator):
+    at = calculator
+    at.number_input(key="landing_avg_file_size").set_value(10.5)
+    at.number_input(key="landing_files_per_day").set_value(100).run()
+    saved = dict(at.session_state.all_costs["Landing"])
+    at.selectbox[0].select("RAW").run()
+    at.radio(key="raw_mode").set_value("Advanced").run()
+    at.sidebar.text_input[0].input("plan")
+    button(at, "Save Estimate").click().run()
+
+    at.radio(key="raw_mode").set_value("Simple").run()
+    at.selectbox[0].select("Landing").run()
+    at.number_input(key="landing_avg_file_size").set_value(1.0).run()
+    assert at.session_state.all_costs["Landing"] != saved
+
+    button(at, "Load Estimate").click().run()
+    assert not at.exception
+    assert at.session_state.all_costs["Landing"] == saved
+    assert at.number_input(key="landing_avg_file_size").value == 10.5
+    assert [message.value for message in at.sidebar.success
+            ] == ["Loaded 'plan' version 1"]
+    at.selectbox[0].select("RAW").run()
+    assert at.radio(key="raw_mode").value == "Advanced"
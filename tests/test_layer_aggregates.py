@@ -0,0 +1,76 @@
+"""Running layer totals agree with totals summed from scratch"""
+import pandas as pd
+import pytest
+
+from utils.layer_aggregates import LayerAggregate
+from utils.pricing_engine import (price_workload, price_workloads_frame,
+                                  summarize_workloads)
+
+REPORTS = [{
+    "name": f"report {number}",
+    "engine_type": engine,
+    "runs_per_month": runs,
+    "gen_duration": duration,
+    "dbu_per_hour": dbus,
+    "storage_gb": 0.0,
+    "photon_enabled": photon
+} for number, (engine, runs, duration, dbus, photon) in enumerate([
+    ("SQL", 4, 30, 2, True),
+    ("PySpark", 120, 12, 8, True),
+    ("Materialized View (MV)", 30, 90, 4, True),
+    ("SQL", 9, 45, 16, False),
+    ("PySpark", 1, 600, 2, False),
+])]
+
+
+def expected(reports, engine=None):
+    return summarize_workloads(
+        "report",
+        [report for report in reports
+         if engine is None or report["engine_type"] == engine])
+
+
+def assert_totals(aggregate, reports):
+    for engine in (None, "SQL", "PySpark", "Materialized View (MV)"):
+        assert aggregate.totals(engine) == pytest.approx(
+            expected(reports, engine)), engine
+
+
+def test_adds_and_removes_track_the_workloads():
+    aggregate = LayerAggregate()
+    for report in REPORTS:
+        aggregate.add(price_workload("report", report), report["engine_type"])
+    assert_totals(aggregate, REPORTS)
+
+    # An edit is a remove of the old row and an add of the new one
+    edited = {**REPORTS[3], "runs_per_month": 30, "photon_enabled": True}
+    aggregate.remove(price_workload("report", REPORTS[3]), "SQL")
+    aggregate.add(price_workload("report", edited), "SQL")
+    aggregate.remove(price_workload("report", REPORTS[1]), "PySpark")
+    remaining = [REPORTS[0], REPORTS[2], edited, REPORTS[4]]
+    assert_totals(aggregate, remaining)
+
+    for report in remaining:
+        aggregate.remove(price_workload("report", report),
+                         report["engine_type"])
+    # Emptied groups restart from exact zeros
+    assert aggregate.totals() == {
+        "count": 0,
+        "compute_cost": 0.0,
+        "photon_cost": 0.0,
+        "storage_gb": 0.0,
+        "photon_enabled": False
+    }
+
+
+def test_extend_matches_adding_row_by_row():
+    frame = pd.DataFrame(REPORTS)
+    aggregate = LayerAggregate()
+    aggregate.extend(price_workloads_frame("report", frame),
+                     frame["engine_type"])
+    assert_totals(aggregate, REPORTS)
+
+    aggregate.clear("PySpark")
+    assert_totals(aggregate, [
+        report for report in REPORTS if report["engine_type"] != "PySpark"
+    ])
@@ -0,0 +1,16 @@
+"""Lifecycle policies only move data into tiers with a transition rate"""
+import pytest
+
+from utils.lifecycle import simulate_lifecycle, transition_tiers
+
+
+def test_transition_tiers_have_transition_rates():
+    tiers = transition_tiers()
+    assert "Standard" not in tiers
+    assert tiers[:2] == ["Intelligent-Tiering", "Standard-IA"]
+
+
+def test_transition_to_standard_is_a_value_error():
+    with pytest.raises(ValueError, match="Standard"):
+        simulate_lifecycle([[10.0] * 60], [[100.0] * 60], [60.0],
+                           "Standard-IA", [(30, "Standard")])
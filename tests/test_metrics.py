@@ -0,0 +1,44 @@
+"""The metrics endpoint serves a valid exposition of the recorded metrics"""
+import urllib.request
+
+import pytest
+
+from utils import metrics
+from utils.metrics import (CONTENT_TYPE, METRICS, _Metric, check_exposition,
+                           track_rerun)
+from utils.pricing_engine import calculate_landing_cost
+
+
+@pytest.fixture
+def endpoint():
+    server = metrics._ephemeral_server()
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port}/metrics"
+    server.shutdown()
+    server.server_close()
+
+
+def test_scrape_passes_the_exposition_check(endpoint):
+    finish = track_rerun("test_page")
+    calculate_landing_cost({
+        "avg_file_size": 2.0,
+        "files_per_day": 5,
+        "file_growth": 0,
+        "retention": "30 days"
+    }, "Standard")
+    finish()
+
+    with urllib.request.urlopen(endpoint, timeout=10) as response:
+        assert response.headers["Content-Type"] == CONTENT_TYPE
+        text = response.read().decode()
+
+    assert check_exposition(text, required=METRICS) == []
+    assert ('cost_calculator_page_reruns_total{page="test_page"} 1'
+            in text.splitlines())
+    assert ('cost_calculator_pricing_seconds_count'
+            '{function="calculate_landing_cost"}') in text
+
+
+def test_metric_families_must_render_their_children():
+    with pytest.raises(TypeError):
+        _Metric("cost_calculator_test_total", "Not a metric type")
@@ -0,0 +1,81 @@
+"""Optimizer choices: finite results, Photon trade-offs and cost ties"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.optimizer import optimize_workloads
+from utils.price_index import build_price_index
+from utils.rate_catalog import PRICE_INDEX_ENV, refresh_rate_catalog
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@pytest.fixture
+def metal_catalog(tmp_path, monkeypatch):
+    """Load the fixture EC2 prices, which include m5.metal"""
+    index_dir = str(tmp_path / "price_index")
+    build_price_index(index_dir,
+                      ec2=os.path.join(FIXTURES, "AmazonEC2-mini.json"))
+    monkeypatch.setenv(PRICE_INDEX_ENV, index_dir)
+    refresh_rate_catalog()
+    yield
+    monkeypatch.undo()
+    refresh_rate_catalog()
+
+
+def test_metal_jobs_keep_their_instance(metal_catalog):
+    jobs = pd.DataFrame({
+        "name": ["metal", "sized"],
+        "instance_type": ["m5.metal", "m5.xlarge"],
+        "avg_duration": [60.0, 60.0],
+        "runs_per_month": [30, 30],
+        "photon_enabled": [True, True]
+    })
+    result = optimize_workloads("job", jobs).set_index("name")
+
+    for column in ("current_cost", "optimized_cost", "savings", "runtime"):
+        assert np.isfinite(result[column]).all(), column
+    assert result["feasible"].all()
+    # Nothing can be scaled to or from a metal instance
+    assert result.loc["metal", "recommended_instance_type"] == "m5.metal"
+    assert result.loc["sized",
+                      "recommended_instance_type"] != "m5.metal"
+    assert result.loc["metal", "optimized_cost"] <= result.loc[
+        "metal", "current_cost"]
+
+
+def test_photon_speedup_is_separate_from_its_cost():
+    jobs = pd.DataFrame({
+        "name": ["job"],
+        "instance_type": ["i3.xlarge"],
+        "avg_duration": [60.0],
+        "runs_per_month": [30],
+        "photon_enabled": [False]
+    })
+    result = optimize_workloads("job", jobs,
+                                {"instance_types": ["i3.xlarge"]}).iloc[0]
+
+    assert result["recommended_photon_enabled"]
+    assert result["runtime"] == pytest.approx(60 / 1.5)
+    assert result["optimized_cost"] == pytest.approx(
+        result["current_cost"] * 1.2 / 1.5)
+
+
+def test_equal_costs_go_to_the_fastest_configuration():
+    jobs = pd.DataFrame({
+        "name": ["job"],
+        "instance_type": ["i3.xlarge"],
+        "avg_duration": [60.0],
+        "runs_per_month": [30],
+        "photon_enabled": [True]
+    })
+    # Twice the size at twice the price costs the same in half the time
+    result = optimize_workloads(
+        "job", jobs,
+        {"instance_types": ["i3.xlarge", "i3.2xlarge", "i3.4xlarge"]}).iloc[0]
+
+    assert result["recommended_instance_type"] == "i3.4xlarge"
+    assert result["runtime"] == pytest.approx(15.0)
+    assert result["savings"] == pytest.approx(0.0)
@@ -0,0 +1,110 @@
+"""Ingest the fixture price lists and read them back through the index"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.price_index import (IndexedRateTable, build_price_index,
+                               ingest_ec2, ingest_s3, open_price_index)
+from utils.rate_catalog import DEFAULT_RATES
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+EC2_OFFER = os.path.join(FIXTURES, "AmazonEC2-mini.json")
+S3_OFFER = os.path.join(FIXTURES, "AmazonS3-mini.json")
+DBU_RATES = os.path.join(FIXTURES, "dbu_rates.csv")
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    out = str(tmp_path / "price_index")
+    build_price_index(out, ec2=EC2_OFFER, s3=S3_OFFER, dbu=DBU_RATES)
+    return out
+
+
+def test_ingest_ec2_keeps_linux_shared_on_demand():
+    entries = ingest_ec2(EC2_OFFER)
+    assert ("EC2", "m5.xlarge", "us-east-1", 0.192) in entries
+    assert ("EC2", "m5.metal", "us-east-1", 4.608) in entries
+    # The Windows price of m5.xlarge is filtered out
+    assert [rate for _, sku, region, rate in entries
+            if (sku, region) == ("m5.xlarge", "us-east-1")] == [0.192]
+    us_east = [sku for _, sku, region, _ in entries if region == "us-east-1"]
+    assert us_east == ["i3.xlarge", "m5.large", "m5.xlarge", "m5.metal"]
+    # Offer rows without a region code are skipped
+    assert "c5.xlarge" not in [sku for _, sku, _, _ in entries]
+
+
+def test_ingest_s3_uses_first_tier_and_calculator_names():
+    entries = ingest_s3(S3_OFFER)
+    assert ("S3", "Standard", "us-east-1", 0.021) in entries
+    assert ("S3", "GlacierDeep", "us-east-1", 0.0009) in entries
+    assert len(entries) == 3
+
+
+def test_index_rates_and_regions(index_dir):
+    catalog = open_price_index(index_dir)
+    assert catalog.rate("EC2", "m5.xlarge") == 0.192
+    assert catalog.rate("EC2", "m5.xlarge", region="eu-west-1") == 0.214
+    assert catalog.rate("DBU", "Jobs") == 0.17
+    assert catalog.rate("DBU", "Jobs", region="eu-west-1") == 0.2
+    assert catalog.rate("S3", "Standard") == 0.021
+    # Built-in rates fill services no file covered
+    assert catalog.rate("Photon", "acceleration_factor") == (
+        DEFAULT_RATES["Photon"]["acceleration_factor"])
+    assert catalog.get("EC2", "m5.24xlarge") is None
+    assert ("EC2", "m5.large") in catalog
+    with pytest.raises(KeyError):
+        catalog.rate("EC2", "m5.large", region="eu-west-1")
+
+
+def test_index_options_keep_ingest_order(index_dir):
+    catalog = open_price_index(index_dir)
+    options = catalog.options("EC2")
+    # Built-in instance types first, then the ingested ones
+    assert options[:len(DEFAULT_RATES["EC2"])] == tuple(DEFAULT_RATES["EC2"])
+    assert options[-3:] == ("m5.large", "m5.xlarge", "m5.metal")
+    assert catalog.index("EC2", "m5.metal") == len(options) - 1
+    assert catalog.options("EC2", region="eu-west-1") == ("m5.xlarge",)
+
+
+def test_index_is_memory_mapped_and_lazy(index_dir):
+    catalog = open_price_index(index_dir)
+    ec2 = catalog.costs["EC2"]
+    assert isinstance(ec2, IndexedRateTable)
+    assert isinstance(catalog._rates.keys, np.memmap)
+    assert ec2._skus is None
+    assert ec2["m5.large"] == 0.096
+    assert ec2._skus is None
+    assert pd.Series(["m5.large", "i3.xlarge"]).map(ec2).tolist() == [
+        0.096, 0.3
+    ]
+
+
+def test_index_version_tracks_rates(index_dir, tmp_path):
+    version = open_price_index(index_dir).version
+    assert open_price_index(index_dir).version == version
+    other = str(tmp_path / "without_dbu")
+    build_price_index(other, ec2=EC2_OFFER, s3=S3_OFFER)
+    assert open_price_index(other).version != version
+
+
+def test_rebuild_leaves_open_catalogs_alone(index_dir, tmp_path):
+    catalog = open_price_index(index_dir)
+    version = catalog.version
+    dbu = tmp_path / "dbu_rebuilt.csv"
+    dbu.write_text("sku,rate,region\nJobs,0.99,\n")
+    for _ in range(3):
+        build_price_index(index_dir, dbu=str(dbu))
+
+    # The open catalog still maps the generation it was opened on
+    assert catalog.rate("DBU", "Jobs") == 0.17
+    assert catalog.rate("EC2", "m5.xlarge") == 0.192
+    assert catalog.version == version
+    rebuilt = open_price_index(index_dir)
+    assert rebuilt.rate("DBU", "Jobs") == 0.99
+    assert rebuilt.version != version
+    # The live generation and one older one are kept
+    generations = [entry for entry in os.listdir(index_dir)
+                   if os.path.isdir(os.path.join(index_dir, entry))]
+    assert len(generations) == 2
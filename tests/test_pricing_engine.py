@@ -0,0 +1,315 @@
+"""The pricing engine matches the calculator page it was extracted from"""
+import pandas as pd
+import pytest
+
+from utils.pricing_engine import LAYER_CALCULATORS, price_workloads_frame
+from utils.rate_catalog import DEFAULT_RATES
+
+# The page's own COSTS table, which DEFAULT_RATES still holds
+S3, EC2, DBU = DEFAULT_RATES["S3"], DEFAULT_RATES["EC2"], DEFAULT_RATES["DBU"]
+PHOTON = DEFAULT_RATES["Photon"]["acceleration_factor"]
+MV = "Materialized View (MV)"
+
+# The formulas below are transcribed from the page before the engine
+# existed, constants and all, so they do not share code with it
+TIER_DBU = {
+    "Databricks Jobs": "Jobs",
+    "Delta Live Tables (Core)": "DLT_Core",
+    "Delta Live Tables (Pro)": "DLT_Pro",
+    "Delta Live Tables (Advanced)": "DLT_Advanced"
+}
+ENGINES = {  # dbu_rate, storage_multiplier, performance_factor
+    "SQL": (DBU["Enterprise"], 1.0, 1.0),
+    "PySpark": (DBU["Jobs"], 1.2, 1.5),
+    MV: (DBU["Enterprise"] * 0.8, 2.0, 0.5)
+}
+SIMPLE_SIZES = {
+    "SQL": {"Extra Small (1 DBU)": 1, "Small (2 DBUs)": 2,
+            "Medium (4 DBUs)": 4, "Large (8 DBUs)": 8},
+    "PySpark": {"Small Cluster (2 DBUs)": 2, "Medium Cluster (4 DBUs)": 4,
+                "Large Cluster (8 DBUs)": 8,
+                "X-Large Cluster (16 DBUs)": 16},
+    MV: {"Low Refresh (1 DBU)": 1, "Medium Refresh (2 DBUs)": 2,
+         "High Refresh (4 DBUs)": 4, "Very High Refresh (8 DBUs)": 8}
+}
+DASHBOARD_SIZES = {
+    **SIMPLE_SIZES,
+    MV: {"Low Usage (1 DBU)": 1, "Medium Usage (2 DBUs)": 2,
+         "High Usage (4 DBUs)": 4, "Very High Usage (8 DBUs)": 8}
+}
+
+
+def months(retention):
+    if retention == "2 physical months":
+        return 2
+    if "physical month" in retention:
+        return 1
+    if "days" in retention:
+        return int(retention.split()[0]) / 30
+    return 12
+
+
+def with_photon(compute, enabled):
+    return {"compute_cost": compute,
+            "photon_cost": compute * PHOTON if enabled else 0}
+
+
+def table_row(table):
+    return {"compute_cost": 0, "photon_cost": 0,
+            "storage_gb": table["files_per_day"] * 30 *
+            table["avg_file_size"] * months(table["retention"])}
+
+
+def job_row(job):
+    hours = job["avg_duration"] / 60 * job["runs_per_month"]
+    return with_photon(EC2[job["instance_type"]] * 1 * (hours / 30) * 30,
+                       job["photon_enabled"])
+
+
+def transform_row(transform):
+    rate = DBU.get(TIER_DBU.get(transform["service_tier"], "Jobs"),
+                   DBU["Jobs"])
+    hours = transform["avg_duration"] / 60 * transform["runs_per_month"]
+    row = with_photon(
+        rate * 1 * (hours / 30) * 30 * transform["dbu_per_hour"],
+        transform["photon_enabled"])
+    return {**row, "storage_gb": transform["storage_gb"]}
+
+
+def dashboard_row(dashboard):
+    rate, _, performance = ENGINES[dashboard["engine_type"]]
+    dbus = DASHBOARD_SIZES[dashboard["engine_type"]].get(
+        dashboard["compute_size"], 2)
+    hours = (dashboard["avg_query_duration"] / 3600 *
+             dashboard["queries_per_day"] * dashboard["active_users"] * 22 *
+             performance)
+    return with_photon(rate * 1 * (hours / 22) * 22 * dbus,
+                       dashboard["photon_enabled"] and
+                       dashboard["engine_type"] != MV)
+
+
+def report_row(report):
+    rate = ENGINES[report["engine_type"]][0]
+    hours = report["gen_duration"] / 60 * report["runs_per_month"]
+    return with_photon(rate * 1 * (hours / 30) * 30 * report["dbu_per_hour"],
+                       report["photon_enabled"] and
+                       report["engine_type"] != MV)
+
+
+def landing_simple(p, tier):
+    storage = (p["files_per_day"] * 30 * p["avg_file_size"] *
+               (1 + p["file_growth"] / 100)**months(p["retention"]))
+    return {"storage_gb": storage,
+            "storage_cost_per_month": storage * S3[tier]}
+
+
+def raw_simple(p, tier):
+    hours = p["avg_job_duration"] / 60 * p["num_jobs"] * p[
+        "avg_runs_per_month"]
+    row = with_photon(EC2[p["instance_type"]] * 1 * (hours / 30) * 30,
+                      p["enable_photon"])
+    return total({**row, "storage_gb": p["num_tables"] * 50}, tier)
+
+
+def conf_simple(p, tier):
+    rate = DBU.get(TIER_DBU.get(p["service_tier"], "Jobs"), DBU["Jobs"])
+    hours = p["avg_transform_duration"] / 60 * p["num_transforms"] * p[
+        "avg_runs_per_month"]
+    row = with_photon(rate * 1 * (hours / 30) * 30 * p["dbu_per_hour"],
+                      p["enable_photon"])
+    complexity = {"Low": 0.7, "Medium": 1.0, "High": 1.5}.get(
+        p["transform_complexity"], 1.0)
+    return total({**row, "storage_gb": p["num_transforms"] * 50 * complexity},
+                 tier)
+
+
+def pb_simple(p, tier):
+    rate, storage, performance = ENGINES[p["engine_type"]]
+    dbus = SIMPLE_SIZES[p["engine_type"]].get(p["compute_size"], 2)
+    query_hours = (p["avg_query_duration"] / 3600 * p["avg_queries_per_day"] *
+                   p["active_users"] * 22) * performance
+    report_hours = (p["avg_report_duration"] / 60 *
+                    p["report_runs_per_month"] * p["num_reports"])
+    compute = (rate * 1 * (query_hours / 22) * 22 * dbus +
+               rate * 1 * (report_hours / 30) * 30 * dbus)
+    row = with_photon(compute, p["enable_photon"] and p["engine_type"] != MV)
+    return total({**row, "storage_gb": p["num_dashboards"] * 20 * storage +
+                  p["num_reports"] * 50 * storage}, tier)
+
+
+def total(row, tier):
+    storage_cost = row["storage_gb"] * S3[tier]
+    return {**row, "storage_cost": storage_cost,
+            "total_cost": row["compute_cost"] + storage_cost +
+            row["photon_cost"]}
+
+
+SIMPLE_CASES = [
+    ("Landing", landing_simple, {"avg_file_size": 2.0, "files_per_day": 10,
+                                 "file_growth": 5, "retention": "90 days"},
+     "Standard"),
+    ("Landing", landing_simple, {"avg_file_size": 0.5, "files_per_day": 400,
+                                 "file_growth": 0, "retention": "Indefinite"},
+     "Glacier"),
+    ("Landing", landing_simple, {"avg_file_size": 3.0, "files_per_day": 7,
+                                 "file_growth": 12,
+                                 "retention": "2 physical months"},
+     "Standard-IA"),
+    ("RAW", raw_simple, {"num_jobs": 3, "num_tables": 10,
+                         "instance_type": "r5.xlarge",
+                         "avg_runs_per_month": 30, "avg_job_duration": 45,
+                         "enable_photon": True}, "Standard"),
+    ("RAW", raw_simple, {"num_jobs": 12, "num_tables": 4,
+                         "instance_type": "i3.8xlarge",
+                         "avg_runs_per_month": 4, "avg_job_duration": 190,
+                         "enable_photon": False}, "OneZone-IA"),
+    ("CONF", conf_simple, {"num_transforms": 4, "dbu_per_hour": 4,
+                           "service_tier": "Databricks Jobs",
+                           "transform_complexity": "Medium",
+                           "avg_transform_duration": 60,
+                           "avg_runs_per_month": 30, "enable_photon": True},
+     "Standard"),
+    ("CONF", conf_simple, {"num_transforms": 9, "dbu_per_hour": 16,
+                           "service_tier": "Delta Live Tables (Advanced)",
+                           "transform_complexity": "High",
+                           "avg_transform_duration": 25,
+                           "avg_runs_per_month": 60, "enable_photon": False},
+     "Intelligent-Tiering"),
+    ("PB", pb_simple, {"engine_type": "SQL", "num_dashboards": 5,
+                       "num_reports": 10, "active_users": 20,
+                       "compute_size": "Small (2 DBUs)",
+                       "avg_queries_per_day": 15, "avg_query_duration": 8,
+                       "report_runs_per_month": 8, "avg_report_duration": 45,
+                       "enable_photon": True}, "Standard"),
+    ("PB", pb_simple, {"engine_type": "PySpark", "num_dashboards": 2,
+                       "num_reports": 3, "active_users": 150,
+                       "compute_size": "X-Large Cluster (16 DBUs)",
+                       "avg_queries_per_day": 40, "avg_query_duration": 30,
+                       "report_runs_per_month": 20, "avg_report_duration": 10,
+                       "enable_photon": True}, "Standard-IA"),
+    ("PB", pb_simple, {"engine_type": MV, "num_dashboards": 8,
+                       "num_reports": 1, "active_users": 5,
+                       "compute_size": "High Refresh (4 DBUs)",
+                       "avg_queries_per_day": 3, "avg_query_duration": 120,
+                       "report_runs_per_month": 720,
+                       "avg_report_duration": 5, "enable_photon": True},
+     "Glacier"),
+]
+
+
+@pytest.mark.parametrize("layer, baseline, params, tier", SIMPLE_CASES)
+def test_simple_mode_matches_the_page(layer, baseline, params, tier):
+    costs = LAYER_CALCULATORS[layer](dict(params), tier)
+    expected = baseline(params, tier)
+    assert {key: costs[key] for key in expected} == pytest.approx(expected)
+
+
+TABLES = [
+    {"name": "a", "avg_file_size": 2.0, "files_per_day": 5,
+     "retention": "30 days"},
+    {"name": "b", "avg_file_size": 0.25, "files_per_day": 900,
+     "retention": "1 physical month"},
+    {"name": "c", "avg_file_size": 8.0, "files_per_day": 1,
+     "retention": "Indefinite"},
+]
+JOBS = [
+    {"name": "a", "instance_type": "i3.xlarge", "avg_duration": 30,
+     "runs_per_month": 30, "photon_enabled": True},
+    {"name": "b", "instance_type": "r5.12xlarge", "avg_duration": 240,
+     "runs_per_month": 4, "photon_enabled": False},
+    {"name": "c", "instance_type": "i3.2xlarge", "avg_duration": 5,
+     "runs_per_month": 8640, "photon_enabled": True},
+]
+TRANSFORMS = [
+    {"name": "a", "service_tier": "Databricks Jobs", "avg_duration": 60,
+     "runs_per_month": 30, "dbu_per_hour": 4, "storage_gb": 50.0,
+     "photon_enabled": True},
+    {"name": "b", "service_tier": "Delta Live Tables (Core)",
+     "avg_duration": 15, "runs_per_month": 720, "dbu_per_hour": 2,
+     "storage_gb": 12.5, "photon_enabled": False},
+    {"name": "c", "service_tier": "Delta Live Tables (Pro)",
+     "avg_duration": 300, "runs_per_month": 1, "dbu_per_hour": 32,
+     "storage_gb": 900.0, "photon_enabled": True},
+]
+DASHBOARDS = [
+    {"name": "a", "engine_type": "SQL", "compute_size": "Medium (4 DBUs)",
+     "active_users": 10, "queries_per_day": 10, "avg_query_duration": 10,
+     "photon_enabled": True},
+    {"name": "b", "engine_type": "PySpark",
+     "compute_size": "Small Cluster (2 DBUs)", "active_users": 300,
+     "queries_per_day": 50, "avg_query_duration": 3,
+     "photon_enabled": False},
+    {"name": "c", "engine_type": MV, "compute_size": "High Usage (4 DBUs)",
+     "active_users": 40, "queries_per_day": 5, "avg_query_duration": 60,
+     "photon_enabled": True},
+    {"name": "d", "engine_type": "SQL", "compute_size": "Large (8 DBUs)",
+     "active_users": 2, "queries_per_day": 400, "avg_query_duration": 1,
+     "photon_enabled": True},
+]
+REPORTS = [
+    {"name": "a", "engine_type": "SQL", "runs_per_month": 4,
+     "gen_duration": 30, "dbu_per_hour": 2, "photon_enabled": True},
+    {"name": "b", "engine_type": "PySpark", "runs_per_month": 120,
+     "gen_duration": 12, "dbu_per_hour": 8, "photon_enabled": True},
+    {"name": "c", "engine_type": MV, "runs_per_month": 30,
+     "gen_duration": 90, "dbu_per_hour": 4, "photon_enabled": True},
+]
+
+ROW_CASES = [
+    ("table", TABLES, table_row),
+    ("job", JOBS, job_row),
+    ("transform", TRANSFORMS, transform_row),
+    ("dashboard", DASHBOARDS, dashboard_row),
+    ("report", REPORTS, report_row),
+]
+
+
+@pytest.mark.parametrize("kind, workloads, baseline", ROW_CASES)
+def test_priced_rows_match_the_page(kind, workloads, baseline):
+    priced = price_workloads_frame(kind, pd.DataFrame(workloads))
+    for position, workload in enumerate(workloads):
+        expected = baseline(workload)
+        assert {key: priced[key].iloc[position]
+                for key in expected} == pytest.approx(expected), workload
+
+
+def sums(rows):
+    return {key: sum(row[key] for row in rows) for key in rows[0]}
+
+
+def advanced_cases():
+    landing = sums([table_row(table) for table in TABLES])
+    yield ("Landing", {"tables": TABLES}, "Standard-IA", {
+        "storage_gb": landing["storage_gb"],
+        "storage_cost_per_month": landing["storage_gb"] * S3["Standard-IA"],
+        "tables_count": len(TABLES)
+    })
+    raw = sums([job_row(job) for job in JOBS])
+    yield ("RAW", {"jobs": JOBS, "estimated_tables": 7,
+                   "avg_table_size": 80.0}, "Standard",
+           {**total({**raw, "storage_gb": 7 * 80.0}, "Standard"),
+            "jobs_count": len(JOBS)})
+    conf = sums([transform_row(transform) for transform in TRANSFORMS])
+    yield ("CONF", {"transforms": TRANSFORMS}, "Glacier",
+           {**total(conf, "Glacier"), "transforms_count": len(TRANSFORMS)})
+    for engine in ENGINES:
+        dashboards = [
+            row for row in DASHBOARDS if row["engine_type"] == engine
+        ]
+        reports = [row for row in REPORTS if row["engine_type"] == engine]
+        priced = sums([dashboard_row(row) for row in dashboards] +
+                      [report_row(row) for row in reports])
+        storage = len(dashboards) * 30.0 + len(reports) * 75.0
+        yield ("PB", {"engine_type": engine, "dashboards": DASHBOARDS,
+                      "reports": REPORTS, "dashboard_storage_gb": 30.0,
+                      "report_storage_gb": 75.0}, "Standard",
+               {**total({**priced, "storage_gb": storage}, "Standard"),
+                "dashboards_count": len(dashboards),
+                "reports_count": len(reports)})
+
+
+@pytest.mark.parametrize("layer, params, tier, expected",
+                         list(advanced_cases()))
+def test_advanced_mode_matches_the_page(layer, params, tier, expected):
+    costs = LAYER_CALCULATORS[layer]({"mode": "Advanced", **params}, tier)
+    assert {key: costs[key] for key in expected} == pytest.approx(expected)
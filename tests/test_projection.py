@@ -0,0 +1,85 @@
+"""Projected storage matches month-by-month bookkeeping of every ingest"""
+import numpy as np
+import pytest
+
+from utils.pricing_engine import LAYER_CALCULATORS
+from utils.projection import (MAX_MONTHS, landing_storage, project_costs,
+                              retention_window)
+
+
+def stored_by_hand(ingest, retention, months, growth, tier, transitions):
+    """Follow each month's ingest as it ages, expires and changes tier"""
+    steps = [(0, tier), *transitions]
+    stored = {}
+    for gb, keep in zip(ingest, retention):
+        for month in range(1, months + 1):
+            for ingested in range(1, month + 1):
+                age = month - ingested
+                if age >= keep:
+                    continue
+                tier_now = [name for start, name in steps if age >= start][-1]
+                tiers = stored.setdefault(tier_now, np.zeros(months))
+                tiers[month - 1] += gb * (1 + growth / 100)**(ingested - 1)
+    return stored
+
+
+@pytest.mark.parametrize("retention, transitions", [
+    (["30 days", "90 days", "Indefinite"], []),
+    (["180 days", "2 physical months", "Indefinite"],
+     [(1, "Standard-IA"), (3, "Glacier")]),
+    (["Indefinite", "Indefinite", "60 days"], [(2, "GlacierDeep")]),
+])
+def test_landing_storage_matches_bookkeeping(retention, transitions):
+    ingest = np.array([600.0, 45.5, 3.25])
+    windows = [retention_window(policy) for policy in retention]
+    stored = landing_storage(ingest, windows, 14, 4.0, "Standard",
+                             transitions)
+    expected = stored_by_hand(ingest, windows, 14, 4.0, "Standard",
+                              transitions)
+
+    assert set(stored) == set(expected)
+    for tier, gb in expected.items():
+        assert stored[tier] == pytest.approx(gb), tier
+
+
+def test_layers_grow_from_their_current_month():
+    raw = LAYER_CALCULATORS["RAW"]({"num_jobs": 3, "num_tables": 10,
+                                    "instance_type": "r5.xlarge",
+                                    "avg_runs_per_month": 30,
+                                    "avg_job_duration": 45,
+                                    "enable_photon": True}, "Standard")
+    frame = project_costs({"Landing": {}, "RAW": raw}, months=6,
+                          growth_rates={"RAW": 10})
+    growth = 1.1**np.arange(6)
+
+    assert frame["Layer"].unique().tolist() == ["RAW"]
+    assert frame["Compute Cost"].to_numpy() == pytest.approx(
+        raw["compute_cost"] * growth)
+    assert frame["Total Cost"].to_numpy() == pytest.approx(
+        raw["total_cost"] * growth)
+    assert frame["Cumulative Cost"].iloc[-1] == pytest.approx(
+        raw["total_cost"] * growth.sum())
+
+
+def test_simple_landing_projects_its_inputs():
+    params = {"avg_file_size": 2.0, "files_per_day": 10, "file_growth": 5,
+              "retention": "60 days"}
+    costs = {"Landing": LAYER_CALCULATORS["Landing"](params, "Standard")}
+    frame = project_costs(costs, {"Landing": {
+        "params": params, "storage_type": "Standard"}}, months=4)
+
+    # 600 GB a month, kept for two months
+    assert frame["Storage (GB)"].tolist() == pytest.approx(
+        [600, 1200, 1200, 1200])
+
+
+@pytest.mark.parametrize("months", [0, MAX_MONTHS + 1])
+def test_months_out_of_range_are_refused(months):
+    with pytest.raises(ValueError):
+        project_costs({"RAW": {"total_cost": 1.0}}, months=months)
+
+
+def test_transitions_need_increasing_ages():
+    with pytest.raises(ValueError):
+        landing_storage(10.0, np.inf, 6,
+                        transitions=[(3, "Glacier"), (2, "Standard-IA")])
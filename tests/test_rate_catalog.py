@@ -0,0 +1,54 @@
+"""The shared catalog swaps rates whole, never table by table"""
+import os
+
+import pytest
+
+from utils.price_index import build_price_index
+from utils.pricing_engine import COSTS, ENGINE_COST_FACTORS
+from utils.rate_catalog import (DEFAULT_RATES, PRICE_INDEX_ENV, RateCatalog,
+                                get_rate_catalog, on_catalog_refresh,
+                                refresh_rate_catalog)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def test_replace_leaves_handed_out_tables_alone():
+    catalog = RateCatalog.from_mapping(DEFAULT_RATES)
+    costs = catalog.costs
+    ec2 = costs["EC2"]
+    catalog.replace(RateCatalog.from_mapping({"S3": {"Standard": 0.03}}))
+
+    # Readers holding the old table keep a complete, unchanged copy
+    assert dict(ec2) == DEFAULT_RATES["EC2"]
+    # The handle follows the new rates as a whole
+    assert list(costs) == ["S3"]
+    assert costs["S3"]["Standard"] == 0.03
+    with pytest.raises(KeyError):
+        costs["EC2"]
+    assert catalog.services == ("S3", )
+
+
+def test_refresh_hooks_read_the_new_catalog(tmp_path, monkeypatch):
+    index_dir = str(tmp_path / "price_index")
+    build_price_index(index_dir, dbu=os.path.join(FIXTURES, "dbu_rates.csv"))
+    seen = []
+
+    def derive(catalog):
+        # Called with the new catalog while the shared one is unchanged
+        seen.append((catalog is not get_rate_catalog(),
+                     catalog.rate("DBU", "Jobs"), COSTS["DBU"]["Jobs"]))
+        return lambda: seen.append(COSTS["DBU"]["Jobs"])
+
+    on_catalog_refresh(derive)
+    monkeypatch.setenv(PRICE_INDEX_ENV, index_dir)
+    try:
+        refresh_rate_catalog()
+        # Published right after the swap
+        assert seen == [(True, 0.17, DEFAULT_RATES["DBU"]["Jobs"]), 0.17]
+        assert ENGINE_COST_FACTORS["PySpark"]["dbu_rate"] == 0.17
+        assert ENGINE_COST_FACTORS["SQL"]["dbu_rate"] == 0.8
+    finally:
+        monkeypatch.undo()
+        refresh_rate_catalog()
+    assert ENGINE_COST_FACTORS["PySpark"]["dbu_rate"] == (
+        DEFAULT_RATES["DBU"]["Jobs"])
@@ -0,0 +1,93 @@
+"""Each scenario grid row prices like the calculator with those options"""
+import pytest
+
+from utils.pricing_engine import LAYER_CALCULATORS
+from utils.report_export import layer_total
+from utils.scenarios import (GRID_AXES, MAX_GRID_SIZE, compare_scenarios,
+                             price_grid, snapshot)
+
+INPUTS = {
+    "Landing": {"params": {"avg_file_size": 2.0, "files_per_day": 10,
+                           "file_growth": 5, "retention": "90 days"},
+                "storage_type": "Standard"},
+    "RAW": {"params": {"num_jobs": 3, "num_tables": 10,
+                       "instance_type": "r5.xlarge", "avg_runs_per_month": 30,
+                       "avg_job_duration": 45, "enable_photon": True},
+            "storage_type": "Standard"},
+    "CONF": {"params": {"num_transforms": 4, "dbu_per_hour": 4,
+                        "service_tier": "Databricks Jobs",
+                        "transform_complexity": "Medium",
+                        "avg_transform_duration": 60,
+                        "avg_runs_per_month": 30, "enable_photon": False},
+             "storage_type": "Standard-IA"}
+}
+OPTIONS = {
+    "instance_type": ["r5.xlarge", "i3.2xlarge", "r5.4xlarge"],
+    "storage_type": ["Standard", "Glacier"],
+    "service_tier": ["Databricks Jobs", "Delta Live Tables (Pro)"],
+    "enable_photon": [True, False]
+}
+
+
+def all_costs():
+    costs = {
+        layer: LAYER_CALCULATORS[layer](inputs["params"],
+                                        inputs["storage_type"])
+        for layer, inputs in INPUTS.items()
+    }
+    # An Advanced mode layer, which the grid does not vary
+    return {**costs, "PB": {"total_cost": 42.0}}
+
+
+def test_grid_rows_match_direct_pricing():
+    grid = price_grid(all_costs(), INPUTS, OPTIONS)
+
+    assert len(grid) == 3 * 2 * 2 * 2
+    assert grid["Total"].is_monotonic_increasing
+    for _, row in grid.iterrows():
+        for layer, inputs in INPUTS.items():
+            params = dict(inputs["params"])
+            storage_type = inputs["storage_type"]
+            for axis, (label, layers) in GRID_AXES.items():
+                if layer not in layers:
+                    continue
+                if axis == "storage_type":
+                    storage_type = row[label]
+                else:
+                    params[axis] = row[label]
+            assert row[layer] == pytest.approx(
+                layer_total(LAYER_CALCULATORS[layer](params, storage_type)))
+        assert row["PB"] == 42.0
+        assert row["Total"] == pytest.approx(
+            sum(row[layer] for layer in (*INPUTS, "PB")))
+
+
+def test_axes_left_out_keep_the_current_configuration():
+    costs = all_costs()
+    grid = price_grid(costs, INPUTS, {"storage_type": ["Standard"],
+                                      "instance_type": []})
+
+    assert list(grid.columns) == ["Storage Tier", "Landing", "RAW", "CONF",
+                                  "PB", "Total"]
+    assert grid.loc[0, "RAW"] == pytest.approx(costs["RAW"]["total_cost"])
+
+
+def test_grids_over_the_limit_are_refused():
+    options = {"instance_type": ["r5.xlarge"] * (MAX_GRID_SIZE // 2 + 1),
+               "enable_photon": [True, False]}
+    with pytest.raises(ValueError, match="limit"):
+        price_grid(all_costs(), INPUTS, options)
+
+
+def test_comparison_lists_saved_scenarios():
+    costs = all_costs()
+    cheaper = {**costs, "PB": {"total_cost": 2.0}}
+    frame = compare_scenarios({
+        "current": snapshot(costs, INPUTS),
+        "cheaper": snapshot(cheaper, INPUTS)
+    }).set_index("Scenario")
+
+    assert frame.loc["current", "Total"] - frame.loc[
+        "cheaper", "Total"] == pytest.approx(40.0)
+    assert frame.loc["current", "Landing"] == pytest.approx(
+        costs["Landing"]["storage_cost_per_month"])
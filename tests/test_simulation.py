@@ -0,0 +1,98 @@
+"""Simulated trials price like the calculator does, one trial at a time"""
+import numpy as np
+import pytest
+
+from utils.pricing_engine import LAYER_CALCULATORS
+from utils.report_export import layer_total
+from utils.simulation import (percentile_bands, sample, simulate_costs,
+                              simulate_layer)
+
+RAW = {
+    "num_jobs": 3,
+    "num_tables": 10,
+    "instance_type": "r5.xlarge",
+    "avg_runs_per_month": 30,
+    "avg_job_duration": 45,
+    "enable_photon": True
+}
+PB = {
+    "engine_type": "PySpark",
+    "num_dashboards": 5,
+    "num_reports": 10,
+    "active_users": 20,
+    "compute_size": "Medium Cluster (4 DBUs)",
+    "avg_queries_per_day": 15,
+    "avg_query_duration": 8,
+    "report_runs_per_month": 8,
+    "avg_report_duration": 45,
+    "enable_photon": True
+}
+DISTRIBUTIONS = {
+    "RAW": {
+        "avg_job_duration": {"dist": "triangular", "low": 20, "mode": 45,
+                             "high": 90},
+        "num_jobs": {"dist": "empirical", "values": [2, 3, 3, 5]}
+    },
+    "PB": {
+        "active_users": {"dist": "lognormal", "median": 20, "p90": 60}
+    }
+}
+
+
+@pytest.mark.parametrize("layer, params", [("RAW", RAW), ("PB", PB)])
+def test_trials_match_scalar_pricing(layer, params):
+    draws = 200
+    trials = simulate_layer(layer, params, "Standard", DISTRIBUTIONS[layer],
+                            draws, np.random.default_rng(7))
+
+    # The same draws, in the same order, priced one trial at a time
+    rng = np.random.default_rng(7)
+    drawn = {param: sample(spec, draws, rng)
+             for param, spec in DISTRIBUTIONS[layer].items()}
+    expected = [
+        layer_total(LAYER_CALCULATORS[layer](
+            {**params, **{param: values[trial]
+                          for param, values in drawn.items()}}, "Standard"))
+        for trial in range(draws)
+    ]
+    assert trials == pytest.approx(expected)
+
+
+def test_point_estimates_and_advanced_layers_stay_fixed():
+    all_costs = {
+        "Landing": {"storage_cost_per_month": 12.5},
+        "RAW": LAYER_CALCULATORS["RAW"](RAW, "Standard"),
+        "CONF": {},
+        "PB": {}
+    }
+    fixed = {"RAW": {"avg_job_duration": {"dist": "triangular", "low": 45,
+                                          "mode": 45, "high": 45}}}
+    samples = simulate_costs(all_costs, {"RAW": {
+        "params": RAW, "storage_type": "Standard"}}, fixed, draws=1000,
+                             seed=1)
+
+    assert list(samples) == ["Landing", "RAW", "TOTAL"]
+    raw_total = all_costs["RAW"]["total_cost"]
+    bands = percentile_bands(samples).set_index("Layer")
+    assert bands.loc["Landing"].tolist() == pytest.approx([12.5] * 4)
+    assert bands.loc["RAW"].tolist() == pytest.approx([raw_total] * 4)
+    assert bands.loc["TOTAL"].tolist() == pytest.approx([12.5 + raw_total] *
+                                                        4)
+
+
+def test_lognormal_hits_its_median_and_p90():
+    values = sample({"dist": "lognormal", "median": 45, "p90": 80}, 200_000,
+                    np.random.default_rng(3))
+    assert np.percentile(values, [50, 90]) == pytest.approx([45, 80],
+                                                            rel=0.02)
+
+
+@pytest.mark.parametrize("spec", [
+    {"dist": "triangular", "low": 50, "mode": 45, "high": 90},
+    {"dist": "lognormal", "median": 45, "p90": 30},
+    {"dist": "empirical", "values": []},
+    {"dist": "uniform", "low": 1, "high": 2},
+])
+def test_invalid_specs_are_rejected(spec):
+    with pytest.raises(ValueError):
+        sample(spec, 10, np.random.default_rng(0))
@@ -0,0 +1,41 @@
+"""Uploaded cells that cannot be read are reported, not replaced"""
+import io
+
+from utils.workload_import import read_upload, validate_workloads
+
+JOBS = """name,instance_type,avg_duration,runs_per_month,photon_enabled
+a,i3.xlarge,abc,30,yes
+b,i3.xlarge,30,30,maybe
+c,i3.xlarge,30,,Y
+d,i3.xlarge,30,x,no
+e,i3.xlarge,30,30,0
+"""
+
+
+def test_unreadable_numbers_and_flags_are_rejected():
+    raw = read_upload(io.StringIO(JOBS), "jobs.csv")
+    valid, errors = validate_workloads(raw, "job")
+
+    assert valid["name"].tolist() == ["c", "e"]
+    # Empty cells still take the form's defaults
+    assert valid["runs_per_month"].tolist() == [30, 30]
+    assert valid["photon_enabled"].tolist() == [True, False]
+    assert errors["Row"].tolist() == [1, 2, 4]
+    assert errors["Errors"].tolist() == [
+        "avg_duration is not a number: 'abc'",
+        "photon_enabled is not true or false: 'maybe'",
+        "runs_per_month is not a number: 'x'"
+    ]
+
+
+def test_whole_numbers_stay_within_int32():
+    raw = read_upload(
+        io.StringIO("name,instance_type,avg_duration,runs_per_month\n"
+                    "big,i3.xlarge,30,3000000000\n"
+                    "ok,i3.xlarge,30,44640\n"), "jobs.csv")
+    valid, errors = validate_workloads(raw, "job")
+
+    assert valid["name"].tolist() == ["ok"]
+    assert errors["Errors"].tolist() == [
+        "runs_per_month out of range (1-44640): 3000000000"
+    ]
@@ -0,0 +1,129 @@
+"""Filtered lookups of WorkloadRegistry stay in step with every change"""
+import os
+
+import pandas as pd
+import pytest
+
+from utils.price_index import build_price_index
+from utils.rate_catalog import PRICE_INDEX_ENV, refresh_rate_catalog
+from utils.workload_registry import WorkloadRegistry
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+SIZES = {
+    "SQL": "Small (2 DBUs)",
+    "PySpark": "Small Cluster (2 DBUs)",
+    "Materialized View (MV)": "Low Usage (1 DBU)"
+}
+
+
+def dashboard(name, engine):
+    return {
+        "name": name,
+        "compute_size": SIZES[engine],
+        "active_users": 3,
+        "queries_per_day": 2,
+        "avg_query_duration": 5,
+        "photon_enabled": True,
+        "engine_type": engine
+    }
+
+
+def names(registry, engine):
+    return registry.frame("engine_type", engine, priced=False)["name"].tolist()
+
+
+def test_filters_follow_add_remove_update_and_clear():
+    registry = WorkloadRegistry("dashboard")
+    registry.add(dashboard("a", "SQL"))
+    registry.extend(
+        pd.DataFrame([
+            dashboard("b", "PySpark"),
+            dashboard("c", "SQL"),
+            dashboard("d", "PySpark"),
+            dashboard("e", "SQL")
+        ]))
+    assert names(registry, "SQL") == ["a", "c", "e"]
+    assert registry.count("engine_type", "PySpark") == 2
+
+    # Swap-remove moves "e" into "a"'s position
+    registry.remove("a")
+    assert names(registry, "SQL") == ["e", "c"]
+    assert [item["name"] for item in registry.find("engine_type", "SQL")
+            ] == ["e", "c"]
+
+    registry.update("b", dashboard("b", "SQL"))
+    assert names(registry, "SQL") == ["e", "b", "c"]
+    assert names(registry, "PySpark") == ["d"]
+
+    registry.clear("engine_type", "SQL")
+    assert names(registry, "SQL") == []
+    assert names(registry, "PySpark") == ["d"]
+    assert registry.values("engine_type") == ["PySpark"]
+    assert registry.totals()["count"] == 1
+    assert names(registry, "Materialized View (MV)") == []
+
+
+def test_one_long_name_does_not_widen_every_name():
+    frame = pd.DataFrame({
+        "name": [f"job_{index:05d}" for index in range(10_000)],
+        "instance_type": "i3.xlarge",
+        "avg_duration": 30.0,
+        "runs_per_month": 30,
+        "photon_enabled": True
+    })
+    short = WorkloadRegistry("job")
+    short.extend(frame)
+    long = WorkloadRegistry("job")
+    long.extend(frame.assign(name=frame["name"].where(
+        frame.index != 5, "x" * 200)))
+    assert long.nbytes() - short.nbytes() < 1_000
+    assert long.get("x" * 200)["name"] == "x" * 200
+    assert long.frame()["name"].iloc[5] == "x" * 200
+
+
+def test_reprice_follows_a_rate_refresh(tmp_path, monkeypatch):
+    jobs = pd.DataFrame({
+        "name": ["a", "b"],
+        "instance_type": ["i3.xlarge", "r5.xlarge"],
+        "avg_duration": [30.0, 60.0],
+        "runs_per_month": [30, 4],
+        "photon_enabled": [True, False]
+    })
+    registry = WorkloadRegistry("job")
+    registry.extend(jobs)
+    before = registry.totals()
+
+    index_dir = str(tmp_path / "price_index")
+    build_price_index(index_dir,
+                      ec2=os.path.join(FIXTURES, "AmazonEC2-mini.json"))
+    monkeypatch.setenv(PRICE_INDEX_ENV, index_dir)
+    try:
+        refresh_rate_catalog()
+        registry.reprice()
+        fresh = WorkloadRegistry("job")
+        fresh.extend(jobs)
+        assert registry.totals() == fresh.totals()
+        assert registry.totals() != before
+        assert registry.frame()["compute_cost"].tolist() == fresh.frame(
+        )["compute_cost"].tolist()
+    finally:
+        monkeypatch.undo()
+        refresh_rate_catalog()
+
+
+def test_counts_too_large_for_int32_are_rejected():
+    registry = WorkloadRegistry("job")
+    job = {
+        "name": "a",
+        "instance_type": "i3.xlarge",
+        "avg_duration": 30.0,
+        "runs_per_month": 3_000_000_000,
+        "photon_enabled": True
+    }
+    with pytest.raises(ValueError, match="runs_per_month"):
+        registry.extend(pd.DataFrame([job]))
+    with pytest.raises(ValueError, match="runs_per_month"):
+        registry.add(job)
+    assert len(registry) == 0
+    assert registry.totals()["compute_cost"] == 0
@@ -0,0 +1,207 @@
+"""
+Static asset pipeline for the Streamlit pages
+
+Images are optimized once (losslessly re-encoded, and downscaled where the
+app never shows them large) and written to static/ under content-hashed
+names such as logo.3f2a9c41d07e.png, which Streamlit serves at
+/app/static/ when server.enableStaticServing is on. A changed file gets a
+new name, so browsers may keep a served asset for as long as they like,
+and pages reference a short URL instead of inlining a base64 copy of the
+image on every rerun.
+
+static/assets.json records the content hash of each source, so a restart
+only re-encodes images that actually changed. Build ahead of time with
+
+    python -m utils.assets
+
+or let the first page run do it.
+"""
+import argparse
+import base64
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+from functools import lru_cache
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC_DIR = os.path.join(ROOT_DIR, "static")
+STATIC_URL = "/app/static"
+MANIFEST = "assets.json"
+
+# Asset name -> (source file, longest side in pixels or None to keep size)
+ASSETS = {
+    "logo": ("logo.png", None),
+    "icon": ("generated-icon.png", 256)
+}
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def _write_atomic(path, data):
+    """Write a file so concurrent readers never see it half written"""
+    # A unique name per call: sessions run in threads of one process, so
+    # two of them can build the same asset at once
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path),
+                                     prefix=f".{os.path.basename(path)}-",
+                                     suffix=".tmp",
+                                     delete=False) as temp_file:
+        try:
+            temp_file.write(data)
+        except BaseException:
+            temp_file.close()
+            os.unlink(temp_file.name)
+            raise
+    # mkstemp files are private; served assets must stay world-readable
+    os.chmod(temp_file.name, 0o644)
+    os.replace(temp_file.name, path)
+
+
+def optimize_image(data, max_size=None):
+    """
+    Re-encode an image as an optimized PNG
+
+    Args:
+        data (bytes): Source image
+        max_size (int): Downscale so the longest side is at most this many
+            pixels, or None to keep the size
+
+    Returns:
+        bytes: The optimized image, or data if re-encoding did not help
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        resized = bool(max_size) and max(image.size) > max_size
+        if resized:
+            image.thumbnail((max_size, max_size), Image.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format="PNG", optimize=True)
+    optimized = output.getvalue()
+    return optimized if resized or len(optimized) < len(data) else data
+
+
+def _read_manifest(static_dir):
+    try:
+        with open(os.path.join(static_dir, MANIFEST)) as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_assets(static_dir=STATIC_DIR, root_dir=ROOT_DIR):
+    """
+    Optimize every asset into a content-hashed file in static_dir
+
+    Assets whose source has the same content hash as in the last build are
+    kept as they are.
+
+    Returns:
+        dict: Asset name -> file, source, source_hash, bytes and
+            source_bytes, for the assets whose source exists
+    """
+    os.makedirs(static_dir, exist_ok=True)
+    previous = _read_manifest(static_dir)
+    manifest = {}
+    for name, (source, max_size) in ASSETS.items():
+        source_path = os.path.join(root_dir, source)
+        if not os.path.exists(source_path):
+            continue
+        with open(source_path, "rb") as source_file:
+            data = source_file.read()
+        source_hash = _digest(data)
+        entry = previous.get(name)
+        if (entry and entry["source_hash"] == source_hash and
+                os.path.exists(os.path.join(static_dir, entry["file"]))):
+            manifest[name] = entry
+            continue
+
+        optimized = optimize_image(data, max_size)
+        stem = os.path.splitext(os.path.basename(source))[0]
+        file_name = f"{stem}.{_digest(optimized)}.png"
+        _write_atomic(os.path.join(static_dir, file_name), optimized)
+        if entry and entry["file"] != file_name:
+            try:
+                os.remove(os.path.join(static_dir, entry["file"]))
+            except OSError:
+                pass
+        manifest[name] = {
+            "file": file_name,
+            "source": source,
+            "source_hash": source_hash,
+            "bytes": len(optimized),
+            "source_bytes": len(data)
+        }
+    if manifest != previous:
+        _write_atomic(os.path.join(static_dir, MANIFEST),
+                      json.dumps(manifest, indent=2).encode())
+    return manifest
+
+
+def _source_stamps():
+    """Modification time and size of every source, to notice edits cheaply"""
+    stamps = []
+    for source, _ in ASSETS.values():
+        try:
+            stat = os.stat(os.path.join(ROOT_DIR, source))
+        except OSError:
+            stamps.append(None)
+        else:
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(stamps)
+
+
+@lru_cache(maxsize=4)
+def _built_assets(stamps):
+    return build_assets()
+
+
+def get_assets():
+    """Return the asset manifest, rebuilt only when a source file changes"""
+    return _built_assets(_source_stamps())
+
+
+@lru_cache(maxsize=None)
+def _data_uri(file_name):
+    with open(os.path.join(STATIC_DIR, file_name), "rb") as asset_file:
+        encoded = base64.b64encode(asset_file.read()).decode()
+    return f"data:image/png;base64,{encoded}"
+
+
+def asset_url(name, static_serving=True):
+    """
+    Return the URL of a built asset, or None if its source is missing
+
+    Args:
+        name (str): Asset name (see ASSETS)
+        static_serving (bool): Whether Streamlit serves static/; without
+            it the asset is inlined as a data URI, encoded once per process
+    """
+    entry = get_assets().get(name)
+    if entry is None:
+        return None
+    if static_serving:
+        return f"{STATIC_URL}/{entry['file']}"
+    return _data_uri(entry["file"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Optimize the app's images into content-hashed static "
+        "files")
+    parser.add_argument("--static-dir", default=STATIC_DIR)
+    args = parser.parse_args(argv)
+    manifest = build_assets(args.static_dir)
+    for name, entry in manifest.items():
+        print(f"{name}: {entry['source']} ({entry['source_bytes']:,} bytes) "
+              f"-> {entry['file']} ({entry['bytes']:,} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+Command-line bulk estimator for workload inventories
+
+Prices every row of a CSV or Parquet inventory (see utils.inventory) with
+the same formulas as the calculator page and writes per-row costs plus
+per-layer totals. Rows that break the upload rules (unreadable numbers or
+flags, values outside the form ranges) are left out of the totals and
+reported instead, optionally to an errors file. The inventory is streamed in chunks and each chunk is
+priced with one vectorized pass per workload kind, so million-row files
+never have to fit in memory.
+
+Usage:
+    python -m utils.bulk_estimator inventory.csv -o priced.csv
+    python -m utils.bulk_estimator inventory.parquet -o priced.parquet \
+        --totals totals.csv --storage-tier Standard-IA --errors rejected.csv
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from utils.cost_formulas import calculate_storage_cost
+from utils.inventory import (DEFAULT_CHUNKSIZE, inventory_format,
+                             read_inventory)
+from utils.pricing_engine import WORKLOAD_KINDS
+from utils.rate_catalog import get_rate_catalog
+from utils.workload_import import (ERROR_COLUMNS, check_workloads,
+                                   error_report)
+
+ROW_COLUMNS = [
+    "name", "kind", "layer", "storage_tier", "compute_cost", "photon_cost",
+    "storage_gb", "storage_cost", "total_cost"
+]
+TOTAL_COLUMNS = [
+    "workloads", "compute_cost", "photon_cost", "storage_gb", "storage_cost",
+    "total_cost"
+]
+LAYERS = ["Landing", "RAW", "CONF", "PB"]
+
+
+def price_chunk(chunk, storage_tier="Standard"):
+    """
+    Price the valid rows of one inventory chunk
+
+    Args:
+        chunk (DataFrame): Raw inventory rows with a kind column, indexed by
+            position in the inventory (from 0)
+        storage_tier (str): S3 tier for rows without a storage_tier
+
+    Returns:
+        tuple: (DataFrame with one priced row per valid input row
+            (ROW_COLUMNS), in input order; DataFrame of rejected rows
+            (ERROR_COLUMNS))
+    """
+    kinds = chunk["kind"].astype("string").str.strip().str.lower()
+    unknown = sorted(set(kinds.dropna().unique()) - set(WORKLOAD_KINDS))
+    if unknown or kinds.isna().any():
+        raise ValueError(f"Unknown workload kinds: {unknown or ['<empty>']}")
+
+    priced_parts = []
+    error_parts = []
+    for kind, rows in chunk.groupby(kinds, sort=False):
+        layer, pricer = WORKLOAD_KINDS[kind]
+        frame, messages = check_workloads(rows, kind)
+        if not messages.empty:
+            error_parts.append(error_report(messages, frame["name"]))
+            frame = frame.drop(index=messages.index.unique())
+        priced = pricer(frame)
+        if "storage_tier" in priced:
+            tiers = priced["storage_tier"].fillna(storage_tier)
+        else:
+            tiers = pd.Series(storage_tier, index=priced.index, dtype="string")
+        tier_rates = tiers.map(get_rate_catalog().rates("S3"))
+        if tier_rates.isna().any():
+            raise ValueError("Unknown storage_tier values: " + ", ".join(
+                sorted(set(tiers[tier_rates.isna()].astype(str)))[:5]))
+        storage_cost = calculate_storage_cost(priced["storage_gb"], tier_rates)
+        priced_parts.append(
+            pd.DataFrame({
+                "name": priced["name"],
+                "kind": kind,
+                "layer": layer,
+                "storage_tier": tiers,
+                "compute_cost": priced["compute_cost"],
+                "photon_cost": priced["photon_cost"],
+                "storage_gb": priced["storage_gb"],
+                "storage_cost": storage_cost,
+                "total_cost": priced["compute_cost"] + priced["photon_cost"] +
+                storage_cost
+            }))
+    priced = pd.concat(priced_parts)
+    errors = (pd.concat(error_parts).sort_values("Row", kind="stable")
+              if error_parts else pd.DataFrame(columns=ERROR_COLUMNS))
+    return (priced.loc[chunk.index.intersection(priced.index), ROW_COLUMNS],
+            errors.reset_index(drop=True))
+
+
+class _RowWriter:
+    """Stream priced chunks into a CSV or Parquet file with pyarrow"""
+
+    def __init__(self, path):
+        self.path = path
+        self.format = inventory_format(path)
+        self._writer = None
+        self._schema = None
+
+    def write(self, priced):
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(priced.astype({
+            "name": "string",
+            "storage_tier": "string"
+        }),
+                                     preserve_index=False)
+        if self._writer is None:
+            self._schema = table.schema
+            if self.format == "parquet":
+                import pyarrow.parquet as pq
+
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                import pyarrow.csv as pa_csv
+
+                self._writer = pa_csv.CSVWriter(self.path, table.schema)
+        self._writer.write_table(table.cast(self._schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def estimate_inventory(path,
+                       output=None,
+                       storage_tier="Standard",
+                       chunksize=DEFAULT_CHUNKSIZE,
+                       errors=None):
+    """
+    Price a whole inventory file chunk by chunk
+
+    Args:
+        path (str): CSV or Parquet inventory
+        output (str): Optional CSV/Parquet file for per-row costs
+        storage_tier (str): Default S3 tier
+        chunksize (int): Rows per chunk
+        errors (list): Optional list that collects a DataFrame of rejected
+            rows (ERROR_COLUMNS, Row counting data rows from 1) per chunk
+
+    Returns:
+        DataFrame: Per-layer totals (TOTAL_COLUMNS) of the valid rows, with
+            a TOTAL row
+    """
+    if ("S3", storage_tier) not in get_rate_catalog():
+        raise ValueError(f"Unknown storage tier: {storage_tier}")
+    totals = pd.DataFrame(0.0, index=LAYERS, columns=TOTAL_COLUMNS)
+    writer = _RowWriter(output) if output else None
+    start = 0
+    try:
+        for chunk in read_inventory(path, chunksize=chunksize):
+            # Parquet batches are indexed from 0; number rows across chunks
+            chunk.index = pd.RangeIndex(start, start + len(chunk))
+            start += len(chunk)
+            if chunk.empty:
+                continue
+            priced, rejected = price_chunk(chunk, storage_tier)
+            if errors is not None and not rejected.empty:
+                errors.append(rejected)
+            if priced.empty:
+                continue
+            layer_sums = priced.groupby("layer")[TOTAL_COLUMNS[1:]].sum()
+            totals.loc[layer_sums.index, TOTAL_COLUMNS[1:]] += layer_sums
+            totals.loc[:, "workloads"] += priced["layer"].value_counts(
+            ).reindex(LAYERS, fill_value=0)
+            if writer:
+                writer.write(priced)
+    finally:
+        if writer:
+            writer.close()
+
+    totals.loc["TOTAL"] = totals.sum()
+    totals["workloads"] = totals["workloads"].astype(int)
+    totals.index.name = "layer"
+    return totals
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.bulk_estimator",
+        description="Price a CSV/Parquet workload inventory in bulk")
+    parser.add_argument("inventory", help="CSV or Parquet inventory file")
+    parser.add_argument("-o",
+                        "--output",
+                        help="Write per-row costs to this CSV/Parquet file")
+    parser.add_argument("--totals",
+                        help="Write per-layer totals to this CSV file")
+    parser.add_argument("--storage-tier",
+                        default="Standard",
+                        choices=get_rate_catalog().options("S3"),
+                        help="S3 tier for rows without a storage_tier column")
+    parser.add_argument("--errors",
+                        help="Write rejected rows and their errors to this "
+                        "CSV file")
+    parser.add_argument("--chunksize",
+                        type=int,
+                        default=DEFAULT_CHUNKSIZE,
+                        help="Rows priced per chunk")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.inventory):
+        parser.error(f"Inventory not found: {args.inventory}")
+
+    started = time.perf_counter()
+    rejected = []
+    try:
+        totals = estimate_inventory(args.inventory,
+                                    output=args.output,
+                                    storage_tier=args.storage_tier,
+                                    chunksize=args.chunksize,
+                                    errors=rejected)
+    except ValueError as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - started
+
+    if args.totals:
+        totals.to_csv(args.totals)
+    if rejected:
+        rejected = pd.concat(rejected, ignore_index=True)
+        if args.errors:
+            rejected.to_csv(args.errors, index=False)
+        print(f"Rejected {len(rejected):,} rows" +
+              (f", see {args.errors}" if args.errors else ":\n" +
+               rejected.head(10).to_string(index=False)),
+              file=sys.stderr)
+    elif args.errors:
+        pd.DataFrame(columns=ERROR_COLUMNS).to_csv(args.errors, index=False)
+    print(totals.to_string(float_format=lambda value: f"{value:,.2f}"))
+    print(f"\nPriced {totals.loc['TOTAL', 'workloads']:,} workloads "
+          f"in {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
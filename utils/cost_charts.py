@@ -0,0 +1,127 @@
+"""
+Cost Visualizations data and figures for the Databricks Cloud Cost Calculator
+
+The charts only depend on st.session_state.all_costs, so everything here is
+keyed by costs_fingerprint(): a content hash that stays the same across
+reruns until a layer's costs actually change. Figures are returned as
+Plotly JSON so they can be cached and handed back to st.plotly_chart
+without rebuilding them through plotly.express.
+"""
+import hashlib
+import json
+
+import pandas as pd
+
+
+def costs_fingerprint(all_costs):
+    """
+    Return a content hash of st.session_state.all_costs
+
+    Equal costs give equal fingerprints whatever the dict order, so the
+    hash can key caches across Streamlit reruns.
+    """
+    canonical = json.dumps(all_costs, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def process_cost_data(all_costs):
+    """
+    Build the layer-wise and component-wise cost frames
+
+    Args:
+        all_costs (dict): st.session_state.all_costs
+
+    Returns:
+        tuple: (layer_df with Layer/Total Cost, component_df with
+            Layer/Component/Cost)
+    """
+    layer_costs = []
+    components = []
+    for layer, costs in all_costs.items():
+        if not costs:
+            continue
+        # Only numeric values are costs; tiers, policies and flags are not
+        numeric = {
+            component: float(cost)
+            for component, cost in costs.items()
+            if isinstance(cost, (int, float))
+        }
+        layer_costs.append({
+            'Layer': layer,
+            'Total Cost': sum(numeric.values())
+        })
+        components.extend({
+            'Layer': layer,
+            'Component': component,
+            'Cost': cost
+        } for component, cost in numeric.items())
+
+    return pd.DataFrame(layer_costs), pd.DataFrame(components)
+
+
+def layer_pie(layer_df):
+    """Donut chart of the total cost per layer"""
+    import plotly.express as px
+
+    fig = px.pie(layer_df,
+                 values='Total Cost',
+                 names='Layer',
+                 color_discrete_sequence=px.colors.qualitative.Set3,
+                 hole=0.4)
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    return fig
+
+
+def component_bar(component_df):
+    """Grouped bar chart of every cost component, coloured by layer"""
+    import plotly.express as px
+
+    fig = px.bar(
+        component_df,
+        x='Component',
+        y='Cost',
+        color='Layer',
+        color_discrete_sequence=['#FF8200', '#00A6A6', '#FF4B4B', '#FFD700'])
+    fig.update_layout(xaxis_title="Cost Component",
+                      yaxis_title="Cost ($)",
+                      barmode='group')
+    return fig
+
+
+def layer_heatmap(component_df):
+    """Heatmap of component costs across layers"""
+    import plotly.express as px
+
+    pivot_df = component_df.pivot(index='Layer',
+                                  columns='Component',
+                                  values='Cost')
+    fig = px.imshow(pivot_df, color_continuous_scale='YlOrRd', aspect='auto')
+    fig.update_layout(xaxis_title="Cost Component", yaxis_title="Layer")
+    return fig
+
+
+# Chart name -> (builder, frame it is drawn from)
+CHARTS = {
+    "layer_pie": (layer_pie, "layer"),
+    "component_bar": (component_bar, "component"),
+    "layer_heatmap": (layer_heatmap, "component")
+}
+
+
+def cost_figure_json(chart, layer_df, component_df):
+    """
+    Build one chart and return its Plotly JSON spec
+
+    Args:
+        chart (str): A CHARTS name
+        layer_df (DataFrame): From process_cost_data
+        component_df (DataFrame): From process_cost_data
+
+    Returns:
+        str: Figure JSON, or None when there is nothing to draw
+    """
+    builder, frame = CHARTS[chart]
+    data = layer_df if frame == "layer" else component_df
+    if data.empty:
+        return None
+    return builder(data).to_json()
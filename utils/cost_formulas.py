@@ -1,22 +1,56 @@
 """
 Cost formula utilities for Databricks Cloud Cost Calculator
+
+Every formula accepts scalars, lists, NumPy arrays or pandas Series.
+Array-like inputs broadcast against each other so a whole column of
+workloads is priced in one call; scalar inputs return a plain number.
 """
+import numpy as np
+
+
+def _as_operand(value):
+    """Turn lists and tuples into float arrays so they broadcast like NumPy"""
+    if isinstance(value, (list, tuple)):
+        return np.asarray(value, dtype=float)
+    return value
+
+
+def _where(condition, if_true, if_false):
+    """Element-wise select that keeps the index of a pandas Series input"""
+    result = np.where(np.asarray(condition, dtype=bool), if_true, if_false)
+    for value in (condition, if_true, if_false):
+        index = getattr(value, "index", None)
+        if index is not None:
+            return type(value)(result, index=index) if result.ndim else result
+    return result
+
 
 def calculate_storage_cost(storage_size, storage_tier_cost, months=1):
     """Calculate storage cost based on size and tier cost"""
-    return storage_size * storage_tier_cost * months
+    return (_as_operand(storage_size) * _as_operand(storage_tier_cost) *
+            _as_operand(months))
 
 def calculate_compute_cost(instance_cost, num_instances, hours_per_day, days_per_month):
     """Calculate compute cost based on instance details"""
-    return instance_cost * num_instances * hours_per_day * days_per_month
+    return (_as_operand(instance_cost) * _as_operand(num_instances) *
+            _as_operand(hours_per_day) * _as_operand(days_per_month))
 
 def calculate_dbu_cost(dbu_rate, cluster_size, hours_per_day, days_per_month, dbu_per_hour=1):
     """Calculate DBU cost based on usage"""
-    return dbu_rate * cluster_size * hours_per_day * days_per_month * dbu_per_hour
+    return (_as_operand(dbu_rate) * _as_operand(cluster_size) *
+            _as_operand(hours_per_day) * _as_operand(days_per_month) *
+            _as_operand(dbu_per_hour))
 
-def calculate_photon_cost(base_compute_cost, photon_acceleration_factor=0.2):
+def calculate_photon_cost(base_compute_cost, photon_acceleration_factor=0.2,
+                          photon_enabled=True):
     """
     Calculate Photon cost as a percentage of base compute cost
     Default acceleration factor is 20% (0.2) of the base compute cost
+    photon_enabled may be a per-row mask; disabled rows cost 0
     """
-    return base_compute_cost * photon_acceleration_factor
\ No newline at end of file
+    photon_cost = (_as_operand(base_compute_cost) *
+                   _as_operand(photon_acceleration_factor))
+    photon_enabled = _as_operand(photon_enabled)
+    if np.ndim(photon_enabled) == 0:
+        return photon_cost if photon_enabled else photon_cost * 0
+    return _where(photon_enabled, photon_cost, 0.0)
@@ -0,0 +1,284 @@
+"""
+Persisted estimates for the Databricks Cloud Cost Calculator
+
+An estimate is everything the calculator keeps in st.session_state: the
+per-layer costs (all_costs), the Simple mode inputs (layer_inputs), the
+values of each layer's input widgets (layer_widgets, including its mode) and
+the Advanced mode workload registries. Estimates are saved by name into a local
+SQLite database in WAL mode, so the app can read while another session
+writes. Saving a name again adds a new version; loading without a version
+opens the latest one.
+
+Workloads are stored one typed table per kind (workloads_table,
+workloads_job, ...) keyed by (estimate, position). Loading a kind is one
+range query read straight into a DataFrame and handed to
+WorkloadRegistry.extend, so an estimate of 50,000 workloads reopens in a
+fraction of a second.
+"""
+import itertools
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from utils.workload_registry import WorkloadRegistry
+from utils.workload_store import FIELD_DTYPES
+
+ESTIMATE_STORE_ENV = "COST_CALCULATOR_ESTIMATES"
+DEFAULT_ESTIMATE_STORE = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "data", "estimates.db")
+
+# st.session_state key -> workload kind of each Advanced mode registry
+SESSION_REGISTRIES = {
+    "landing_tables": "table",
+    "raw_jobs": "job",
+    "conf_transforms": "transform",
+    "pb_dashboards": "dashboard",
+    "pb_reports": "report"
+}
+
+# Column type per workload field dtype
+_SQL_TYPES = {
+    "category": "TEXT",
+    "float64": "REAL",
+    "int32": "INTEGER",
+    "bool": "INTEGER"
+}
+
+
+def _json_default(value):
+    """Serialize numpy scalars left in all_costs by the calculators"""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class EstimateStore:
+    """
+    Named, versioned estimates in a SQLite database
+
+    Args:
+        path (str): Database file, created on first use
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS estimates (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    saved_at TEXT NOT NULL,
+                    all_costs TEXT NOT NULL,
+                    layer_inputs TEXT NOT NULL,
+                    workloads INTEGER NOT NULL,
+                    widgets TEXT NOT NULL DEFAULT '{}',
+                    UNIQUE (name, version)
+                )""")
+            for kind, dtypes in FIELD_DTYPES.items():
+                columns = "".join(f", {field} {_SQL_TYPES[dtype]} NOT NULL"
+                                  for field, dtype in dtypes.items())
+                connection.execute(f"""
+                    CREATE TABLE IF NOT EXISTS workloads_{kind} (
+                        estimate_id INTEGER NOT NULL
+                            REFERENCES estimates (id) ON DELETE CASCADE,
+                        position INTEGER NOT NULL,
+                        name TEXT NOT NULL{columns},
+                        PRIMARY KEY (estimate_id, position)
+                    ) WITHOUT ROWID""")
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation, since Streamlit runs
+        # each session's script in its own thread
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            connection.execute("PRAGMA foreign_keys=ON")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with connection:  # commit, or roll back on error
+                yield connection
+        finally:
+            connection.close()
+
+    def save(self,
+             name,
+             all_costs,
+             layer_inputs=None,
+             registries=None,
+             widgets=None):
+        """
+        Save an estimate as the next version of a name
+
+        Args:
+            name (str): Estimate name
+            all_costs (dict): st.session_state.all_costs
+            layer_inputs (dict): st.session_state.layer_inputs
+            registries (dict): SESSION_REGISTRIES key -> WorkloadRegistry;
+                missing or None registries are saved empty
+            widgets (dict): st.session_state.layer_widgets, layer ->
+                widget key -> value
+
+        Returns:
+            int: The saved version
+        """
+        name = name.strip()
+        if not name:
+            raise ValueError("Estimate name cannot be empty")
+        registries = {
+            key: registry
+            for key, registry in (registries or {}).items()
+            if registry is not None and key in SESSION_REGISTRIES
+        }
+        with self._connect() as connection:
+            # Take the write lock before reading the next version, so
+            # concurrent saves of one name queue up instead of both picking
+            # the same version
+            connection.execute("BEGIN IMMEDIATE")
+            version = connection.execute(
+                "SELECT COALESCE(MAX(version), 0) + 1 FROM estimates "
+                "WHERE name = ?", (name, )).fetchone()[0]
+            estimate_id = connection.execute(
+                "INSERT INTO estimates (name, version, saved_at, all_costs, "
+                "layer_inputs, workloads, widgets) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (name, version, datetime.now(timezone.utc).isoformat(
+                    timespec="seconds"),
+                 json.dumps(all_costs, default=_json_default),
+                 json.dumps(layer_inputs or {}, default=_json_default),
+                 sum(len(registry) for registry in registries.values()),
+                 json.dumps(widgets or {}, default=_json_default))).lastrowid
+            for key, registry in registries.items():
+                self._save_workloads(connection, estimate_id, registry)
+        return version
+
+    @staticmethod
+    def _save_workloads(connection, estimate_id, registry):
+        if not len(registry):
+            return
+        frame = registry.frame(priced=False)
+        columns = ["name", *registry.fields]
+        rows = zip(
+            itertools.repeat(estimate_id),
+            range(len(frame)),
+            *(frame[column].astype(object).tolist() if
+              FIELD_DTYPES[registry.kind].get(column) == "category" else
+              frame[column].tolist() for column in columns))
+        placeholders = ", ".join("?" * (len(columns) + 2))
+        connection.executemany(
+            f"INSERT INTO workloads_{registry.kind} (estimate_id, position, "
+            f"{', '.join(columns)}) VALUES ({placeholders})", rows)
+
+    def _estimate(self, connection, name, version):
+        if version is None:
+            row = connection.execute(
+                "SELECT id, version, all_costs, layer_inputs, widgets "
+                "FROM estimates "
+                "WHERE name = ? ORDER BY version DESC LIMIT 1",
+                (name, )).fetchone()
+        else:
+            row = connection.execute(
+                "SELECT id, version, all_costs, layer_inputs, widgets "
+                "FROM estimates "
+                "WHERE name = ? AND version = ?", (name, version)).fetchone()
+        if row is None:
+            raise KeyError(name if version is None else f"{name} v{version}")
+        return row
+
+    def load(self, name, version=None):
+        """
+        Load an estimate
+
+        Args:
+            name (str): Estimate name
+            version (int): Version to load, default the latest
+
+        Returns:
+            dict: version, all_costs, layer_inputs, widgets and registries
+                (SESSION_REGISTRIES key -> WorkloadRegistry)
+        """
+        with self._connect() as connection:
+            (estimate_id, version, all_costs, layer_inputs,
+             widgets) = self._estimate(connection, name, version)
+            registries = {}
+            for key, kind in SESSION_REGISTRIES.items():
+                columns = ["name", *FIELD_DTYPES[kind]]
+                cursor = connection.execute(
+                    f"SELECT {', '.join(columns)} FROM workloads_{kind} "
+                    "WHERE estimate_id = ? ORDER BY position", (estimate_id, ))
+                registry = WorkloadRegistry(kind)
+                registry.extend(
+                    pd.DataFrame.from_records(cursor.fetchall(),
+                                              columns=columns))
+                registries[key] = registry
+        return {
+            "version": version,
+            "all_costs": json.loads(all_costs),
+            "layer_inputs": json.loads(layer_inputs),
+            "widgets": json.loads(widgets),
+            "registries": registries
+        }
+
+    def list_estimates(self):
+        """
+        Return the saved estimates, latest version of each
+
+        Returns:
+            DataFrame: name, version, versions, saved_at and workloads,
+                most recently saved first
+        """
+        with self._connect() as connection:
+            return pd.read_sql_query(
+                """
+                SELECT name, version, versions, saved_at, workloads
+                FROM (
+                    SELECT name, version, saved_at, workloads,
+                           COUNT(*) OVER (PARTITION BY name) AS versions,
+                           ROW_NUMBER() OVER (PARTITION BY name
+                                              ORDER BY version DESC) AS latest
+                    FROM estimates
+                )
+                WHERE latest = 1
+                ORDER BY saved_at DESC, name""", connection)
+
+    def versions(self, name):
+        """
+        Return every saved version of an estimate
+
+        Returns:
+            DataFrame: version, saved_at and workloads, latest first
+        """
+        with self._connect() as connection:
+            return pd.read_sql_query(
+                "SELECT version, saved_at, workloads FROM estimates "
+                "WHERE name = ? ORDER BY version DESC", connection,
+                params=(name, ))
+
+    def delete(self, name, version=None):
+        """Delete one version of an estimate, or all of its versions"""
+        with self._connect() as connection:
+            if version is None:
+                deleted = connection.execute(
+                    "DELETE FROM estimates WHERE name = ?", (name, ))
+            else:
+                deleted = connection.execute(
+                    "DELETE FROM estimates WHERE name = ? AND version = ?",
+                    (name, version))
+            if not deleted.rowcount:
+                raise KeyError(name)
+
+
+@lru_cache(maxsize=None)
+def get_estimate_store(path=None):
+    """Return the process-wide estimate store, creating it on first use"""
+    return EstimateStore(path or os.environ.get(ESTIMATE_STORE_ENV) or
+                         DEFAULT_ESTIMATE_STORE)
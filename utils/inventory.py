@@ -0,0 +1,151 @@
+"""
+Workload inventory files for bulk pricing
+
+An inventory is a CSV or Parquet file with one row per landing table, RAW
+job, CONF transformation, PB dashboard or PB report. The "kind" column
+(table, job, transform, dashboard, report) says which, and the other
+columns carry the same fields as the matching calculator form. Empty cells
+take the form's default value. An optional "storage_tier" column overrides
+the S3 tier for that row.
+
+Files are read in chunks so inventories far larger than memory can be
+priced.
+"""
+import os
+
+import pandas as pd
+
+# Fields per workload kind with the calculator form defaults.
+# None means "no default": the pricer falls back per row (PB storage).
+KIND_FIELDS = {
+    "table": {
+        "avg_file_size": 2.0,
+        "files_per_day": 5,
+        "retention": "30 days"
+    },
+    "job": {
+        "instance_type": "i3.xlarge",
+        "avg_duration": 30,
+        "runs_per_month": 30,
+        "photon_enabled": True
+    },
+    "transform": {
+        "service_tier": "Databricks Jobs",
+        "avg_duration": 60,
+        "runs_per_month": 30,
+        "dbu_per_hour": 4,
+        "storage_gb": 50.0,
+        "photon_enabled": True
+    },
+    "dashboard": {
+        "engine_type": "SQL",
+        "compute_size": "",
+        "active_users": 10,
+        "queries_per_day": 10,
+        "avg_query_duration": 10,
+        "storage_gb": None,
+        "photon_enabled": True
+    },
+    "report": {
+        "engine_type": "SQL",
+        "runs_per_month": 4,
+        "gen_duration": 30,
+        "dbu_per_hour": 2,
+        "storage_gb": None,
+        "photon_enabled": True
+    }
+}
+
+TEXT_FIELDS = {
+    "name", "kind", "retention", "instance_type", "service_tier",
+    "engine_type", "compute_size", "storage_tier"
+}
+
+# Spellings of boolean flags; 1.0/0.0 are how Excel and Parquet write 1/0 in
+# a column with empty cells
+_TRUE_FLAGS = {"true", "1", "1.0", "yes", "y", "enabled", "on"}
+_FALSE_FLAGS = {"false", "0", "0.0", "no", "n", "disabled", "off"}
+
+DEFAULT_CHUNKSIZE = 250_000
+
+
+def inventory_format(path):
+    """Return 'csv' or 'parquet' based on the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".parquet", ".pq"):
+        return "parquet"
+    if extension in (".csv", ".txt", ".gz"):
+        return "csv"
+    raise ValueError(f"Unsupported inventory format: {path}")
+
+
+def read_inventory(path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Stream an inventory file as DataFrame chunks
+
+    Args:
+        path (str): CSV or Parquet inventory file
+        chunksize (int): Maximum rows per chunk
+
+    Yields:
+        DataFrame: Raw inventory rows
+    """
+    if inventory_format(path) == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        text_columns = {column: "string" for column in TEXT_FIELDS}
+        yield from pd.read_csv(path, chunksize=chunksize, dtype=text_columns)
+
+
+def parse_flags(column):
+    """Parse a boolean column that may hold True/False, 1/0 or yes/no text"""
+    if column.dtype == bool:
+        return column
+    return column.astype("string").str.strip().str.lower().isin(_TRUE_FLAGS)
+
+
+def unknown_flags(column):
+    """Mask of values that are neither a true nor a false flag (see
+    parse_flags, which reads them as False); missing values are not flagged
+    """
+    if column.dtype == bool:
+        return pd.Series(False, index=column.index)
+    text = column.astype("string").str.strip().str.lower()
+    return column.notna() & ~text.isin(_TRUE_FLAGS | _FALSE_FLAGS)
+
+
+def normalize_workloads(frame, kind):
+    """
+    Fill defaults and coerce types for rows of a single workload kind
+
+    Args:
+        frame (DataFrame): Inventory rows that all have this kind
+        kind (str): One of KIND_FIELDS
+
+    Returns:
+        DataFrame: Rows with every field of the kind present and typed
+    """
+    columns = {"name": frame["name"].astype("string") if "name" in frame
+               else pd.Series(pd.NA, index=frame.index, dtype="string")}
+    for field, default in KIND_FIELDS[kind].items():
+        if field in frame:
+            column = frame[field]
+        else:
+            column = pd.Series(pd.NA, index=frame.index, dtype=object)
+
+        if field == "photon_enabled":
+            present = column.notna()
+            column = parse_flags(column.where(present, str(default)))
+        elif field in TEXT_FIELDS:
+            column = column.astype("string").fillna(default)
+        else:
+            column = pd.to_numeric(column, errors="coerce")
+            if default is not None:
+                column = column.fillna(default)
+        columns[field] = column
+    if "storage_tier" in frame:
+        columns["storage_tier"] = frame["storage_tier"].astype("string")
+    return pd.DataFrame(columns, index=frame.index)
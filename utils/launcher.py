@@ -0,0 +1,449 @@
+"""
+Server entry point for the Databricks Cloud Cost Calculator
+
+    python -m utils.launcher --port 5000
+    python -m utils.launcher --port 5000 --workers 4
+
+With one worker, the launcher pre-warms the process-wide state every
+session shares (the rate catalog and the pricing engine rates derived
+from it, the static assets, the estimate store, the metrics server and
+the libraries the calculator imports on its first render), then starts
+the Streamlit server for home.py in the same process, so the first
+visitor does not pay for any of it.
+
+With several workers, it starts one such server per worker on a private
+port and serves the public port itself with a small load balancer. A
+Streamlit session lives in the memory of the worker that ran it, so the
+balancer is sticky: a browser's first response sets a cookie naming its
+worker, and every later request and websocket from that browser goes to
+the same worker. New browsers go to the healthy worker with the fewest
+open connections. Workers that exit are restarted; the balancer only
+starts accepting traffic once every worker answers its health check.
+
+Server options (--port, --address, --max-upload-size,
+--websocket-compression) are passed to Streamlit as flags; options left
+out keep their .streamlit/config.toml value. PORT and
+COST_CALCULATOR_WORKERS set the port and worker count of a container.
+"""
+import argparse
+import asyncio
+import importlib
+import itertools
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+from utils.metrics import DEFAULT_METRICS_PORT, METRICS_PORT_ENV
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOME_PAGE = os.path.join(ROOT_DIR, "home.py")
+
+PORT_ENV = "PORT"
+WORKERS_ENV = "COST_CALCULATOR_WORKERS"
+DEFAULT_PORT = 5000
+DEFAULT_ADDRESS = "0.0.0.0"
+HEALTH_PATH = "/_stcore/health"
+WORKER_COOKIE = "cost_calculator_worker"
+STARTUP_TIMEOUT = 120
+HEAD_LIMIT = 64 * 1024
+PIPE_CHUNK = 64 * 1024
+
+# Libraries the calculator's first render would otherwise import
+PREWARM_MODULES = ("pandas", "pyarrow", "plotly.express", "altair",
+                   "xlsxwriter", "utils.pricing_engine", "utils.cost_charts",
+                   "utils.projection", "utils.lifecycle", "utils.simulation",
+                   "utils.optimizer", "utils.scenarios")
+
+logger = logging.getLogger(__name__)
+
+
+def _import(name):
+    importlib.import_module(name)
+
+
+def _warm_rate_catalog():
+    from utils.rate_catalog import refresh_rate_catalog
+
+    # Builds the shared catalog, then runs the engine's refresh hooks
+    importlib.import_module("utils.pricing_engine")
+    refresh_rate_catalog()
+
+
+def _warm_assets():
+    from utils.assets import get_assets
+
+    get_assets()
+
+
+def _warm_estimate_store():
+    from utils.estimate_store import get_estimate_store
+
+    get_estimate_store().list_estimates()
+
+
+def _warm_metrics():
+    from utils.metrics import start_metrics_server
+
+    start_metrics_server()
+
+
+# Pre-warm step -> function, in the order they run
+PREWARM_STEPS = {
+    "rate_catalog": _warm_rate_catalog,
+    "assets": _warm_assets,
+    "estimate_store": _warm_estimate_store,
+    "metrics": _warm_metrics,
+    **{
+        f"import {name}": (lambda name=name: _import(name))
+        for name in PREWARM_MODULES
+    }
+}
+
+
+def prewarm():
+    """
+    Build the process-wide state shared by every session
+
+    A step that fails is logged and skipped; the page builds it on
+    demand instead.
+
+    Returns:
+        dict: Step -> seconds it took (None if it failed)
+    """
+    timings = {}
+    for step, function in PREWARM_STEPS.items():
+        started = time.perf_counter()
+        try:
+            function()
+        except Exception:
+            logger.exception("Pre-warm step %s failed", step)
+            timings[step] = None
+        else:
+            timings[step] = time.perf_counter() - started
+    logger.info("Pre-warmed in %.2f s", sum(
+        seconds for seconds in timings.values() if seconds is not None))
+    return timings
+
+
+def streamlit_flags(args):
+    """Return the streamlit run flags for the launcher options"""
+    flags = [
+        "--server.headless", "true",
+        "--server.port", str(args.port),
+        "--server.address", args.address
+    ]
+    if args.max_upload_size is not None:
+        flags += ["--server.maxUploadSize", str(args.max_upload_size)]
+    if args.websocket_compression is not None:
+        flags += [
+            "--server.enableWebsocketCompression",
+            str(args.websocket_compression).lower()
+        ]
+    return flags
+
+
+def run_server(args):
+    """Pre-warm, then serve home.py with Streamlit in this process"""
+    from streamlit.web import cli
+
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
+    os.chdir(ROOT_DIR)
+    if not args.no_prewarm:
+        prewarm()
+    sys.argv = ["streamlit", "run", HOME_PAGE, *streamlit_flags(args)]
+    return cli.main()
+
+
+class Worker:
+    """
+    One Streamlit server process behind the load balancer
+
+    Args:
+        index (int): Worker number, also the value of its sticky cookie
+        port (int): Private port it serves on
+        command (list): Command line starting it
+        env (dict): Its environment
+    """
+
+    def __init__(self, index, port, command, env):
+        self.index = index
+        self.port = port
+        self.command = command
+        self.env = env
+        self.process = None
+        self.healthy = False
+        self.connections = 0
+
+    def start(self):
+        self.healthy = False
+        self.process = subprocess.Popen(self.command, cwd=ROOT_DIR,
+                                        env=self.env)
+
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def check_health(self):
+        """Ask the worker's Streamlit server whether it is up"""
+        try:
+            with urllib.request.urlopen(
+                    f"http://127.0.0.1:{self.port}{HEALTH_PATH}",
+                    timeout=2) as response:
+                self.healthy = response.status == 200
+        except OSError:
+            self.healthy = False
+        return self.healthy
+
+    def stop(self):
+        if self.alive():
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def start_workers(args):
+    """
+    Start args.workers single-worker launchers on private ports
+
+    Worker i serves on args.worker_port + i and its metrics on
+    args.metrics_port + i (none if args.metrics_port is 0).
+
+    Returns:
+        list: Worker per process, started but not yet healthy
+    """
+    workers = []
+    for index in range(args.workers):
+        port = args.worker_port + index
+        env = dict(os.environ)
+        env[METRICS_PORT_ENV] = str(args.metrics_port and
+                                    args.metrics_port + index)
+        command = [
+            sys.executable, "-m", "utils.launcher", "--workers", "1",
+            "--port", str(port), "--address", "127.0.0.1"
+        ]
+        if args.max_upload_size is not None:
+            command += ["--max-upload-size", str(args.max_upload_size)]
+        if args.websocket_compression is not None:
+            command.append("--websocket-compression"
+                           if args.websocket_compression else
+                           "--no-websocket-compression")
+        if args.no_prewarm:
+            command.append("--no-prewarm")
+        worker = Worker(index, port, command, env)
+        worker.start()
+        workers.append(worker)
+    return workers
+
+
+_new_clients = itertools.count()
+
+
+def _cookie_worker(head, workers):
+    """The healthy worker named by the request's sticky cookie, if any"""
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() != b"cookie":
+            continue
+        for cookie in value.split(b";"):
+            key, _, index = cookie.strip().partition(b"=")
+            if key == WORKER_COOKIE.encode() and index.isdigit():
+                index = int(index)
+                if index < len(workers) and workers[index].healthy:
+                    return workers[index]
+    return None
+
+
+def pick_worker(head, workers):
+    """
+    Choose the worker for a new client connection
+
+    Returns:
+        tuple: (worker, whether the response must set the sticky cookie),
+            or (None, False) if no worker is healthy
+    """
+    worker = _cookie_worker(head, workers)
+    if worker is not None:
+        return worker, False
+    healthy = [worker for worker in workers if worker.healthy]
+    if not healthy:
+        return None, False
+    # Fewest connections; ties rotate so idle workers share new browsers
+    start = next(_new_clients) % len(healthy)
+    return min(healthy[start:] + healthy[:start],
+               key=lambda worker: worker.connections), True
+
+
+async def _pipe(reader, writer):
+    try:
+        while True:
+            data = await reader.read(PIPE_CHUNK)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        try:
+            writer.close()
+        except ConnectionError:
+            pass
+
+
+async def _proxy(client_reader, client_writer, workers):
+    """Forward one client connection to its worker"""
+    try:
+        head = await client_reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+            ConnectionError):
+        client_writer.close()
+        return
+    worker, set_cookie = pick_worker(head, workers)
+    if worker is None:
+        client_writer.write(b"HTTP/1.1 503 Service Unavailable\r\n"
+                            b"Content-Length: 0\r\nConnection: close\r\n\r\n")
+        await client_writer.drain()
+        client_writer.close()
+        return
+
+    worker.connections += 1
+    upstream = None
+    try:
+        backend_reader, backend_writer = await asyncio.open_connection(
+            "127.0.0.1", worker.port, limit=HEAD_LIMIT)
+        backend_writer.write(head)
+        await backend_writer.drain()
+        if set_cookie:
+            # Pin the browser to this worker from its first response on
+            upstream = asyncio.ensure_future(
+                _pipe(client_reader, backend_writer))
+            response_head = await backend_reader.readuntil(b"\r\n\r\n")
+            status_line, _, rest = response_head.partition(b"\r\n")
+            client_writer.write(
+                status_line + b"\r\nSet-Cookie: " + WORKER_COOKIE.encode() +
+                b"=" + str(worker.index).encode() +
+                b"; Path=/; HttpOnly; SameSite=Lax\r\n" + rest)
+            await asyncio.gather(upstream,
+                                 _pipe(backend_reader, client_writer))
+        else:
+            await asyncio.gather(_pipe(client_reader, backend_writer),
+                                 _pipe(backend_reader, client_writer))
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+            ConnectionError):
+        client_writer.close()
+    finally:
+        if upstream is not None and not upstream.done():
+            upstream.cancel()
+        worker.connections -= 1
+
+
+async def _supervise(workers, interval=2.0):
+    """Restart workers that exit and track which ones are healthy"""
+    loop = asyncio.get_running_loop()
+    while True:
+        for worker in workers:
+            if not worker.alive():
+                logger.warning("Worker %d exited, restarting it",
+                               worker.index)
+                worker.start()
+            await loop.run_in_executor(None, worker.check_health)
+        await asyncio.sleep(interval)
+
+
+async def _wait_healthy(workers, timeout=STARTUP_TIMEOUT):
+    loop = asyncio.get_running_loop()
+    deadline = time.monotonic() + timeout
+    while not all(worker.healthy for worker in workers):
+        if time.monotonic() > deadline:
+            raise RuntimeError("Workers did not become healthy in time")
+        for worker in workers:
+            if not worker.alive():
+                raise RuntimeError(f"Worker {worker.index} exited on start")
+            if not worker.healthy:
+                await loop.run_in_executor(None, worker.check_health)
+        await asyncio.sleep(0.5)
+
+
+async def balance(args, workers):
+    """Serve the public port once every worker is healthy"""
+    await _wait_healthy(workers)
+    server = await asyncio.start_server(
+        lambda reader, writer: _proxy(reader, writer, workers),
+        args.address, args.port, limit=HEAD_LIMIT)
+    logger.info("Balancing %s:%d over %d workers", args.address, args.port,
+                len(workers))
+    async with server:
+        await asyncio.gather(server.serve_forever(), _supervise(workers))
+
+
+def run_balanced(args):
+    """Start the workers and balance the public port across them"""
+    workers = start_workers(args)
+
+    def stop(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        asyncio.run(balance(args, workers))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.stop()
+    return 0
+
+
+def _workers(value):
+    if value == "auto":
+        return os.cpu_count() or 1
+    workers = int(value)
+    if workers < 1:
+        raise argparse.ArgumentTypeError("Need at least one worker")
+    return workers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Pre-warm and serve the calculator, optionally as "
+        "several worker processes behind a sticky load balancer")
+    parser.add_argument("--port", type=int,
+                        default=int(os.environ.get(PORT_ENV, DEFAULT_PORT)))
+    parser.add_argument("--address", default=DEFAULT_ADDRESS)
+    parser.add_argument("--workers", type=_workers,
+                        default=_workers(os.environ.get(WORKERS_ENV, "1")),
+                        help="Server processes, or 'auto' for one per CPU")
+    parser.add_argument("--worker-port", type=int,
+                        help="First private worker port, default port + 1")
+    parser.add_argument("--metrics-port", type=int,
+                        default=int(
+                            os.environ.get(METRICS_PORT_ENV,
+                                           DEFAULT_METRICS_PORT)),
+                        help="Metrics port (of the first worker)")
+    parser.add_argument("--max-upload-size", type=int,
+                        help="Largest upload in MB")
+    parser.add_argument("--websocket-compression",
+                        action=argparse.BooleanOptionalAction,
+                        help="Compress websocket messages")
+    parser.add_argument("--no-prewarm", action="store_true",
+                        help="Start serving without building shared state")
+    args = parser.parse_args(argv)
+    if args.worker_port is None:
+        args.worker_port = args.port + 1
+
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s %(name)s %(message)s")
+    if args.workers == 1:
+        os.environ[METRICS_PORT_ENV] = str(args.metrics_port)
+        return run_server(args)
+    return run_balanced(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Incremental per-layer totals for Advanced mode workloads
+
+A LayerAggregate keeps running sums of the priced rows of one workload
+kind (see pricing_engine.price_workload), so adding, editing or removing a
+workload only touches that workload's row and the layer totals never have
+to be rebuilt by walking every workload on each Streamlit rerun.
+"""
+import numpy as np
+
+SUM_FIELDS = ("compute_cost", "photon_cost", "storage_gb")
+
+
+def _empty_totals():
+    return {"count": 0, "photon_count": 0, **dict.fromkeys(SUM_FIELDS, 0.0)}
+
+
+class LayerAggregate:
+    """
+    Running totals of priced workload rows, optionally split into groups
+
+    Groups keep separate totals, e.g. one per engine type for PB
+    dashboards and reports. totals() without a group sums every group.
+    """
+
+    def __init__(self):
+        self._totals = {}  # group -> running sums
+
+    def _apply(self, row, group, sign):
+        totals = self._totals.setdefault(group, _empty_totals())
+        totals["count"] += sign
+        totals["photon_count"] += sign * bool(row["photon"])
+        for field in SUM_FIELDS:
+            totals[field] += sign * row[field]
+        if not totals["count"]:
+            # Start an emptied group from exact zeros rather than from
+            # accumulated rounding error
+            del self._totals[group]
+
+    def add(self, row, group=None):
+        """Add a priced row to the totals"""
+        self._apply(row, group, 1)
+
+    def extend(self, rows, groups=None):
+        """
+        Add many priced rows at once
+
+        Args:
+            rows (DataFrame): compute_cost, photon_cost, storage_gb and
+                photon columns
+            groups (array): Group of each row, or None
+        """
+        if not len(rows):
+            return
+        parts = [(None, rows)] if groups is None else rows.groupby(
+            np.asarray(groups), sort=False)
+        for group, part in parts:
+            totals = self._totals.setdefault(group, _empty_totals())
+            totals["count"] += len(part)
+            totals["photon_count"] += int(part["photon"].sum())
+            for field in SUM_FIELDS:
+                totals[field] += float(part[field].sum())
+
+    def remove(self, row, group=None):
+        """Subtract a previously added priced row from the totals"""
+        self._apply(row, group, -1)
+
+    def clear(self, group=None):
+        """Reset every group, or only one"""
+        if group is None:
+            self._totals.clear()
+        else:
+            self._totals.pop(group, None)
+
+    def totals(self, group=None):
+        """
+        Return the summed costs of all rows, or of one group
+
+        Returns:
+            dict: count, compute_cost, photon_cost, storage_gb and
+                photon_enabled (see pricing_engine.summarize_workloads)
+        """
+        if group is None:
+            groups = list(self._totals.values())
+        else:
+            groups = [self._totals.get(group, _empty_totals())]
+        totals = _empty_totals()
+        for group_totals in groups:
+            for field, value in group_totals.items():
+                totals[field] += value
+        photon_count = totals.pop("photon_count")
+        return {**totals, "photon_enabled": photon_count > 0}
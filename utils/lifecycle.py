@@ -0,0 +1,241 @@
+"""
+S3 lifecycle tiering simulator for the Databricks Cloud Cost Calculator
+
+The layer calculators price storage at one tier for one steady-state month.
+Here every day's files form a cohort that ages through a lifecycle policy,
+e.g. Standard -> Standard-IA after 30 days -> Glacier after 90 days, and is
+deleted at the end of its retention window. Each day is charged for:
+
+    Storage           GB held in each tier, at the tier's monthly rate / 30
+    Transitions       objects moved into a tier, per 1,000 requests
+                      (rate_catalog "S3Transition")
+    Minimum duration  data leaving a tier before the tier's minimum storage
+                      duration (rate_catalog "S3MinimumDays") is billed for
+                      the remaining days when it leaves
+
+The cohort math works on the cumulative ingest C of a (tables x days)
+array: what is aged between a and b days on day t is C[t - a] - C[t - b].
+All charges are linear in the ingest, so tables are first summed into one
+row per retention window; a year of 10,000 tables is one cumsum and a few
+gathers over a handful of rows.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.pricing_engine import COSTS, DAYS_PER_MONTH, retention_to_months
+
+DEFAULT_DAYS = 365
+MAX_DAYS = 5 * 365
+
+# Typical Delta file size, used to count the objects of RAW tables
+RAW_OBJECT_SIZE_MB = 128
+
+LIFECYCLE_COLUMNS = [
+    "Month", "Stored (GB)", "Storage Cost", "Transition Cost",
+    "Minimum Duration Cost", "Total Cost"
+]
+
+
+def retention_days(retention):
+    """Days a retention policy keeps data (inf for Indefinite)"""
+    if retention == "Indefinite":
+        return np.inf
+    return float(np.ceil(retention_to_months(retention) * DAYS_PER_MONTH))
+
+
+def transition_tiers():
+    """S3 tiers a lifecycle step can move data into, in option order"""
+    return [tier for tier in COSTS["S3"] if tier in COSTS["S3Transition"]]
+
+
+def _policy(storage_tier, transitions):
+    """Validate a policy and return its tiers and age bounds in days"""
+    ages = [0] + [age for age, _ in transitions]
+    if any(later <= earlier for earlier, later in zip(ages, ages[1:])):
+        raise ValueError("Lifecycle transitions need increasing ages")
+    tiers = [storage_tier] + [tier for _, tier in transitions]
+    for tier in tiers:
+        if tier not in COSTS["S3"]:
+            raise ValueError(f"Unknown S3 tier: {tier}")
+    for _, tier in transitions:
+        if tier not in COSTS["S3Transition"]:
+            raise ValueError(f"Lifecycle rules cannot transition to {tier}")
+    return tiers, ages + [np.inf]
+
+
+def simulate_lifecycle(ingest_gb,
+                       ingest_objects,
+                       retention,
+                       storage_tier="Standard",
+                       transitions=()):
+    """
+    Age daily cohorts through a lifecycle policy and price every day
+
+    Args:
+        ingest_gb (array): GB landing per table and day, shape
+            (tables, days)
+        ingest_objects (array): Objects landing per table and day, same
+            shape as ingest_gb
+        retention (array): Days each table keeps data (inf keeps it forever)
+        storage_tier (str): Tier new data lands in
+        transitions (list): (age in days, tier) lifecycle steps, in
+            increasing age order; data older than the age moves to the tier
+
+    Returns:
+        dict: "stored" (tier -> GB held per day), "storage_cost",
+            "transition_cost" and "minimum_cost" (cost per day)
+    """
+    tiers, bounds = _policy(storage_tier, transitions)
+    ingest_gb = np.atleast_2d(np.asarray(ingest_gb, dtype=float))
+    ingest_objects = np.broadcast_to(np.asarray(ingest_objects, dtype=float),
+                                     ingest_gb.shape)
+    retention = np.broadcast_to(np.asarray(retention, dtype=float),
+                                ingest_gb.shape[:1])
+    days = ingest_gb.shape[1]
+
+    # Every charge is linear in the ingest: sum the tables sharing a
+    # retention window so the cohort math runs on one row per window
+    windows, group = np.unique(retention, return_inverse=True)
+    gb = np.zeros((len(windows), days))
+    objects = np.zeros((len(windows), days))
+    for window in range(len(windows)):
+        rows = group == window
+        gb[window] = ingest_gb[rows].sum(axis=0)
+        objects[window] = ingest_objects[rows].sum(axis=0)
+
+    # cumulative[:, k] = ingest of days 0..k-1
+    cumulative_gb = np.zeros((len(windows), days + 1))
+    cumulative_objects = np.zeros((len(windows), days + 1))
+    np.cumsum(gb, axis=1, out=cumulative_gb[:, 1:])
+    np.cumsum(objects, axis=1, out=cumulative_objects[:, 1:])
+    day = np.arange(days)
+
+    def aged(cumulative, age):
+        """Ingest at least `age` days old on each day, per window"""
+        age = np.minimum(age, days + 1)[:, None]
+        index = np.clip(day[None, :] - age + 1, 0, days).astype(np.intp)
+        return np.take_along_axis(cumulative, index, axis=1)
+
+    def aged_exactly(cumulative, age):
+        """Ingest exactly `age` days old on each day, per window"""
+        return aged(cumulative, age) - aged(cumulative, age + 1)
+
+    stored = {}
+    storage_cost = np.zeros(days)
+    transition_cost = np.zeros(days)
+    minimum_cost = np.zeros(days)
+    for position, (tier, start, end) in enumerate(zip(tiers, bounds,
+                                                       bounds[1:])):
+        # Data aged [start, end) days sits in the tier until retention ends
+        start = np.minimum(start, windows)
+        end = np.minimum(end, windows)
+        held = (aged(cumulative_gb, start) - aged(cumulative_gb, end)).sum(0)
+        stored[tier] = stored.get(tier, 0) + held
+        daily_rate = COSTS["S3"][tier] / DAYS_PER_MONTH
+        storage_cost += held * daily_rate
+
+        resident = end > start
+        if position and resident.any():
+            moved = aged_exactly(cumulative_objects, start)[resident].sum(0)
+            transition_cost += moved * COSTS["S3Transition"][tier] / 1000
+
+        # Cohorts leaving early pay for the rest of the minimum duration
+        shortfall = COSTS["S3MinimumDays"].get(tier, 0) - (end - start)
+        early = resident & np.isfinite(end) & (shortfall > 0)
+        if early.any():
+            leaving = aged_exactly(cumulative_gb, end)[early]
+            minimum_cost += (leaving *
+                             shortfall[early][:, None]).sum(0) * daily_rate
+
+    return {
+        "stored": stored,
+        "storage_cost": storage_cost,
+        "transition_cost": transition_cost,
+        "minimum_cost": minimum_cost
+    }
+
+
+def monthly_lifecycle(daily):
+    """
+    Total a simulate_lifecycle() result per 30-day month
+
+    Returns:
+        DataFrame: LIFECYCLE_COLUMNS plus "<tier> (GB)" held at month end
+    """
+    days = len(daily["storage_cost"])
+    month_starts = np.arange(0, days, DAYS_PER_MONTH)
+    month_ends = np.minimum(month_starts + DAYS_PER_MONTH, days) - 1
+    frame = pd.DataFrame({"Month": np.arange(1, len(month_starts) + 1)})
+    stored = sum(daily["stored"].values())
+    frame["Stored (GB)"] = stored[month_ends]
+    for tier, held in daily["stored"].items():
+        frame[f"{tier} (GB)"] = held[month_ends]
+    for column, key in (("Storage Cost", "storage_cost"),
+                        ("Transition Cost", "transition_cost"),
+                        ("Minimum Duration Cost", "minimum_cost")):
+        frame[column] = np.add.reduceat(daily[key], month_starts)
+    frame["Total Cost"] = frame[["Storage Cost", "Transition Cost",
+                                 "Minimum Duration Cost"]].sum(axis=1)
+    return frame
+
+
+def layer_ingest(all_costs, layer_inputs, days, landing_tables=None,
+                 include_raw=False):
+    """
+    Build the daily ingest of the Landing (and optionally RAW) storage
+
+    Landing tables ingest files_per_day * avg_file_size GB every day; in
+    Simple mode the ingest grows by the monthly growth rate. RAW storage
+    already exists, so it is one cohort landing on day 0 that is never
+    deleted.
+
+    Args:
+        all_costs (dict): st.session_state.all_costs
+        layer_inputs (dict): Simple mode inputs per layer
+            (st.session_state.layer_inputs)
+        days (int): Days to simulate, 1 to MAX_DAYS
+        landing_tables (WorkloadRegistry): Advanced mode Landing tables
+        include_raw (bool): Also age the RAW layer's storage
+
+    Returns:
+        tuple: (ingest_gb, ingest_objects, retention) for
+            simulate_lifecycle; empty arrays if there is nothing to age
+    """
+    if not 1 <= days <= MAX_DAYS:
+        raise ValueError(f"Lifecycle days must be 1 to {MAX_DAYS}")
+    layer_inputs = layer_inputs or {}
+    daily_gb, daily_objects, retention = [], [], []
+
+    inputs = layer_inputs.get("Landing")
+    if all_costs.get("Landing") and inputs is not None:
+        params = inputs["params"]
+        growth = (1 + params.get("file_growth", 0.0) / 100)**(
+            np.arange(days) / DAYS_PER_MONTH)
+        files = params.get("files_per_day", 10) * growth
+        daily_objects.append(files[None, :])
+        daily_gb.append(files[None, :] * params.get("avg_file_size", 2.0))
+        retention.append([retention_days(params.get("retention", "30 days"))])
+    elif (all_costs.get("Landing") and landing_tables is not None and
+          len(landing_tables)):
+        tables = landing_tables.frame(priced=False)
+        files = tables["files_per_day"].to_numpy(dtype=float)
+        shape = (len(files), days)
+        daily_objects.append(np.broadcast_to(files[:, None], shape))
+        daily_gb.append(np.broadcast_to(
+            (files * tables["avg_file_size"].to_numpy(dtype=float))[:, None],
+            shape))
+        retention.append(tables["retention"].astype(object).map(
+            retention_days).to_numpy(dtype=float))
+
+    raw_gb = (all_costs.get("RAW") or {}).get("storage_gb", 0.0)
+    if include_raw and raw_gb:
+        cohort = np.zeros((1, days))
+        cohort[0, 0] = raw_gb
+        daily_gb.append(cohort)
+        daily_objects.append(cohort * 1024 / RAW_OBJECT_SIZE_MB)
+        retention.append([np.inf])
+
+    if not daily_gb:
+        return np.zeros((0, days)), np.zeros((0, days)), np.zeros(0)
+    return (np.vstack(daily_gb), np.vstack(daily_objects),
+            np.concatenate(retention))
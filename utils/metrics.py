@@ -0,0 +1,495 @@
+"""
+Prometheus metrics for the Databricks Cloud Cost Calculator
+
+The Streamlit server runs every session's script in its own thread of one
+process, so the counters and histograms below are process-wide and shared
+by all sessions. start_metrics_server() serves them in the Prometheus text
+format on a side port (COST_CALCULATOR_METRICS_PORT, default 9464; 0
+turns it off) from that same process; the pages call it on every rerun
+and only the first call starts the server.
+
+    cost_calculator_page_reruns_total         reruns started, per page
+    cost_calculator_rerun_seconds             rerun duration, per page
+    cost_calculator_pricing_seconds           pricing engine call latency
+    cost_calculator_workloads                 workloads per session, per
+                                              layer and kind
+    cost_calculator_session_workload_bytes    memory of a session's
+                                              workloads
+    cost_calculator_export_seconds            report generation time, per
+                                              format
+    process_resident_memory_bytes             server process memory
+
+Check the endpoint, either in-process or against a running app, with
+
+    python -m utils.metrics --check
+    python -m utils.metrics --check --url http://localhost:9464/metrics
+"""
+import abc
+import argparse
+import functools
+import logging
+import math
+import os
+import re
+import sys
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT_ENV = "COST_CALCULATOR_METRICS_PORT"
+METRICS_HOST_ENV = "COST_CALCULATOR_METRICS_HOST"
+DEFAULT_METRICS_PORT = 9464
+DEFAULT_METRICS_HOST = "127.0.0.1"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+BYTES_BUCKETS = (2**10, 2**14, 2**17, 2**20, 2**23, 2**26, 2**29)
+
+logger = logging.getLogger(__name__)
+
+# Metric name -> metric, in registration order
+METRICS = {}
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace(
+        '"', '\\"'))
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"'
+                          for name, value in pairs) + "}"
+
+
+class _Metric(abc.ABC):
+    """A metric family; children hold the values of each label set"""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        if name in METRICS:
+            raise ValueError(f"Metric {name} is already registered")
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        METRICS[name] = self
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """Return the value holder for a new label set"""
+
+    @abc.abstractmethod
+    def _render_child(self, key, child):
+        """Yield the sample lines of one label set"""
+
+    def labels(self, **labels):
+        """Return the child for one set of label values"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} takes labels {', '.join(self.labelnames)}")
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+        return child
+
+    def render(self):
+        """Return the family in the Prometheus text format"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}"
+        ]
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class _CounterChild:
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. requests served"""
+
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def _render_child(self, key, child):
+        yield (f"{self.name}{_format_labels(self.labelnames, key)} "
+               f"{_format_value(child.value)}")
+
+
+class _HistogramChild:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[position] += 1
+                    break
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        """Observe the seconds spent in a with block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    """
+    Observations counted into cumulative buckets, e.g. latencies
+
+    Args:
+        buckets (tuple): Increasing upper bounds; +Inf is added
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf, )
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, key, child):
+        with child._lock:
+            counts, total, count = list(child.counts), child.sum, child.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, key,
+                                    [("le", _format_value(bound))])
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = _format_labels(self.labelnames, key)
+        yield f"{self.name}_sum{labels} {_format_value(total)}"
+        yield f"{self.name}_count{labels} {count}"
+
+
+def timed(histogram, **labels):
+    """Decorate a function to observe its duration in a histogram"""
+    child = histogram.labels(**labels)
+
+    def decorator(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with child.time():
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+PAGE_RERUNS = Counter("cost_calculator_page_reruns_total",
+                      "Script reruns started, per page", ["page"])
+RERUN_SECONDS = Histogram("cost_calculator_rerun_seconds",
+                          "Seconds a page rerun took to complete", ["page"])
+PRICING_SECONDS = Histogram("cost_calculator_pricing_seconds",
+                            "Seconds spent in a pricing engine call",
+                            ["function"])
+WORKLOADS = Histogram("cost_calculator_workloads",
+                      "Advanced mode workloads held by a session, observed "
+                      "once per calculator rerun", ["layer", "kind"],
+                      buckets=COUNT_BUCKETS)
+SESSION_WORKLOAD_BYTES = Histogram(
+    "cost_calculator_session_workload_bytes",
+    "Approximate memory of a session's workloads, observed once per "
+    "calculator rerun",
+    buckets=BYTES_BUCKETS)
+EXPORT_SECONDS = Histogram("cost_calculator_export_seconds",
+                           "Seconds spent writing a cost report",
+                           ["format"])
+
+
+def track_rerun(page):
+    """
+    Count a page rerun and start timing it
+
+    Returns:
+        callable: Call at the end of the script to record its duration
+    """
+    PAGE_RERUNS.labels(page=page).inc()
+    started = time.perf_counter()
+    rerun_seconds = RERUN_SECONDS.labels(page=page)
+    return lambda: rerun_seconds.observe(time.perf_counter() - started)
+
+
+def record_session_workloads(registries):
+    """
+    Observe the workloads a session holds
+
+    Args:
+        registries (dict): Workload kind -> WorkloadRegistry or None
+    """
+    from utils.pricing_engine import WORKLOAD_KINDS
+
+    total_bytes = 0
+    for kind, registry in registries.items():
+        count = len(registry) if registry is not None else 0
+        WORKLOADS.labels(layer=WORKLOAD_KINDS[kind][0], kind=kind).observe(
+            count)
+        if count:
+            total_bytes += registry.nbytes()
+    SESSION_WORKLOAD_BYTES.labels().observe(total_bytes)
+
+
+def _process_lines():
+    """Process gauges, read at scrape time"""
+    lines = []
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        resident_pages = None
+    if resident_pages is not None:
+        lines += [
+            "# HELP process_resident_memory_bytes Resident memory size in "
+            "bytes.",
+            "# TYPE process_resident_memory_bytes gauge",
+            "process_resident_memory_bytes "
+            f"{resident_pages * os.sysconf('SC_PAGE_SIZE')}"
+        ]
+    lines += [
+        "# HELP cost_calculator_threads Threads in the server process.",
+        "# TYPE cost_calculator_threads gauge",
+        f"cost_calculator_threads {threading.active_count()}"
+    ]
+    return lines
+
+
+def render_metrics():
+    """Return every metric in the Prometheus text format"""
+    lines = []
+    for metric in list(METRICS.values()):
+        lines.extend(metric.render())
+    lines.extend(_process_lines())
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server_lock = threading.Lock()
+_server = None
+_server_failed = False
+
+
+def start_metrics_server(port=None, host=None):
+    """
+    Serve the metrics on a side port, once per process
+
+    Args:
+        port (int): Port to listen on, default COST_CALCULATOR_METRICS_PORT
+            or DEFAULT_METRICS_PORT; 0 disables the server
+        host (str): Address to bind, default COST_CALCULATOR_METRICS_HOST
+            or DEFAULT_METRICS_HOST
+
+    Returns:
+        ThreadingHTTPServer, or None if disabled or the port is taken
+    """
+    global _server, _server_failed
+    if _server is not None or _server_failed:
+        return _server
+    if port is None:
+        port = int(os.environ.get(METRICS_PORT_ENV, DEFAULT_METRICS_PORT))
+    if not port:
+        return None
+    host = host or os.environ.get(METRICS_HOST_ENV) or DEFAULT_METRICS_HOST
+    with _server_lock:
+        if _server is not None or _server_failed:
+            return _server
+        try:
+            server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            # Another process (e.g. a second app worker) has the port
+            logger.warning("Metrics server not started on %s:%s: %s", host,
+                           port, e)
+            _server_failed = True
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever,
+                         name="metrics-server",
+                         daemon=True).start()
+        _server = server
+    return _server
+
+
+_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)'
+                     r'(\{(?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*\})?'
+                     r' (-?[0-9.eE+-]+|[+-]Inf|NaN)$')
+
+
+def check_exposition(text, required=()):
+    """
+    Validate a Prometheus text exposition
+
+    Args:
+        text (str): Scraped body
+        required (iterable): Metric families that must be present
+
+    Returns:
+        list: Problems found; empty if the exposition is valid
+    """
+    problems = []
+    types = {}
+    bucket_counts = {}
+    for number, line in enumerate(text.splitlines(), start=1):
+        if not line:
+            continue
+        if line.startswith("# TYPE "):
+            parts = line.split()
+            if len(parts) != 4:
+                problems.append(f"line {number}: bad TYPE line")
+            else:
+                types[parts[2]] = parts[3]
+            continue
+        if line.startswith("#"):
+            continue
+        match = _SAMPLE.match(line)
+        if match is None:
+            problems.append(f"line {number}: bad sample: {line}")
+            continue
+        name, labels, value = match.groups()
+        family = re.sub(r"_(bucket|sum|count)$", "", name)
+        if family not in types and name not in types:
+            problems.append(f"line {number}: {name} has no TYPE")
+        if name.endswith("_bucket"):
+            series = (family, re.sub(r',?le="[^"]*"', "", labels or ""))
+            previous = bucket_counts.get(series, 0)
+            if float(value) < previous:
+                problems.append(
+                    f"line {number}: {family} buckets are not cumulative")
+            bucket_counts[series] = float(value)
+    for family in required:
+        if family not in types:
+            problems.append(f"missing metric {family}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve or check the calculator's Prometheus metrics")
+    parser.add_argument("--check", action="store_true",
+                        help="Scrape the endpoint once and validate it")
+    parser.add_argument("--url",
+                        help="Endpoint to check; default starts one in this "
+                        "process on a free port")
+    parser.add_argument("--port", type=int,
+                        help="Port to serve on, default "
+                        f"{METRICS_PORT_ENV} or {DEFAULT_METRICS_PORT}")
+    args = parser.parse_args(argv)
+
+    if not args.check:
+        server = start_metrics_server(args.port)
+        if server is None:
+            print("Metrics server is disabled or its port is taken")
+            return 1
+        print(f"Serving metrics on http://{server.server_address[0]}:"
+              f"{server.server_address[1]}/metrics")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    url = args.url
+    if url is None:
+        # Record a sample of every metric so each family has series
+        finish = track_rerun("self_check")
+        PRICING_SECONDS.labels(function="self_check").observe(0.002)
+        record_session_workloads({})
+        EXPORT_SECONDS.labels(format="self_check").observe(0.1)
+        finish()
+        server = _ephemeral_server()
+        url = (f"http://{server.server_address[0]}:"
+               f"{server.server_address[1]}/metrics")
+
+    try:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            content_type = response.headers.get("Content-Type", "")
+            text = response.read().decode()
+    except OSError as e:
+        print(f"{url}: cannot scrape: {e}")
+        return 1
+    problems = check_exposition(text, required=METRICS)
+    if not content_type.startswith("text/plain"):
+        problems.append(f"unexpected Content-Type {content_type}")
+    samples = sum(1 for line in text.splitlines()
+                  if line and not line.startswith("#"))
+    for problem in problems:
+        print(problem)
+    print(f"{url}: {samples} samples, "
+          f"{'OK' if not problems else f'{len(problems)} problem(s)'}")
+    return 1 if problems else 0
+
+
+def _ephemeral_server():
+    """Start a metrics server on a free local port for --check"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    sys.exit(main())
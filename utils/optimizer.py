@@ -0,0 +1,395 @@
+"""
+Cost optimizer for Advanced mode workloads
+
+Searches every configuration the calculator can price (EC2 instance type,
+DBU service tier, PB engine and compute size, S3 tier, retention, Photon)
+for the cheapest one per workload that meets the user's constraints.
+
+The search is a vectorized enumeration: for one workload kind the candidate
+configurations are laid out along one axis and the workloads along the
+other, so runtimes, costs and feasibility are (workloads x candidates)
+NumPy arrays and the optimum is an argmin per row. Rows are processed in
+chunks to bound memory, and a 10,000-workload portfolio against every
+instance type in the rate catalog takes well under a second.
+
+Runtime model, relative to what the user entered for the workload:
+    EC2 size      runtime scales with AWS size normalization units
+                  (xlarge = 1, 2xlarge = 2, large = 0.5)
+    PB compute    runtime scales with the compute size in DBUs
+    PB engine     runtime scales with the engine performance_factor
+    Photon        runtime is divided by the Photon runtime_speedup; the
+                  acceleration_factor is only its cost surcharge
+Costs then come from the same per-workload formulas as the calculator,
+so a workload's own configuration prices exactly as it does on the page.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.pricing_engine import (
+    COSTS, ENGINE_COST_FACTORS, MATERIALIZED_VIEW, PB_DASHBOARD_SIZES,
+    RETENTION_OPTIONS, SERVICE_TIERS, _dashboard_compute_cost,
+    _job_compute_cost, _landing_table_storage, _report_compute_cost,
+    _transform_compute_cost, dbu_rate, retention_to_months)
+
+# Default constraints; see optimize_workloads
+DEFAULT_CONSTRAINTS = {
+    "max_runtime_minutes": None,  # Jobs, transformations and reports
+    "max_query_seconds": None,  # Dashboard queries
+    "require_photon": False,
+    "allow_engine_change": False,  # Between SQL and PySpark
+    "min_retention_months": None,  # None keeps each table's retention
+    "storage_tiers": None,  # Landing tiers to consider; None = current
+    "instance_types": None  # EC2 types to consider; None = all
+}
+
+# Configuration fields the optimizer chooses, per workload kind
+CHOICE_FIELDS = {
+    "table": ("retention", "storage_tier"),
+    "job": ("instance_type", "photon_enabled"),
+    "transform": ("service_tier", "photon_enabled"),
+    "dashboard": ("engine_type", "compute_size", "photon_enabled"),
+    "report": ("engine_type", "photon_enabled")
+}
+
+# Cells of the (workloads x candidates) arrays processed at once
+CHUNK_CELLS = 1 << 21
+
+# Relative cost difference treated as a tie; ties go to the fastest
+TIE_TOLERANCE = 1e-9
+
+_SMALL_SIZE_UNITS = {
+    "nano": 0.25,
+    "micro": 0.5,
+    "small": 1,
+    "medium": 2,
+    "large": 4
+}
+
+
+def instance_size_units(instance_type):
+    """
+    Return the relative size of an EC2 instance type (xlarge = 1)
+
+    Uses AWS size normalization factors; sizes without one (metal) give NaN.
+    """
+    size = instance_type.partition(".")[2]
+    if size in _SMALL_SIZE_UNITS:
+        return _SMALL_SIZE_UNITS[size] / 8
+    if size.endswith("xlarge"):
+        multiplier = size[:-len("xlarge")]
+        if multiplier == "":
+            return 1.0
+        if multiplier.isdigit():
+            return float(multiplier)
+    return np.nan
+
+
+def _photon_speedup(current, candidate):
+    """Runtime multiplier for moving from the current to the candidate Photon setting"""
+    speedup = COSTS["Photon"]["runtime_speedup"]
+    return np.where(candidate, 1 / speedup, 1.0) * np.where(
+        current, speedup, 1.0)
+
+
+def _with_photon_cost(compute_cost, photon):
+    return compute_cost * (1 + COSTS["Photon"]["acceleration_factor"] * photon)
+
+
+def _runtime_ok(runtime, limit):
+    if limit is None:
+        return np.ones(runtime.shape, dtype=bool)
+    return runtime <= limit
+
+
+def _job_candidates(constraints):
+    instances = constraints["instance_types"] or list(COSTS["EC2"])
+    instances = [instance for instance in instances if instance in COSTS["EC2"]]
+    return pd.DataFrame({
+        "instance_type": np.repeat(instances, 2),
+        "photon_enabled": np.tile([False, True], len(instances))
+    })
+
+
+def _job_costs(rows, candidates, constraints):
+    # Sizes without normalization units (metal) cannot be scaled to or from,
+    # so those moves get a NaN runtime and cost and are never chosen; a job
+    # on such an instance can still change its Photon setting
+    current_units = rows["instance_type"].map(instance_size_units).to_numpy()
+    candidate_units = candidates["instance_type"].map(
+        instance_size_units).to_numpy()
+    same_instance = (rows["instance_type"].to_numpy()[:, None] ==
+                     candidates["instance_type"].to_numpy()[None, :])
+    size_ratio = np.where(same_instance, 1.0,
+                          current_units[:, None] / candidate_units[None, :])
+    photon = candidates["photon_enabled"].to_numpy(dtype=bool)[None, :]
+    runtime = (rows["avg_duration"].to_numpy()[:, None] * size_ratio *
+               _photon_speedup(
+                   rows["photon_enabled"].to_numpy(dtype=bool)[:, None],
+                   photon))
+    rates = candidates["instance_type"].map(COSTS["EC2"]).to_numpy()[None, :]
+    cost = _with_photon_cost(
+        _job_compute_cost(rates, runtime,
+                          rows["runs_per_month"].to_numpy()[:, None]), photon)
+    return cost, runtime, _runtime_ok(runtime, constraints["max_runtime_minutes"])
+
+
+def _transform_candidates(constraints):
+    tiers = list(SERVICE_TIERS)
+    return pd.DataFrame({
+        "service_tier": np.repeat(tiers, 2),
+        "photon_enabled": np.tile([False, True], len(tiers))
+    })
+
+
+def _transform_costs(rows, candidates, constraints):
+    photon = candidates["photon_enabled"].to_numpy(dtype=bool)[None, :]
+    runtime = rows["avg_duration"].to_numpy()[:, None] * _photon_speedup(
+        rows["photon_enabled"].to_numpy(dtype=bool)[:, None], photon)
+    rates = candidates["service_tier"].map({
+        tier: dbu_rate(dbu_type)
+        for tier, dbu_type in SERVICE_TIERS.items()
+    }).to_numpy()[None, :]
+    cost = _with_photon_cost(
+        _transform_compute_cost(rates, runtime,
+                                rows["runs_per_month"].to_numpy()[:, None],
+                                rows["dbu_per_hour"].to_numpy()[:, None]),
+        photon)
+    return cost, runtime, _runtime_ok(runtime, constraints["max_runtime_minutes"])
+
+
+def _engine_factor(engines, factor):
+    return engines.map({
+        engine: factors[factor]
+        for engine, factors in ENGINE_COST_FACTORS.items()
+    }).to_numpy()
+
+
+def _engine_allowed(rows, candidates, constraints):
+    """Engines a workload may move to: its own, or SQL <-> PySpark if allowed"""
+    current = rows["engine_type"].to_numpy()[:, None]
+    candidate = candidates["engine_type"].to_numpy()[None, :]
+    allowed = current == candidate
+    if constraints["allow_engine_change"]:
+        allowed |= ((current != MATERIALIZED_VIEW) &
+                    (candidate != MATERIALIZED_VIEW))
+    return allowed
+
+
+def _dashboard_candidates(constraints):
+    columns = {"engine_type": [], "compute_size": [], "photon_enabled": []}
+    for engine, sizes in PB_DASHBOARD_SIZES.items():
+        for size in sizes:
+            # Photon does not apply to materialized views
+            for photon in ((False, ) if engine == MATERIALIZED_VIEW else
+                           (False, True)):
+                columns["engine_type"].append(engine)
+                columns["compute_size"].append(size)
+                columns["photon_enabled"].append(photon)
+    return pd.DataFrame(columns)
+
+
+def _dashboard_dbus(frame):
+    dbus = np.full(len(frame), 2.0)
+    for engine, sizes in PB_DASHBOARD_SIZES.items():
+        rows = (frame["engine_type"] == engine).to_numpy()
+        dbus[rows] = frame["compute_size"][rows].map(sizes).fillna(
+            2).to_numpy()
+    return dbus
+
+
+def _current_photon(rows):
+    return (rows["photon_enabled"].to_numpy(dtype=bool) &
+            (rows["engine_type"] != MATERIALIZED_VIEW).to_numpy())
+
+
+def _dashboard_costs(rows, candidates, constraints):
+    photon = candidates["photon_enabled"].to_numpy(dtype=bool)[None, :]
+    candidate_dbus = _dashboard_dbus(candidates)[None, :]
+    candidate_factor = _engine_factor(candidates["engine_type"],
+                                      "performance_factor")[None, :]
+    # Query duration before the engine's performance factor is applied
+    duration = (rows["avg_query_duration"].to_numpy()[:, None] *
+                _dashboard_dbus(rows)[:, None] / candidate_dbus *
+                _photon_speedup(_current_photon(rows)[:, None], photon))
+    current_factor = _engine_factor(rows["engine_type"],
+                                    "performance_factor")[:, None]
+    runtime = duration * candidate_factor / current_factor
+    cost = _with_photon_cost(
+        _dashboard_compute_cost(
+            _engine_factor(candidates["engine_type"], "dbu_rate")[None, :],
+            candidate_factor, candidate_dbus, duration,
+            rows["queries_per_day"].to_numpy()[:, None],
+            rows["active_users"].to_numpy()[:, None]), photon)
+    feasible = (_runtime_ok(runtime, constraints["max_query_seconds"]) &
+                _engine_allowed(rows, candidates, constraints))
+    return cost, runtime, feasible
+
+
+def _report_candidates(constraints):
+    columns = {"engine_type": [], "photon_enabled": []}
+    for engine in ENGINE_COST_FACTORS:
+        for photon in ((False, ) if engine == MATERIALIZED_VIEW else
+                       (False, True)):
+            columns["engine_type"].append(engine)
+            columns["photon_enabled"].append(photon)
+    return pd.DataFrame(columns)
+
+
+def _report_costs(rows, candidates, constraints):
+    photon = candidates["photon_enabled"].to_numpy(dtype=bool)[None, :]
+    factor_ratio = (
+        _engine_factor(candidates["engine_type"], "performance_factor")[None, :]
+        / _engine_factor(rows["engine_type"], "performance_factor")[:, None])
+    runtime = (rows["gen_duration"].to_numpy()[:, None] * factor_ratio *
+               _photon_speedup(_current_photon(rows)[:, None], photon))
+    cost = _with_photon_cost(
+        _report_compute_cost(
+            _engine_factor(candidates["engine_type"], "dbu_rate")[None, :],
+            runtime, rows["runs_per_month"].to_numpy()[:, None],
+            rows["dbu_per_hour"].to_numpy()[:, None]), photon)
+    feasible = (_runtime_ok(runtime, constraints["max_runtime_minutes"]) &
+                _engine_allowed(rows, candidates, constraints))
+    return cost, runtime, feasible
+
+
+def _table_candidates(constraints):
+    tiers = constraints["storage_tiers"] or [constraints["storage_tier"]]
+    return pd.DataFrame({
+        "retention": np.repeat(RETENTION_OPTIONS, len(tiers)),
+        "storage_tier": np.tile(tiers, len(RETENTION_OPTIONS))
+    })
+
+
+def _table_costs(rows, candidates, constraints):
+    months = {option: retention_to_months(option) for option in RETENTION_OPTIONS}
+    candidate_months = candidates["retention"].map(months).to_numpy()[None, :]
+    current_months = rows["retention"].map(months).to_numpy()[:, None]
+    storage_gb = _landing_table_storage(
+        rows["files_per_day"].to_numpy()[:, None],
+        rows["avg_file_size"].to_numpy()[:, None], candidate_months)
+    cost = storage_gb * candidates["storage_tier"].map(
+        COSTS["S3"]).to_numpy()[None, :]
+    if constraints["min_retention_months"] is None:
+        feasible = candidate_months == current_months
+    else:
+        feasible = np.broadcast_to(
+            candidate_months >= constraints["min_retention_months"],
+            cost.shape)
+    # Storage has no runtime
+    return cost, np.zeros_like(cost), feasible
+
+
+# Workload kind -> (candidate builder, cost/runtime/feasibility evaluator)
+OPTIMIZERS = {
+    "table": (_table_candidates, _table_costs),
+    "job": (_job_candidates, _job_costs),
+    "transform": (_transform_candidates, _transform_costs),
+    "dashboard": (_dashboard_candidates, _dashboard_costs),
+    "report": (_report_candidates, _report_costs)
+}
+
+
+def optimize_workloads(kind, workloads, constraints=None,
+                       storage_tier="Standard"):
+    """
+    Find the cheapest feasible configuration of every workload of one kind
+
+    Args:
+        kind (str): table, job, transform, dashboard or report
+        workloads (DataFrame): Workloads as entered (WorkloadRegistry.frame)
+        constraints (dict): Overrides of DEFAULT_CONSTRAINTS
+        storage_tier (str): Current Landing S3 tier (tables only)
+
+    Returns:
+        DataFrame: name, the current choice fields, recommended_<field>
+            for each, current_cost, optimized_cost, savings, runtime and
+            feasible (False when no configuration meets the constraints;
+            the workload then keeps its own configuration)
+    """
+    constraints = {
+        **DEFAULT_CONSTRAINTS,
+        **(constraints or {}), "storage_tier": storage_tier
+    }
+    build_candidates, evaluate = OPTIMIZERS[kind]
+    fields = list(CHOICE_FIELDS[kind])
+    rows = workloads.reset_index(drop=True).assign(
+        **({"storage_tier": storage_tier} if kind == "table" else {}))
+    for field in fields:
+        if isinstance(rows[field].dtype, pd.CategoricalDtype):
+            rows[field] = rows[field].astype(object)
+    if "engine_type" in rows:
+        # Photon never applies to materialized views, whatever was entered
+        rows["photon_enabled"] = _current_photon(rows)
+
+    # Every workload's own configuration is a candidate too, so its current
+    # cost comes from the same arrays; ones the constraints exclude (e.g. an
+    # instance type left out of the search) are not offered to others
+    candidates = build_candidates(constraints).assign(offered=True)
+    own_configs = rows[fields].drop_duplicates()
+    missing = ~pd.MultiIndex.from_frame(own_configs).isin(
+        pd.MultiIndex.from_frame(candidates[fields]))
+    candidates = pd.concat(
+        [candidates, own_configs[missing].assign(offered=False)],
+        ignore_index=True)
+    own = pd.MultiIndex.from_frame(candidates[fields]).get_indexer(
+        pd.MultiIndex.from_frame(rows[fields]))
+
+    offered = candidates["offered"].to_numpy(dtype=bool)[None, :]
+    if constraints["require_photon"] and "photon_enabled" in candidates:
+        photon_ok = candidates["photon_enabled"].to_numpy(dtype=bool)[None, :]
+    else:
+        photon_ok = None
+
+    best = np.empty(len(rows), dtype=np.int64)
+    current_cost = np.empty(len(rows))
+    optimized_cost = np.empty(len(rows))
+    runtime = np.empty(len(rows))
+    feasible = np.empty(len(rows), dtype=bool)
+    step = max(1, CHUNK_CELLS // len(candidates))
+    for start in range(0, len(rows), step):
+        chunk = rows.iloc[start:start + step]
+        chunk_own = own[start:start + step]
+        positions = np.arange(len(chunk))
+        cost, chunk_runtime, allowed = evaluate(chunk, candidates, constraints)
+        allowed = allowed & offered
+        if photon_ok is not None:
+            if "engine_type" in chunk:
+                # Photon cannot be required of materialized views
+                allowed = allowed & (photon_ok | (
+                    chunk["engine_type"] == MATERIALIZED_VIEW).to_numpy()[:,
+                                                                         None])
+            else:
+                allowed = allowed & photon_ok
+
+        # Configurations that cannot be priced are never chosen
+        allowed = allowed & np.isfinite(cost) & np.isfinite(chunk_runtime)
+        masked = np.where(allowed, cost, np.inf)
+        tied = masked <= masked.min(axis=1, keepdims=True) * (1 +
+                                                              TIE_TOLERANCE)
+        # Of the cheapest configurations (within rounding noise), the fastest
+        choice = np.where(tied, chunk_runtime, np.inf).argmin(axis=1)
+        # Keep the workload's own configuration when nothing is cheaper or,
+        # at the same cost, faster
+        choice = np.where(
+            tied[positions, chunk_own] &
+            (chunk_runtime[positions, chunk_own] <=
+             chunk_runtime[positions, choice]), chunk_own, choice)
+        chunk_feasible = allowed[positions, choice]
+        # Workloads no configuration satisfies keep their own one
+        choice = np.where(chunk_feasible, choice, chunk_own)
+
+        best[start:start + step] = choice
+        current_cost[start:start + step] = cost[positions, chunk_own]
+        optimized_cost[start:start + step] = cost[positions, choice]
+        runtime[start:start + step] = chunk_runtime[positions, choice]
+        feasible[start:start + step] = chunk_feasible
+
+    result = rows[["name"] + fields].copy()
+    for field in fields:
+        result[f"recommended_{field}"] = candidates[field].to_numpy()[best]
+    result["current_cost"] = current_cost
+    result["optimized_cost"] = optimized_cost
+    result["savings"] = current_cost - optimized_cost
+    result["runtime"] = runtime
+    result["feasible"] = feasible
+    return result
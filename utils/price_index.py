@@ -0,0 +1,519 @@
+"""
+Offline price-list ingestion for the rate catalog
+
+Builds a compact local index from the public AWS price-list JSON files
+(AmazonEC2 and AmazonS3 offer files) and a Databricks DBU SKU file, so
+the calculator can price every EC2 instance type and S3 storage class
+without parsing several hundred MB of JSON at startup.
+
+Each build is written to a new generation directory inside the index
+directory; the CURRENT file names the live one and is switched with an atomic
+rename once the generation is complete and synced. Catalogs already open keep
+mapping the generation they opened, so a rebuild never changes rates under
+them. A generation holds memory-mapped column arrays, one entry per
+(service, SKU, region), sorted by lookup key:
+
+    keys.npy      uint64  service << 48 | region << 32 | sku
+    rates.npy     float64 unit price per entry
+    order.npy     uint32  position of the entry in option order
+    service.npy   uint8   code into strings.json "services"
+    sku.npy       uint32  code into strings.json "skus"
+    region.npy    uint16  code into strings.json "regions"
+    strings.json  string tables, version, default region and source files
+
+open_price_index() does not read the entries into Python objects: a rate
+is found with a binary search of keys.npy, and only the (service, region)
+tables that are listed or iterated (e.g. the EC2 instance types of the
+default region) are turned into SKU names.
+
+Usage:
+    python -m utils.price_index --ec2 AmazonEC2-us-east-1.json \
+        --s3 AmazonS3-us-east-1.json --dbu dbu_rates.csv \
+        --out data/price_index
+
+Point COST_CALCULATOR_PRICE_INDEX at the output directory, or build it
+into data/price_index, and get_rate_catalog() will load it instead of the
+built-in rates. Per-region offer files keep ingestion memory modest.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections.abc import Mapping
+
+import numpy as np
+
+from utils.rate_catalog import (DEFAULT_RATES, DEFAULT_REGION, EMPTY_RATES,
+                                RateCatalog, RateSource)
+
+INDEX_STRINGS = "strings.json"
+INDEX_POINTER = "CURRENT"
+# Generations kept besides the live one, for readers that have just read
+# the pointer
+_KEPT_GENERATIONS = 1
+INDEX_COLUMNS = {
+    "keys": np.uint64,
+    "rates": np.float64,
+    "order": np.uint32,
+    "service": np.uint8,
+    "sku": np.uint32,
+    "region": np.uint16
+}
+
+_SERVICE_SHIFT = 48
+_REGION_SHIFT = 32
+_SKU_MASK = (1 << _REGION_SHIFT) - 1
+
+# AWS S3 volumeType -> storage tier name used by the calculator.
+# Volume types not listed here keep their AWS name.
+S3_VOLUME_TYPES = {
+    "Standard": "Standard",
+    "Intelligent-Tiering Frequent Access": "Intelligent-Tiering",
+    "Standard - Infrequent Access": "Standard-IA",
+    "One Zone - Infrequent Access": "OneZone-IA",
+    "Amazon Glacier": "Glacier",
+    "Glacier Flexible Retrieval": "Glacier",
+    "Glacier Deep Archive": "GlacierDeep"
+}
+
+_EC2_FAMILIES = {"Compute Instance", "Compute Instance (bare metal)"}
+_EC2_FILTERS = {
+    "tenancy": "Shared",
+    "operatingSystem": "Linux",
+    "preInstalledSw": "NA",
+    "capacitystatus": "Used"
+}
+
+
+def _load_offer(path):
+    with open(path, "rb") as offer_file:
+        return json.load(offer_file)
+
+
+def _on_demand_prices(offer, sku, unit):
+    """Yield (begin_range, usd) on-demand price dimensions of one SKU"""
+    for term in offer.get("terms", {}).get("OnDemand", {}).get(sku,
+                                                                {}).values():
+        for dimension in term.get("priceDimensions", {}).values():
+            if dimension.get("unit") != unit:
+                continue
+            usd = dimension.get("pricePerUnit", {}).get("USD")
+            if usd is not None:
+                yield float(dimension.get("beginRange", 0)), float(usd)
+
+
+_SMALL_SIZES = ("nano", "micro", "small", "medium", "large")
+
+
+def _instance_sort_key(instance_type):
+    """Order instance types by family, then size (large < xlarge < 2xlarge)"""
+    family, _, size = instance_type.partition(".")
+    if size in _SMALL_SIZES:
+        return (family, 0, _SMALL_SIZES.index(size))
+    multiplier = size.split("xlarge")[0]
+    if size.endswith("xlarge"):
+        return (family, 1, int(multiplier) if multiplier.isdigit() else 1)
+    return (family, 2, size)
+
+
+def ingest_ec2(path):
+    """
+    Read Linux shared-tenancy on-demand prices from an AmazonEC2 offer file
+
+    Returns:
+        list: (service, sku, region, rate) tuples, SKUs in family/size order
+    """
+    offer = _load_offer(path)
+    entries = {}
+    for sku, product in offer.get("products", {}).items():
+        if product.get("productFamily") not in _EC2_FAMILIES:
+            continue
+        attributes = product.get("attributes", {})
+        if any(
+                attributes.get(field, value) != value
+                for field, value in _EC2_FILTERS.items()):
+            continue
+        prices = [usd for _, usd in _on_demand_prices(offer, sku, "Hrs")]
+        if prices and max(prices) > 0:
+            region = attributes.get("regionCode")
+            if not region:
+                continue
+            entries[(attributes["instanceType"], region)] = max(prices)
+    return [("EC2", instance_type, region, rate)
+            for (instance_type, region), rate in sorted(
+                entries.items(),
+                key=lambda item: (item[0][1], _instance_sort_key(item[0][0])))]
+
+
+def ingest_s3(path):
+    """
+    Read first-tier storage prices (USD per GB-month) from an AmazonS3 offer file
+
+    Returns:
+        list: (service, sku, region, rate) tuples
+    """
+    offer = _load_offer(path)
+    entries = {}
+    for sku, product in offer.get("products", {}).items():
+        if product.get("productFamily") != "Storage":
+            continue
+        attributes = product.get("attributes", {})
+        volume_type = attributes.get("volumeType")
+        region = attributes.get("regionCode")
+        if not volume_type or not region:
+            continue
+        first_tier = [
+            usd for begin, usd in _on_demand_prices(offer, sku, "GB-Mo")
+            if begin == 0
+        ]
+        if first_tier:
+            tier = S3_VOLUME_TYPES.get(volume_type, volume_type)
+            entries.setdefault((tier, region), first_tier[0])
+    return [("S3", tier, region, rate)
+            for (tier, region), rate in entries.items()]
+
+
+def ingest_dbu(path, region=DEFAULT_REGION):
+    """
+    Read Databricks DBU rates from a CSV or JSON SKU file
+
+    CSV files need sku and rate columns and may have a region column. JSON
+    files are either {sku: rate} or a list of {"sku", "rate", "region"}.
+
+    Returns:
+        list: (service, sku, region, rate) tuples
+    """
+    if path.lower().endswith(".json"):
+        with open(path) as dbu_file:
+            data = json.load(dbu_file)
+        rows = ([{"sku": sku, "rate": rate} for sku, rate in data.items()]
+                if isinstance(data, dict) else data)
+    else:
+        with open(path, newline="") as dbu_file:
+            rows = list(csv.DictReader(dbu_file))
+    return [("DBU", row["sku"].strip(), (row.get("region") or region).strip(),
+             float(row["rate"])) for row in rows]
+
+
+def build_price_index(out_dir,
+                      ec2=None,
+                      s3=None,
+                      dbu=None,
+                      default_region=DEFAULT_REGION):
+    """
+    Ingest price files and write a memory-mappable index
+
+    The built-in rates are the base layer, so services without a source
+    file (and Photon) keep working. Ingested entries override them.
+
+    Args:
+        out_dir (str): Index directory to create, or to add a generation to
+        ec2 (str): AmazonEC2 offer JSON
+        s3 (str): AmazonS3 offer JSON
+        dbu (str): Databricks DBU CSV/JSON
+        default_region (str): Region used when a lookup names none
+
+    Returns:
+        int: Number of entries in the index
+    """
+    entries = {(service, sku, default_region): rate
+               for service, table in DEFAULT_RATES.items()
+               for sku, rate in table.items()}
+    for source, ingest in ((ec2, ingest_ec2), (s3, ingest_s3),
+                           (dbu, lambda path: ingest_dbu(path, default_region))):
+        if source:
+            for service, sku, region, rate in ingest(source):
+                entries[(service, sku, region)] = rate
+
+    vocab = {"services": {}, "skus": {}, "regions": {}}
+    codes = {"service": [], "sku": [], "region": []}
+    for service, sku, region in entries:
+        codes["service"].append(vocab["services"].setdefault(
+            service, len(vocab["services"])))
+        codes["sku"].append(vocab["skus"].setdefault(sku, len(vocab["skus"])))
+        codes["region"].append(vocab["regions"].setdefault(
+            region, len(vocab["regions"])))
+    columns = _sorted_columns(
+        {name: np.asarray(values, dtype=INDEX_COLUMNS[name])
+         for name, values in codes.items()},
+        np.fromiter(entries.values(), dtype=np.float64, count=len(entries)))
+    strings = {name: list(values) for name, values in vocab.items()}
+
+    version = _index_version(columns, strings)
+
+    os.makedirs(out_dir, exist_ok=True)
+    generation = tempfile.mkdtemp(prefix=f"{version}-", dir=out_dir)
+    for name, dtype in INDEX_COLUMNS.items():
+        with open(os.path.join(generation, f"{name}.npy"), "wb") as column:
+            np.save(column, columns[name].astype(dtype, copy=False))
+            _sync(column)
+    with open(os.path.join(generation, INDEX_STRINGS), "w") as strings_file:
+        json.dump(
+            {
+                **strings,
+                "version": version,
+                "default_region": default_region,
+                "sources": {
+                    "ec2": ec2,
+                    "s3": s3,
+                    "dbu": dbu
+                }
+            }, strings_file)
+        _sync(strings_file)
+    _sync_dir(generation)
+
+    # Switch readers over: refresh_rate_catalog() watches this file
+    pointer = os.path.join(out_dir, INDEX_POINTER)
+    with tempfile.NamedTemporaryFile("w", dir=out_dir, prefix=".CURRENT-",
+                                     delete=False) as pointer_file:
+        pointer_file.write(os.path.basename(generation))
+        _sync(pointer_file)
+    os.replace(pointer_file.name, pointer)
+    _sync_dir(out_dir)
+    _prune_generations(out_dir, os.path.basename(generation))
+    return len(entries)
+
+
+def _sync(open_file):
+    open_file.flush()
+    os.fsync(open_file.fileno())
+
+
+def _sync_dir(path):
+    """Make renames and new files in a directory durable (POSIX only)"""
+    if os.name != "posix":
+        return
+    descriptor = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def _prune_generations(out_dir, live):
+    """Delete all but the live and the most recent older generations
+
+    Open catalogs keep their mappings of deleted files on POSIX systems.
+    """
+    generations = sorted(
+        (entry for entry in os.scandir(out_dir)
+         if entry.is_dir() and entry.name != live
+         and os.path.exists(os.path.join(entry.path, INDEX_STRINGS))),
+        key=lambda entry: entry.stat().st_mtime_ns,
+        reverse=True)
+    for entry in generations[_KEPT_GENERATIONS:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def current_index(index_dir):
+    """
+    Return the directory of the live generation of an index
+
+    Args:
+        index_dir (str): Directory written by build_price_index
+
+    Returns:
+        str: Generation directory, or None if there is no index
+    """
+    try:
+        with open(os.path.join(index_dir, INDEX_POINTER)) as pointer_file:
+            generation = pointer_file.read().strip()
+    except OSError:
+        return None
+    return os.path.join(index_dir, generation) if generation else None
+
+
+def _sorted_columns(codes, rates):
+    """
+    Sort entries by lookup key
+
+    Args:
+        codes (dict): service, sku and region code arrays in option order
+        rates (ndarray): Rate per entry, in the same order
+
+    Returns:
+        dict: Every INDEX_COLUMNS array, sorted by key
+    """
+    keys = ((codes["service"].astype(np.uint64) << np.uint64(_SERVICE_SHIFT))
+            | (codes["region"].astype(np.uint64) << np.uint64(_REGION_SHIFT))
+            | codes["sku"].astype(np.uint64))
+    order = np.argsort(keys, kind="stable")
+    return {
+        "keys": keys[order],
+        "rates": rates[order],
+        "order": order.astype(np.uint32),
+        **{name: column[order] for name, column in codes.items()}
+    }
+
+
+def _index_version(columns, strings):
+    """Hash of every key, rate and string, as RateCatalog.version"""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(columns["keys"]).tobytes())
+    digest.update(np.ascontiguousarray(columns["rates"]).tobytes())
+    digest.update(
+        json.dumps([strings[name] for name in ("services", "skus",
+                                                "regions")]).encode())
+    return digest.hexdigest()[:12]
+
+
+class IndexedRateTable(Mapping):
+    """
+    Read-only {sku: rate} view of one (service, region) of a price index
+
+    Lookups are a binary search of the index keys; SKU names are only
+    built when the table is iterated.
+    """
+
+    def __init__(self, index, base, start, stop):
+        self._index = index
+        self._base = base
+        self._start = start
+        self._stop = stop
+        self._skus = None
+
+    def __getitem__(self, sku):
+        code = self._index.sku_codes.get(sku)
+        if code is not None:
+            rate = self._index.lookup(self._base | code, self._start,
+                                      self._stop)
+            if rate is not None:
+                return rate
+        raise KeyError(sku)
+
+    def _listed(self):
+        if self._skus is None:
+            index = self._index
+            rows = np.arange(self._start, self._stop)[np.argsort(
+                index.order[self._start:self._stop], kind="stable")]
+            self._skus = tuple(index.skus[code] for code in (
+                index.keys[rows] & np.uint64(_SKU_MASK)).tolist())
+        return self._skus
+
+    def __iter__(self):
+        return iter(self._listed())
+
+    def __len__(self):
+        return self._stop - self._start
+
+
+class IndexedRates(RateSource):
+    """
+    Rates read from the memory-mapped arrays of one index generation
+
+    Args:
+        generation (str): Generation directory (see current_index)
+    """
+
+    def __init__(self, generation):
+        super().__init__()
+        with open(os.path.join(generation, INDEX_STRINGS)) as strings_file:
+            strings = json.load(strings_file)
+        columns = {
+            name: np.load(os.path.join(generation, f"{name}.npy"),
+                          mmap_mode="r")
+            for name in INDEX_COLUMNS
+        }
+        self.keys = columns["keys"]
+        self.rates = columns["rates"]
+        self.order = columns["order"]
+        self.skus = strings["skus"]
+        self.sku_codes = {sku: code for code, sku in enumerate(self.skus)}
+        self._service_codes = {
+            service: code
+            for code, service in enumerate(strings["services"])
+        }
+        self._region_codes = {
+            region: code
+            for code, region in enumerate(strings["regions"])
+        }
+        self.default_region = strings["default_region"]
+        self.services = tuple(strings["services"])
+        self.regions = tuple(strings["regions"])
+        self.version = strings["version"]
+        self._tables = {}
+
+    def _base(self, service, region):
+        service_code = self._service_codes.get(service)
+        region_code = self._region_codes.get(region)
+        if service_code is None or region_code is None:
+            return None
+        return (service_code << _SERVICE_SHIFT) | (region_code <<
+                                                   _REGION_SHIFT)
+
+    def lookup(self, key, start=0, stop=None):
+        """Return the rate stored under key, or None"""
+        stop = len(self.keys) if stop is None else stop
+        position = start + int(
+            np.searchsorted(self.keys[start:stop], np.uint64(key)))
+        if position < stop and int(self.keys[position]) == key:
+            return float(self.rates[position])
+        return None
+
+    def table(self, service, region):
+        key = (service, region)
+        table = self._tables.get(key)
+        if table is None:
+            base = self._base(service, region)
+            if base is None:
+                return EMPTY_RATES
+            start, stop = np.searchsorted(
+                self.keys,
+                np.array([base, base + (1 << _REGION_SHIFT)], dtype=np.uint64))
+            table = self._tables[key] = IndexedRateTable(
+                self, base, int(start), int(stop))
+        return table
+
+    def get(self, service, sku, region):
+        base = self._base(service, region)
+        code = self.sku_codes.get(sku)
+        if base is None or code is None:
+            return None
+        return self.lookup(base | code)
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def open_price_index(index_dir):
+    """Open the live generation of a price index as a RateCatalog"""
+    generation = current_index(index_dir)
+    if generation is None:
+        raise FileNotFoundError(f"No price index in {index_dir}")
+    return RateCatalog(rates=IndexedRates(generation))
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.price_index",
+        description="Build the local price index from offline price files")
+    parser.add_argument("--ec2", help="AWS AmazonEC2 offer JSON file")
+    parser.add_argument("--s3", help="AWS AmazonS3 offer JSON file")
+    parser.add_argument("--dbu", help="Databricks DBU rates CSV/JSON file")
+    parser.add_argument("--region",
+                        default=DEFAULT_REGION,
+                        help="Default region for lookups")
+    parser.add_argument("--out",
+                        default=os.path.join("data", "price_index"),
+                        help="Index directory to write")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    count = build_price_index(args.out,
+                              ec2=args.ec2,
+                              s3=args.s3,
+                              dbu=args.dbu,
+                              default_region=args.region)
+    print(f"Indexed {count:,} rates into {args.out} "
+          f"in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
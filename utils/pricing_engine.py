@@ -0,0 +1,818 @@
+"""
+Headless pricing engine for the Databricks Cloud Cost Calculator
+
+One pure function per layer takes the same inputs the calculator page
+collects (plain dicts, or dataclasses with the same field names) and
+returns the dict stored in st.session_state.all_costs for that layer.
+Nothing here depends on Streamlit, so workloads can be priced from batch
+jobs and tests as well as from the page.
+"""
+import dataclasses
+
+import numpy as np
+import pandas as pd
+
+from utils.cost_formulas import (calculate_storage_cost,
+                                 calculate_compute_cost, calculate_dbu_cost,
+                                 calculate_photon_cost)
+from utils.metrics import PRICING_SECONDS, timed
+from utils.rate_catalog import get_rate_catalog, on_catalog_refresh
+
+# Read-only {service: {sku: rate}} view of the shared rate catalog
+COSTS = get_rate_catalog().costs
+
+# Default compute configuration (hidden from user)
+DEFAULT_COMPUTE = {
+    "instance_type": "r5.xlarge",
+    "num_instances": 2,
+    "hours_per_day": 8,
+    "days_per_month": 22
+}
+
+DAYS_PER_MONTH = 30  # Days in a physical month
+WORKING_DAYS_PER_MONTH = 22  # Days dashboards are queried
+
+RETENTION_OPTIONS = [
+    "30 days", "60 days", "90 days", "180 days", "1 physical month",
+    "2 physical months", "Indefinite"
+]
+
+# Map service tier to DBU type
+SERVICE_TIERS = {
+    "Databricks Jobs": "Jobs",
+    "Delta Live Tables (Core)": "DLT_Core",
+    "Delta Live Tables (Pro)": "DLT_Pro",
+    "Delta Live Tables (Advanced)": "DLT_Advanced"
+}
+
+# Storage multiplier per CONF transformation complexity
+TRANSFORM_COMPLEXITY = {"Low": 0.7, "Medium": 1.0, "High": 1.5}
+
+MATERIALIZED_VIEW = "Materialized View (MV)"
+ENGINE_TYPES = ["SQL", "PySpark", MATERIALIZED_VIEW]
+
+
+def _engine_dbu_rates(costs=COSTS):
+    """DBU rate per engine type, derived from the given rates"""
+    return {
+        "SQL": costs["DBU"]["Enterprise"],
+        "PySpark": costs["DBU"]["Jobs"],
+        # Materialized views are precomputed so query time is less
+        MATERIALIZED_VIEW: costs["DBU"]["Enterprise"] * 0.8
+    }
+
+
+# Different cost factors based on engine type
+ENGINE_COST_FACTORS = {
+    "SQL": {
+        "storage_multiplier": 1.0,
+        "performance_factor": 1.0
+    },
+    "PySpark": {
+        "storage_multiplier":
+        1.2,  # PySpark typically uses more storage due to intermediate results
+        "performance_factor":
+        1.5  # PySpark can be more powerful but uses more resources
+    },
+    MATERIALIZED_VIEW: {
+        "storage_multiplier":
+        2.0,  # MV requires additional storage for the materialized data
+        "performance_factor":
+        0.5  # MV has lower compute needs for querying, but higher for refreshes
+    }
+}
+
+
+def _refresh_engine_rates(catalog=None):
+    """
+    Derive the engine DBU rates, e.g. from a newly loaded catalog
+
+    Returns:
+        function: Publishes the new rates into ENGINE_COST_FACTORS with one
+            dict update
+    """
+    costs = COSTS if catalog is None else catalog.costs
+    factors = {
+        engine: {
+            **ENGINE_COST_FACTORS[engine], "dbu_rate": rate
+        }
+        for engine, rate in _engine_dbu_rates(costs).items()
+    }
+    return lambda: ENGINE_COST_FACTORS.update(factors)
+
+
+_refresh_engine_rates()()
+on_catalog_refresh(_refresh_engine_rates)
+
+# Compute size options (label -> DBUs) for PB Simple mode
+PB_COMPUTE_SIZES = {
+    "SQL": {
+        "Extra Small (1 DBU)": 1,
+        "Small (2 DBUs)": 2,
+        "Medium (4 DBUs)": 4,
+        "Large (8 DBUs)": 8
+    },
+    "PySpark": {
+        "Small Cluster (2 DBUs)": 2,
+        "Medium Cluster (4 DBUs)": 4,
+        "Large Cluster (8 DBUs)": 8,
+        "X-Large Cluster (16 DBUs)": 16
+    },
+    MATERIALIZED_VIEW: {
+        "Low Refresh (1 DBU)": 1,
+        "Medium Refresh (2 DBUs)": 2,
+        "High Refresh (4 DBUs)": 4,
+        "Very High Refresh (8 DBUs)": 8
+    }
+}
+
+# Compute size options (label -> DBUs) for individual PB dashboards/views
+PB_DASHBOARD_SIZES = {
+    "SQL": PB_COMPUTE_SIZES["SQL"],
+    "PySpark": PB_COMPUTE_SIZES["PySpark"],
+    MATERIALIZED_VIEW: {
+        "Low Usage (1 DBU)": 1,
+        "Medium Usage (2 DBUs)": 2,
+        "High Usage (4 DBUs)": 4,
+        "Very High Usage (8 DBUs)": 8
+    }
+}
+
+RAW_TABLE_SIZE_GB = 50.0  # Assumed size per RAW table in Simple mode
+CONF_TRANSFORM_SIZE_GB = 50.0  # Assumed output per CONF transformation
+PB_DASHBOARD_SIZE_GB = 20.0  # Approx storage per dashboard
+PB_REPORT_SIZE_GB = 50.0  # Approx storage per report
+
+
+def _fields(item):
+    """Return a workload as a dict whether it is a dict or a dataclass"""
+    if dataclasses.is_dataclass(item):
+        return dataclasses.asdict(item)
+    return item
+
+
+def dbu_rate(dbu_type):
+    """Return the DBU rate of a DBU type, falling back to Jobs pricing"""
+    catalog = get_rate_catalog()
+    return catalog.get("DBU", dbu_type, catalog.rate("DBU", "Jobs"))
+
+
+def retention_to_months(retention):
+    """Convert a retention policy label to a number of physical months"""
+    if "physical month" in retention:
+        if retention == "1 physical month":
+            return 1
+        elif retention == "2 physical months":
+            return 2
+        return 1  # Default
+    elif "days" in retention:
+        days = int(retention.split()[0])
+        return days / 30  # Convert days to months
+    return 12  # Indefinite: assume 1 year for calculation
+
+
+def photon_applies(item):
+    """Check whether Photon is enabled and applicable for a workload"""
+    item = _fields(item)
+    return bool(item.get('photon_enabled', False)) and item.get(
+        'engine_type') != MATERIALIZED_VIEW
+
+
+# Per-workload formulas. Arguments may be scalars or whole columns, so the
+# same math prices a single form entry and a million-row inventory.
+def _landing_table_storage(files_per_day, avg_file_size, retention_months):
+    files_per_month = files_per_day * DAYS_PER_MONTH
+    return files_per_month * avg_file_size * retention_months
+
+
+def _job_compute_cost(instance_cost, avg_duration, runs_per_month):
+    job_hours = (avg_duration / 60) * runs_per_month
+    return calculate_compute_cost(
+        instance_cost,
+        1,  # Number of instances per job
+        job_hours / DAYS_PER_MONTH,  # Hours per day
+        DAYS_PER_MONTH)
+
+
+def _transform_compute_cost(dbu_cost, avg_duration, runs_per_month,
+                            dbu_per_hour):
+    monthly_hours = (avg_duration / 60) * runs_per_month
+    return calculate_dbu_cost(
+        dbu_cost,
+        1,  # Cluster size (already factored into dbu_per_hour)
+        monthly_hours / DAYS_PER_MONTH,  # Hours per day
+        DAYS_PER_MONTH,
+        dbu_per_hour)
+
+
+def _dashboard_compute_cost(dbu_rate, performance_factor, compute_dbu,
+                            avg_query_duration, queries_per_day,
+                            active_users):
+    # Convert query duration from seconds to hours and apply performance factor
+    query_hours = (avg_query_duration / 3600) * queries_per_day * \
+        active_users * WORKING_DAYS_PER_MONTH * performance_factor
+    return calculate_dbu_cost(
+        dbu_rate,
+        1,  # Cluster size (already factored into compute_dbu)
+        query_hours / WORKING_DAYS_PER_MONTH,  # Hours per day
+        WORKING_DAYS_PER_MONTH,
+        compute_dbu)
+
+
+def _report_compute_cost(dbu_rate, gen_duration, runs_per_month,
+                         dbu_per_hour):
+    report_hours = (gen_duration / 60) * runs_per_month
+    return calculate_dbu_cost(
+        dbu_rate,
+        1,  # Cluster size
+        report_hours / DAYS_PER_MONTH,  # Hours per day
+        DAYS_PER_MONTH,
+        dbu_per_hour)
+
+
+def _with_photon(compute_cost, photon_enabled):
+    return {
+        "compute_cost": compute_cost,
+        "photon_cost": calculate_photon_cost(
+            compute_cost, COSTS["Photon"]["acceleration_factor"],
+            photon_enabled)
+    }
+
+
+def price_landing_table(table):
+    """Calculate the retained storage (GB) of a single landing table"""
+    table = _fields(table)
+    return _landing_table_storage(table['files_per_day'],
+                                  table['avg_file_size'],
+                                  retention_to_months(table['retention']))
+
+
+def price_raw_job(job):
+    """Calculate monthly compute and Photon cost of a single RAW job"""
+    job = _fields(job)
+    compute_cost = _job_compute_cost(COSTS["EC2"][job['instance_type']],
+                                     job['avg_duration'],
+                                     job['runs_per_month'])
+    return _with_photon(compute_cost, photon_applies(job))
+
+
+def price_transform(transform):
+    """Calculate monthly compute and Photon cost of a single CONF transformation"""
+    transform = _fields(transform)
+    compute_cost = _transform_compute_cost(
+        dbu_rate(SERVICE_TIERS.get(transform['service_tier'], "Jobs")),
+        transform['avg_duration'], transform['runs_per_month'],
+        transform['dbu_per_hour'])
+    return _with_photon(compute_cost, photon_applies(transform))
+
+
+def price_dashboard(dashboard):
+    """Calculate monthly compute and Photon cost of a single PB dashboard or view"""
+    dashboard = _fields(dashboard)
+    factors = ENGINE_COST_FACTORS[dashboard['engine_type']]
+    compute_cost = _dashboard_compute_cost(
+        factors["dbu_rate"], factors["performance_factor"],
+        PB_DASHBOARD_SIZES[dashboard['engine_type']].get(
+            dashboard['compute_size'], 2), dashboard['avg_query_duration'],
+        dashboard['queries_per_day'], dashboard['active_users'])
+    return _with_photon(compute_cost, photon_applies(dashboard))
+
+
+def price_report(report):
+    """Calculate monthly compute and Photon cost of a single PB report or MV refresh"""
+    report = _fields(report)
+    compute_cost = _report_compute_cost(
+        ENGINE_COST_FACTORS[report['engine_type']]["dbu_rate"],
+        report['gen_duration'], report['runs_per_month'],
+        report['dbu_per_hour'])
+    return _with_photon(compute_cost, photon_applies(report))
+
+
+def _lookup(column, mapping, name):
+    """Map a column through a dict in one pass, rejecting unknown values"""
+    mapped = column.map(mapping)
+    unknown = mapped.isna()
+    if unknown.any():
+        values = sorted(set(column[unknown].astype(str)))
+        raise ValueError(f"Unknown {name} values: {', '.join(values[:5])}")
+    return mapped
+
+
+def _photon_mask(frame):
+    return frame['photon_enabled'].astype(bool) & (frame['engine_type'] !=
+                                                   MATERIALIZED_VIEW)
+
+
+def price_landing_tables_frame(tables):
+    """
+    Price a DataFrame of landing tables in one vectorized pass
+
+    Returns a copy of the frame with compute_cost, photon_cost and
+    storage_gb columns added, matching price_landing_table row by row.
+    """
+    retention_months = _lookup(
+        tables['retention'],
+        {r: retention_to_months(r) for r in RETENTION_OPTIONS}, "retention")
+    return tables.assign(compute_cost=0.0,
+                         photon_cost=0.0,
+                         storage_gb=_landing_table_storage(
+                             tables['files_per_day'], tables['avg_file_size'],
+                             retention_months))
+
+
+def price_raw_jobs_frame(jobs):
+    """
+    Price a DataFrame of RAW jobs in one vectorized pass
+
+    Jobs carry no storage of their own; RAW storage is sized per layer.
+    """
+    compute_cost = _job_compute_cost(
+        _lookup(jobs['instance_type'], COSTS["EC2"], "instance_type"),
+        jobs['avg_duration'], jobs['runs_per_month'])
+    return jobs.assign(storage_gb=0.0,
+                       **_with_photon(compute_cost,
+                                      jobs['photon_enabled'].astype(bool)))
+
+
+def price_transforms_frame(transforms):
+    """Price a DataFrame of CONF transformations in one vectorized pass"""
+    dbu_cost = _lookup(
+        transforms['service_tier'], {
+            tier: dbu_rate(dbu_type)
+            for tier, dbu_type in SERVICE_TIERS.items()
+        }, "service_tier")
+    compute_cost = _transform_compute_cost(dbu_cost,
+                                           transforms['avg_duration'],
+                                           transforms['runs_per_month'],
+                                           transforms['dbu_per_hour'])
+    return transforms.assign(**_with_photon(
+        compute_cost, transforms['photon_enabled'].astype(bool)))
+
+
+def _engine_factor(frame, factor):
+    return _lookup(
+        frame['engine_type'],
+        {engine: factors[factor]
+         for engine, factors in ENGINE_COST_FACTORS.items()}, "engine_type")
+
+
+def price_dashboards_frame(dashboards):
+    """
+    Price a DataFrame of PB dashboards/views in one vectorized pass
+
+    A missing or empty storage_gb falls back to the per-dashboard default
+    for the row's engine type.
+    """
+    compute_dbu = np.full(len(dashboards), 2.0)
+    for engine, sizes in PB_DASHBOARD_SIZES.items():
+        rows = (dashboards['engine_type'] == engine).to_numpy()
+        compute_dbu[rows] = dashboards['compute_size'][rows].map(
+            sizes).fillna(2).to_numpy()
+    compute_cost = _dashboard_compute_cost(
+        _engine_factor(dashboards, "dbu_rate"),
+        _engine_factor(dashboards, "performance_factor"), compute_dbu,
+        dashboards['avg_query_duration'], dashboards['queries_per_day'],
+        dashboards['active_users'])
+    default_storage = PB_DASHBOARD_SIZE_GB * _engine_factor(
+        dashboards, "storage_multiplier")
+    return dashboards.assign(
+        storage_gb=dashboards['storage_gb'].fillna(default_storage)
+        if 'storage_gb' in dashboards else default_storage,
+        **_with_photon(compute_cost, _photon_mask(dashboards)))
+
+
+def price_reports_frame(reports):
+    """
+    Price a DataFrame of PB reports/MV refreshes in one vectorized pass
+
+    A missing or empty storage_gb falls back to the per-report default for
+    the row's engine type.
+    """
+    compute_cost = _report_compute_cost(_engine_factor(reports, "dbu_rate"),
+                                        reports['gen_duration'],
+                                        reports['runs_per_month'],
+                                        reports['dbu_per_hour'])
+    default_storage = PB_REPORT_SIZE_GB * _engine_factor(
+        reports, "storage_multiplier")
+    return reports.assign(
+        storage_gb=reports['storage_gb'].fillna(default_storage)
+        if 'storage_gb' in reports else default_storage,
+        **_with_photon(compute_cost, _photon_mask(reports)))
+
+
+# Workload kind -> (layer, vectorized pricer)
+WORKLOAD_KINDS = {
+    "table": ("Landing", price_landing_tables_frame),
+    "job": ("RAW", price_raw_jobs_frame),
+    "transform": ("CONF", price_transforms_frame),
+    "dashboard": ("PB", price_dashboards_frame),
+    "report": ("PB", price_reports_frame)
+}
+
+
+def price_workload(kind, item):
+    """
+    Price one workload of any kind as a uniform row
+
+    Args:
+        kind (str): One of WORKLOAD_KINDS
+        item (dict): Workload fields as entered in the calculator form
+
+    Returns:
+        dict: compute_cost, photon_cost, storage_gb and photon (applies)
+    """
+    item = _fields(item)
+    if kind == "table":
+        return {
+            "compute_cost": 0.0,
+            "photon_cost": 0.0,
+            "storage_gb": price_landing_table(item),
+            "photon": False
+        }
+    pricers = {
+        "job": price_raw_job,
+        "transform": price_transform,
+        "dashboard": price_dashboard,
+        "report": price_report
+    }
+    costs = pricers[kind](item)
+    return {
+        "compute_cost": costs["compute_cost"],
+        "photon_cost": costs["photon_cost"],
+        # Only transformations size their own storage; RAW and PB storage
+        # is entered per layer
+        "storage_gb": item['storage_gb'] if kind == "transform" else 0.0,
+        "photon": photon_applies(item)
+    }
+
+
+@timed(PRICING_SECONDS, function="price_workloads_frame")
+def price_workloads_frame(kind, frame):
+    """
+    Price a DataFrame of workloads of any kind as uniform columns
+
+    The vectorized counterpart of price_workload.
+
+    Returns:
+        DataFrame: compute_cost, photon_cost, storage_gb and photon
+            (applies), aligned with frame
+    """
+    priced = WORKLOAD_KINDS[kind][1](frame)
+    if kind == "table":
+        photon = False
+    elif 'engine_type' in frame:
+        photon = _photon_mask(frame)
+    else:
+        photon = frame['photon_enabled'].astype(bool)
+    return pd.DataFrame(
+        {
+            "compute_cost": priced['compute_cost'],
+            "photon_cost": priced['photon_cost'],
+            # As in price_workload, RAW and PB storage is entered per layer
+            "storage_gb": priced['storage_gb']
+            if kind in ("table", "transform") else 0.0,
+            "photon": photon
+        },
+        index=frame.index)
+
+
+def summarize_workloads(kind, items):
+    """
+    Total a list of workloads of one kind
+
+    Returns:
+        dict: count, compute_cost, photon_cost, storage_gb and
+            photon_enabled, the same shape as LayerAggregate.totals()
+    """
+    rows = [price_workload(kind, item) for item in items]
+    return {
+        "count": len(rows),
+        "compute_cost": sum(row["compute_cost"] for row in rows),
+        "photon_cost": sum(row["photon_cost"] for row in rows),
+        "storage_gb": sum(row["storage_gb"] for row in rows),
+        "photon_enabled": any(row["photon"] for row in rows)
+    }
+
+
+def _advanced_totals(params,
+                     key,
+                     kind,
+                     totals_key="totals",
+                     engine_type=None):
+    """Advanced mode totals: precomputed ones if given, else summed from the list"""
+    if params.get(totals_key) is not None:
+        return params[totals_key]
+    items = map(_fields, params.get(key, []))
+    if engine_type is not None:
+        items = (item for item in items
+                 if item.get('engine_type') == engine_type)
+    return summarize_workloads(kind, items)
+
+
+@timed(PRICING_SECONDS, function="calculate_landing_cost")
+def calculate_landing_cost(params, storage_type):
+    """
+    Calculate the Landing layer storage cost
+
+    Args:
+        params (dict): Simple mode inputs (avg_file_size, files_per_day,
+            file_growth, retention) or {"mode": "Advanced", "tables": [...]}.
+            In Advanced mode "totals" (see summarize_workloads) may be
+            passed instead of the list.
+        storage_type (str): S3 storage tier type
+
+    Returns:
+        dict: Landing entry of st.session_state.all_costs
+    """
+    params = _fields(params)
+    if params.get("mode") == "Advanced":
+        totals = _advanced_totals(params, "tables", "table")
+        return {
+            "storage_gb": totals["storage_gb"],
+            "storage_cost_per_month": calculate_storage_cost(
+                totals["storage_gb"], COSTS["S3"][storage_type], months=1),
+            "storage_tier": storage_type,
+            "tables_count": totals["count"]
+        }
+
+    retention = params.get("retention", "30 days")
+    total_files = params.get("files_per_day", 10) * DAYS_PER_MONTH
+    total_storage_gb = total_files * params.get("avg_file_size", 2.0)
+    growth_factor = 1 + (params.get("file_growth", 5) / 100)
+
+    # Calculate cost with retention
+    projected_storage = total_storage_gb * (growth_factor**
+                                            retention_to_months(retention))
+    return {
+        "storage_gb": projected_storage,
+        "storage_cost_per_month": calculate_storage_cost(
+            projected_storage, COSTS["S3"][storage_type], months=1),
+        "storage_tier": storage_type,
+        "retention_policy": retention
+    }
+
+
+@timed(PRICING_SECONDS, function="calculate_raw_cost")
+def calculate_raw_cost(params, storage_type):
+    """
+    Calculate the RAW layer compute, Photon and storage cost
+
+    Args:
+        params (dict): Simple mode inputs (num_jobs, num_tables,
+            instance_type, avg_runs_per_month, avg_job_duration,
+            enable_photon) or {"mode": "Advanced", "jobs": [...],
+            "estimated_tables": n, "avg_table_size": gb}, with "totals"
+            optionally replacing "jobs"
+        storage_type (str): S3 storage tier type
+
+    Returns:
+        dict: RAW entry of st.session_state.all_costs
+    """
+    params = _fields(params)
+    if params.get("mode") == "Advanced":
+        totals = _advanced_totals(params, "jobs", "job")
+        compute_cost = totals["compute_cost"]
+        photon_cost = totals["photon_cost"]
+        raw_storage_gb = params.get("estimated_tables", 10) * params.get(
+            "avg_table_size", RAW_TABLE_SIZE_GB)
+        storage_cost = calculate_storage_cost(raw_storage_gb,
+                                              COSTS["S3"][storage_type],
+                                              months=1)
+        return {
+            "compute_cost": compute_cost,
+            "storage_cost": storage_cost,
+            "photon_cost": photon_cost,
+            "total_cost": compute_cost + storage_cost + photon_cost,
+            "jobs_count": totals["count"],
+            "storage_gb": raw_storage_gb,
+            "photon_enabled": totals["photon_enabled"]
+        }
+
+    num_jobs = params.get("num_jobs", 3)
+    instance_type = params.get("instance_type", DEFAULT_COMPUTE["instance_type"])
+    enable_photon = params.get("enable_photon", True)
+
+    # Convert job duration to hours
+    job_hours = (params.get("avg_job_duration", 45) /
+                 60) * num_jobs * params.get("avg_runs_per_month", 30)
+    compute_cost = calculate_compute_cost(
+        COSTS["EC2"][instance_type],
+        1,  # Number of instances per job
+        job_hours / DAYS_PER_MONTH,  # Hours per day
+        DAYS_PER_MONTH)
+    photon_cost = calculate_photon_cost(compute_cost,
+                                        COSTS["Photon"]["acceleration_factor"],
+                                        enable_photon)
+
+    # Storage estimate for processed tables in RAW
+    raw_storage_gb = params.get("num_tables", 10) * RAW_TABLE_SIZE_GB
+    storage_cost = calculate_storage_cost(raw_storage_gb,
+                                          COSTS["S3"][storage_type],
+                                          months=1)
+    return {
+        "compute_cost": compute_cost,
+        "storage_cost": storage_cost,
+        "photon_cost": photon_cost,
+        "total_cost": compute_cost + storage_cost + photon_cost,
+        "jobs_count": num_jobs,
+        "storage_gb": raw_storage_gb,
+        "instance_type": instance_type,
+        "photon_enabled": enable_photon
+    }
+
+
+@timed(PRICING_SECONDS, function="calculate_conf_cost")
+def calculate_conf_cost(params, storage_type):
+    """
+    Calculate the CONF layer compute, Photon and storage cost
+
+    Args:
+        params (dict): Simple mode inputs (num_transforms, dbu_per_hour,
+            service_tier, transform_complexity, avg_transform_duration,
+            avg_runs_per_month, enable_photon) or
+            {"mode": "Advanced", "transforms": [...]}, with "totals"
+            optionally replacing "transforms"
+        storage_type (str): S3 storage tier type
+
+    Returns:
+        dict: CONF entry of st.session_state.all_costs
+    """
+    params = _fields(params)
+    if params.get("mode") == "Advanced":
+        totals = _advanced_totals(params, "transforms", "transform")
+        compute_cost = totals["compute_cost"]
+        photon_cost = totals["photon_cost"]
+        total_storage_gb = totals["storage_gb"]
+        storage_cost = calculate_storage_cost(total_storage_gb,
+                                              COSTS["S3"][storage_type],
+                                              months=1)
+        return {
+            "compute_cost": compute_cost,
+            "storage_cost": storage_cost,
+            "photon_cost": photon_cost,
+            "total_cost": compute_cost + storage_cost + photon_cost,
+            "transforms_count": totals["count"],
+            "storage_gb": total_storage_gb,
+            "photon_enabled": totals["photon_enabled"]
+        }
+
+    num_transforms = params.get("num_transforms", 4)
+    service_tier = params.get("service_tier", "Databricks Jobs")
+    enable_photon = params.get("enable_photon", True)
+    dbu_cost = dbu_rate(SERVICE_TIERS.get(service_tier, "Jobs"))
+
+    # Calculate hours for all transformations in a physical month
+    monthly_hours = (params.get("avg_transform_duration", 60) /
+                     60) * num_transforms * params.get("avg_runs_per_month", 30)
+    compute_cost = calculate_dbu_cost(
+        dbu_cost,
+        1,  # Cluster size (already factored into dbu_per_hour)
+        monthly_hours / DAYS_PER_MONTH,  # Hours per day
+        DAYS_PER_MONTH,
+        params.get("dbu_per_hour", 4))
+    photon_cost = calculate_photon_cost(compute_cost,
+                                        COSTS["Photon"]["acceleration_factor"],
+                                        enable_photon)
+
+    # Storage calculation based on complexity
+    complexity_factor = TRANSFORM_COMPLEXITY.get(
+        params.get("transform_complexity", "Medium"), 1.0)
+    conf_storage_gb = num_transforms * CONF_TRANSFORM_SIZE_GB * complexity_factor
+    storage_cost = calculate_storage_cost(conf_storage_gb,
+                                          COSTS["S3"][storage_type],
+                                          months=1)
+    return {
+        "compute_cost": compute_cost,
+        "storage_cost": storage_cost,
+        "photon_cost": photon_cost,
+        "total_cost": compute_cost + storage_cost + photon_cost,
+        "transforms_count": num_transforms,
+        "storage_gb": conf_storage_gb,
+        "service_tier": service_tier,
+        "photon_enabled": enable_photon
+    }
+
+
+@timed(PRICING_SECONDS, function="calculate_pb_cost")
+def calculate_pb_cost(params, storage_type):
+    """
+    Calculate the PB layer compute, Photon and storage cost
+
+    Args:
+        params (dict): engine_type plus Simple mode inputs (num_dashboards,
+            num_reports, active_users, compute_size, avg_queries_per_day,
+            avg_query_duration, report_runs_per_month, avg_report_duration,
+            enable_photon) or {"mode": "Advanced", "dashboards": [...],
+            "reports": [...], "dashboard_storage_gb": gb,
+            "report_storage_gb": gb}. In Advanced mode only dashboards and
+            reports of engine_type are priced; "dashboard_totals" and
+            "report_totals" for that engine may replace the lists.
+        storage_type (str): S3 storage tier type
+
+    Returns:
+        dict: PB entry of st.session_state.all_costs
+    """
+    params = _fields(params)
+    engine_type = params.get("engine_type", "SQL")
+    engine_factors = ENGINE_COST_FACTORS[engine_type]
+
+    if params.get("mode") == "Advanced":
+        dashboards = _advanced_totals(params, "dashboards", "dashboard",
+                                      "dashboard_totals", engine_type)
+        reports = _advanced_totals(params, "reports", "report",
+                                   "report_totals", engine_type)
+        compute_cost = dashboards["compute_cost"] + reports["compute_cost"]
+        photon_cost = dashboards["photon_cost"] + reports["photon_cost"]
+
+        total_storage_gb = dashboards["count"] * params.get(
+            "dashboard_storage_gb", PB_DASHBOARD_SIZE_GB *
+            engine_factors["storage_multiplier"]) + reports["count"] * params.get(
+                "report_storage_gb",
+                PB_REPORT_SIZE_GB * engine_factors["storage_multiplier"])
+        storage_cost = calculate_storage_cost(total_storage_gb,
+                                              COSTS["S3"][storage_type],
+                                              months=1)
+        return {
+            "compute_cost": compute_cost,
+            "storage_cost": storage_cost,
+            "photon_cost": photon_cost,
+            "total_cost": compute_cost + storage_cost + photon_cost,
+            "dashboards_count": dashboards["count"],
+            "reports_count": reports["count"],
+            "storage_gb": total_storage_gb,
+            "photon_enabled": (dashboards["photon_enabled"]
+                               or reports["photon_enabled"]),
+            "engine_type": engine_type
+        }
+
+    num_dashboards = params.get("num_dashboards", 5)
+    num_reports = params.get("num_reports", 10)
+    # Photon is only available for SQL and partially for PySpark
+    enable_photon = (params.get("enable_photon", True)
+                     and engine_type != MATERIALIZED_VIEW)
+    compute_dbu = PB_COMPUTE_SIZES[engine_type].get(
+        params.get("compute_size"), 2)
+
+    # Dashboard/Interactive compute cost
+    # Convert query duration from seconds to hours
+    query_hours = (params.get("avg_query_duration", 8) /
+                   3600) * params.get("avg_queries_per_day", 15) * params.get(
+                       "active_users", 20) * WORKING_DAYS_PER_MONTH
+
+    # Apply engine-specific performance factor
+    query_hours *= engine_factors["performance_factor"]
+
+    dashboard_compute = calculate_dbu_cost(
+        engine_factors["dbu_rate"],
+        1,  # Cluster size (already factored into compute_dbu)
+        query_hours / WORKING_DAYS_PER_MONTH,  # Hours per day
+        WORKING_DAYS_PER_MONTH,
+        compute_dbu)
+
+    # Report/Batch compute cost
+    report_hours = (params.get("avg_report_duration", 45) / 60) * params.get(
+        "report_runs_per_month", 8) * num_reports
+
+    # For Materialized Views, use the same DBU rate but adjust hours based on refresh frequency
+    report_compute = calculate_dbu_cost(
+        engine_factors["dbu_rate"],
+        1,  # Cluster size
+        report_hours / DAYS_PER_MONTH,  # Hours per day
+        DAYS_PER_MONTH,
+        compute_dbu  # Use the selected compute size
+    )
+
+    compute_cost = dashboard_compute + report_compute
+    photon_cost = calculate_photon_cost(compute_cost,
+                                        COSTS["Photon"]["acceleration_factor"],
+                                        enable_photon)
+
+    # Storage calculation with engine-specific multiplier
+    dashboard_storage = num_dashboards * PB_DASHBOARD_SIZE_GB * engine_factors[
+        "storage_multiplier"]
+    report_storage = num_reports * PB_REPORT_SIZE_GB * engine_factors[
+        "storage_multiplier"]
+    total_storage_gb = dashboard_storage + report_storage
+    storage_cost = calculate_storage_cost(total_storage_gb,
+                                          COSTS["S3"][storage_type],
+                                          months=1)
+    return {
+        "compute_cost": compute_cost,
+        "storage_cost": storage_cost,
+        "photon_cost": photon_cost,
+        "total_cost": compute_cost + storage_cost + photon_cost,
+        "dashboards_count": num_dashboards,
+        "reports_count": num_reports,
+        "storage_gb": total_storage_gb,
+        "photon_enabled": enable_photon,
+        "engine_type": engine_type
+    }
+
+
+# Layer -> calculator, in display order
+LAYER_CALCULATORS = {
+    "Landing": calculate_landing_cost,
+    "RAW": calculate_raw_cost,
+    "CONF": calculate_conf_cost,
+    "PB": calculate_pb_cost
+}
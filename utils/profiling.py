@@ -0,0 +1,213 @@
+"""
+Opt-in per-stage timing of a Streamlit rerun
+
+A page marks where each of its stages begins:
+
+    profiler = start_profiling("calculator", enabled)
+    profiler.stage("css")
+    ...
+    profiler.stage("summary")
+    ...
+    stages = profiler.finish()
+
+Each stage runs until the next one begins and is timed with
+time.perf_counter_ns. Its allocations are measured with tracemalloc:
+"allocated" is the change in traced memory over the stage and "peak" the
+most it rose above the stage's start. finish() writes the rerun as one
+JSON log line (logger "utils.profiling") and returns the stages for the
+page to show.
+
+Profiling is off unless COST_CALCULATOR_PROFILE is set or the page asks
+for it, e.g. with ?profile=1. When off, start_profiling returns a shared
+profiler whose methods do nothing, so a rerun pays one no-op call per
+stage. tracemalloc runs only while a profiled rerun is in progress; it is
+process-wide, so allocation figures include any session rerunning at the
+same time.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+PROFILE_ENV = "COST_CALCULATOR_PROFILE"
+
+STAGE_COLUMNS = ["Stage", "Time (ms)", "Allocated (KiB)", "Peak (KiB)"]
+
+logger = logging.getLogger(__name__)
+
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_started_tracing = False
+
+
+def profiling_enabled(requested=False):
+    """
+    Whether to profile this rerun
+
+    Args:
+        requested (bool): The page asked for it (e.g. a query parameter)
+    """
+    return requested or os.environ.get(PROFILE_ENV, "").lower() in ("1",
+                                                                    "true",
+                                                                    "yes")
+
+
+def _acquire_tracing():
+    global _tracing_users, _started_tracing
+    with _tracing_lock:
+        if not _tracing_users and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracing_users += 1
+
+
+def _release_tracing():
+    global _tracing_users, _started_tracing
+    with _tracing_lock:
+        _tracing_users -= 1
+        # Leave tracing that someone else started alone
+        if not _tracing_users and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+def _install_log_handler():
+    """Print profile records to stderr unless logging is configured"""
+    if not logger.handlers and not logging.getLogger().handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    if logger.getEffectiveLevel() > logging.INFO:
+        logger.setLevel(logging.INFO)
+
+
+class RerunProfiler:
+    """
+    Times the stages of one rerun of a page
+
+    Args:
+        page (str): Page name, recorded in the log
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.stages = []
+        self._current = None
+        self._finished = False
+        _install_log_handler()
+        _acquire_tracing()
+        self._started_ns = time.perf_counter_ns()
+
+    def _close_stage(self):
+        if self._current is None:
+            return
+        name, started_ns, started_bytes = self._current
+        elapsed_ns = time.perf_counter_ns() - started_ns
+        current, peak = tracemalloc.get_traced_memory()
+        self.stages.append({
+            "stage": name,
+            "ns": elapsed_ns,
+            "allocated": current - started_bytes,
+            "peak": max(peak - started_bytes, 0)
+        })
+        self._current = None
+
+    def stage(self, name):
+        """End the current stage, if any, and begin the named one"""
+        self._close_stage()
+        tracemalloc.reset_peak()
+        self._current = (name, time.perf_counter_ns(),
+                         tracemalloc.get_traced_memory()[0])
+
+    def finish(self):
+        """
+        End the last stage and log the rerun
+
+        Returns:
+            list: One dict per stage with stage, ns, allocated and peak
+                (bytes), in the order they ran
+        """
+        if self._finished:
+            return self.stages
+        self._close_stage()
+        self._finished = True
+        _release_tracing()
+        logger.info(json.dumps({
+            "event": "rerun_profile",
+            "page": self.page,
+            "total_ms": (time.perf_counter_ns() - self._started_ns) / 1e6,
+            "stages": [{
+                "stage": stage["stage"],
+                "ms": stage["ns"] / 1e6,
+                "allocated": stage["allocated"],
+                "peak": stage["peak"]
+            } for stage in self.stages]
+        }))
+        return self.stages
+
+    def __del__(self):
+        # A rerun stopped early (st.rerun, st.stop, an error) never calls
+        # finish(); stop tracing once its profiler is dropped
+        if not self._finished:
+            self._finished = True
+            _release_tracing()
+
+
+class _NullProfiler:
+    """Stands in for RerunProfiler when profiling is off"""
+
+    stages = ()
+
+    def stage(self, name):
+        pass
+
+    def finish(self):
+        return self.stages
+
+    def __bool__(self):
+        return False
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+def start_profiling(page, requested=False):
+    """
+    Return the profiler for a rerun of a page
+
+    Args:
+        page (str): Page name, recorded in the log
+        requested (bool): The page asked for profiling (see
+            profiling_enabled)
+
+    Returns:
+        RerunProfiler, or NULL_PROFILER (falsy) when profiling is off
+    """
+    if not profiling_enabled(requested):
+        return NULL_PROFILER
+    return RerunProfiler(page)
+
+
+def stage_rows(stages):
+    """
+    Turn finished stages into display rows with a total
+
+    Returns:
+        list: Dicts keyed by STAGE_COLUMNS, slowest stage first, then TOTAL
+    """
+    rows = [{
+        "Stage": stage["stage"],
+        "Time (ms)": stage["ns"] / 1e6,
+        "Allocated (KiB)": stage["allocated"] / 1024,
+        "Peak (KiB)": stage["peak"] / 1024
+    } for stage in sorted(stages, key=lambda stage: -stage["ns"])]
+    rows.append({
+        "Stage": "TOTAL",
+        "Time (ms)": sum(row["Time (ms)"] for row in rows),
+        "Allocated (KiB)": sum(row["Allocated (KiB)"] for row in rows),
+        "Peak (KiB)": max((row["Peak (KiB)"] for row in rows), default=0.0)
+    })
+    return rows
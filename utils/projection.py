@@ -0,0 +1,194 @@
+"""
+Month-by-month cost projection for the Databricks Cloud Cost Calculator
+
+The layer calculators price one steady-state month. Here the same
+configuration is projected over 1-60 months:
+
+    Landing       every table ingests files_per_day * 30 * avg_file_size GB
+                  a month, growing by the monthly growth rate. Data is kept
+                  for its retention window (Indefinite keeps everything)
+                  and can move to cheaper S3 tiers as it ages.
+    RAW/CONF/PB   compute, Photon and storage grow by the layer's monthly
+                  growth rate from their current values.
+
+Stored Landing data is computed from the cumulative ingest C: what is kept
+at the end of month m is C[m] - C[m - retention], and the part aged between
+a and b months sits in the tier for that age, C[m - a] - C[m - b]. The
+whole projection is a cumsum and a few gathers over a (tables x months)
+array, so thousands of tables over 60 months take milliseconds.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.pricing_engine import COSTS, DAYS_PER_MONTH, retention_to_months
+from utils.report_export import layer_total
+
+MAX_MONTHS = 60
+
+PROJECTION_COLUMNS = [
+    "Month", "Layer", "Storage (GB)", "Storage Cost", "Compute Cost",
+    "Photon Cost", "Total Cost", "Cumulative Cost"
+]
+
+
+def retention_window(retention):
+    """Whole months a retention policy keeps data (inf for Indefinite)"""
+    if retention == "Indefinite":
+        return np.inf
+    return float(np.ceil(retention_to_months(retention)))
+
+
+def _growth(growth_rate, months):
+    """Multiplier of month 1..months for a monthly growth rate in percent"""
+    return (1 + growth_rate / 100)**np.arange(months)
+
+
+def landing_storage(monthly_ingest_gb,
+                    retention_months,
+                    months,
+                    growth_rate=0.0,
+                    storage_tier="Standard",
+                    transitions=()):
+    """
+    Project the GB stored in each S3 tier at the end of every month
+
+    Args:
+        monthly_ingest_gb (float or array): First-month ingest per table
+        retention_months (float or array): Retention window per table in
+            whole months (inf keeps data forever)
+        months (int): Months to project
+        growth_rate (float): Monthly ingest growth in percent
+        storage_tier (str): Tier new data lands in
+        transitions (list): (age in months, tier) lifecycle steps, in
+            increasing age order; data older than the age moves to the tier
+
+    Returns:
+        dict: Tier -> stored GB per month (arrays of length months)
+    """
+    ages = [0] + [age for age, _ in transitions]
+    if any(later <= earlier for earlier, later in zip(ages, ages[1:])):
+        raise ValueError("Lifecycle transitions need increasing ages")
+
+    ingest = np.atleast_1d(np.asarray(monthly_ingest_gb, dtype=float))
+    retention = np.broadcast_to(
+        np.asarray(retention_months, dtype=float), ingest.shape)
+    monthly = ingest[:, None] * _growth(growth_rate, months)[None, :]
+    # cumulative[:, k] = GB ingested in months 1..k
+    cumulative = np.zeros((len(ingest), months + 1))
+    np.cumsum(monthly, axis=1, out=cumulative[:, 1:])
+    month = np.arange(1, months + 1)
+
+    def ingested_through(lag):
+        """Cumulative ingest at month m - lag, per table and month"""
+        lag = np.minimum(lag, months + 1)[:, None]
+        index = np.clip(month[None, :] - lag, 0, months).astype(np.intp)
+        return np.take_along_axis(cumulative, index, axis=1)
+
+    tiers = [storage_tier] + [tier for _, tier in transitions]
+    bounds = ages + [np.inf]
+    stored = {}
+    for tier, start, end in zip(tiers, bounds, bounds[1:]):
+        # Data aged [start, end) months, cut off at the retention window
+        start = np.minimum(start, retention)
+        end = np.minimum(end, retention)
+        gb = (ingested_through(start) - ingested_through(end)).sum(axis=0)
+        stored[tier] = stored.get(tier, 0) + gb
+    return stored
+
+
+def _landing_rows(all_costs, layer_inputs, landing_tables, months,
+                  growth_rate, transitions):
+    costs = all_costs.get("Landing")
+    if not costs:
+        return None
+    storage_tier = costs.get("storage_tier", "Standard")
+    inputs = layer_inputs.get("Landing")
+    if inputs is not None:
+        params = inputs["params"]
+        ingest = (params.get("files_per_day", 10) * DAYS_PER_MONTH *
+                  params.get("avg_file_size", 2.0))
+        retention = retention_window(params.get("retention", "30 days"))
+    elif landing_tables is not None and len(landing_tables):
+        tables = landing_tables.frame(priced=False)
+        ingest = (tables["files_per_day"].to_numpy() * DAYS_PER_MONTH *
+                  tables["avg_file_size"].to_numpy())
+        retention = tables["retention"].astype(object).map(
+            retention_window).to_numpy(dtype=float)
+    else:
+        return None
+    stored = landing_storage(ingest, retention, months, growth_rate,
+                             storage_tier, transitions)
+    storage_gb = sum(stored.values())
+    storage_cost = sum(gb * COSTS["S3"][tier] for tier, gb in stored.items())
+    return {
+        "Storage (GB)": storage_gb,
+        "Storage Cost": storage_cost,
+        "Compute Cost": np.zeros(months),
+        "Photon Cost": np.zeros(months)
+    }
+
+
+def _layer_rows(costs, months, growth_rate):
+    growth = _growth(growth_rate, months)
+    compute_cost = costs.get("compute_cost", 0.0)
+    photon_cost = costs.get("photon_cost", 0.0)
+    storage_cost = layer_total(costs) - compute_cost - photon_cost
+    return {
+        "Storage (GB)": costs.get("storage_gb", 0.0) * growth,
+        "Storage Cost": storage_cost * growth,
+        "Compute Cost": compute_cost * growth,
+        "Photon Cost": photon_cost * growth
+    }
+
+
+def project_costs(all_costs,
+                  layer_inputs=None,
+                  months=12,
+                  growth_rates=None,
+                  transitions=(),
+                  landing_tables=None):
+    """
+    Project every configured layer month by month
+
+    Args:
+        all_costs (dict): st.session_state.all_costs
+        layer_inputs (dict): Simple mode inputs per layer
+            (st.session_state.layer_inputs)
+        months (int): Months to project, 1 to MAX_MONTHS
+        growth_rates (dict): Layer -> monthly growth in percent
+        transitions (list): Landing lifecycle steps, see landing_storage
+        landing_tables (WorkloadRegistry): Advanced mode Landing tables
+
+    Returns:
+        DataFrame: PROJECTION_COLUMNS, one row per month and layer
+    """
+    if not 1 <= months <= MAX_MONTHS:
+        raise ValueError(f"Projection months must be 1 to {MAX_MONTHS}")
+    layer_inputs = layer_inputs or {}
+    growth_rates = growth_rates or {}
+
+    frames = []
+    for layer, costs in all_costs.items():
+        if not costs:
+            continue
+        if layer == "Landing":
+            rows = _landing_rows(all_costs, layer_inputs, landing_tables,
+                                 months, growth_rates.get(layer, 0.0),
+                                 transitions)
+            if rows is None:
+                # Nothing to project from; hold the current month flat
+                rows = _layer_rows(costs, months, 0.0)
+        else:
+            rows = _layer_rows(costs, months, growth_rates.get(layer, 0.0))
+        total = (rows["Storage Cost"] + rows["Compute Cost"] +
+                 rows["Photon Cost"])
+        frames.append(
+            pd.DataFrame({
+                "Month": np.arange(1, months + 1),
+                "Layer": layer,
+                **rows, "Total Cost": total,
+                "Cumulative Cost": np.cumsum(total)
+            }))
+    if not frames:
+        return pd.DataFrame(columns=PROJECTION_COLUMNS)
+    return pd.concat(frames, ignore_index=True)[PROJECTION_COLUMNS]
@@ -0,0 +1,365 @@
+"""
+Rate catalog for the Databricks Cloud Cost Calculator
+
+Holds every unit price the calculator uses, indexed by service, SKU and
+region. The catalog is built once per process (get_rate_catalog) and is
+shared read-only by every Streamlit session, so rate lookups, selectbox
+option lists and default option positions are not rebuilt on each rerun.
+
+When a local price index (see utils.price_index) exists at
+COST_CALCULATOR_PRICE_INDEX or data/price_index, it replaces the built-in
+rates below. refresh_rate_catalog() picks up a rebuilt (or removed) index
+without a restart: a new rate source is loaded in full and swapped into the
+shared catalog with one assignment, so a session sees either the old rates
+or the new ones, never a mix. The version, a hash of every rate, changes so
+caches keyed on it are invalidated.
+"""
+import hashlib
+import os
+import threading
+from collections.abc import Mapping
+from functools import lru_cache
+from types import MappingProxyType
+
+DEFAULT_REGION = "us-east-1"
+PRICE_INDEX_ENV = "COST_CALCULATOR_PRICE_INDEX"
+DEFAULT_PRICE_INDEX = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                                   "data", "price_index")
+
+# Cost constants (AWS only)
+DEFAULT_RATES = {
+    "S3": {
+        "Standard": 0.023,
+        "Intelligent-Tiering": 0.022,
+        "Standard-IA": 0.0125,
+        "OneZone-IA": 0.01,
+        "Glacier": 0.004,
+        "GlacierDeep": 0.00099
+    },
+    "EC2": {
+        "i3.xlarge": 0.312,
+        "i3.2xlarge": 0.624,
+        "i3.4xlarge": 1.248,
+        "i3.8xlarge": 2.496,
+        "i3.16xlarge": 4.992,
+        "r5.xlarge": 0.252,
+        "r5.2xlarge": 0.504,
+        "r5.4xlarge": 1.008,
+        "r5.8xlarge": 2.016,
+        "r5.12xlarge": 3.024
+    },
+    "DBU": {
+        "Enterprise": 0.75,
+        "DLT_Advanced": 0.36,
+        "DLT_Core": 0.20,
+        "DLT_Pro": 0.25,
+        "Jobs": 0.15
+    },
+    "Photon": {
+        "acceleration_factor": 0.2,  # 20% of base compute cost
+        # Runtime divisor the optimizer assumes for Photon (a third less
+        # time); an estimate, not a published rate, so it is never ingested
+        "runtime_speedup": 1.5
+    },
+    # S3 lifecycle transition requests, USD per 1,000 objects moved into a tier
+    "S3Transition": {
+        "Intelligent-Tiering": 0.01,
+        "Standard-IA": 0.01,
+        "OneZone-IA": 0.01,
+        "Glacier": 0.03,
+        "GlacierDeep": 0.05
+    },
+    # Minimum billable storage duration per tier, in days
+    "S3MinimumDays": {
+        "Standard": 0,
+        "Intelligent-Tiering": 0,
+        "Standard-IA": 30,
+        "OneZone-IA": 30,
+        "Glacier": 90,
+        "GlacierDeep": 180
+    }
+}
+
+
+EMPTY_RATES = MappingProxyType({})
+
+
+class RateSource:
+    """
+    Where a RateCatalog reads its rates from
+
+    Subclasses provide table(service, region), a read-only {sku: rate}
+    mapping in option order, plus default_region, services, regions and
+    version. Option lists and positions are derived from the tables on
+    first use and kept.
+    """
+
+    source = None
+
+    def __init__(self):
+        self._options = {}
+        self._positions = {}
+        self._costs = None
+
+    def table(self, service, region):
+        raise NotImplementedError
+
+    def costs(self):
+        """Return {service: table} in the default region, built once"""
+        if self._costs is None:
+            self._costs = {
+                service: self.table(service, self.default_region)
+                for service in self.services
+            }
+        return self._costs
+
+    def get(self, service, sku, region):
+        """Return the rate of a SKU, or None if it is unknown"""
+        return self.table(service, region).get(sku)
+
+    def options(self, service, region):
+        key = (service, region)
+        options = self._options.get(key)
+        if options is None:
+            options = self._options[key] = tuple(self.table(service, region))
+        return options
+
+    def positions(self, service, region):
+        key = (service, region)
+        positions = self._positions.get(key)
+        if positions is None:
+            positions = self._positions[key] = {
+                sku: position
+                for position, sku in enumerate(self.options(service, region))
+            }
+        return positions
+
+
+class RateTables(RateSource):
+    """
+    Rates held in dicts, built from (service, sku, region, rate) tuples
+
+    Args:
+        entries (iterable): (service, sku, region, rate) tuples, in the
+            order options should be listed
+        default_region (str): Region used when a lookup names none
+    """
+
+    def __init__(self, entries, default_region=DEFAULT_REGION):
+        super().__init__()
+        rates = {}
+        tables = {}
+        digest = hashlib.sha256()
+        for service, sku, region, rate in entries:
+            rates[(service, sku, region)] = float(rate)
+            tables.setdefault((service, region), {})[sku] = float(rate)
+            digest.update(f"{service}\0{sku}\0{region}\0{float(rate)!r}\n"
+                          .encode())
+
+        self.default_region = default_region
+        self.services = tuple(dict.fromkeys(service for service, _ in tables))
+        self.regions = tuple(dict.fromkeys(region for _, region in tables))
+        self.version = digest.hexdigest()[:12]
+        self._rates = rates
+        self._tables = {
+            key: MappingProxyType(table)
+            for key, table in tables.items()
+        }
+
+    def table(self, service, region):
+        return self._tables.get((service, region), EMPTY_RATES)
+
+    def get(self, service, sku, region):
+        return self._rates.get((service, sku, region))
+
+    def __len__(self):
+        return len(self._rates)
+
+
+class CatalogCosts(Mapping):
+    """
+    Read-only {service: {sku: rate}} view of a catalog's default region
+
+    Handed out once (e.g. pricing_engine.COSTS), so every lookup goes
+    through the catalog's current rate source and follows replace().
+    """
+
+    def __init__(self, catalog):
+        self._catalog = catalog
+
+    def __getitem__(self, service):
+        return self._catalog._rates.costs()[service]
+
+    def __iter__(self):
+        return iter(self._catalog._rates.costs())
+
+    def __len__(self):
+        return len(self._catalog._rates.costs())
+
+
+class RateCatalog:
+    """
+    Read-only unit prices with O(1) lookups by service, SKU and region
+
+    All state lives in one RateSource, which is never changed once built;
+    replace() swaps in another source with a single assignment.
+
+    Args:
+        entries (iterable): (service, sku, region, rate) tuples, in the
+            order options should be listed
+        default_region (str): Region used when a lookup names none
+        rates (RateSource): Read rates from this source instead of entries
+            (e.g. a memory-mapped price index)
+    """
+
+    def __init__(self, entries=(), default_region=DEFAULT_REGION, rates=None):
+        self._lock = threading.Lock()
+        self._rates = rates if rates is not None else RateTables(
+            entries, default_region)
+        self.costs = CatalogCosts(self)
+
+    def replace(self, catalog):
+        """Take over another catalog's rates, atomically"""
+        with self._lock:
+            self._rates = catalog._rates
+
+    @property
+    def default_region(self):
+        return self._rates.default_region
+
+    @property
+    def services(self):
+        return self._rates.services
+
+    @property
+    def regions(self):
+        return self._rates.regions
+
+    @property
+    def version(self):
+        return self._rates.version
+
+    @property
+    def source(self):
+        """Price index the rates were loaded from, None for built-ins"""
+        return self._rates.source
+
+    @source.setter
+    def source(self, source):
+        self._rates.source = source
+
+    @classmethod
+    def from_mapping(cls, rates, region=DEFAULT_REGION):
+        """Build a catalog from a {service: {sku: rate}} dict for one region"""
+        return cls(((service, sku, region, rate)
+                    for service, table in rates.items()
+                    for sku, rate in table.items()),
+                   default_region=region)
+
+    def rate(self, service, sku, region=None):
+        """Return the unit price of a SKU, raising KeyError if it is unknown"""
+        rates = self._rates
+        region = region or rates.default_region
+        rate = rates.get(service, sku, region)
+        if rate is None:
+            raise KeyError((service, sku, region))
+        return rate
+
+    def get(self, service, sku, default=None, region=None):
+        """Return the unit price of a SKU, or default if it is unknown"""
+        rates = self._rates
+        rate = rates.get(service, sku, region or rates.default_region)
+        return default if rate is None else rate
+
+    def rates(self, service, region=None):
+        """Return a read-only {sku: rate} mapping for a service"""
+        rates = self._rates
+        return rates.table(service, region or rates.default_region)
+
+    def options(self, service, region=None):
+        """Return the SKUs of a service as a tuple for selectbox options"""
+        rates = self._rates
+        return rates.options(service, region or rates.default_region)
+
+    def index(self, service, sku, default=0, region=None):
+        """Return the position of a SKU in options(), for selectbox index="""
+        rates = self._rates
+        return rates.positions(service, region or
+                               rates.default_region).get(sku, default)
+
+    def __contains__(self, key):
+        service, sku = key
+        rates = self._rates
+        return rates.get(service, sku, rates.default_region) is not None
+
+    def __len__(self):
+        return len(self._rates)
+
+
+_refresh_lock = threading.Lock()
+_refresh_callbacks = []
+
+
+def _price_index_source():
+    """Identify the price index in use; changes whenever it is rebuilt"""
+    from utils.price_index import current_index
+
+    # The live generation directory, named by the index's pointer file
+    return current_index(
+        os.environ.get(PRICE_INDEX_ENV) or DEFAULT_PRICE_INDEX)
+
+
+def _load_catalog(source):
+    if source is None:
+        catalog = RateCatalog.from_mapping(DEFAULT_RATES)
+    else:
+        from utils.price_index import IndexedRates
+
+        catalog = RateCatalog(rates=IndexedRates(source))
+    catalog.source = source
+    return catalog
+
+
+@lru_cache(maxsize=None)
+def get_rate_catalog():
+    """Return the process-wide rate catalog, building it on first use"""
+    return _load_catalog(_price_index_source())
+
+
+def on_catalog_refresh(callback):
+    """
+    Call callback(catalog) whenever refresh_rate_catalog() reloads rates
+
+    The callback gets the newly loaded catalog before it is swapped in and
+    returns a function that publishes what it derived. The publish functions
+    run right after the swap, under the same lock, so derived values and
+    the rates change together.
+    """
+    _refresh_callbacks.append(callback)
+
+
+def refresh_rate_catalog():
+    """
+    Swap new rates into the shared catalog if its price index changed
+
+    Cheap enough to call on every Streamlit rerun: it only reads the index's
+    small pointer file.
+    Modules holding catalog.costs see new rates directly; values derived
+    from rates at import are rebuilt by on_catalog_refresh callbacks.
+
+    Returns:
+        str: The catalog version, for keying caches of rate-derived data
+    """
+    catalog = get_rate_catalog()
+    source = _price_index_source()
+    if source != catalog.source:
+        with _refresh_lock:
+            if source != catalog.source:
+                loaded = _load_catalog(source)
+                # Derive everything first, so nothing slow runs between
+                # the swap and the publishing of derived values
+                publish = [callback(loaded) for callback in _refresh_callbacks]
+                catalog.replace(loaded)
+                for apply in publish:
+                    apply()
+    return catalog.version
@@ -0,0 +1,202 @@
+"""
+Cost report export for the Databricks Cloud Cost Calculator
+
+Builds the report sheets (one Metric/Value sheet per configured layer, a
+Summary sheet and per-workload detail sheets) and writes them straight to
+a temporary file:
+
+    Excel    xlsxwriter in constant_memory mode, rows flushed as written
+    CSV      a zip with one CSV per sheet
+    Parquet  a zip with one Parquet file per sheet
+
+Rows are written in chunks, so exporting a large inventory never holds a
+second in-memory copy of the workbook.
+"""
+import os
+import tempfile
+import zipfile
+
+import pandas as pd
+
+from utils.metrics import EXPORT_SECONDS
+
+EXCEL_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Detail sheet name -> session state registry holding the workloads
+DETAIL_SHEETS = {
+    "Landing Tables": "landing_tables",
+    "RAW Jobs": "raw_jobs",
+    "CONF Transforms": "conf_transforms",
+    "PB Dashboards": "pb_dashboards",
+    "PB Reports": "pb_reports"
+}
+
+ROWS_PER_CHUNK = 10_000
+
+
+def layer_total(costs):
+    """Return a layer's monthly total (Landing only has storage)"""
+    return costs.get('total_cost', costs.get('storage_cost_per_month', 0))
+
+
+def layer_sheet(layer_name, costs):
+    """
+    Build the Metric/Value sheet of one layer
+
+    Args:
+        layer_name (str): Landing, RAW, CONF or PB
+        costs (dict): The layer's entry of st.session_state.all_costs
+
+    Returns:
+        DataFrame: Metric and Value columns
+    """
+    if layer_name == "Landing":
+        return pd.DataFrame({
+            'Metric': [
+                'Storage Cost', 'Storage Size', 'Storage Tier',
+                'Retention Policy'
+            ],
+            'Value': [
+                f"${costs.get('storage_cost_per_month', 0):.2f}/physical month",
+                f"{costs.get('storage_gb', 0):.1f} GB",
+                costs.get('storage_tier', 'Standard'),
+                costs.get('retention_policy', '30 days')
+            ]
+        })
+
+    metrics = ['Total Cost', 'Compute Cost', 'Storage Cost']
+    values = [
+        f"${costs.get('total_cost', 0):.2f}/physical month",
+        f"${costs.get('compute_cost', 0):.2f}/physical month",
+        f"${costs.get('storage_cost', 0):.2f}/physical month"
+    ]
+
+    if "photon_cost" in costs and costs["photon_cost"] > 0:
+        metrics.append('Photon Acceleration')
+        values.append(f"${costs['photon_cost']:.2f}/physical month")
+
+    metrics.append('Storage Size')
+    values.append(f"{costs.get('storage_gb', 0):.1f} GB")
+
+    # Add specific metrics based on layer
+    if layer_name == "RAW" and "jobs_count" in costs:
+        metrics.append('Jobs Count')
+        values.append(str(costs['jobs_count']))
+    elif layer_name == "CONF" and "transforms_count" in costs:
+        metrics.append('Transformations Count')
+        values.append(str(costs['transforms_count']))
+    elif layer_name == "PB":
+        if "dashboards_count" in costs:
+            metrics.append('Dashboards Count')
+            values.append(str(costs['dashboards_count']))
+        if "reports_count" in costs:
+            metrics.append('Reports Count')
+            values.append(str(costs['reports_count']))
+
+    return pd.DataFrame({'Metric': metrics, 'Value': values})
+
+
+def report_sheets(all_costs, layers, total_monthly_cost, registries=None):
+    """
+    Build every sheet of the cost report, in workbook order
+
+    Args:
+        all_costs (dict): st.session_state.all_costs
+        layers (list): Layers with costs, in display order
+        total_monthly_cost (float): Sum of the layer totals
+        registries (dict): Optional session state; WorkloadRegistry entries
+            named in DETAIL_SHEETS become per-workload detail sheets
+
+    Returns:
+        dict: Sheet name -> DataFrame
+    """
+    sheets = {layer: layer_sheet(layer, all_costs[layer]) for layer in layers}
+    sheets['Summary'] = pd.DataFrame({
+        'Layer': layers + ['TOTAL'],
+        'Monthly Cost':
+        [layer_total(all_costs[layer])
+         for layer in layers] + [total_monthly_cost]
+    })
+    for sheet_name, key in DETAIL_SHEETS.items():
+        registry = (registries or {}).get(key)
+        if registry:
+            sheets[sheet_name] = registry.frame()
+    return sheets
+
+
+def _chunks(frame):
+    """Yield the rows of a frame as tuples of plain Python values"""
+    for start in range(0, len(frame), ROWS_PER_CHUNK):
+        chunk = frame.iloc[start:start + ROWS_PER_CHUNK].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        yield from chunk.itertuples(index=False, name=None)
+
+
+def write_excel(sheets, path):
+    """Write sheets to an .xlsx file, flushing each row as it is written"""
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {
+        "constant_memory": True,
+        "nan_inf_to_errors": True
+    })
+    try:
+        for sheet_name, frame in sheets.items():
+            worksheet = workbook.add_worksheet(sheet_name)
+            worksheet.write_row(0, 0, [str(column) for column in frame.columns])
+            for row, values in enumerate(_chunks(frame), start=1):
+                worksheet.write_row(row, 0, values)
+    finally:
+        workbook.close()
+
+
+def write_csv_zip(sheets, path):
+    """Write sheets to a zip of CSV files, one per sheet"""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for sheet_name, frame in sheets.items():
+            with archive.open(f"{sheet_name}.csv", "w") as member:
+                for start in range(0, max(len(frame), 1), ROWS_PER_CHUNK):
+                    member.write(frame.iloc[start:start + ROWS_PER_CHUNK].to_csv(
+                        index=False, header=start == 0).encode())
+
+
+def write_parquet_zip(sheets, path):
+    """Write sheets to a zip of Parquet files, one per sheet"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    with zipfile.ZipFile(path, "w") as archive:
+        for sheet_name, frame in sheets.items():
+            with archive.open(f"{sheet_name}.parquet", "w") as member:
+                pq.write_table(pa.Table.from_pandas(frame,
+                                                    preserve_index=False),
+                               member)
+
+
+# Export format -> (file extension, MIME type, writer)
+EXPORT_FORMATS = {
+    "Excel": (".xlsx", EXCEL_MIME, write_excel),
+    "CSV": (".zip", "application/zip", write_csv_zip),
+    "Parquet": (".zip", "application/zip", write_parquet_zip)
+}
+
+
+def export_report(sheets, export_format="Excel"):
+    """
+    Write the report to a temporary file
+
+    The caller owns the returned file and should delete it once read.
+
+    Returns:
+        tuple: (path, file extension, MIME type)
+    """
+    extension, mime, writer = EXPORT_FORMATS[export_format]
+    handle, path = tempfile.mkstemp(prefix="cost_estimate_", suffix=extension)
+    os.close(handle)
+    try:
+        with EXPORT_SECONDS.labels(format=export_format).time():
+            writer(sheets, path)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, extension, mime
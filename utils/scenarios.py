@@ -0,0 +1,142 @@
+"""
+Named scenarios and scenario grids for the Databricks Cloud Cost Calculator
+
+A scenario is a snapshot of the calculator: the per-layer costs
+(st.session_state.all_costs) and the Simple mode inputs that produced
+them (st.session_state.layer_inputs). Saved scenarios are compared side
+by side in one table.
+
+A scenario grid takes the current configuration and prices every
+combination of the chosen options (instance type x storage tier x DBU
+tier x Photon). Each layer only depends on some of the axes, so it is
+priced once per combination of *its* axes and the results are broadcast
+over the full grid with NumPy; a grid of thousands of scenarios costs a
+few hundred layer calculations.
+"""
+import copy
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from utils.pricing_engine import LAYER_CALCULATORS
+from utils.report_export import layer_total
+
+# Grid axis -> (label, layers whose Simple mode inputs it changes).
+# storage_type is passed to the calculators next to the inputs.
+GRID_AXES = {
+    "instance_type": ("Instance Type", ("RAW", )),
+    "storage_type": ("Storage Tier", ("Landing", "RAW", "CONF", "PB")),
+    "service_tier": ("Service Tier", ("CONF", )),
+    "enable_photon": ("Photon", ("RAW", "CONF", "PB"))
+}
+
+MAX_GRID_SIZE = 100_000
+
+
+def snapshot(all_costs, layer_inputs):
+    """Return a copy of the current configuration to store as a scenario"""
+    return {
+        "all_costs": copy.deepcopy(all_costs),
+        "layer_inputs": copy.deepcopy(layer_inputs)
+    }
+
+
+def layer_totals(all_costs):
+    """Return layer -> monthly total of the layers that have costs"""
+    return {
+        layer: float(layer_total(costs))
+        for layer, costs in all_costs.items() if costs
+    }
+
+
+def compare_scenarios(scenarios):
+    """
+    Build the side-by-side comparison of saved scenarios
+
+    Args:
+        scenarios (dict): Scenario name -> snapshot()
+
+    Returns:
+        DataFrame: Scenario, one column per layer and Total, $/month
+    """
+    rows = []
+    for name, scenario in scenarios.items():
+        totals = layer_totals(scenario["all_costs"])
+        rows.append({
+            "Scenario": name,
+            **{layer: totals.get(layer, 0.0)
+               for layer in LAYER_CALCULATORS},
+            "Total": sum(totals.values())
+        })
+    return pd.DataFrame(rows,
+                        columns=["Scenario", *LAYER_CALCULATORS, "Total"])
+
+
+def _layer_grid(layer, inputs, axes, options):
+    """Price one layer over the grid axes it depends on"""
+    layer_axes = [
+        position for position, axis in enumerate(axes)
+        if layer in GRID_AXES[axis][1]
+    ]
+    totals = np.empty([len(options[axes[position]]) for position in layer_axes])
+    for index in np.ndindex(totals.shape):
+        params = dict(inputs["params"])
+        storage_type = inputs["storage_type"]
+        for position, choice in zip(layer_axes, index):
+            value = options[axes[position]][choice]
+            if axes[position] == "storage_type":
+                storage_type = value
+            else:
+                params[axes[position]] = value
+        totals[index] = layer_total(LAYER_CALCULATORS[layer](params,
+                                                             storage_type))
+    # Re-insert the axes this layer ignores as length-1 dimensions
+    shape = [
+        totals.shape[layer_axes.index(position)]
+        if position in layer_axes else 1 for position in range(len(axes))
+    ]
+    return totals.reshape(shape)
+
+
+def price_grid(all_costs, layer_inputs, options):
+    """
+    Price every combination of the chosen options
+
+    Args:
+        all_costs (dict): st.session_state.all_costs
+        layer_inputs (dict): Layer -> {"params": ..., "storage_type": ...}
+            of the layers priced in Simple mode
+        options (dict): GRID_AXES key -> values to try; axes left out or
+            empty keep the current configuration
+
+    Returns:
+        DataFrame: One row per scenario with a column per axis, per layer
+            and Total ($/month), cheapest first
+    """
+    axes = [axis for axis in GRID_AXES if options.get(axis)]
+    shape = tuple(len(options[axis]) for axis in axes)
+    size = int(np.prod(shape))
+    if size > MAX_GRID_SIZE:
+        raise ValueError(f"{size:,} scenarios requested; the limit is "
+                         f"{MAX_GRID_SIZE:,}")
+
+    totals = {}
+    for layer, costs in all_costs.items():
+        if not costs:
+            continue
+        inputs = layer_inputs.get(layer)
+        if inputs is None:
+            # Advanced mode layers are not varied by the grid
+            totals[layer] = np.full(shape, float(layer_total(costs)))
+        else:
+            totals[layer] = np.broadcast_to(
+                _layer_grid(layer, inputs, axes, options), shape)
+
+    combos = list(itertools.product(*(options[axis] for axis in axes)))
+    frame = pd.DataFrame(combos,
+                         columns=[GRID_AXES[axis][0] for axis in axes])
+    for layer, values in totals.items():
+        frame[layer] = values.reshape(-1)
+    frame["Total"] = frame[list(totals)].sum(axis=1) if totals else 0.0
+    return frame.sort_values("Total", kind="stable").reset_index(drop=True)
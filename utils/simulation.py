@@ -0,0 +1,176 @@
+"""
+Monte Carlo cost simulation for the Databricks Cloud Cost Calculator
+
+Simple mode inputs are point estimates. Here any numeric input can be given
+a distribution instead; every input is drawn once per trial as a NumPy
+array and the whole array goes through the layer calculators in
+pricing_engine, which broadcast like the formulas they are built on. A
+100,000-trial run is a handful of vectorized array operations per layer.
+
+Distribution specs are plain dicts:
+
+    {"dist": "triangular", "low": 20, "mode": 45, "high": 90}
+    {"dist": "lognormal", "median": 45, "p90": 80}
+    {"dist": "empirical", "values": [38, 41, 45, 52, 75]}
+"""
+import numpy as np
+import pandas as pd
+
+from utils.pricing_engine import LAYER_CALCULATORS
+from utils.report_export import layer_total
+
+DISTRIBUTIONS = {
+    "triangular": "Triangular",
+    "lognormal": "Lognormal",
+    "empirical": "Empirical (history)"
+}
+
+DEFAULT_DRAWS = 100_000
+PERCENTILES = (50, 90, 99)
+
+# z-score of the 90th percentile of a standard normal
+_Z90 = 1.2815515655446004
+
+# Simple mode inputs that can be simulated, per layer (param -> label)
+SIMULATED_INPUTS = {
+    "Landing": {
+        "avg_file_size": "Average File Size (GB)",
+        "files_per_day": "Files Received Per Day",
+        "file_growth": "Monthly Growth Rate (%)"
+    },
+    "RAW": {
+        "num_jobs": "Number of Jobs",
+        "num_tables": "Number of Tables",
+        "avg_runs_per_month": "Average Runs per Month",
+        "avg_job_duration": "Average Job Duration (minutes)"
+    },
+    "CONF": {
+        "num_transforms": "Number of Transformations",
+        "dbu_per_hour": "DBUs per Hour",
+        "avg_transform_duration": "Average Transformation Duration (minutes)",
+        "avg_runs_per_month": "Average Runs per Month"
+    },
+    "PB": {
+        "num_dashboards": "Number of Dashboards",
+        "num_reports": "Number of Reports",
+        "active_users": "Active Users",
+        "avg_queries_per_day": "Average Queries per User per Day",
+        "avg_query_duration": "Average Query Duration (seconds)",
+        "report_runs_per_month": "Report Runs per Month",
+        "avg_report_duration": "Average Report Duration (minutes)"
+    }
+}
+
+
+def sample(spec, draws, rng):
+    """
+    Draw samples of one input
+
+    Args:
+        spec (dict): Distribution spec (see module docstring)
+        draws (int): Number of samples
+        rng (numpy.random.Generator): Random source
+
+    Returns:
+        ndarray: float64 samples
+    """
+    dist = spec["dist"]
+    if dist == "triangular":
+        low, mode, high = (float(spec[key]) for key in ("low", "mode", "high"))
+        if not low <= mode <= high:
+            raise ValueError("Triangular inputs need low <= mode <= high")
+        if low == high:
+            return np.full(draws, mode)
+        return rng.triangular(low, mode, high, draws)
+    if dist == "lognormal":
+        median, p90 = float(spec["median"]), float(spec["p90"])
+        if median <= 0 or p90 < median:
+            raise ValueError("Lognormal inputs need 0 < median <= p90")
+        sigma = np.log(p90 / median) / _Z90
+        return rng.lognormal(np.log(median), sigma, draws)
+    if dist == "empirical":
+        values = np.asarray(spec["values"], dtype=float)
+        if not values.size:
+            raise ValueError("Empirical inputs need at least one value")
+        # Bootstrap: resample the observed history with replacement
+        return rng.choice(values, draws)
+    raise ValueError(f"Unknown distribution: {dist}")
+
+
+def simulate_layer(layer, params, storage_type, distributions, draws, rng):
+    """
+    Simulate the monthly total of one Simple mode layer
+
+    Args:
+        layer (str): Landing, RAW, CONF or PB
+        params (dict): The layer's Simple mode inputs
+        storage_type (str): S3 storage tier type
+        distributions (dict): param -> distribution spec; other inputs
+            keep their point estimate
+        draws (int): Number of trials
+        rng (numpy.random.Generator): Random source
+
+    Returns:
+        ndarray: Monthly total per trial
+    """
+    params = dict(params)
+    for param, spec in distributions.items():
+        params[param] = sample(spec, draws, rng)
+    total = layer_total(LAYER_CALCULATORS[layer](params, storage_type))
+    return np.broadcast_to(np.asarray(total, dtype=float), (draws, ))
+
+
+def simulate_costs(all_costs,
+                   layer_inputs,
+                   distributions,
+                   draws=DEFAULT_DRAWS,
+                   seed=None):
+    """
+    Simulate the monthly cost of every layer and of the whole deployment
+
+    Layers without Simple mode inputs (Advanced mode) keep their current
+    total from all_costs in every trial.
+
+    Args:
+        all_costs (dict): st.session_state.all_costs
+        layer_inputs (dict): Layer -> {"params": ..., "storage_type": ...}
+            of the layers priced in Simple mode
+        distributions (dict): Layer -> {param: distribution spec}
+        draws (int): Number of trials
+        seed (int): Seed for reproducible runs
+
+    Returns:
+        dict: Layer -> monthly total per trial, plus "TOTAL"
+    """
+    rng = np.random.default_rng(seed)
+    samples = {}
+    for layer, costs in all_costs.items():
+        if not costs:
+            continue
+        inputs = layer_inputs.get(layer)
+        if inputs is None:
+            samples[layer] = np.full(draws, float(layer_total(costs)))
+        else:
+            samples[layer] = simulate_layer(layer, inputs["params"],
+                                            inputs["storage_type"],
+                                            distributions.get(layer, {}),
+                                            draws, rng)
+    samples["TOTAL"] = (np.sum(list(samples.values()), axis=0)
+                        if samples else np.zeros(draws))
+    return samples
+
+
+def percentile_bands(samples, percentiles=PERCENTILES):
+    """
+    Summarize simulated totals as mean and percentile bands
+
+    Returns:
+        DataFrame: Layer, Mean and one P<n> column per percentile
+    """
+    layers = list(samples)
+    matrix = np.vstack([samples[layer] for layer in layers])
+    bands = np.percentile(matrix, percentiles, axis=1)
+    frame = pd.DataFrame({"Layer": layers, "Mean": matrix.mean(axis=1)})
+    for percentile, values in zip(percentiles, bands):
+        frame[f"P{percentile}"] = values
+    return frame
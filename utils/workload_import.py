@@ -0,0 +1,280 @@
+"""
+Bulk import of Advanced mode workloads from an uploaded file
+
+An upload is a CSV, Excel (.xlsx) or Parquet file with one row per workload
+of a single layer and the same columns as the layer's form (see
+inventory.KIND_FIELDS); empty cells take the form's default. Every row is
+checked in one vectorized pass, one boolean mask per rule over the whole
+file:
+
+    name            present, unique in the file and not already added
+    choice fields   an instance type in COSTS["EC2"], a known service tier,
+                    retention policy, engine type or compute size
+    numbers         numeric, whole where the form takes whole numbers and
+                    within the form's range (FIELD_RANGES)
+    photon_enabled  a true or false flag (true/false, yes/no, 1/0, ...)
+
+The rows that pass are priced and added to the registry with one extend()
+call; the others come back as a per-row error report. The bulk estimator
+applies the same field rules (check_workloads) to inventory files.
+"""
+import os
+
+import pandas as pd
+
+from utils.inventory import (KIND_FIELDS, TEXT_FIELDS, normalize_workloads,
+                             unknown_flags)
+from utils.pricing_engine import (COSTS, ENGINE_TYPES, PB_DASHBOARD_SIZES,
+                                  RETENTION_OPTIONS, SERVICE_TIERS)
+from utils.workload_store import FIELD_DTYPES
+
+UPLOAD_FORMATS = {
+    ".csv": "csv",
+    ".xlsx": "xlsx",
+    ".parquet": "parquet",
+    ".pq": "parquet"
+}
+
+# (minimum, maximum) per numeric field, as the calculator forms allow.
+# Durations are capped at a day (minutes) or an hour (query seconds). Whole
+# number fields are stored as int32 and capped well below its maximum: runs
+# at one a minute, queries at one a second.
+FIELD_RANGES = {
+    "avg_file_size": (0.1, None),
+    "files_per_day": (1, 1_000_000),
+    "avg_duration": (1, 1440),
+    "runs_per_month": (1, 31 * 24 * 60),
+    "dbu_per_hour": (1, None),
+    "storage_gb": (1, None),
+    "active_users": (1, 1_000_000),
+    "queries_per_day": (1, 24 * 60 * 60),
+    "avg_query_duration": (1, 3600),
+    "gen_duration": (1, 1440)
+}
+
+ERROR_COLUMNS = ["Row", "Name", "Errors"]
+
+
+def _choices(field):
+    """Valid values of a choice field, read from the current rate catalog"""
+    return {
+        "instance_type": COSTS["EC2"],
+        "retention": RETENTION_OPTIONS,
+        "service_tier": SERVICE_TIERS,
+        "engine_type": ENGINE_TYPES
+    }[field]
+
+
+def read_upload(data, filename):
+    """
+    Read an uploaded workload file
+
+    Args:
+        data: File-like object (e.g. a Streamlit UploadedFile) or path
+        filename (str): Original file name; its extension picks the reader
+
+    Returns:
+        DataFrame: The raw rows, text columns as strings
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in UPLOAD_FORMATS:
+        raise ValueError(f"Unsupported file type: {filename} (expected "
+                         f"{', '.join(sorted(UPLOAD_FORMATS))})")
+    upload_format = UPLOAD_FORMATS[extension]
+    text_columns = {column: "string" for column in TEXT_FIELDS}
+    if upload_format == "parquet":
+        return pd.read_parquet(data)
+    if upload_format == "xlsx":
+        # pandas imports openpyxl itself, only when an .xlsx is read
+        return pd.read_excel(data, dtype=text_columns, engine="openpyxl")
+    return pd.read_csv(data, dtype=text_columns)
+
+
+def _name_messages(frame, existing):
+    """
+    Build one Series of messages per failed name rule, indexed by row
+
+    Args:
+        frame (DataFrame): Rows after normalize_workloads
+        existing: Names already in the registry (anything isin accepts)
+    """
+    messages = []
+    names = frame["name"]
+    missing = names.isna() | (names == "")
+    messages.append(pd.Series("missing name", index=frame.index)[missing])
+    repeated = names.duplicated(keep=False) & ~missing
+    messages.append(
+        pd.Series("name repeated in file", index=frame.index)[repeated])
+    taken = names.isin(existing) & ~missing
+    messages.append(
+        pd.Series("name already added", index=frame.index)[taken])
+    return messages
+
+
+def _value_messages(raw, frame, kind):
+    """
+    Build one Series of messages per failed field rule, indexed by row
+
+    Args:
+        raw (DataFrame): The rows as read
+        frame (DataFrame): The same rows after normalize_workloads
+        kind (str): Workload kind
+    """
+    messages = []
+    for field in KIND_FIELDS[kind]:
+        if field == "compute_size":
+            valid = pd.Series(False, index=frame.index)
+            for engine, sizes in PB_DASHBOARD_SIZES.items():
+                valid |= ((frame["engine_type"] == engine) &
+                          frame[field].isin(list(sizes))).fillna(False)
+        elif field in TEXT_FIELDS:
+            valid = frame[field].isin(list(_choices(field)))
+        else:
+            continue
+        bad = ~valid
+        messages.append(("unknown " + field.replace("_", " ") + " '" +
+                         frame[field][bad].fillna("") + "'"))
+
+    if "photon_enabled" in KIND_FIELDS[kind] and "photon_enabled" in raw:
+        flags = raw["photon_enabled"]
+        unknown = unknown_flags(flags)
+        messages.append("photon_enabled is not true or false: '" +
+                        flags[unknown].astype(str) + "'")
+
+    int_fields = [
+        field for field, dtype in FIELD_DTYPES[kind].items()
+        if dtype == "int32"
+    ]
+    for field, (minimum, maximum) in FIELD_RANGES.items():
+        if field not in FIELD_DTYPES[kind]:
+            continue
+        values = frame[field]
+        if field in raw:
+            # Checked on the upload, since normalize_workloads fills
+            # unreadable numbers with the default
+            text = raw[field].astype("string").str.strip()
+            not_numeric = (text.notna() & (text != "") &
+                           pd.to_numeric(raw[field], errors="coerce").isna())
+            messages.append(
+                (f"{field} is not a number: '" +
+                 raw[field][not_numeric].astype(str) + "'"))
+        out_of_range = values < minimum
+        if maximum is not None:
+            out_of_range |= values > maximum
+        bound = f"{minimum}-{maximum}" if maximum is not None else (
+            f">= {minimum}")
+        messages.append(f"{field} out of range ({bound}): " +
+                        values[out_of_range].astype(str))
+        if field in int_fields:
+            fractional = values.notna() & (values % 1 != 0)
+            messages.append(f"{field} must be a whole number: " +
+                            values[fractional].astype(str))
+    return messages
+
+
+def check_workloads(raw, kind, engine_type=None):
+    """
+    Fill defaults for rows of one workload kind and check their fields
+
+    The rules uploads and the bulk estimator share; names are not checked.
+
+    Args:
+        raw (DataFrame): Rows as read, with any index
+        kind (str): Workload kind ("table", "job", ...)
+        engine_type (str): PB engine for rows without one (dashboards and
+            reports); their compute size defaults to the form's default
+            for the engine
+
+    Returns:
+        tuple: (DataFrame from normalize_workloads, with the name stripped
+            and the compute size filled in; Series of messages, one per
+            failed rule, indexed like raw)
+    """
+    frame = normalize_workloads(raw, kind)
+    frame["name"] = frame["name"].str.strip()
+    if engine_type is not None and "engine_type" in frame:
+        if "engine_type" not in raw:
+            frame["engine_type"] = engine_type
+        else:
+            frame["engine_type"] = raw["engine_type"].fillna(engine_type)
+    if "compute_size" in frame:
+        form_default = pd.Series({
+            engine: list(sizes)[1]
+            for engine, sizes in PB_DASHBOARD_SIZES.items()
+        })
+        unset = frame["compute_size"] == ""
+        frame.loc[unset, "compute_size"] = frame["engine_type"][unset].map(
+            form_default)
+    messages = _value_messages(raw, frame, kind)
+    return frame, pd.concat(messages) if messages else pd.Series(dtype=str)
+
+
+def error_report(messages, names):
+    """
+    Join the messages of each rejected row into one report row
+
+    Args:
+        messages (Series): Messages indexed by row position (from 0)
+        names (Series): Workload name per row position
+
+    Returns:
+        DataFrame: ERROR_COLUMNS, Row counting data rows from 1
+    """
+    if messages.empty:
+        return pd.DataFrame(columns=ERROR_COLUMNS)
+    joined = messages.groupby(level=0).agg("; ".join)
+    return pd.DataFrame({
+        "Row": joined.index + 1,
+        "Name": names.reindex(joined.index).fillna(""),
+        "Errors": joined.to_numpy()
+    }).reset_index(drop=True)
+
+
+def validate_workloads(raw, kind, existing=(), engine_type=None):
+    """
+    Check uploaded rows of one workload kind
+
+    Args:
+        raw (DataFrame): Rows from read_upload
+        kind (str): Workload kind ("table", "job", ...)
+        existing: Names already in the target registry
+        engine_type (str): PB engine for rows without one (dashboards and
+            reports); their compute size defaults to the form's default
+            for the engine
+
+    Returns:
+        tuple: (DataFrame of valid rows with name and the kind's fields,
+            DataFrame of ERROR_COLUMNS with one row per rejected row; Row
+            counts data rows from 1)
+    """
+    raw = raw.reset_index(drop=True)
+    frame, messages = check_workloads(raw, kind, engine_type)
+    messages = pd.concat([*_name_messages(frame, existing), messages])
+    errors = error_report(messages, frame["name"])
+    valid = frame.drop(index=messages.index.unique())
+    fields = ["name", *FIELD_DTYPES[kind]]
+    return valid[fields].reset_index(drop=True), errors
+
+
+def import_workloads(registry, data, filename, engine_type=None):
+    """
+    Read, validate and add an uploaded file's workloads to a registry
+
+    Valid rows are priced and added in one step; rejected rows are left
+    out and reported.
+
+    Args:
+        registry (WorkloadRegistry): Layer registry to add to
+        data: Uploaded file (see read_upload)
+        filename (str): Original file name
+        engine_type (str): Default PB engine (see validate_workloads)
+
+    Returns:
+        tuple: (number of workloads added, error DataFrame)
+    """
+    raw = read_upload(data, filename)
+    existing = registry.frame(priced=False)["name"] if registry else ()
+    valid, errors = validate_workloads(raw, registry.kind, existing,
+                                       engine_type)
+    registry.extend(valid)
+    return len(valid), errors
@@ -0,0 +1,313 @@
+"""
+Name-keyed workload registries for Advanced mode
+
+One WorkloadRegistry per Advanced mode list (landing tables, RAW jobs, CONF
+transformations, PB dashboards, PB reports). Workloads live in columnar
+storage (WorkloadColumns) together with their priced costs, a NameIndex
+makes duplicate checks, lookups, edits and renames O(1), a RowIndex per
+filter field (engine type, instance type, ...) finds the rows with a value
+without scanning the layer, and the layer totals (LayerAggregate) are kept
+in step with every change.
+"""
+import numpy as np
+
+from utils.layer_aggregates import LayerAggregate
+from utils.pricing_engine import price_workload, price_workloads_frame
+from utils.workload_store import (FIELD_DTYPES, NameIndex, RowIndex,
+                                  WorkloadColumns)
+
+# Fields find()/count()/clear() can filter by, per workload kind
+INDEX_FIELDS = {
+    "table": ("retention", ),
+    "job": ("instance_type", ),
+    "transform": ("service_tier", ),
+    "dashboard": ("engine_type", "compute_size"),
+    "report": ("engine_type", )
+}
+
+# Field the layer totals are grouped by, per workload kind
+GROUP_FIELDS = {"dashboard": "engine_type", "report": "engine_type"}
+
+# Priced columns stored next to the workload fields
+PRICED_DTYPES = {
+    "compute_cost": "float64",
+    "photon_cost": "float64",
+    "priced_storage_gb": "float64",
+    "photon": "bool"
+}
+
+
+class WorkloadRegistry:
+    """
+    Workloads of one kind keyed by name, with per-value row indexes and totals
+
+    Args:
+        kind (str): Workload kind (table, job, transform, dashboard, report)
+        items (iterable): Workloads to start with
+    """
+
+    def __init__(self, kind, items=()):
+        self.kind = kind
+        self.fields = tuple(FIELD_DTYPES[kind])
+        self.index_fields = INDEX_FIELDS[kind]
+        self.group_field = GROUP_FIELDS.get(kind)
+        self.aggregate = LayerAggregate()
+        self._columns = WorkloadColumns({
+            **FIELD_DTYPES[kind],
+            **PRICED_DTYPES
+        })
+        self._names = NameIndex()  # name -> row position
+        self._indexes = {field: RowIndex() for field in self.index_fields}
+        for item in items:
+            self.add(item)
+
+    def _price(self, item):
+        row = price_workload(self.kind, item)
+        return {
+            "compute_cost": row["compute_cost"],
+            "photon_cost": row["photon_cost"],
+            "priced_storage_gb": row["storage_gb"],
+            "photon": row["photon"]
+        }
+
+    def _track(self, values, sign):
+        """Add (sign=1) or subtract (sign=-1) a stored row from the totals"""
+        update = self.aggregate.add if sign > 0 else self.aggregate.remove
+        update(
+            {
+                "compute_cost": values["compute_cost"],
+                "photon_cost": values["photon_cost"],
+                "storage_gb": values["priced_storage_gb"],
+                "photon": values["photon"]
+            }, values.get(self.group_field))
+
+    def _codes(self, row):
+        """Index field -> stored category code of a row"""
+        return {
+            field: int(self._columns.column(field)[row])
+            for field in self.index_fields
+        }
+
+    def _reindex(self):
+        for field, index in self._indexes.items():
+            index.rebuild(self._columns.column(field))
+
+    def _item(self, values):
+        return {
+            field: values[field]
+            for field in ("name", ) + self.fields
+        }
+
+    def _row(self, row):
+        return {"name": self._names.name(row), **self._columns.row(row)}
+
+    def _position(self, name):
+        row = self._names.find(name)
+        if row is None:
+            raise KeyError(name)
+        return row
+
+    def add(self, item):
+        """Price and add a workload, raising ValueError if its name is taken"""
+        if item['name'] in self._names:
+            raise ValueError(f"Workload '{item['name']}' already exists")
+        values = {**item, **self._price(item)}
+        row = self._columns.append(values)
+        self._names.append(item['name'])
+        self._track(values, 1)
+        for field, code in self._codes(row).items():
+            self._indexes[field].add(code, row)
+        return self._item(values)
+
+    def extend(self, frame):
+        """
+        Price and add a DataFrame of workloads in one vectorized pass
+
+        Loads a large inventory much faster than add() per row. Raises
+        ValueError, adding nothing, if a name is repeated or already taken.
+        """
+        if not len(frame):
+            return
+        names = frame['name'].astype(str)
+        taken = names[names.duplicated()]
+        if not len(taken) and len(self):
+            taken = names[[name in self._names for name in names]]
+        if len(taken):
+            raise ValueError(f"Workload '{taken.iloc[0]}' already exists")
+        fields = frame[list(self.fields)].reset_index(drop=True)
+        priced = price_workloads_frame(self.kind, fields)
+        first = self._columns.extend({
+            **{field: fields[field] for field in self.fields},
+            "compute_cost": priced["compute_cost"],
+            "photon_cost": priced["photon_cost"],
+            "priced_storage_gb": priced["storage_gb"],
+            "photon": priced["photon"]
+        })
+        self._names.extend(names.to_numpy())
+        self.aggregate.extend(
+            priced, fields[self.group_field] if self.group_field else None)
+        for field, index in self._indexes.items():
+            index.extend(self._columns.column(field)[first:], first)
+
+    def reprice(self):
+        """
+        Price every stored workload again in one vectorized pass
+
+        Stored costs are priced when a workload is added, so call this when
+        the rates change (see refresh_rate_catalog) to keep the totals from
+        mixing old and new rates.
+        """
+        if not len(self):
+            return
+        fields = self._columns.frame(list(self.fields))
+        # Price the category values, as extend() does, not their codes
+        fields = fields.astype({
+            field: object
+            for field, dtype in FIELD_DTYPES[self.kind].items()
+            if dtype == "category"
+        })
+        priced = price_workloads_frame(self.kind, fields)
+        for column, source in (("compute_cost", "compute_cost"),
+                               ("photon_cost", "photon_cost"),
+                               ("priced_storage_gb", "storage_gb"),
+                               ("photon", "photon")):
+            self._columns.column(column)[:] = priced[source].to_numpy()
+        self.aggregate.clear()
+        self.aggregate.extend(
+            priced, fields[self.group_field] if self.group_field else None)
+
+    def remove(self, name):
+        """Remove a workload by name and return it"""
+        row = self._position(name)
+        values = self._row(row)
+        codes = self._codes(row)
+        last = self._columns.swap_remove(row)
+        self._names.swap_remove(row)
+        self._track(values, -1)
+        for field, index in self._indexes.items():
+            index.discard(codes[field], row)
+            if last != row:
+                # The last row now lives at the removed row's position
+                moved = int(self._columns.column(field)[row])
+                index.discard(moved, last)
+                index.add(moved, row)
+        return self._item(values)
+
+    def update(self, name, item):
+        """Replace a workload in place, repricing only it; the name may change"""
+        if item['name'] != name and item['name'] in self._names:
+            raise ValueError(f"Workload '{item['name']}' already exists")
+        row = self._position(name)
+        values = {**item, **self._price(item)}
+        previous = self._row(row)
+        previous_codes = self._codes(row)
+        self._columns.set_row(row, values)
+        if item['name'] != name:
+            self._names.rename(row, item['name'])
+        self._track(previous, -1)
+        self._track(values, 1)
+        for field, code in self._codes(row).items():
+            if code != previous_codes[field]:
+                self._indexes[field].discard(previous_codes[field], row)
+                self._indexes[field].add(code, row)
+        return self._item(values)
+
+    def rename(self, name, new_name):
+        """Rename a workload, keeping its position"""
+        return self.update(name, {**self.get(name), 'name': new_name})
+
+    def clear(self, field=None, value=None):
+        """Remove every workload, or those whose field equals value"""
+        if field is None:
+            self._columns.clear()
+            self._names.clear()
+            self.aggregate.clear()
+            for index in self._indexes.values():
+                index.clear()
+            return
+        rows = self._rows(field, value)
+        if not len(rows):
+            return
+        for row in rows:
+            self._track(self._columns.row(row), -1)
+        keep = np.ones(len(self), dtype=bool)
+        keep[rows] = False
+        self._columns.compact(keep)
+        self._names.compact(keep)
+        # Compaction moves every later row, so index the kept rows afresh
+        self._reindex()
+
+    def _rows(self, field, value):
+        """Sorted positions of the rows whose indexed field equals value"""
+        code = self._columns.code(field, value)
+        if code is None:
+            return np.empty(0, dtype=np.int32)
+        return self._indexes[field].rows(code)
+
+    def get(self, name, default=None):
+        """Return the workload with this name as a dict, or default"""
+        row = self._names.find(name)
+        if row is None:
+            return default
+        return self._item(self._row(row))
+
+    def find(self, field, value):
+        """Return the workloads whose field equals value, in order"""
+        return [
+            self._item(self._row(row))
+            for row in self._rows(field, value)
+        ]
+
+    def count(self, field, value):
+        """Return how many workloads have an indexed field equal to value"""
+        code = self._columns.code(field, value)
+        return 0 if code is None else self._indexes[field].count(code)
+
+    def values(self, field):
+        """Return the distinct values of an indexed field"""
+        categories = self._columns.categories(field)
+        return [categories[code] for code in self._indexes[field].codes()]
+
+    def frame(self, field=None, value=None, priced=True):
+        """
+        Return the workloads as a DataFrame
+
+        Apart from the decoded names, the full frame shares memory with the
+        registry and is only valid until its next change; filtering by
+        field/value returns a copy.
+        Priced frames add compute_cost, photon_cost, photon (applies) and,
+        where the workload has no storage field of its own, storage_gb.
+        """
+        fields = list(self.fields)
+        if priced:
+            fields += ["compute_cost", "photon_cost", "photon"]
+            if "storage_gb" not in self.fields:
+                fields.append("priced_storage_gb")
+        frame = self._columns.frame(fields).rename(
+            columns={"priced_storage_gb": "storage_gb"})
+        if field is None:
+            frame.insert(0, "name", self._names.names())
+            return frame
+        rows = self._rows(field, value)
+        frame = frame.take(rows).reset_index(drop=True)
+        frame.insert(0, "name", self._names.names(rows))
+        return frame
+
+    def totals(self, group=None):
+        """Return the layer totals, optionally for one group"""
+        return self.aggregate.totals(group)
+
+    def nbytes(self):
+        """Approximate memory held by the stored workloads"""
+        return (self._columns.nbytes() + self._names.nbytes() +
+                sum(index.nbytes() for index in self._indexes.values()))
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self._item(self._row(row))
+
+    def __len__(self):
+        return len(self._names)
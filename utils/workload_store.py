@@ -0,0 +1,579 @@
+"""
+Columnar storage for Advanced mode workloads
+
+Workloads are kept as one numpy array per field instead of one dict per
+workload. Repeated strings (instance types, compute sizes, service tiers,
+engine types, retention policies) are stored as small integer codes into a
+per-column vocabulary, so a large imported inventory costs a few dozen bytes
+per workload rather than a dict, its keys and its boxed values. Names are
+kept UTF-8 encoded in one byte buffer behind a NameIndex hash table instead
+of as str keys of a dict. Columns are exposed to pandas as views, so displaying a layer does
+not copy them.
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Field dtypes per workload kind, in calculator form order. "category"
+# fields are stored as codes into a vocabulary of the distinct values.
+FIELD_DTYPES = {
+    "table": {
+        "avg_file_size": "float64",
+        "files_per_day": "int32",
+        "retention": "category"
+    },
+    "job": {
+        "instance_type": "category",
+        "avg_duration": "float64",
+        "runs_per_month": "int32",
+        "photon_enabled": "bool"
+    },
+    "transform": {
+        "service_tier": "category",
+        "avg_duration": "float64",
+        "runs_per_month": "int32",
+        "dbu_per_hour": "float64",
+        "storage_gb": "float64",
+        "photon_enabled": "bool"
+    },
+    "dashboard": {
+        "compute_size": "category",
+        "active_users": "int32",
+        "queries_per_day": "int32",
+        "avg_query_duration": "float64",
+        "photon_enabled": "bool",
+        "engine_type": "category"
+    },
+    "report": {
+        "runs_per_month": "int32",
+        "gen_duration": "float64",
+        "dbu_per_hour": "float64",
+        "photon_enabled": "bool",
+        "engine_type": "category"
+    }
+}
+
+_INITIAL_CAPACITY = 64
+
+
+def _code_dtype(categories):
+    """Smallest signed code dtype pandas uses for this many categories"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+class WorkloadColumns:
+    """
+    Growable array-backed columns with categorical codes
+
+    Rows are appended at the end and removed by moving the last row into
+    the gap (swap-remove), so both are O(1) amortised.
+
+    Args:
+        dtypes (dict): Field -> "category" or a numpy dtype name
+    """
+
+    def __init__(self, dtypes):
+        self.dtypes = dict(dtypes)
+        self.clear()
+
+    def clear(self):
+        """Remove every row and forget the category vocabularies"""
+        self._length = 0
+        self._categories = {
+            field: []
+            for field, dtype in self.dtypes.items() if dtype == "category"
+        }
+        self._category_codes = {field: {} for field in self._categories}
+        self._arrays = {
+            field: np.empty(_INITIAL_CAPACITY, dtype=self._array_dtype(field))
+            for field in self.dtypes
+        }
+
+    def _array_dtype(self, field):
+        if field in self._categories:
+            return _code_dtype(len(self._categories[field]))
+        return np.dtype(self.dtypes[field])
+
+    def _encode(self, field, value):
+        codes = self._category_codes[field]
+        if value not in codes:
+            codes[value] = len(codes)
+            self._categories[field].append(value)
+            dtype = _code_dtype(len(codes))
+            if self._arrays[field].dtype != dtype:
+                self._arrays[field] = self._arrays[field].astype(dtype)
+        return codes[value]
+
+    def _check(self, field, value):
+        dtype = self.dtypes[field]
+        if dtype.startswith("int"):
+            if value != int(value):
+                raise ValueError(
+                    f"{field} must be a whole number, got {value}")
+            limits = np.iinfo(dtype)
+            if not limits.min <= value <= limits.max:
+                raise ValueError(f"{field} must be between {limits.min} "
+                                 f"and {limits.max}, got {value}")
+        return value
+
+    def _grow(self, needed):
+        capacity = len(next(iter(self._arrays.values())))
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        for field, array in self._arrays.items():
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self._length] = array[:self._length]
+            self._arrays[field] = grown
+
+    def append(self, values):
+        """Append a row given as a {field: value} dict; return its position"""
+        row = self._length
+        self._grow(row + 1)
+        self.set_row(row, values)
+        self._length += 1
+        return row
+
+    def extend(self, values):
+        """
+        Append many rows given as a {field: column} dict in one pass
+
+        Every column is validated before anything is written, so a bad
+        value leaves the store untouched.
+
+        Returns:
+            int: Position of the first appended row
+        """
+        first = self._length
+        count = len(values[next(iter(self.dtypes))])
+        encoded, factorized = {}, {}
+        for field, dtype in self.dtypes.items():
+            column = values[field]
+            if field in self._categories:
+                codes, uniques = pd.factorize(column)
+                if (codes < 0).any():
+                    raise ValueError(f"{field} is missing a value")
+                factorized[field] = (codes, uniques)
+                continue
+            array = np.asarray(column)
+            if dtype.startswith("int"):
+                fractional = array != np.floor(array)
+                if fractional.any():
+                    raise ValueError(f"{field} must be a whole number, got "
+                                     f"{array[fractional][0]}")
+                # astype() would wrap values that do not fit around
+                limits = np.iinfo(dtype)
+                outside = (array < limits.min) | (array > limits.max)
+                if outside.any():
+                    raise ValueError(f"{field} must be between {limits.min} "
+                                     f"and {limits.max}, got "
+                                     f"{array[outside][0]}")
+            encoded[field] = array.astype(dtype)
+        # Encode categories only once every column is valid, since encoding
+        # extends the vocabularies
+        for field, (codes, uniques) in factorized.items():
+            mapping = np.array(
+                [self._encode(field, value) for value in uniques],
+                dtype=np.int64)
+            encoded[field] = mapping[codes] if count else codes
+        self._grow(first + count)
+        for field, array in encoded.items():
+            self._arrays[field][first:first + count] = array
+        self._length += count
+        return first
+
+    def set_row(self, row, values):
+        """Overwrite the fields of an existing (or just reserved) row"""
+        encoded = {}
+        for field in self.dtypes:
+            value = values[field]
+            if field in self._categories:
+                encoded[field] = self._encode(field, value)
+            else:
+                encoded[field] = self._check(field, value)
+        # Write only once every field is valid, so a bad value leaves the
+        # row untouched
+        for field, value in encoded.items():
+            self._arrays[field][row] = value
+
+    def swap_remove(self, row):
+        """
+        Remove a row by moving the last row into its place
+
+        Returns:
+            int: Former position of the moved row (equal to row when the
+                last row itself was removed)
+        """
+        last = self._length - 1
+        if row != last:
+            for array in self._arrays.values():
+                array[row] = array[last]
+        self._length = last
+        return last
+
+    def compact(self, keep):
+        """Keep only rows where the boolean mask is True, preserving order"""
+        kept = int(np.count_nonzero(keep))
+        for field, array in self._arrays.items():
+            array[:kept] = array[:self._length][keep]
+        self._length = kept
+
+    def row(self, row):
+        """Return one row as a {field: value} dict of plain Python values"""
+        values = {}
+        for field, array in self._arrays.items():
+            if field in self._categories:
+                values[field] = self._categories[field][array[row]]
+            else:
+                values[field] = array[row].item()
+        return values
+
+    def column(self, field):
+        """Return a view of a column (codes for category fields)"""
+        return self._arrays[field][:self._length]
+
+    def categories(self, field):
+        """Return the vocabulary of a category field, indexed by code"""
+        return list(self._categories[field])
+
+    def code(self, field, value):
+        """Return the code of a category value, or None if never stored"""
+        return self._category_codes[field].get(value)
+
+    def frame(self, fields=None):
+        """
+        Return the columns as a DataFrame that shares the arrays' memory
+
+        Category fields become pandas Categoricals over the stored codes.
+        The frame is only valid until the next change to the store.
+        """
+        columns = {}
+        for field in fields or self.dtypes:
+            array = self.column(field)
+            if field in self._categories:
+                columns[field] = pd.Categorical.from_codes(
+                    array,
+                    dtype=pd.CategoricalDtype(self._categories[field]),
+                    validate=False)
+            else:
+                columns[field] = pd.Series(array, dtype=array.dtype,
+                                           copy=False)
+        return pd.DataFrame(columns, copy=False)
+
+    def nbytes(self):
+        """Approximate memory held by the columns, vocabularies included"""
+        total = sum(array.nbytes for array in self._arrays.values())
+        for categories in self._categories.values():
+            total += sum(map(sys.getsizeof, categories))
+        return total
+
+    def __len__(self):
+        return self._length
+
+
+class RowIndex:
+    """
+    Row positions per code of one category column
+
+    Each code's rows are kept sorted in a growable int32 array, so finding
+    the rows with a value costs O(rows with that value) instead of a scan
+    of the column, and a count is O(1). Appending rows is amortised O(1);
+    moving or removing a row shifts the rows of its code only.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Forget every row"""
+        self._rows = {}  # code -> [int32 array, length]
+
+    def _reserve(self, code, needed):
+        entry = self._rows.setdefault(
+            code, [np.empty(_INITIAL_CAPACITY, dtype=np.int32), 0])
+        if needed > len(entry[0]):
+            grown = np.empty(max(needed, len(entry[0]) * 2), dtype=np.int32)
+            grown[:entry[1]] = entry[0][:entry[1]]
+            entry[0] = grown
+        return entry
+
+    def add(self, code, row):
+        """Record that a row has this code"""
+        entry = self._reserve(code, self._rows.get(code, [None, 0])[1] + 1)
+        rows, length = entry
+        position = int(np.searchsorted(rows[:length], row))
+        rows[position + 1:length + 1] = rows[position:length]
+        rows[position] = row
+        entry[1] = length + 1
+
+    def discard(self, code, row):
+        """Forget that a row has this code"""
+        entry = self._rows[code]
+        rows, length = entry
+        position = int(np.searchsorted(rows[:length], row))
+        rows[position:length - 1] = rows[position + 1:length]
+        entry[1] = length - 1
+        if not entry[1]:
+            del self._rows[code]
+
+    def extend(self, codes, first):
+        """Record the codes of rows first, first + 1, ... (all new)"""
+        order = np.argsort(codes, kind="stable")
+        values, starts = np.unique(codes[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        for code, start, end in zip(values.tolist(), starts, ends):
+            entry = self._reserve(code,
+                                  self._rows.get(code, [None, 0])[1] +
+                                  end - start)
+            entry[0][entry[1]:entry[1] + end - start] = first + order[start:end]
+            entry[1] += end - start
+
+    def rebuild(self, codes):
+        """Index a whole column of codes from scratch"""
+        self.clear()
+        self.extend(codes, 0)
+
+    def rows(self, code):
+        """Return the sorted rows with this code (a view)"""
+        entry = self._rows.get(code)
+        if entry is None:
+            return np.empty(0, dtype=np.int32)
+        return entry[0][:entry[1]]
+
+    def count(self, code):
+        entry = self._rows.get(code)
+        return 0 if entry is None else entry[1]
+
+    def codes(self):
+        """Return the codes that have rows, in the order first indexed"""
+        return list(self._rows)
+
+    def nbytes(self):
+        return sum(rows.nbytes for rows, _ in self._rows.values())
+
+
+class NameIndex:
+    """
+    Name -> row position lookups without a Python str and dict entry per name
+
+    Names are stored UTF-8 encoded back to back in one growable byte
+    buffer, with a start offset and a length per row aligned with the
+    WorkloadColumns rows, so each name costs its own length whatever the
+    longest name is. Removing or renaming a row leaves its old bytes behind;
+    the buffer is repacked once they outweigh the live names. Lookups go
+    through an open-addressing hash table of int32 row positions (linear
+    probing, backward-shift deletion). Insert, lookup and delete are O(1)
+    on average.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Forget every name"""
+        self._length = 0
+        self._data = np.empty(_INITIAL_CAPACITY * 16, dtype=np.uint8)
+        self._used = 0  # Bytes of _data written, live or not
+        self._garbage = 0  # Bytes of _data no row refers to
+        self._starts = np.empty(_INITIAL_CAPACITY, dtype=np.uint32)
+        self._lengths = np.empty(_INITIAL_CAPACITY, dtype=np.uint32)
+        self._slots = np.full(_INITIAL_CAPACITY * 2, -1, dtype=np.int32)
+
+    def _encoded(self, row):
+        start = int(self._starts[row])
+        return self._data[start:start + int(self._lengths[row])].tobytes()
+
+    def _home(self, encoded):
+        return hash(encoded) & (len(self._slots) - 1)
+
+    def _slot(self, encoded):
+        """Return the table slot holding this name, or the empty slot ending its probe"""
+        mask = len(self._slots) - 1
+        slot = self._home(encoded)
+        while True:
+            row = self._slots[slot]
+            if row < 0 or self._encoded(row) == encoded:
+                return slot
+            slot = (slot + 1) & mask
+
+    def _insert(self, row, encoded):
+        self._slots[self._slot(encoded)] = row
+
+    def _delete(self, slot):
+        mask = len(self._slots) - 1
+        self._slots[slot] = -1
+        probe = slot
+        while True:
+            probe = (probe + 1) & mask
+            row = self._slots[probe]
+            if row < 0:
+                return
+            home = self._home(self._encoded(row))
+            # Move the entry back unless its home lies cyclically in
+            # (slot, probe], where lookups would still reach it
+            if (slot < probe and not slot < home <= probe) or (
+                    slot > probe and probe < home <= slot):
+                self._slots[slot] = row
+                self._slots[probe] = -1
+                slot = probe
+
+    def _rebuild(self, table_size):
+        self._slots = np.full(table_size, -1, dtype=np.int32)
+        for row in range(self._length):
+            self._insert(row, self._encoded(row))
+
+    def _reserve_rows(self, needed):
+        if needed <= len(self._starts):
+            return
+        capacity = max(needed, len(self._starts) * 2)
+        for attribute in ("_starts", "_lengths"):
+            array = getattr(self, attribute)
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self._length] = array[:self._length]
+            setattr(self, attribute, grown)
+
+    def _write(self, data):
+        """Append encoded bytes (a uint8 array) to the buffer; return their start"""
+        start = self._used
+        needed = start + len(data)
+        if needed > len(self._data):
+            grown = np.empty(max(needed, len(self._data) * 2), dtype=np.uint8)
+            grown[:start] = self._data[:start]
+            self._data = grown
+        if needed > np.iinfo(self._starts.dtype).max:
+            self._starts = self._starts.astype(np.int64)
+        self._data[start:needed] = data
+        self._used = needed
+        return start
+
+    def _gather(self, rows):
+        """
+        Copy the names at rows back to back
+
+        Returns:
+            tuple: (uint8 array of the bytes, int64 offsets with one more
+                entry than rows)
+        """
+        lengths = self._lengths[rows].astype(np.int64)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        positions = np.repeat(
+            self._starts[rows].astype(np.int64) - offsets[:-1],
+            lengths) + np.arange(offsets[-1])
+        return self._data[positions], offsets
+
+    def _repack(self, rows=None):
+        """Rewrite the names at rows (default: all) with no gaps between them"""
+        if rows is None:
+            rows = np.arange(self._length)
+        data, offsets = self._gather(rows)
+        lengths = self._lengths[rows]
+        self._data = np.empty(max(len(data), _INITIAL_CAPACITY * 16),
+                              dtype=np.uint8)
+        self._data[:len(data)] = data
+        self._used = len(data)
+        self._garbage = 0
+        self._length = len(rows)
+        self._starts[:self._length] = offsets[:-1]
+        self._lengths[:self._length] = lengths
+
+    def _discard(self, row):
+        self._garbage += int(self._lengths[row])
+
+    def _maybe_repack(self):
+        if self._garbage > max(self._used - self._garbage,
+                               _INITIAL_CAPACITY * 16):
+            self._repack()
+
+    def find(self, name):
+        """Return the row position of a name, or None"""
+        row = self._slots[self._slot(name.encode())]
+        return None if row < 0 else int(row)
+
+    def append(self, name):
+        """Add a new name at the next row position and return that position"""
+        encoded = name.encode()
+        row = self._length
+        self._reserve_rows(row + 1)
+        self._starts[row] = self._write(np.frombuffer(encoded, dtype=np.uint8))
+        self._lengths[row] = len(encoded)
+        self._length += 1
+        if self._length * 2 > len(self._slots):
+            self._rebuild(len(self._slots) * 2)
+        else:
+            self._insert(row, encoded)
+        return row
+
+    def extend(self, names):
+        """Add many new names at the next row positions, in order"""
+        encoded = [str(name).encode() for name in names]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64,
+                              count=len(encoded))
+        first = self._length
+        needed = first + len(encoded)
+        self._reserve_rows(needed)
+        start = self._write(np.frombuffer(b"".join(encoded), dtype=np.uint8))
+        self._starts[first:needed] = start + np.cumsum(lengths) - lengths
+        self._lengths[first:needed] = lengths
+        self._length = needed
+        table_size = len(self._slots)
+        while self._length * 2 > table_size:
+            table_size *= 2
+        self._rebuild(table_size)
+
+    def rename(self, row, name):
+        """Give the name at a row position a new name"""
+        self._delete(self._slot(self._encoded(row)))
+        self._discard(row)
+        encoded = name.encode()
+        self._starts[row] = self._write(np.frombuffer(encoded, dtype=np.uint8))
+        self._lengths[row] = len(encoded)
+        self._insert(row, encoded)
+        self._maybe_repack()
+
+    def swap_remove(self, row):
+        """Remove a name, moving the last row's name into its position"""
+        self._delete(self._slot(self._encoded(row)))
+        self._discard(row)
+        last = self._length - 1
+        if row != last:
+            moved = self._encoded(last)
+            self._slots[self._slot(moved)] = row
+            self._starts[row] = self._starts[last]
+            self._lengths[row] = self._lengths[last]
+        self._length = last
+        self._maybe_repack()
+
+    def compact(self, keep):
+        """Keep only names where the boolean mask is True, preserving order"""
+        self._repack(np.flatnonzero(keep))
+        self._rebuild(len(self._slots))
+
+    def name(self, row):
+        return self._encoded(row).decode()
+
+    def names(self, rows=None):
+        """Return every name (or those at rows), decoded, in row order"""
+        import pyarrow as pa
+
+        if rows is None:
+            rows = np.arange(self._length)
+        data, offsets = self._gather(rows)
+        array = pa.LargeStringArray.from_buffers(len(rows),
+                                                 pa.py_buffer(offsets),
+                                                 pa.py_buffer(data))
+        return array.to_numpy(zero_copy_only=False)
+
+    def nbytes(self):
+        return (self._data.nbytes + self._starts.nbytes +
+                self._lengths.nbytes + self._slots.nbytes)
+
+    def __contains__(self, name):
+        return self.find(name) is not None
+
+    def __len__(self):
+        return self._length